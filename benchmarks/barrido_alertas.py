@@ -0,0 +1,86 @@
+# benchmarks/barrido_alertas.py
+"""
+Mide el barrido de alertas de flota (services/barrido_alertas_service.py) sobre
+una base SQLite temporal con N neumáticos sintéticos.
+
+    python -m benchmarks.barrido_alertas --neumaticos 500000 --bloque 50000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models  # noqa: F401  (registra todas las tablas)
+from models.modelo import ModeloNeumatico
+from models.neumatico import Neumatico
+from models.usuario import Usuario
+from schemas.common import EstadoNeumaticoEnum
+from services.barrido_alertas_service import BarridoAlertasService
+
+LOTE_INSERCION = 20000
+
+
+async def _poblar(engine, n: int) -> None:
+    rnd = random.Random(42)
+    hoy = date.today()
+    usuario_id = uuid.uuid4()
+    modelos = [uuid.uuid4() for _ in range(20)]
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(insert(Usuario.__table__), [{
+            "id": usuario_id, "username": "bench", "email": "bench@example.com", "hashed_password": "x",
+            "activo": True, "es_superusuario": True,
+            "creado_en": datetime.now(timezone.utc), "actualizado_en": datetime.now(timezone.utc),
+        }])
+        await conn.execute(insert(ModeloNeumatico.__table__), [{
+            "id": m, "fabricante_id": uuid.uuid4(), "nombre_modelo": f"Modelo {i}", "medida": "295/80R22.5",
+            "profundidad_original_mm": 18, "permite_reencauche": True, "reencauches_maximos": 2 + i % 2,
+            "activo": True, "creado_en": datetime.now(timezone.utc), "actualizado_en": datetime.now(timezone.utc),
+        } for i, m in enumerate(modelos)])
+        for inicio in range(0, n, LOTE_INSERCION):
+            neumaticos = []
+            for i in range(inicio, min(n, inicio + LOTE_INSERCION)):
+                neumaticos.append({
+                    "id": uuid.uuid4(), "numero_serie": f"BENCH-{i}", "modelo_id": rnd.choice(modelos),
+                    "fecha_compra": hoy - timedelta(days=rnd.randint(0, 365 * 7)),
+                    # Distribución aproximada de una flota real: ~15% de neumáticos con alguna alerta
+                    "kilometraje_acumulado": rnd.randint(0, 90000),
+                    "reencauches_realizados": rnd.choices((0, 1, 2, 3), weights=(80, 15, 4, 1))[0],
+                    "estado_actual": EstadoNeumaticoEnum.INSTALADO.name, "es_reencauchado": False, "vida_actual": 1,
+                    # La mitad de la flota con una inspección registrada
+                    "profundidad_actual_mm": round(rnd.uniform(3, 18), 1) if i % 2 == 0 else None,
+                    "creado_en": datetime.now(timezone.utc),
+                })
+            await conn.execute(insert(Neumatico.__table__), neumaticos)
+
+
+async def main(n: int, bloque: int) -> None:
+    ruta = os.path.join(tempfile.mkdtemp(), "bench_barrido.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{ruta}")
+    t0 = time.perf_counter()
+    await _poblar(engine, n)
+    print(f"Datos sintéticos: {n} neumáticos en {time.perf_counter() - t0:.1f}s ({ruta})")
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        informe = await BarridoAlertasService(session, tamano_bloque=bloque).ejecutar()
+    print(json.dumps(informe, indent=2, ensure_ascii=False))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--neumaticos", type=int, default=500000)
+    parser.add_argument("--bloque", type=int, default=50000)
+    args = parser.parse_args()
+    asyncio.run(main(args.neumaticos, args.bloque))
@@ -0,0 +1,184 @@
+# benchmarks/cpk_lectura.py
+"""
+Lectura de CPK (services/cpk_service.py: leer_cpk / leer_serie_cpk) sobre una base
+SQLite temporal con los agregados diarios que produce una historia de N eventos.
+
+Los endpoints solo leen cpk_grupo_diario, así que se genera directamente: los
+--eventos se reparten al azar entre los días y las combinaciones (modelo,
+proveedor, tipo de vehículo), y cada par (día, combinación) con algún evento es
+una fila. Cada consulta se mide (mediana de --repeticiones) con el esquema del
+modelo y, después, con cada variante de índices candidatos. Los índices que ya
+declara el modelo se eliminan antes, para medir también el esquema original
+(solo 'dia').
+
+    python -m benchmarks.cpk_lectura --eventos 5000000 --dias 1095
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models  # noqa: F401  (registra todas las tablas)
+from models.cpk_diario import CpkGrupoDiario
+from models.fabricante import FabricanteNeumatico
+from models.modelo import ModeloNeumatico
+from models.proveedor import Proveedor
+from models.tipo_vehiculo import TipoVehiculo
+from schemas.common import AgrupacionCpkEnum, GranularidadEnum
+from services.cpk_service import leer_cpk, leer_serie_cpk
+
+LOTE_INSERCION = 50000
+
+# Índices candidatos: nombre -> columnas
+CANDIDATOS = {
+    "ix_cpk_grupo_diario_modelo_dia": ("modelo_id", "dia"),
+    "ix_cpk_grupo_diario_proveedor_dia": ("proveedor_id", "dia"),
+    "ix_cpk_grupo_diario_tipo_vehiculo_dia": ("tipo_vehiculo_id", "dia"),
+}
+# Variantes medidas además del esquema del modelo: cada candidato solo y la combinación elegida
+VARIANTES = [[nombre] for nombre in CANDIDATOS] + [
+    ["ix_cpk_grupo_diario_modelo_dia", "ix_cpk_grupo_diario_proveedor_dia"],
+]
+
+
+async def _poblar(engine, eventos: int, dias: int, modelos: int, proveedores: int, tipos: int) -> dict:
+    rng = np.random.default_rng(42)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        fabricantes = [FabricanteNeumatico(nombre=f"Fabricante {i}", codigo_abreviado=f"F{i}", activo=True) for i in range(8)]
+        session.add_all(fabricantes)
+        await session.flush()
+        ids_modelo = [uuid.uuid4() for _ in range(modelos)]
+        session.add_all(
+            ModeloNeumatico(
+                id=m, fabricante_id=fabricantes[i % len(fabricantes)].id, nombre_modelo=f"Modelo {i}",
+                medida="295/80R22.5", profundidad_original_mm=18, permite_reencauche=True, activo=True,
+            )
+            for i, m in enumerate(ids_modelo)
+        )
+        ids_proveedor = [uuid.uuid4() for _ in range(proveedores)]
+        session.add_all(Proveedor(id=p, nombre=f"Proveedor {i}", activo=True) for i, p in enumerate(ids_proveedor))
+        ids_tipo = [uuid.uuid4() for _ in range(tipos)]
+        session.add_all(TipoVehiculo(id=t, nombre=f"Tipo {i}", activo=True) for i, t in enumerate(ids_tipo))
+        await session.commit()
+
+    # Eventos por (día, combinación): las combinaciones con más flota reciben más eventos
+    combinaciones = modelos * proveedores * tipos
+    peso = rng.pareto(1.5, combinaciones) + 0.05
+    dia_evento = rng.integers(0, dias, eventos)
+    combinacion_evento = rng.choice(combinaciones, eventos, p=peso / peso.sum())
+    conteo = np.bincount(dia_evento * combinaciones + combinacion_evento, minlength=dias * combinaciones)
+    celdas = np.flatnonzero(conteo)
+
+    inicio = date.today() - timedelta(days=dias)
+    filas = []
+    for celda in celdas.tolist():
+        dia, combinacion = divmod(celda, combinaciones)
+        m, resto = divmod(combinacion, proveedores * tipos)
+        p, t = divmod(resto, tipos)
+        n = int(conteo[celda])
+        filas.append({
+            "dia": inicio + timedelta(days=dia), "modelo_id": ids_modelo[m], "proveedor_id": ids_proveedor[p],
+            "tipo_vehiculo_id": ids_tipo[t], "costo_pen": 35 * n, "costo_usd": 9 * n, "km": 450 * n,
+        })
+    async with engine.begin() as conn:
+        for i in range(0, len(filas), LOTE_INSERCION):
+            await conn.execute(insert(CpkGrupoDiario.__table__), filas[i:i + LOTE_INSERCION])
+        await conn.execute(text("ANALYZE"))
+    return {
+        "filas": len(filas), "hoy": date.today(), "modelo": ids_modelo[0],
+        "proveedor": ids_proveedor[0], "tipo": ids_tipo[0], "fabricante": fabricantes[0].id,
+    }
+
+
+def _consultas(d: dict):
+    hoy = d["hoy"]
+    anio, trimestre = hoy - timedelta(days=365), hoy - timedelta(days=90)
+    return [
+        ("por modelo, todo el histórico", lambda s: leer_cpk(s, agrupar_por=AgrupacionCpkEnum.MODELO)),
+        ("por fabricante, 90 días", lambda s: leer_cpk(s, agrupar_por=AgrupacionCpkEnum.FABRICANTE, desde=trimestre, hasta=hoy)),
+        ("por proveedor, 365 días, un modelo", lambda s: leer_cpk(
+            s, agrupar_por=AgrupacionCpkEnum.PROVEEDOR, desde=anio, hasta=hoy, modelo_id=d["modelo"])),
+        ("por modelo, 365 días, un proveedor", lambda s: leer_cpk(
+            s, agrupar_por=AgrupacionCpkEnum.MODELO, desde=anio, hasta=hoy, proveedor_id=d["proveedor"])),
+        ("por modelo, 365 días, un tipo de vehículo", lambda s: leer_cpk(
+            s, agrupar_por=AgrupacionCpkEnum.MODELO, desde=anio, hasta=hoy, tipo_vehiculo_id=d["tipo"])),
+        ("serie mensual, todo el histórico, un modelo", lambda s: leer_serie_cpk(
+            s, granularidad=GranularidadEnum.MES, modelo_id=d["modelo"])),
+        ("serie mensual, 365 días, un fabricante", lambda s: leer_serie_cpk(
+            s, granularidad=GranularidadEnum.MES, desde=anio, hasta=hoy, fabricante_id=d["fabricante"])),
+    ]
+
+
+async def _medir(factory, consultas, repeticiones: int) -> list:
+    tiempos = []
+    async with factory() as session:
+        for _, consulta in consultas:
+            await consulta(session)  # calentamiento (caché de páginas de SQLite)
+            muestras = []
+            for _ in range(repeticiones):
+                t0 = time.perf_counter()
+                await consulta(session)
+                muestras.append((time.perf_counter() - t0) * 1000)
+            tiempos.append(statistics.median(muestras))
+    return tiempos
+
+
+async def main(eventos: int, dias: int, modelos: int, proveedores: int, tipos: int, repeticiones: int) -> None:
+    ruta = os.path.join(tempfile.mkdtemp(), "bench_cpk.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{ruta}")
+    t0 = time.perf_counter()
+    datos = await _poblar(engine, eventos, dias, modelos, proveedores, tipos)
+    print(f"Datos sintéticos: {eventos} eventos -> {datos['filas']} filas de cpk_grupo_diario "
+          f"en {time.perf_counter() - t0:.1f}s ({ruta})")
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    consultas = _consultas(datos)
+
+    async with engine.begin() as conn:
+        for nombre in CANDIDATOS:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {nombre}"))
+        await conn.execute(text("ANALYZE"))
+    resultados = {"solo dia": await _medir(factory, consultas, repeticiones)}
+    for variante in VARIANTES:
+        async with engine.begin() as conn:
+            for nombre in variante:
+                await conn.execute(text(f"CREATE INDEX {nombre} ON cpk_grupo_diario ({', '.join(CANDIDATOS[nombre])})"))
+            await conn.execute(text("ANALYZE"))
+        resultados["+ " + " + ".join(n.removeprefix("ix_cpk_grupo_diario_") for n in variante)] = (
+            await _medir(factory, consultas, repeticiones)
+        )
+        async with engine.begin() as conn:
+            for nombre in variante:
+                await conn.execute(text(f"DROP INDEX {nombre}"))
+
+    print(f"\nMediana de {repeticiones} ejecuciones, ms")
+    for i, (descripcion, _) in enumerate(consultas):
+        print(f"\n{descripcion}")
+        for variante, tiempos in resultados.items():
+            print(f"  {variante:<32} {tiempos[i]:9.1f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--eventos", type=int, default=5_000_000)
+    parser.add_argument("--dias", type=int, default=1095)
+    parser.add_argument("--modelos", type=int, default=40)
+    parser.add_argument("--proveedores", type=int, default=8)
+    parser.add_argument("--tipos", type=int, default=6)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.eventos, args.dias, args.modelos, args.proveedores, args.tipos, args.repeticiones))
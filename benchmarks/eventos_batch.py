@@ -0,0 +1,161 @@
+# benchmarks/eventos_batch.py
+"""
+Ingesta de eventos de neumáticos con la app en proceso (ASGITransport) sobre una
+base SQLite temporal: --eventos inspecciones enviadas una a una por
+POST /neumaticos/eventos frente a las mismas inspecciones en lotes de --lote por
+POST /neumaticos/eventos/batch (una transacción por lote y, con --bloque, una
+por bloque de ese tamaño). Con --fallidos, ese número de inspecciones sin datos
+(422) se reparten por la entrada: miden el coste de cortar el bloque en tramos y
+repetir la parte válida de cada uno. Los logs de la app (una línea o más por evento) se
+silencian hasta WARNING incluido, para no medir la escritura de logs.
+
+    python -m benchmarks.eventos_batch --eventos 1000 --lote 1000 --neumaticos 200 --fallidos 0
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models  # noqa: F401  (registra todas las tablas)
+from core.config import settings
+from core.dependencies import get_read_session, get_session, get_session_factory
+from core.security import create_access_token, get_password_hash
+from main import app
+from models.almacen import Almacen
+from models.evento_neumatico import EventoNeumatico
+from models.fabricante import FabricanteNeumatico
+from models.modelo import ModeloNeumatico
+from models.neumatico import Neumatico
+from models.proveedor import Proveedor
+from models.usuario import Usuario
+from schemas.common import EstadoNeumaticoEnum, TipoEventoNeumaticoEnum
+
+
+async def _poblar(factory: Callable[[], AsyncSession], neumaticos: int) -> List[uuid.UUID]:
+    ahora = datetime.now(timezone.utc)
+    async with factory() as session:
+        usuario = Usuario(
+            id=uuid.uuid4(), username="bench", email="bench@example.com", hashed_password=get_password_hash("x"),
+            activo=True, es_superusuario=True, creado_en=ahora,
+        )
+        fabricante = FabricanteNeumatico(nombre="Fabricante", codigo_abreviado="FAB", activo=True)
+        proveedor = Proveedor(nombre="Proveedor", activo=True)
+        almacen = Almacen(codigo="ALM-BENCH", nombre="Almacén", activo=True)
+        session.add_all([usuario, fabricante, proveedor, almacen])
+        await session.flush()
+        modelo = ModeloNeumatico(
+            fabricante_id=fabricante.id, nombre_modelo="Modelo", medida="295/80R22.5",
+            profundidad_original_mm=Decimal("18.0"), permite_reencauche=True, activo=True,
+        )
+        session.add(modelo)
+        await session.flush()
+        ids = [uuid.uuid4() for _ in range(neumaticos)]
+        session.add_all(
+            Neumatico(
+                id=n, numero_serie=f"SERIE-{i:06d}", modelo_id=modelo.id, fecha_compra=date.today(),
+                costo_compra=Decimal("500.00"), proveedor_compra_id=proveedor.id,
+                estado_actual=EstadoNeumaticoEnum.EN_STOCK, ubicacion_almacen_id=almacen.id,
+            )
+            for i, n in enumerate(ids)
+        )
+        await session.commit()
+    return ids
+
+
+def _inspecciones(neumaticos: List[uuid.UUID], eventos: int, desplazamiento: int, fallidos: int = 0) -> List[Dict]:
+    # Profundidad decreciente por neumático, por encima del umbral de alerta
+    inspecciones = [
+        {
+            "neumatico_id": str(neumaticos[i % len(neumaticos)]),
+            "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION.value,
+            "profundidad_remanente_mm": round(17.0 - (desplazamiento + i) // len(neumaticos) * 0.01, 2),
+            "presion_psi": 105.0,
+        }
+        for i in range(eventos)
+    ]
+    # Sin profundidad ni presión: 422
+    for i in range(fallidos):
+        inspecciones[(i * eventos) // fallidos + eventos // (2 * fallidos)] = {
+            "neumatico_id": str(neumaticos[i % len(neumaticos)]), "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION.value,
+        }
+    return inspecciones
+
+
+async def main(eventos: int, lote: int, bloque: Optional[int], neumaticos: int, fallidos: int) -> None:
+    logging.disable(logging.WARNING)
+    ruta = os.path.join(tempfile.mkdtemp(), "bench_eventos.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{ruta}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    ids = await _poblar(factory, neumaticos)
+
+    async def _session():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _session
+    app.dependency_overrides[get_read_session] = _session
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'bench'})}"}
+    url = f"{settings.API_V1_STR}/neumaticos/eventos"
+    resultados = {"eventos": eventos, "fallidos": fallidos, "lote": lote, "bloque": bloque}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            # Calentamiento (caché de catálogos, compilación de consultas)
+            for evento in _inspecciones(ids, 10, 0):
+                assert (await client.post(url, json=evento, headers=headers)).status_code == 201
+
+            inicio = time.perf_counter()
+            for evento in _inspecciones(ids, eventos, 10, fallidos):
+                response = await client.post(url, json=evento, headers=headers)
+                assert response.status_code in (201, 422), response.text
+            individual = time.perf_counter() - inicio
+
+            pendientes = _inspecciones(ids, eventos, 10 + eventos, fallidos)
+            inicio = time.perf_counter()
+            for i in range(0, eventos, lote):
+                cuerpo = {"eventos": pendientes[i:i + lote], **({"tamano_bloque": bloque} if bloque else {})}
+                response = await client.post(f"{url}/batch", json=cuerpo, headers=headers)
+                assert response.status_code == 200, response.text
+            por_lotes = time.perf_counter() - inicio
+    finally:
+        app.dependency_overrides.clear()
+
+    async with factory() as session:
+        registrados = (await session.exec(select(func.count()).select_from(EventoNeumatico))).one()
+    await engine.dispose()
+    assert registrados == 10 + 2 * (eventos - fallidos), registrados
+
+    resultados.update({
+        "individual_s": round(individual, 2),
+        "individual_ms_por_evento": round(individual / eventos * 1000, 2),
+        "batch_s": round(por_lotes, 2),
+        "batch_ms_por_evento": round(por_lotes / eventos * 1000, 2),
+        "aceleracion": round(individual / por_lotes, 1),
+    })
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eventos", type=int, default=1000)
+    parser.add_argument("--lote", type=int, default=settings.EVENTOS_BATCH_MAX_ITEMS)
+    parser.add_argument("--bloque", type=int, default=None, help="tamano_bloque del lote (por defecto, EVENTOS_BATCH_CHUNK_SIZE)")
+    parser.add_argument("--neumaticos", type=int, default=200)
+    parser.add_argument("--fallidos", type=int, default=0, help="eventos inválidos repartidos por la entrada")
+    args = parser.parse_args()
+    asyncio.run(main(args.eventos, args.lote, args.bloque, args.neumaticos, args.fallidos))
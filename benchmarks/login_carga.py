@@ -0,0 +1,107 @@
+# benchmarks/login_carga.py
+"""
+Logins por segundo (POST /auth/token) y latencia de un endpoint ligero (GET /)
+servido a la vez, con bcrypt en el event loop (HASH_POOL_WORKERS = 0) y en el
+pool de hashing (core/pool_hash.py), sobre una base SQLite temporal y la app en
+proceso (ASGITransport).
+
+Con bcrypt en el loop, cada login bloquea a todas las demás peticiones; con el
+pool, el loop queda libre y varios hashes avanzan en paralelo.
+
+    python -m benchmarks.login_carga --logins 200 --concurrencia 20 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models  # noqa: F401  (registra todas las tablas)
+from core.config import settings
+from core.dependencies import get_session
+from core.pool_hash import pool_hash
+from core.security import get_password_hash
+from main import app
+from models.usuario import Usuario
+
+
+async def _medir(client: AsyncClient, logins: int, concurrencia: int):
+    url = f"{settings.API_V1_STR}/auth/token"
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias = []
+    terminado = asyncio.Event()
+
+    async def login() -> None:
+        async with semaforo:
+            response = await client.post(url, data={"username": "bench", "password": "bench-pass"})
+            assert response.status_code == 200, response.text
+
+    async def sonda() -> None:
+        # Petición ligera concurrente: mide cuánto bloquea bcrypt al resto del tráfico
+        while not terminado.is_set():
+            inicio = time.perf_counter()
+            await client.get("/")
+            latencias.append(time.perf_counter() - inicio)
+            await asyncio.sleep(0.01)
+
+    tarea_sonda = asyncio.create_task(sonda())
+    inicio = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    duracion = time.perf_counter() - inicio
+    terminado.set()
+    await tarea_sonda
+    latencias.sort()
+    p99 = latencias[min(len(latencias) - 1, int(0.99 * len(latencias)))] if latencias else 0.0
+    return logins / duracion, p99 * 1000
+
+
+async def main(logins: int, concurrencia: int, workers: int) -> None:
+    ruta = os.path.join(tempfile.mkdtemp(), "bench_login.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{ruta}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(Usuario(
+            id=uuid.uuid4(), username="bench", email="bench@example.com",
+            hashed_password=get_password_hash("bench-pass"), activo=True, creado_en=datetime.now(timezone.utc),
+        ))
+        await session.commit()
+
+    async def _session():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _session
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            pool_hash.workers = 0
+            en_loop, p99_en_loop = await _medir(client, logins, concurrencia)
+            pool_hash.workers = workers
+            pool_hash.max_pendientes = max(pool_hash.max_pendientes, concurrencia)
+            en_pool, p99_en_pool = await _medir(client, logins, concurrencia)
+    finally:
+        app.dependency_overrides.clear()
+        pool_hash.cerrar()
+        await engine.dispose()
+    print(f"bcrypt en el loop:        {en_loop:7.1f} logins/s   p99 GET /: {p99_en_loop:8.1f} ms")
+    print(f"bcrypt en pool ({workers} hilos): {en_pool:7.1f} logins/s   p99 GET /: {p99_en_pool:8.1f} ms"
+          f"  ({en_pool / en_loop:.2f}x)")
+    print(f"Métricas del pool: {pool_hash.metricas()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrencia", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=settings.HASH_POOL_WORKERS or 4)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrencia, args.workers))
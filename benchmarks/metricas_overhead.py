@@ -0,0 +1,88 @@
+# benchmarks/metricas_overhead.py
+"""
+Sobrecoste del middleware de métricas (core/metricas_http.py): peticiones por
+segundo de GET / (endpoint trivial, el peor caso relativo) y de GET /vehiculos/
+(listado autenticado con SQL) con METRICAS_HABILITADAS desactivado y activado,
+sobre una base SQLite temporal y la app en proceso (ASGITransport).
+
+    python -m benchmarks.metricas_overhead --peticiones 5000 --concurrencia 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models  # noqa: F401  (registra todas las tablas)
+from core.config import settings
+from core.dependencies import get_session
+from core.security import create_access_token, get_password_hash
+from main import app
+from models.usuario import Usuario
+
+
+async def _medir(client: AsyncClient, url: str, headers: dict, peticiones: int, concurrencia: int) -> float:
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def peticion() -> None:
+        async with semaforo:
+            response = await client.get(url, headers=headers)
+            assert response.status_code == 200, response.text
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(peticion() for _ in range(peticiones)))
+    return peticiones / (time.perf_counter() - inicio)
+
+
+async def main(peticiones: int, concurrencia: int) -> None:
+    ruta = os.path.join(tempfile.mkdtemp(), "bench_metricas.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{ruta}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(Usuario(
+            id=uuid.uuid4(), username="bench", email="bench@example.com", hashed_password=get_password_hash("x"),
+            activo=True, es_superusuario=True, creado_en=datetime.now(timezone.utc),
+        ))
+        await session.commit()
+
+    async def _session():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _session
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'bench'})}"}
+    casos = [("GET /", "/", {}), ("GET /vehiculos/", f"{settings.API_V1_STR}/vehiculos/", headers)]
+    habilitadas = settings.METRICAS_HABILITADAS
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            for nombre, url, cabeceras in casos:
+                await _medir(client, url, cabeceras, 200, concurrencia)  # calentamiento
+                settings.METRICAS_HABILITADAS = False
+                sin = await _medir(client, url, cabeceras, peticiones, concurrencia)
+                settings.METRICAS_HABILITADAS = True
+                con = await _medir(client, url, cabeceras, peticiones, concurrencia)
+                sobrecoste_us = (1 / con - 1 / sin) * 1e6
+                print(f"{nombre:18s} sin métricas: {sin:8.1f} pet/s   con métricas: {con:8.1f} pet/s   "
+                      f"sobrecoste: {sobrecoste_us:6.1f} µs/petición ({(sin - con) / sin:.1%})")
+    finally:
+        settings.METRICAS_HABILITADAS = habilitadas
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--peticiones", type=int, default=5000)
+    parser.add_argument("--concurrencia", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.peticiones, args.concurrencia))
@@ -0,0 +1,104 @@
+# benchmarks/pool_carga.py
+"""
+Prueba de carga del pool de conexiones: lanza ráfagas de N peticiones
+concurrentes que ocupan una conexión durante `--retencion-ms` (una consulta más
+la espera simulada) y compara varias configuraciones de pool_size/max_overflow.
+
+Por cada combinación informa el rendimiento, las latencias extremo a extremo,
+los timeouts y las esperas medidas por core/pool_metrics.py.
+
+    python -m benchmarks.pool_carga --url postgresql+asyncpg://... \\
+        --pool-size 5 10 20 --max-overflow 0 10 --concurrencia 100 --peticiones 2000
+
+Sin --url usa una base SQLite temporal (útil para ver el efecto de la cola,
+no las cifras absolutas).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.pool_metrics import PoolMedido, instrumentar_engine
+
+
+def _percentil(valores: List[float], p: float) -> Optional[float]:
+    if not valores:
+        return None
+    valores = sorted(valores)
+    return round(valores[min(len(valores) - 1, int(p * len(valores)))] * 1000, 2)
+
+
+async def _ejecutar(url: str, pool_size: int, max_overflow: int, timeout: float,
+                    concurrencia: int, peticiones: int, retencion_ms: float) -> Dict[str, Any]:
+    nombre = f"carga_{pool_size}_{max_overflow}"
+    engine = create_async_engine(
+        url, poolclass=PoolMedido, pool_size=pool_size, max_overflow=max_overflow,
+        pool_timeout=timeout, pool_pre_ping=False, pool_logging_name=nombre,
+    )
+    metricas = instrumentar_engine(engine, nombre)
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias: List[float] = []
+    timeouts = 0
+
+    async def peticion() -> None:
+        nonlocal timeouts
+        async with semaforo:
+            inicio = time.perf_counter()
+            try:
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+                    await asyncio.sleep(retencion_ms / 1000)
+                latencias.append(time.perf_counter() - inicio)
+            except exc.TimeoutError:
+                timeouts += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(peticion() for _ in range(peticiones)))
+    duracion = time.perf_counter() - inicio
+    estado = metricas.instantanea()
+    await engine.dispose()
+    return {
+        "pool_size": pool_size, "max_overflow": max_overflow,
+        "peticiones_por_segundo": round(len(latencias) / duracion, 1),
+        "latencia_p50_ms": _percentil(latencias, 0.50),
+        "latencia_p95_ms": _percentil(latencias, 0.95),
+        "latencia_max_ms": _percentil(latencias, 1.0),
+        "timeouts": timeouts,
+        "max_en_uso": estado["max_en_uso"],
+        "conexiones_abiertas": estado["conexiones_abiertas"],
+        "espera_pool_p95_ms": None if estado["espera_p95_segundos"] is None else round(estado["espera_p95_segundos"] * 1000, 2),
+        "espera_pool_max_ms": round(estado["espera_max_segundos"] * 1000, 2),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    url = args.url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_pool.db')}"
+    resultados = []
+    for pool_size, max_overflow in itertools.product(args.pool_size, args.max_overflow):
+        resultado = await _ejecutar(url, pool_size, max_overflow, args.timeout, args.concurrencia,
+                                    args.peticiones, args.retencion_ms)
+        print(json.dumps(resultado, ensure_ascii=False))
+        resultados.append(resultado)
+    print(f"\n{'pool':>6} {'overflow':>8} {'pet/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'espera p95':>10} {'timeouts':>8}")
+    for r in resultados:
+        print(f"{r['pool_size']:>6} {r['max_overflow']:>8} {r['peticiones_por_segundo']:>8} {r['latencia_p50_ms']!s:>8} "
+              f"{r['latencia_p95_ms']!s:>8} {r['espera_pool_p95_ms']!s:>10} {r['timeouts']:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="URL async de la base de datos (por defecto SQLite temporal).")
+    parser.add_argument("--pool-size", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--max-overflow", type=int, nargs="+", default=[0, 10])
+    parser.add_argument("--timeout", type=float, default=30.0, help="pool_timeout en segundos.")
+    parser.add_argument("--concurrencia", type=int, default=100)
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--retencion-ms", type=float, default=5.0, help="Tiempo que cada petición retiene la conexión.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,86 @@
+# benchmarks/usuario_cache.py
+"""
+Peticiones por segundo de un endpoint autenticado trivial (GET /usuarios/me/)
+con y sin la caché de usuarios de get_current_user (services/usuario_cache.py),
+sobre una base SQLite temporal y la app en proceso (ASGITransport).
+
+    python -m benchmarks.usuario_cache --peticiones 5000 --concurrencia 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models  # noqa: F401  (registra todas las tablas)
+from core.config import settings
+from core.dependencies import get_session
+from core.security import create_access_token, get_password_hash
+from main import app
+from models.usuario import Usuario
+from services.usuario_cache import usuario_cache
+
+
+async def _medir(client: AsyncClient, headers: dict, peticiones: int, concurrencia: int) -> float:
+    url = f"{settings.API_V1_STR}/usuarios/me/"
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def peticion() -> None:
+        async with semaforo:
+            response = await client.get(url, headers=headers)
+            assert response.status_code == 200, response.text
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(peticion() for _ in range(peticiones)))
+    return peticiones / (time.perf_counter() - inicio)
+
+
+async def main(peticiones: int, concurrencia: int) -> None:
+    ruta = os.path.join(tempfile.mkdtemp(), "bench_usuarios.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{ruta}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(Usuario(
+            id=uuid.uuid4(), username="bench", email="bench@example.com", hashed_password=get_password_hash("x"),
+            activo=True, creado_en=datetime.now(timezone.utc),
+        ))
+        await session.commit()
+
+    async def _session():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _session
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'bench'})}"}
+    ttl_configurado = usuario_cache.ttl_segundos or 30.0
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            await _medir(client, headers, 200, concurrencia)  # calentamiento
+            usuario_cache.ttl_segundos = 0
+            sin_cache = await _medir(client, headers, peticiones, concurrencia)
+            usuario_cache.ttl_segundos = ttl_configurado
+            usuario_cache.invalidar_usuario()
+            con_cache = await _medir(client, headers, peticiones, concurrencia)
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+    print(f"Sin caché: {sin_cache:8.1f} pet/s")
+    print(f"Con caché: {con_cache:8.1f} pet/s  ({con_cache / sin_cache:.2f}x)  {usuario_cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--peticiones", type=int, default=5000)
+    parser.add_argument("--concurrencia", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.peticiones, args.concurrencia))
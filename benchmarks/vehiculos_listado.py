@@ -0,0 +1,131 @@
+# benchmarks/vehiculos_listado.py
+"""
+Listado de 10k vehículos (utils/serializacion.py) sobre una base SQLite temporal:
+
+1. Consulta + serialización de todas las filas en proceso: el camino anterior
+   (entidades ORM, diccionario a mano por fila y jsonable_encoder) frente a la
+   proyección de columnas de VehiculoRead serializada con orjson.
+2. Extremo a extremo: recorrer el listado completo por GET /vehiculos/ con
+   el cursor (páginas de --limite), con la app en proceso (ASGITransport).
+
+    python -m benchmarks.vehiculos_listado --vehiculos 10000 --repeticiones 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models  # noqa: F401  (registra todas las tablas)
+from core.config import settings
+from core.dependencies import get_read_session, get_session
+from core.security import create_access_token, get_password_hash
+from main import app
+from models.tipo_vehiculo import TipoVehiculo
+from models.usuario import Usuario
+from models.vehiculo import Vehiculo
+from routers.vehiculos import COLUMNAS_VEHICULO_READ
+from utils.cursor import CABECERA_SIGUIENTE_CURSOR
+from utils.serializacion import RespuestaORJSON, filas_como_dicts
+
+
+async def _camino_anterior(session: AsyncSession) -> bytes:
+    vehiculos = (await session.exec(select(Vehiculo))).all()
+    filas = [
+        {
+            "id": str(v.id), "tipo_vehiculo_id": str(v.tipo_vehiculo_id), "numero_economico": v.numero_economico,
+            "placa": v.placa, "vin": v.vin, "marca": v.marca, "modelo_vehiculo": v.modelo_vehiculo,
+            "anio_fabricacion": v.anio_fabricacion, "fecha_alta": str(v.fecha_alta) if v.fecha_alta else None,
+            "activo": v.activo, "ubicacion_actual": v.ubicacion_actual, "notas": v.notas,
+            "odometro_actual": v.odometro_actual, "fecha_ultimo_odometro": v.fecha_ultimo_odometro,
+            "creado_en": v.creado_en, "actualizado_en": v.actualizado_en,
+        }
+        for v in vehiculos
+    ]
+    return json.dumps(jsonable_encoder(filas)).encode()
+
+
+async def _camino_proyectado(session: AsyncSession) -> bytes:
+    filas = filas_como_dicts(await session.exec(select(*COLUMNAS_VEHICULO_READ)))
+    return RespuestaORJSON(filas).body
+
+
+async def main(vehiculos: int, repeticiones: int, limite: int) -> None:
+    ruta = os.path.join(tempfile.mkdtemp(), "bench_vehiculos.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{ruta}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    ahora = datetime.now(timezone.utc)
+    async with factory() as session:
+        session.add(Usuario(
+            id=uuid.uuid4(), username="bench", email="bench@example.com", hashed_password=get_password_hash("x"),
+            activo=True, es_superusuario=True, creado_en=ahora,
+        ))
+        tipo = TipoVehiculo(nombre="Tractocamión", ejes_standard=3)
+        session.add(tipo)
+        await session.flush()
+        for i in range(vehiculos):
+            session.add(Vehiculo(
+                tipo_vehiculo_id=str(tipo.id), numero_economico=f"ECO-{i:06d}", placa=f"PL-{i:06d}",
+                marca="Marca", modelo_vehiculo="Modelo", anio_fabricacion=2020, odometro_actual=i * 10,
+                creado_en=ahora + timedelta(microseconds=i),
+            ))
+        await session.commit()
+
+    async with factory() as session:
+        for nombre, camino in (("anterior (ORM + dicts)", _camino_anterior), ("proyección + orjson", _camino_proyectado)):
+            await camino(session)  # calentamiento
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                cuerpo = await camino(session)
+                session.expunge_all()
+            ms = (time.perf_counter() - inicio) / repeticiones * 1000
+            print(f"{nombre:24s} {vehiculos} filas: {ms:8.1f} ms/listado ({len(cuerpo) / 1024:.0f} KiB)")
+
+    async def _session():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _session
+    app.dependency_overrides[get_read_session] = _session
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'bench'})}"}
+    url = f"{settings.API_V1_STR}/vehiculos/"
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            inicio = time.perf_counter()
+            total, paginas, cursor = 0, 0, None
+            while True:
+                params = {"limit": limite, **({"cursor": cursor} if cursor else {})}
+                response = await client.get(url, params=params, headers=headers)
+                assert response.status_code == 200, response.text
+                total += len(response.json())
+                paginas += 1
+                cursor = response.headers.get(CABECERA_SIGUIENTE_CURSOR)
+                if not cursor:
+                    break
+            segundos = time.perf_counter() - inicio
+            print(f"GET /vehiculos/ por cursor: {total} vehículos en {paginas} páginas, "
+                  f"{segundos * 1000:.0f} ms ({segundos / paginas * 1000:.1f} ms/página)")
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vehiculos", type=int, default=10000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--limite", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.vehiculos, args.repeticiones, args.limite))
@@ -9,6 +9,16 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "GesNeuAPI"
     API_V1_STR: str = "/api/v1" # <--- ATRIBUTO AÑADIDO AQUÍ
     LOG_LEVEL: str = "INFO" # Niveles comunes: DEBUG, INFO, WARNING, ERROR, CRITICAL
+    LOG_FORMATO: str = "json" # "json" (un objeto por línea) o "texto"
+    LOG_NIVELES: str = "" # Niveles por módulo: "sqlalchemy.engine=INFO,routers.vehiculos=DEBUG"
+    LOG_ARCHIVO: Optional[str] = "logs/app.log" # Vacío: solo consola
+    LOG_FILAS_POR_SEGUNDO: float = 5.0 # Límite de los logs por fila de los listados (utils/logging.py)
+    METRICAS_HABILITADAS: bool = True # Middleware de métricas Prometheus (core/metricas_http.py)
+    METRICAS_SERVER_TIMING: bool = True # Cabecera Server-Timing con db/handler/serialización
+    SQL_PRESUPUESTO_ESTRICTO: bool = False # Desarrollo/pruebas: superar el presupuesto de consultas devuelve 500
+    SQL_PRESUPUESTO_POR_DEFECTO: int = 0 # Máximo de consultas de las rutas sin presupuesto propio; 0 = sin límite
+    SQL_REPETIDAS_UMBRAL: int = 3 # Una misma sentencia repetida estas veces se reporta (posible N+1)
+    INSTALADOS_STREAM_LOTE: int = 1000 # Filas por lote del cursor de servidor en GET /neumaticos/instalados?formato=ndjson
 
     # Seguridad
     SECRET_KEY: str = "B3ll1c0s"
@@ -22,6 +32,18 @@ class Settings(BaseSettings):
     DATABASE_TEST_URL_HOST: Optional[str] = "sqlite+aiosqlite:///./test_db_host.db"
     DATABASE_TEST_URL_DOCKER: Optional[str] = "postgresql+asyncpg://test_user:test_password@db_test:5432/test_db"
 
+    # Pool de conexiones del engine principal (database.py; no aplica a SQLite)
+    DB_POOL_SIZE: int = 10 # Conexiones persistentes
+    DB_MAX_OVERFLOW: int = 20 # Conexiones extra bajo pico (se cierran al devolverse)
+    DB_POOL_TIMEOUT: float = 30.0 # Segundos de espera por una conexión antes de TimeoutError
+    DB_POOL_RECYCLE: int = 1800 # Segundos; recicla conexiones antes de que el servidor/proxy las corte
+    DB_POOL_PRE_PING: bool = True # Comprueba la conexión al sacarla del pool
+
+    # Réplica de lectura (get_read_session); sin URL todas las lecturas van a la primaria
+    DATABASE_READ_URL: Optional[str] = None
+    DB_READ_FALLBACK_PRIMARIA: bool = True # Si la réplica no responde, leer de la primaria
+    DB_READ_YOUR_WRITES_SEGUNDOS: float = 5.0 # Tras escribir, las lecturas del usuario van a la primaria
+
     # Primer superusuario (opcional, para creación inicial)
     FIRST_SUPERUSER_USERNAME: Optional[str] = "admin"
     FIRST_SUPERUSER_EMAIL: Optional[str] = "admin@example.com"
@@ -34,6 +56,63 @@ class Settings(BaseSettings):
 
     # Umbral para alertas (ejemplo)
     UMBRAL_PROFUNDIDAD_MINIMA_MM: float = 1.6
+
+    # Ingesta de eventos por lotes (POST /neumaticos/eventos/batch)
+    EVENTOS_BATCH_MAX_ITEMS: int = 1000 # Máximo de eventos aceptados por petición
+    EVENTOS_BATCH_CHUNK_SIZE: int = 0 # Eventos por transacción; 0 = todo el lote en una sola
+    # Importación en streaming de inspecciones (filas por bloque/transacción)
+    IMPORTACION_BLOQUE_FILAS: int = 500
+
+    # Caché de proceso del catálogo de modelos/fabricantes (services/catalogo_cache.py)
+    CATALOGO_CACHE_TTL_SEGUNDOS: int = 300
+
+    # Caché de usuarios autenticados en get_current_user (services/usuario_cache.py)
+    USUARIO_CACHE_TTL_SEGUNDOS: float = 30.0 # Obsolescencia máxima; 0 desactiva la caché
+    USUARIO_CACHE_MAX_ENTRADAS: int = 10000 # Usuarios en caché (LRU)
+
+    # Pool de hilos para bcrypt (core/pool_hash.py)
+    HASH_POOL_WORKERS: int = 4 # Hilos de hashing; 0 ejecuta bcrypt en el event loop
+    HASH_POOL_MAX_PENDIENTES: int = 64 # Operaciones en cola + en curso; por encima, login responde 503
+
+    # Outbox de alertas (services/alert_outbox_worker.py)
+    ALERTAS_OUTBOX_LOTE: int = 200 # Filas por lote/transacción del worker
+    ALERTAS_OUTBOX_INTERVALO_SEGUNDOS: float = 1.0 # Espera entre sondeos cuando no hay trabajo
+    ALERTAS_OUTBOX_MAX_INTENTOS: int = 5 # Tras estos fallos la fila se abandona (queda el error)
+    ALERTAS_OUTBOX_WORKER_EN_PROCESO: bool = True # False si el worker corre como proceso aparte
+
+    # Notificaciones de alertas por correo (services/notification_dispatcher.py)
+    EMAIL_FROM: str = "noreply@example.com"
+    ALERT_RECIPIENTS: str = "admin@example.com" # Separados por comas; cada uno recibe su resumen
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 25
+    NOTIFICACIONES_HABILITADAS: bool = True # Arranca el despachador en el lifespan
+    NOTIF_VENTANA_SEGUNDOS: float = 30.0 # Alertas acumuladas en un mismo resumen
+    NOTIF_MAX_COLA: int = 10000 # Notificaciones pendientes; por encima se descartan
+    NOTIF_SMTP_CONEXIONES: int = 2 # Conexiones SMTP persistentes (y envíos simultáneos)
+    NOTIF_SMTP_TIMEOUT_SEGUNDOS: float = 10.0
+    NOTIF_MAX_REINTENTOS: int = 4 # Reintentos ante errores transitorios (conexión, 4xx)
+    NOTIF_REINTENTO_BASE_SEGUNDOS: float = 2.0 # Backoff exponencial: base * 2^intento (con jitter)
+    NOTIF_MAX_ALERTAS_POR_RESUMEN: int = 500 # Un resumen más grande se parte en varios correos
+
+    # Tareas periódicas en proceso (core/scheduler.py)
+    SCHEDULER_HABILITADO: bool = True
+    # Barrido de alertas sobre toda la flota (services/barrido_alertas_service.py)
+    BARRIDO_ALERTAS_INTERVALO_SEGUNDOS: int = 24 * 60 * 60 # 0 = solo bajo demanda / CLI
+    BARRIDO_ALERTAS_BLOQUE: int = 50000 # Neumáticos cargados y evaluados por bloque
+    # Refresco de la vista materializada de inventario (services/inventario_service.py)
+    INVENTARIO_REFRESCO_INTERVALO_SEGUNDOS: int = 60 # 0 = solo bajo demanda / CLI
+    # Reconciliación de los contadores del resumen de alertas (services/alertas_contadores_service.py)
+    ALERTAS_CONTADORES_RECONCILIACION_SEGUNDOS: int = 60 * 60 # 0 = solo CLI
+    # Plegado de los deltas pendientes en alertas_contadores (sin bloquear 'alertas')
+    ALERTAS_CONTADORES_PLEGADO_SEGUNDOS: int = 60 # 0 = solo en la reconciliación
+    # Refresco incremental de los agregados de CPK (services/cpk_service.py)
+    CPK_REFRESCO_INTERVALO_SEGUNDOS: int = 15 * 60 # 0 = solo bajo demanda / CLI
+    CPK_REFRESCO_MARGEN_SEGUNDOS: int = 5 * 60 # Solape con el refresco anterior (transacciones confirmadas tarde)
+    CPK_REFRESCO_BLOQUE: int = 1000 # Neumáticos recalculados por bloque
+    # Pronóstico de desgaste y fecha de retiro (services/pronostico_desgaste_service.py)
+    PRONOSTICO_DESGASTE_INTERVALO_SEGUNDOS: int = 15 * 60 # 0 = solo bajo demanda / CLI
+    PRONOSTICO_DESGASTE_MARGEN_SEGUNDOS: int = 5 * 60 # Solape con el refresco anterior
+    PRONOSTICO_DESGASTE_BLOQUE: int = 5000 # Neumáticos ajustados por bloque
     
     # Configuración para pydantic-settings
     model_config = SettingsConfigDict(
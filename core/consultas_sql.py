@@ -0,0 +1,182 @@
+# core/consultas_sql.py
+"""
+Contabilidad de SQL por petición y detección de N+1.
+
+Los eventos `before/after_cursor_execute` de SQLAlchemy (registrados sobre la
+clase Engine: principal, réplica y engines de pruebas) anotan cada sentencia en
+el RegistroConsultas de la petición en curso, que vive en un ContextVar
+(SQLAlchemy lo propaga a sus greenlets). Fuera de una petición se puede medir
+un bloque con `contar_consultas()`.
+
+ConsultasSQLMiddleware abre un registro por petición y:
+- añade las cabeceras `X-DB-Queries` y `X-DB-Time-Ms`;
+- deja una línea de log con el recuento (DEBUG; WARNING si hay sentencias
+  repetidas SQL_REPETIDAS_UMBRAL veces o más, el patrón típico de un N+1);
+- comprueba el presupuesto de consultas de la ruta, declarado con la
+  dependencia `presupuesto_consultas(n)` (o SQL_PRESUPUESTO_POR_DEFECTO). Al
+  superarlo se registra un WARNING; con SQL_PRESUPUESTO_ESTRICTO (desarrollo
+  y pruebas) la respuesta se sustituye por un 500 con el informe.
+"""
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CABECERA_CONSULTAS = "X-DB-Queries"
+CABECERA_TIEMPO_DB = "X-DB-Time-Ms"
+# Longitud de las sentencias en los informes
+MAX_LONGITUD_SENTENCIA = 300
+
+
+@dataclass
+class RegistroConsultas:
+    consultas: int = 0
+    db_segundos: float = 0.0
+    presupuesto: Optional[int] = None
+    sentencias: Counter = field(default_factory=Counter)
+
+    def repetidas(self, umbral: int = 2) -> List[Dict[str, Any]]:
+        """Sentencias idénticas (mismo SQL, parámetros aparte) ejecutadas `umbral` veces o más."""
+        return [
+            {"veces": veces, "sentencia": sentencia[:MAX_LONGITUD_SENTENCIA]}
+            for sentencia, veces in self.sentencias.most_common()
+            if veces >= umbral
+        ]
+
+    def presupuesto_efectivo(self) -> Optional[int]:
+        if self.presupuesto is not None:
+            return self.presupuesto
+        return settings.SQL_PRESUPUESTO_POR_DEFECTO or None
+
+    def excede_presupuesto(self) -> bool:
+        presupuesto = self.presupuesto_efectivo()
+        return presupuesto is not None and self.consultas > presupuesto
+
+    def informe(self) -> Dict[str, Any]:
+        return {
+            "consultas": self.consultas,
+            "db_ms": round(self.db_segundos * 1000, 2),
+            "presupuesto": self.presupuesto_efectivo(),
+            "repetidas": self.repetidas(),
+        }
+
+
+registro_consultas_actual: ContextVar[Optional[RegistroConsultas]] = ContextVar("registro_consultas", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_consultas_inicio", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    pila = conn.info.get("_consultas_inicio")
+    if not pila:
+        return
+    inicio = pila.pop()
+    registro = registro_consultas_actual.get()
+    if registro is not None:
+        registro.consultas += 1
+        registro.db_segundos += time.perf_counter() - inicio
+        registro.sentencias[statement] += 1
+
+
+@contextmanager
+def contar_consultas() -> Iterator[RegistroConsultas]:
+    """Cuenta las consultas del bloque (scripts, benchmarks, pruebas de servicios)."""
+    registro = RegistroConsultas()
+    token = registro_consultas_actual.set(registro)
+    try:
+        yield registro
+    finally:
+        registro_consultas_actual.reset(token)
+
+
+def presupuesto_consultas(maximo: int):
+    """
+    Dependencia que fija el máximo de consultas SQL de la ruta:
+
+        @router.get("/", dependencies=[Depends(presupuesto_consultas(4))])
+    """
+    async def _fijar_presupuesto() -> None:
+        registro = registro_consultas_actual.get()
+        if registro is not None:
+            registro.presupuesto = maximo
+    return _fijar_presupuesto
+
+
+class ConsultasSQLMiddleware:
+    """Middleware ASGI que cuenta las consultas de cada petición y aplica los presupuestos."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registro = RegistroConsultas()
+        token = registro_consultas_actual.set(registro)
+        estado = {"sustituida": False}
+
+        async def send_con_consultas(message):
+            if estado["sustituida"]:
+                return  # Se descarta la respuesta original
+            if message["type"] == "http.response.start":
+                if settings.SQL_PRESUPUESTO_ESTRICTO and registro.excede_presupuesto():
+                    estado["sustituida"] = True
+                    await self._responder_exceso(send, scope, registro)
+                    return
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (CABECERA_CONSULTAS.lower().encode("latin-1"), str(registro.consultas).encode("latin-1")),
+                    (CABECERA_TIEMPO_DB.lower().encode("latin-1"), f"{registro.db_segundos * 1000:.2f}".encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_con_consultas)
+        finally:
+            registro_consultas_actual.reset(token)
+            self._registrar(scope, registro)
+
+    @staticmethod
+    async def _responder_exceso(send, scope, registro: RegistroConsultas) -> None:
+        cuerpo = json.dumps({
+            "detail": f"Presupuesto de consultas SQL superado en {scope['method']} {scope['path']}",
+            **registro.informe(),
+        }, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 500,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(cuerpo)).encode())],
+        })
+        await send({"type": "http.response.body", "body": cuerpo})
+
+    @staticmethod
+    def _registrar(scope, registro: RegistroConsultas) -> None:
+        repetidas = registro.repetidas(settings.SQL_REPETIDAS_UMBRAL)
+        excede = registro.excede_presupuesto()
+        if excede or repetidas:
+            logger.warning(
+                "%s %s: %d consultas SQL (presupuesto %s, %.1f ms)%s",
+                scope["method"], scope["path"], registro.consultas, registro.presupuesto_efectivo(),
+                registro.db_segundos * 1000, " - EXCEDE EL PRESUPUESTO" if excede else "",
+                extra={"sentencias_repetidas": repetidas},
+            )
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s %s: %d consultas SQL (%.1f ms)", scope["method"], scope["path"],
+                         registro.consultas, registro.db_segundos * 1000)
@@ -1,20 +1,27 @@
 # gesneu_api2/core/dependencies.py
-from typing import AsyncGenerator, Annotated  # Annotated para FastAPI más reciente
+import logging
+from typing import AsyncGenerator, Annotated, Callable  # Annotated para FastAPI más reciente
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from sqlmodel import select
 
+import database
 from database import AsyncSessionFactory
 from core.config import settings
+from core.escrituras_recientes import CABECERA_LEER_PRIMARIA, registro_escrituras, sujeto_desde_cabeceras
 from core.security import verify_token
+from services.usuario_cache import usuario_cache
 from models.usuario import Usuario # Asegúrate que tu modelo Usuario tenga el campo 'es_superusuario' y 'activo'
 
 # Definir el esquema OAuth2
 # Ajusta la URL según tu router de auth, por ejemplo, si es /api/v1/auth/token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token") 
 
+logger = logging.getLogger(__name__)
+
 # Función para obtener la sesión de base de datos
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -37,6 +44,82 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             # La sesión se cierra automáticamente al salir del contexto 'async with'.
             pass
 
+# Fábricas de sesión para respuestas en streaming
+def get_session_factory() -> Callable[[], AsyncSession]:
+    """
+    Fábrica de sesiones de la primaria para el trabajo que sigue después de que
+    el endpoint retorna (generadores de StreamingResponse). La sesión de
+    get_session no sirve ahí: según la versión de FastAPI, la dependencia se
+    cierra antes de empezar a enviar el cuerpo. El generador abre su propia
+    sesión y la cierra al terminar.
+    """
+    return AsyncSessionFactory
+
+
+def _leer_de_primaria(request: Request) -> bool:
+    # Sin réplica, o el cliente necesita leer sus propias escrituras
+    return (
+        database.LecturaSessionFactory is None
+        or request.headers.get(CABECERA_LEER_PRIMARIA) == "1"
+        or registro_escrituras.reciente(sujeto_desde_cabeceras(request.headers.get("authorization")))
+    )
+
+
+def get_read_session_factory(
+    request: Request,
+    primaria: Annotated[Callable[[], AsyncSession], Depends(get_session_factory)],
+) -> Callable[[], AsyncSession]:
+    """
+    Como get_session_factory, para lecturas: la réplica en los mismos casos que
+    get_read_session (sin el respaldo a la primaria si la réplica no responde,
+    que ya no puede decidirse con el cuerpo a medio enviar).
+    """
+    if _leer_de_primaria(request):
+        request.state.origen_lectura = "primaria"
+        return primaria
+    request.state.origen_lectura = "replica"
+    return database.LecturaSessionFactory
+
+
+# Sesión para endpoints de solo lectura: réplica si está configurada
+async def get_read_session(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_session)]
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Entrega una sesión de la réplica de lectura (DATABASE_READ_URL).
+
+    Se usa la sesión de la primaria (la de get_session, que no conecta hasta su
+    primer uso) cuando no hay réplica, cuando el usuario escribió hace menos de
+    DB_READ_YOUR_WRITES_SEGUNDOS o pide `X-Leer-Primaria: 1`, y, si
+    DB_READ_FALLBACK_PRIMARIA está activo, cuando la réplica no responde.
+    """
+    if _leer_de_primaria(request):
+        request.state.origen_lectura = "primaria"
+        yield session
+        return
+
+    lectura = database.LecturaSessionFactory()
+    try:
+        await lectura.connection()
+        replica_disponible = True
+    except (OSError, SQLAlchemyError) as e:
+        await lectura.close()
+        if not settings.DB_READ_FALLBACK_PRIMARIA:
+            raise
+        logger.warning(f"Réplica de lectura no disponible, se lee de la primaria: {e}")
+        replica_disponible = False
+    if not replica_disponible:
+        request.state.origen_lectura = "primaria"
+        yield session
+        return
+
+    request.state.origen_lectura = "replica"
+    try:
+        yield lectura
+    finally:
+        await lectura.close()
+
 # Función para obtener el usuario actual a partir del token
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)], # Usando Annotated para claridad
@@ -56,11 +139,8 @@ async def get_current_user(
         if username is None:
             raise credentials_exception
 
-        # Buscar el usuario en la base de datos usando el username
-        # Usar session.exec() como recomienda SQLModel
-        statement = select(Usuario).where(Usuario.username == username)
-        db_user = await session.exec(statement)
-        user = db_user.first() # .one_or_none() si quieres error si hay más de uno (aunque username es unique)
+        # Buscar el usuario por username: caché de proceso y, si no está, la base de datos
+        user = await usuario_cache.get_usuario(session, username)
 
         if user is None:
             raise credentials_exception
@@ -0,0 +1,89 @@
+# core/escrituras_recientes.py
+"""
+Registro de escrituras recientes por usuario para "read-your-writes".
+
+Las lecturas pueden servirse desde la réplica (get_read_session), que va con
+algo de retraso respecto a la primaria. Para que un usuario vea siempre lo que
+acaba de escribir, EscriturasRecientesMiddleware anota al usuario (el `sub` de
+su token) cada vez que una petición de escritura (POST/PUT/PATCH/DELETE)
+termina con éxito, y durante DB_READ_YOUR_WRITES_SEGUNDOS sus lecturas van a
+la primaria.
+
+El registro es de proceso: con varios workers, la petición siguiente puede
+caer en otro proceso que no conoce la escritura. Para ese caso el cliente
+puede forzar la primaria con la cabecera `X-Leer-Primaria: 1`.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+from core.config import settings
+from core.security import verify_token
+
+METODOS_ESCRITURA = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+CABECERA_LEER_PRIMARIA = "x-leer-primaria"
+# Tope de usuarios registrados; al superarlo se purgan las entradas caducadas
+MAX_ENTRADAS = 10000
+
+
+class RegistroEscrituras:
+    def __init__(self, ventana_segundos: float):
+        self.ventana_segundos = ventana_segundos
+        self._expira: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, sujeto: str) -> None:
+        ahora = time.monotonic()
+        with self._lock:
+            if len(self._expira) >= MAX_ENTRADAS:
+                self._expira = {s: t for s, t in self._expira.items() if t > ahora}
+            self._expira[sujeto] = ahora + self.ventana_segundos
+
+    def reciente(self, sujeto: Optional[str]) -> bool:
+        if not sujeto:
+            return False
+        expira = self._expira.get(sujeto)
+        return expira is not None and expira > time.monotonic()
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._expira.clear()
+
+
+registro_escrituras = RegistroEscrituras(settings.DB_READ_YOUR_WRITES_SEGUNDOS)
+
+
+def sujeto_desde_cabeceras(authorization: Optional[str]) -> Optional[str]:
+    """Usuario (`sub`) del token Bearer, o None si no hay token válido."""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return verify_token(authorization[7:].strip()).get("sub")
+    except HTTPException:
+        return None
+
+
+class EscriturasRecientesMiddleware:
+    """Middleware ASGI que registra las escrituras con éxito de cada usuario."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in METODOS_ESCRITURA:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_con_registro(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                authorization = next(
+                    (v.decode("latin-1") for k, v in scope["headers"] if k == b"authorization"), None
+                )
+                sujeto = sujeto_desde_cabeceras(authorization)
+                if sujeto:
+                    registro_escrituras.registrar(sujeto)
+            await send(message)
+
+        await self.app(scope, receive, send_con_registro)
@@ -0,0 +1,193 @@
+# core/metricas_http.py
+"""
+Métricas HTTP en formato Prometheus y cabecera Server-Timing.
+
+MetricasMiddleware (ASGI puro, el más externo de la app) registra por ruta
+(la plantilla, p.ej. "/api/v1/vehiculos/{vehiculo_id}", nunca la URL concreta
+para no disparar la cardinalidad):
+
+- gesneu_http_requests_total{method,route,status}
+- gesneu_http_request_duration_seconds{method,route} (histograma)
+- gesneu_http_response_size_bytes{method,route} (histograma)
+- gesneu_http_requests_in_progress{method} (gauge)
+
+y añade `Server-Timing` con el reparto del tiempo hasta el inicio de la
+respuesta: `db` (ejecución de SQL, del registro de core/consultas_sql.py),
+`handler` (dependencias y endpoint, sin el SQL) y `serializacion` (desde que
+el endpoint devuelve hasta que sale la respuesta).
+
+Con varios workers de uvicorn, si PROMETHEUS_MULTIPROC_DIR está definida (antes
+de importar prometheus_client), cada proceso escribe sus métricas en ese
+directorio y GET /metrics las agrega con MultiProcessCollector.
+"""
+import functools
+import inspect
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi.routing import APIRoute
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from starlette.requests import Request
+from starlette.responses import Response
+
+from core.config import settings
+from core.consultas_sql import registro_consultas_actual
+
+RUTA_METRICAS = "/metrics"
+RUTA_SIN_COINCIDENCIA = "<sin_ruta>"
+MULTIPROCESO = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+PETICIONES = Counter(
+    "gesneu_http_requests_total", "Peticiones HTTP atendidas.", ["method", "route", "status"]
+)
+DURACION = Histogram(
+    "gesneu_http_request_duration_seconds", "Duración de las peticiones HTTP (hasta el final del cuerpo).",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+TAMANO_RESPUESTA = Histogram(
+    "gesneu_http_response_size_bytes", "Tamaño del cuerpo de las respuestas HTTP.",
+    ["method", "route"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+EN_CURSO = Gauge(
+    "gesneu_http_requests_in_progress", "Peticiones HTTP en curso.", ["method"], multiprocess_mode="livesum"
+)
+
+
+@dataclass
+class TiemposPeticion:
+    inicio: float
+    fin_endpoint: Optional[float] = None
+
+
+tiempos_actuales: ContextVar[Optional[TiemposPeticion]] = ContextVar("tiempos_peticion", default=None)
+
+
+# --- Fin del endpoint (separa handler de serialización) ---
+def _medir_endpoint(funcion):
+    if inspect.iscoroutinefunction(funcion):
+        @functools.wraps(funcion)
+        async def envoltura(*args, **kwargs):
+            try:
+                return await funcion(*args, **kwargs)
+            finally:
+                tiempos = tiempos_actuales.get()
+                if tiempos is not None:
+                    tiempos.fin_endpoint = time.perf_counter()
+    else:
+        # Los endpoints síncronos corren en el threadpool, que copia el contexto
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                tiempos = tiempos_actuales.get()
+                if tiempos is not None:
+                    tiempos.fin_endpoint = time.perf_counter()
+    envoltura._medido = True
+    return envoltura
+
+
+def instrumentar_rutas(*routers: APIRouter) -> None:
+    """Envuelve el endpoint de cada APIRoute de los routers para marcar su fin (idempotente)."""
+    for router in routers:
+        for route in router.routes:
+            if isinstance(route, APIRoute) and not getattr(route.dependant.call, "_medido", False):
+                # El handler de la ruta lee dependant.call en cada petición
+                route.dependant.call = _medir_endpoint(route.dependant.call)
+
+
+def plantilla_ruta(scope) -> str:
+    """
+    Ruta con los parámetros en forma de plantilla ("/api/v1/vehiculos/{vehiculo_id}").
+    Se reconstruye desde la URL y los path_params, que valen igual con routers
+    incluidos con prefijo; si ninguna ruta casó se agrupa en RUTA_SIN_COINCIDENCIA.
+    """
+    if scope.get("route") is None:
+        return RUTA_SIN_COINCIDENCIA
+    parametros = scope.get("path_params") or {}
+    if not parametros:
+        return scope["path"]
+    nombres = {str(valor).lower(): nombre for nombre, valor in parametros.items()}
+    return "/".join(
+        f"{{{nombres[segmento.lower()]}}}" if segmento.lower() in nombres else segmento
+        for segmento in scope["path"].split("/")
+    )
+
+
+def _server_timing(tiempos: TiemposPeticion, inicio_respuesta: float) -> bytes:
+    total = inicio_respuesta - tiempos.inicio
+    # El registro de consultas lo abre ConsultasSQLMiddleware (más interno); send se llama en su contexto
+    registro = registro_consultas_actual.get()
+    db = min(registro.db_segundos, total) if registro is not None else 0.0
+    fin_endpoint = tiempos.fin_endpoint if tiempos.fin_endpoint is not None else inicio_respuesta
+    serializacion = max(inicio_respuesta - fin_endpoint, 0.0)
+    handler = max(total - db - serializacion, 0.0)
+    return (
+        f"db;dur={db * 1000:.2f}, handler;dur={handler * 1000:.2f}, "
+        f"serializacion;dur={serializacion * 1000:.2f}, total;dur={total * 1000:.2f}"
+    ).encode("latin-1")
+
+
+class MetricasMiddleware:
+    """Middleware ASGI de métricas Prometheus y Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICAS_HABILITADAS or scope["path"] == RUTA_METRICAS:
+            await self.app(scope, receive, send)
+            return
+
+        metodo = scope["method"]
+        tiempos = TiemposPeticion(inicio=time.perf_counter())
+        token = tiempos_actuales.set(tiempos)
+        estado = {"status": 500, "bytes": 0}
+
+        async def send_medido(message):
+            if message["type"] == "http.response.start":
+                estado["status"] = message["status"]
+                if settings.METRICAS_SERVER_TIMING:
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"server-timing", _server_timing(tiempos, time.perf_counter())),
+                    ]
+            elif message["type"] == "http.response.body":
+                estado["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        en_curso = EN_CURSO.labels(metodo)
+        en_curso.inc()
+        try:
+            await self.app(scope, receive, send_medido)
+        finally:
+            en_curso.dec()
+            tiempos_actuales.reset(token)
+            plantilla = plantilla_ruta(scope)
+            PETICIONES.labels(metodo, plantilla, str(estado["status"])).inc()
+            DURACION.labels(metodo, plantilla).observe(time.perf_counter() - tiempos.inicio)
+            TAMANO_RESPUESTA.labels(metodo, plantilla).observe(estado["bytes"])
+
+
+def exponer_metricas(request: Request) -> Response:
+    """Métricas en formato de texto de Prometheus (agregadas entre procesos si aplica)."""
+    if MULTIPROCESO:
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = REGISTRY
+    return Response(generate_latest(registro), media_type=CONTENT_TYPE_LATEST)
+
+
+def marcar_proceso_terminado() -> None:
+    """Libera los gauges `livesum` de este worker al apagarse (modo multiproceso)."""
+    if MULTIPROCESO:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,109 @@
+# core/pool_hash.py
+"""
+Pool de hilos acotado para el trabajo de bcrypt (verificar y generar hashes).
+
+bcrypt a 12 rondas tarda decenas de milisegundos de CPU; ejecutado en el event
+loop bloquea todas las demás peticiones del worker mientras dura. La extensión
+C de bcrypt libera el GIL, así que un ThreadPoolExecutor basta para sacarlo del
+loop y ejecutar varios en paralelo sin el coste de un pool de procesos.
+
+La cola es acotada (HASH_POOL_MAX_PENDIENTES): cuando una avalancha de logins
+la llena, las peticiones nuevas fallan de inmediato con PoolHashSaturadoError
+(el router responde 503) en lugar de acumular latencia para todos. Con
+HASH_POOL_WORKERS = 0 el trabajo se ejecuta en línea (comportamiento anterior).
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from core.config import settings
+
+T = TypeVar("T")
+
+
+class PoolHashSaturadoError(RuntimeError):
+    """La cola del pool de hashing está llena."""
+
+
+class PoolHash:
+    def __init__(self, workers: int, max_pendientes: int):
+        self.workers = workers
+        self.max_pendientes = max_pendientes
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pendientes = 0  # en cola + en ejecución
+        self.en_ejecucion = 0
+        self.max_pendientes_observado = 0
+        self.completadas = 0
+        self.rechazadas = 0
+        self.espera_total_segundos = 0.0
+        self.espera_max_segundos = 0.0
+        self.ejecucion_total_segundos = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Creación perezosa: tras cerrar() (fin del lifespan) se vuelve a crear si hace falta
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _medir(self, funcion: Callable[..., T], encolada_en: float, *args: Any) -> T:
+        inicio = time.perf_counter()
+        espera = inicio - encolada_en
+        with self._lock:
+            self.en_ejecucion += 1
+            self.espera_total_segundos += espera
+            self.espera_max_segundos = max(self.espera_max_segundos, espera)
+        try:
+            return funcion(*args)
+        finally:
+            with self._lock:
+                self.en_ejecucion -= 1
+                self.ejecucion_total_segundos += time.perf_counter() - inicio
+
+    async def ejecutar(self, funcion: Callable[..., T], *args: Any) -> T:
+        """Ejecuta `funcion(*args)` en el pool; PoolHashSaturadoError si la cola está llena."""
+        if self.workers <= 0:
+            return funcion(*args)
+        with self._lock:
+            if self.pendientes >= self.max_pendientes:
+                self.rechazadas += 1
+                raise PoolHashSaturadoError(
+                    f"Pool de hashing saturado ({self.pendientes} operaciones pendientes)"
+                )
+            self.pendientes += 1
+            self.max_pendientes_observado = max(self.max_pendientes_observado, self.pendientes)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), self._medir, funcion, time.perf_counter(), *args
+            )
+        finally:
+            with self._lock:
+                self.pendientes -= 1
+                self.completadas += 1
+
+    def cerrar(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pendientes": self.max_pendientes,
+                "pendientes": self.pendientes,
+                "en_ejecucion": self.en_ejecucion,
+                "en_cola": max(self.pendientes - self.en_ejecucion, 0),
+                "max_pendientes_observado": self.max_pendientes_observado,
+                "completadas": self.completadas,
+                "rechazadas": self.rechazadas,
+                "espera_media_segundos": round(self.espera_total_segundos / self.completadas, 6) if self.completadas else None,
+                "espera_max_segundos": round(self.espera_max_segundos, 6),
+                "ejecucion_media_segundos": round(self.ejecucion_total_segundos / self.completadas, 6) if self.completadas else None,
+            }
+
+
+pool_hash = PoolHash(workers=settings.HASH_POOL_WORKERS, max_pendientes=settings.HASH_POOL_MAX_PENDIENTES)
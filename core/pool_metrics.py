@@ -0,0 +1,183 @@
+# core/pool_metrics.py
+"""
+Telemetría del pool de conexiones de SQLAlchemy.
+
+Los contadores (checkouts, checkins, conexiones físicas abiertas/cerradas,
+invalidaciones, máximo simultáneo) se alimentan con los eventos del pool
+(`checkout`, `checkin`, `connect`, `close`, `invalidate`). SQLAlchemy no emite
+ningún evento *antes* de esperar por una conexión, así que el tiempo de espera
+en la cola del pool se mide en `PoolMedido`, una subclase de
+AsyncAdaptedQueuePool que cronometra `connect()` (espera en la cola, apertura
+de conexiones nuevas y pre-ping; incluidos los timeouts).
+
+`metricas_pool(nombre).instantanea()` devuelve el estado actual del pool
+(tamaño, conexiones en uso, ociosas y de overflow) junto con los contadores;
+lo expone GET /admin/pool.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Muestras de espera conservadas para los percentiles
+MAX_MUESTRAS_ESPERA = 2048
+
+
+class MetricasPool:
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self._lock = threading.Lock()
+        self.engine: Optional[AsyncEngine] = None
+        self.checkouts = 0
+        self.checkins = 0
+        self.conexiones_abiertas = 0
+        self.conexiones_cerradas = 0
+        self.invalidaciones = 0
+        self.timeouts = 0
+        self.en_uso = 0
+        self.max_en_uso = 0
+        self.esperas = 0  # checkouts que tuvieron que esperar (> 1 ms)
+        self.espera_total_segundos = 0.0
+        self.espera_max_segundos = 0.0
+        self._muestras: Deque[float] = deque(maxlen=MAX_MUESTRAS_ESPERA)
+
+    def registrar_espera(self, segundos: float, timeout: bool = False) -> None:
+        with self._lock:
+            self._muestras.append(segundos)
+            self.espera_total_segundos += segundos
+            self.espera_max_segundos = max(self.espera_max_segundos, segundos)
+            if segundos > 0.001:
+                self.esperas += 1
+            if timeout:
+                self.timeouts += 1
+
+    def _percentil(self, muestras: list, p: float) -> Optional[float]:
+        if not muestras:
+            return None
+        return round(muestras[min(len(muestras) - 1, int(p * len(muestras)))], 6)
+
+    def instantanea(self) -> Dict[str, Any]:
+        pool = self.engine.sync_engine.pool if self.engine is not None else None
+        estado: Dict[str, Any] = {"nombre": self.nombre, "clase": type(pool).__name__ if pool else None}
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            estado.update({
+                "tamano": pool.size(),
+                "en_uso": pool.checkedout(),
+                "ociosas": pool.checkedin(),
+                # overflow() es negativo mientras no se ha llenado el tamaño base
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout_segundos": pool.timeout(),
+            })
+        with self._lock:
+            muestras = sorted(self._muestras)
+            estado.update({
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "max_en_uso": self.max_en_uso,
+                "conexiones_abiertas": self.conexiones_abiertas,
+                "conexiones_cerradas": self.conexiones_cerradas,
+                "invalidaciones": self.invalidaciones,
+                "timeouts": self.timeouts,
+                "esperas": self.esperas,
+                "espera_total_segundos": round(self.espera_total_segundos, 6),
+                "espera_max_segundos": round(self.espera_max_segundos, 6),
+                "espera_p50_segundos": self._percentil(muestras, 0.50),
+                "espera_p95_segundos": self._percentil(muestras, 0.95),
+                "espera_p99_segundos": self._percentil(muestras, 0.99),
+            })
+        return estado
+
+    def reiniciar(self) -> None:
+        """Pone a cero los contadores acumulados (no el estado del pool)."""
+        with self._lock:
+            self.checkouts = self.checkins = self.timeouts = self.esperas = 0
+            self.conexiones_abiertas = self.conexiones_cerradas = self.invalidaciones = 0
+            self.max_en_uso = self.en_uso
+            self.espera_total_segundos = self.espera_max_segundos = 0.0
+            self._muestras.clear()
+
+
+# Una entrada por pool instrumentado, indexada por el logging_name del pool
+# (que se conserva cuando engine.dispose() recrea el pool).
+_registro: Dict[str, MetricasPool] = {}
+
+
+class PoolMedido(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool que mide el tiempo de obtención de cada conexión."""
+
+    def connect(self):
+        metricas = _registro.get(self._orig_logging_name or "")
+        if metricas is None:
+            return super().connect()
+        inicio = time.perf_counter()
+        try:
+            conexion = super().connect()
+        except exc.TimeoutError:
+            metricas.registrar_espera(time.perf_counter() - inicio, timeout=True)
+            raise
+        metricas.registrar_espera(time.perf_counter() - inicio)
+        return conexion
+
+
+def instrumentar_engine(engine: AsyncEngine, nombre: str) -> MetricasPool:
+    """
+    Registra los eventos de telemetría en el pool del engine (idempotente).
+
+    `nombre` debe coincidir con el `pool_logging_name` del engine para que
+    PoolMedido asocie las esperas a estas métricas. Los eventos se registran
+    sobre el pool actual y se heredan cuando engine.dispose() lo recrea.
+    """
+    if nombre in _registro:
+        return _registro[nombre]
+    metricas = MetricasPool(nombre)
+    metricas.engine = engine
+    _registro[nombre] = metricas
+    pool = engine.sync_engine.pool
+
+    @event.listens_for(pool, "connect")
+    def _connect(dbapi_connection, connection_record):
+        with metricas._lock:
+            metricas.conexiones_abiertas += 1
+
+    @event.listens_for(pool, "close")
+    def _close(dbapi_connection, connection_record):
+        with metricas._lock:
+            metricas.conexiones_cerradas += 1
+
+    @event.listens_for(pool, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        with metricas._lock:
+            metricas.invalidaciones += 1
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        with metricas._lock:
+            metricas.checkouts += 1
+            metricas.en_uso += 1
+            metricas.max_en_uso = max(metricas.max_en_uso, metricas.en_uso)
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        with metricas._lock:
+            metricas.checkins += 1
+            metricas.en_uso = max(metricas.en_uso - 1, 0)
+
+    return metricas
+
+
+def metricas_pool(nombre: str) -> Optional[MetricasPool]:
+    return _registro.get(nombre)
+
+
+def todas_las_metricas() -> Dict[str, Dict[str, Any]]:
+    return {nombre: m.instantanea() for nombre, m in _registro.items()}
+
+
+def reiniciar_metricas() -> None:
+    for metricas in _registro.values():
+        metricas.reiniciar()
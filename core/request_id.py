@@ -0,0 +1,46 @@
+# core/request_id.py
+"""
+Identificador de petición para correlacionar los logs.
+
+RequestIdMiddleware toma la cabecera `X-Request-ID` entrante (si la envía el
+proxy o el cliente) o genera una nueva, la guarda en un ContextVar durante la
+petición y la devuelve en la respuesta. El filtro de utils/logging.py la añade
+a cada registro emitido en ese contexto (también en las tareas que crea).
+"""
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+CABECERA_REQUEST_ID = "X-Request-ID"
+_CABECERA_ASGI = CABECERA_REQUEST_ID.lower().encode("latin-1")
+# Las ids recibidas se truncan: llegan de fuera y acaban en cada línea de log
+MAX_LONGITUD_REQUEST_ID = 128
+
+request_id_actual: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class RequestIdMiddleware:
+    """Middleware ASGI que asigna y propaga la id de cada petición."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recibida = next((v.decode("latin-1") for k, v in scope["headers"] if k == _CABECERA_ASGI), "")
+        request_id = recibida.strip()[:MAX_LONGITUD_REQUEST_ID] or uuid.uuid4().hex
+        token = request_id_actual.set(request_id)
+
+        async def send_con_request_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (_CABECERA_ASGI, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_con_request_id)
+        finally:
+            request_id_actual.reset(token)
@@ -0,0 +1,121 @@
+# core/scheduler.py
+"""
+Planificador mínimo de tareas periódicas dentro del proceso de la API.
+
+Cada tarea es una corrutina sin argumentos que se ejecuta cada `intervalo_segundos`
+en su propia tarea asyncio; una ejecución nunca se solapa con la anterior de la
+misma tarea. Se arranca y detiene desde el lifespan de main.py.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TareaPeriodica:
+    nombre: str
+    funcion: Callable[[], Awaitable[Any]]
+    intervalo_segundos: float
+    # Si es True la primera ejecución ocurre al arrancar; si no, tras el primer intervalo
+    al_iniciar: bool = False
+    ultima_ejecucion: Optional[float] = None
+    ultima_duracion_segundos: Optional[float] = None
+    ultimo_error: Optional[str] = None
+    ejecuciones: int = 0
+    _despertar: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+
+class Scheduler:
+    def __init__(self) -> None:
+        self._tareas: Dict[str, TareaPeriodica] = {}
+        self._corriendo: Dict[str, asyncio.Task] = {}
+        self._detener = asyncio.Event()
+
+    def registrar(
+        self, nombre: str, funcion: Callable[[], Awaitable[Any]], intervalo_segundos: float, al_iniciar: bool = False
+    ) -> None:
+        """Registra (o reemplaza) una tarea. Un intervalo <= 0 la deja solo bajo demanda."""
+        self._tareas[nombre] = TareaPeriodica(nombre, funcion, intervalo_segundos, al_iniciar)
+
+    async def ejecutar_ahora(self, nombre: str) -> Any:
+        """Ejecuta la tarea inmediatamente (esperando si ya hay una ejecución en curso)."""
+        tarea = self._tareas.get(nombre)
+        if tarea is None:
+            raise KeyError(f"Tarea programada desconocida: {nombre}")
+        return await self._ejecutar(tarea)
+
+    def solicitar(self, nombre: str) -> None:
+        """Adelanta la próxima ejecución periódica de la tarea sin esperarla."""
+        tarea = self._tareas.get(nombre)
+        if tarea is None:
+            raise KeyError(f"Tarea programada desconocida: {nombre}")
+        tarea._despertar.set()
+
+    async def _ejecutar(self, tarea: TareaPeriodica) -> Any:
+        async with tarea._lock:
+            inicio = time.perf_counter()
+            try:
+                resultado = await tarea.funcion()
+                tarea.ultimo_error = None
+                return resultado
+            except Exception as e:
+                tarea.ultimo_error = str(e)
+                raise
+            finally:
+                tarea.ejecuciones += 1
+                tarea.ultima_ejecucion = time.time()
+                tarea.ultima_duracion_segundos = round(time.perf_counter() - inicio, 4)
+
+    async def _bucle(self, tarea: TareaPeriodica) -> None:
+        primera = True
+        while not self._detener.is_set():
+            if not (primera and tarea.al_iniciar):
+                try:
+                    timeout = tarea.intervalo_segundos if tarea.intervalo_segundos > 0 else None
+                    await asyncio.wait_for(tarea._despertar.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                tarea._despertar.clear()
+                if self._detener.is_set():
+                    break
+            primera = False
+            try:
+                await self._ejecutar(tarea)
+            except Exception as e:
+                logger.error(f"Tarea programada '{tarea.nombre}' falló: {e}", exc_info=True)
+
+    def iniciar(self) -> None:
+        self._detener.clear()
+        for nombre, tarea in self._tareas.items():
+            if nombre not in self._corriendo or self._corriendo[nombre].done():
+                self._corriendo[nombre] = asyncio.create_task(self._bucle(tarea), name=f"scheduler-{nombre}")
+        logger.info(f"Scheduler iniciado con {len(self._tareas)} tareas: {', '.join(self._tareas) or '-'}")
+
+    async def detener(self) -> None:
+        self._detener.set()
+        for tarea in self._tareas.values():
+            tarea._despertar.set()
+        corriendo = list(self._corriendo.values())
+        self._corriendo.clear()
+        await asyncio.gather(*corriendo, return_exceptions=True)
+        logger.info("Scheduler detenido.")
+
+    def estado(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            nombre: {
+                "intervalo_segundos": t.intervalo_segundos,
+                "ejecuciones": t.ejecuciones,
+                "ultima_ejecucion": t.ultima_ejecucion,
+                "ultima_duracion_segundos": t.ultima_duracion_segundos,
+                "ultimo_error": t.ultimo_error,
+            }
+            for nombre, t in self._tareas.items()
+        }
+
+
+scheduler = Scheduler()
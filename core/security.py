@@ -3,6 +3,7 @@ from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, status
 from core.config import settings
+from core.pool_hash import pool_hash
 import warnings
 
 # Suprimir warnings específicos de passlib
@@ -31,6 +32,15 @@ def get_password_hash(password: str) -> str:
     """Genera el hash de una contraseña plana."""
     return pwd_context.hash(password)
 
+# --- Variantes asíncronas: bcrypt fuera del event loop (core/pool_hash.py) ---
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Como verify_password, en el pool de hashing. Puede lanzar PoolHashSaturadoError."""
+    return await pool_hash.ejecutar(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Como get_password_hash, en el pool de hashing. Puede lanzar PoolHashSaturadoError."""
+    return await pool_hash.ejecutar(get_password_hash, password)
+
 # --- Funciones de Token (las que ya tenías) ---
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
@@ -1,8 +1,9 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 
 # Removed jsonable_encoder import as it's deprecated with Pydantic v2
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import SQLModel
 
@@ -10,7 +11,38 @@ ModelType = TypeVar("ModelType", bound=SQLModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+
+class FiltroInvalidoError(ValueError):
+    """A filter or sort key not allowed by the listing."""
+
+
+@dataclass(frozen=True)
+class EspecificacionListado:
+    """
+    Filters and sort keys a CRUD listing accepts. Everything is compiled into
+    SQL (WHERE / ORDER BY) before paginating.
+
+    Args:
+        filtros: Columns that can be filtered by equality.
+        busqueda: Columns for the text search (ILIKE '%text%', OR-combined).
+        orden: Allowed sort keys; a "-" prefix sorts descending.
+        orden_por_defecto: Keys used when no sort is requested. The id is always
+            appended as a tie-breaker so pagination is stable.
+    """
+    filtros: Tuple[str, ...] = ()
+    busqueda: Tuple[str, ...] = ()
+    orden: Tuple[str, ...] = ()
+    orden_por_defecto: Tuple[str, ...] = ()
+
+
+def _escapar_like(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Filters and sort keys for get_multi; each CRUD declares its own
+    listado: ClassVar[EspecificacionListado] = EspecificacionListado()
+
     def __init__(self, model: Type[ModelType]):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
@@ -40,47 +72,82 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             result = await session.exec(select(self.model).where(self.model.id == id))
             return result.first()
 
+    def aplicar_listado(
+        self,
+        statement,
+        *,
+        filtros: Optional[Dict[str, Any]] = None,
+        busqueda: Optional[str] = None,
+        orden: Optional[str] = None,
+    ):
+        """
+        Apply the CRUD's `listado` filters, text search and sort to a statement.
+
+        Args:
+            statement: A SELECT over the model (entities or projected columns).
+            filtros: Field -> value; None values are ignored.
+            busqueda: Text to search for in the search columns.
+            orden: Comma-separated sort keys, e.g. "marca,-creado_en".
+
+        Returns:
+            The statement with the WHERE and ORDER BY clauses added.
+
+        Raises:
+            FiltroInvalidoError: If a filter or sort key is not allowed.
+        """
+        for campo, valor in (filtros or {}).items():
+            if valor is None:
+                continue
+            if campo not in self.listado.filtros:
+                raise FiltroInvalidoError(f"Filtro no admitido: {campo}")
+            statement = statement.where(getattr(self.model, campo) == valor)
+
+        if busqueda and busqueda.strip() and self.listado.busqueda:
+            patron = f"%{_escapar_like(busqueda.strip())}%"
+            statement = statement.where(or_(*(
+                getattr(self.model, campo).ilike(patron, escape="\\") for campo in self.listado.busqueda
+            )))
+
+        claves = [c.strip() for c in orden.split(",") if c.strip()] if orden else list(self.listado.orden_por_defecto)
+        columnas_orden = []
+        for clave in claves:
+            campo = clave.lstrip("-")
+            if campo not in self.listado.orden:
+                raise FiltroInvalidoError(f"Orden no admitido: {clave} (admitidos: {', '.join(self.listado.orden)})")
+            columna = getattr(self.model, campo)
+            columnas_orden.append(columna.desc() if clave.startswith("-") else columna.asc())
+        if columnas_orden:
+            statement = statement.order_by(*columnas_orden, self.model.id.asc())
+        return statement
+
     async def get_multi(
-        self, session: AsyncSession, *, skip: int = 0, limit: int = 100
+        self,
+        session: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        filtros: Optional[Dict[str, Any]] = None,
+        busqueda: Optional[str] = None,
+        orden: Optional[str] = None,
     ) -> List[ModelType]:
         """
-        Retrieve multiple records.
+        Retrieve multiple records, filtered and sorted in SQL.
 
         Args:
             session: The database session.
             skip: The number of records to skip.
             limit: The maximum number of records to return.
+            filtros, busqueda, orden: See `aplicar_listado`.
 
         Returns:
             A list of model instances.
+
+        Raises:
+            FiltroInvalidoError: If a filter or sort key is not allowed.
         """
-        # Using session.exec() instead of session.execute() to fix deprecation warning
-        # session.exec() returns a different result type than session.execute()
-        try:
-            # Direct query with exec
-            result = await session.exec(select(self.model).offset(skip).limit(limit))
-            # Process results and handle both direct objects and tuples
-            items = []
-            for item in result:
-                # Check if item is a tuple (which happens with certain SQLAlchemy queries)
-                if isinstance(item, tuple):
-                    # Extract the model instance from the tuple (usually first element)
-                    if len(item) > 0 and isinstance(item[0], self.model):
-                        items.append(item[0])
-                else:
-                    # Item is already a model instance
-                    items.append(item)
-            return items
-        except Exception as e:
-            print(f"Error in get_multi: {e}")
-            # Fallback to execute approach if exec fails
-            try:
-                # Legacy approach with execute
-                result = await session.execute(select(self.model).offset(skip).limit(limit))
-                return list(result.scalars().all())
-            except Exception as e2:
-                print(f"Error in get_multi fallback: {e2}")
-                return []
+        statement = self.aplicar_listado(select(self.model), filtros=filtros, busqueda=busqueda, orden=orden)
+        result = await session.exec(statement.offset(skip).limit(limit))
+        return list(result.scalars().all())
 
     async def create(self, session: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         """
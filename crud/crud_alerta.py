@@ -1,9 +1,135 @@
 # crud/crud_alerta.py
+from datetime import datetime, timezone
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
 from crud.base import CRUDBase
-from models.alerta import Alerta
+from models.alerta import Alerta, clave_dedup_alerta
 from schemas.alerta import AlertaCreate, AlertaUpdate
 
+# Predicado del índice parcial uq_alertas_abiertas_clave_dedup, por dialecto
+_PREDICADO_ABIERTAS = {
+    "postgresql": "resuelta = false",
+    "sqlite": "resuelta = 0",
+}
+_INSERT_POR_DIALECTO = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+# Columnas que una repetición actualiza con los datos más recientes
+_COLUMNAS_REFRESCADAS = ("descripcion", "nivel_severidad", "datos_contexto", "parametro_id")
+
+
 class CRUDAlerta(CRUDBase[Alerta, AlertaCreate, AlertaUpdate]):
-    pass
 
-alerta = CRUDAlerta(Alerta)
\ No newline at end of file
+    async def upsert_abierta(self, session: AsyncSession, *, db_obj: Alerta) -> Tuple[Alerta, bool]:
+        """
+        Inserta la alerta o, si ya hay una abierta con la misma clave de deduplicación,
+        incrementa sus ocurrencias y su última ocurrencia (INSERT ... ON CONFLICT).
+        No confirma la transacción.
+
+        Returns:
+            (alerta persistida, True si es nueva)
+        """
+        ahora = datetime.now(timezone.utc)
+        db_obj.clave_dedup = db_obj.clave_dedup or clave_dedup_alerta(
+            db_obj.tipo_alerta, db_obj.neumatico_id, db_obj.vehiculo_id, db_obj.modelo_id, db_obj.almacen_id
+        )
+        db_obj.ocurrencias = 1
+        db_obj.ultima_ocurrencia_en = ahora
+
+        connection = await session.connection()
+        dialecto = connection.dialect.name
+        insert = _INSERT_POR_DIALECTO.get(dialecto)
+        if insert is None:
+            return await self._upsert_abierta_generico(session, db_obj, ahora)
+
+        tabla = Alerta.__table__
+        valores = {c.name: getattr(db_obj, c.name) for c in tabla.columns}
+        stmt = self._stmt_upsert(dialecto, [valores], contar_ocurrencia=True)
+        alerta_id, ocurrencias = (await session.exec(stmt.returning(tabla.c.id, tabla.c.ocurrencias))).one()
+
+        alerta = await session.get(Alerta, alerta_id, populate_existing=True)
+        return alerta, ocurrencias == 1
+
+    async def upsert_abiertas_bulk(
+        self, session: AsyncSession, *, filas: List[Dict[str, Any]], contar_ocurrencia: bool = False, tamano_bloque: int = 1000
+    ) -> int:
+        """
+        Inserta en bloque alertas abiertas (dicts con los campos de Alerta) deduplicando
+        contra las existentes. Si `contar_ocurrencia` es False una alerta ya abierta solo
+        actualiza su última ocurrencia (p.ej. barridos que re-confirman la misma condición).
+        Las filas de una misma llamada no deben repetir clave. No confirma la transacción.
+
+        Returns:
+            Número de filas enviadas.
+        """
+        if not filas:
+            return 0
+        dialecto = (await session.connection()).dialect.name
+        if dialecto not in _INSERT_POR_DIALECTO:
+            for fila in filas:
+                await self._upsert_abierta_generico(session, Alerta(**fila), datetime.now(timezone.utc))
+            return len(filas)
+
+        ahora = datetime.now(timezone.utc)
+        base = {c.name: None for c in Alerta.__table__.columns}
+        base.update(resuelta=False, nivel_severidad="INFO", ocurrencias=1, creado_en=ahora,
+                    actualizado_en=ahora, ultima_ocurrencia_en=ahora)
+        valores = []
+        for fila in filas:
+            valor = {**base, **fila}
+            valor["id"] = valor["id"] or uuid.uuid4()
+            valor["tipo_alerta"] = getattr(valor["tipo_alerta"], "value", valor["tipo_alerta"])
+            valor["clave_dedup"] = valor["clave_dedup"] or clave_dedup_alerta(
+                valor["tipo_alerta"], valor["neumatico_id"], valor["vehiculo_id"], valor["modelo_id"], valor["almacen_id"]
+            )
+            valores.append(valor)
+        # executemany sobre una única sentencia: el driver agrupa las filas (insertmanyvalues)
+        stmt = self._stmt_upsert(dialecto, None, contar_ocurrencia=contar_ocurrencia)
+        for inicio in range(0, len(valores), tamano_bloque):
+            await session.exec(stmt, params=valores[inicio:inicio + tamano_bloque])
+        return len(filas)
+
+    @staticmethod
+    def _stmt_upsert(dialecto: str, valores: Optional[List[Dict[str, Any]]], contar_ocurrencia: bool):
+        tabla = Alerta.__table__
+        stmt = _INSERT_POR_DIALECTO[dialecto](tabla)
+        if valores is not None:
+            stmt = stmt.values(valores)
+        set_ = {
+            "ultima_ocurrencia_en": stmt.excluded.ultima_ocurrencia_en,
+            "actualizado_en": stmt.excluded.actualizado_en,
+            **{col: stmt.excluded[col] for col in _COLUMNAS_REFRESCADAS},
+        }
+        if contar_ocurrencia:
+            set_["ocurrencias"] = tabla.c.ocurrencias + 1
+        return stmt.on_conflict_do_update(
+            index_elements=[tabla.c.clave_dedup],
+            index_where=text(_PREDICADO_ABIERTAS[dialecto]),
+            set_=set_,
+        )
+
+    async def _upsert_abierta_generico(self, session: AsyncSession, db_obj: Alerta, ahora: datetime) -> Tuple[Alerta, bool]:
+        # Dialectos sin ON CONFLICT: lectura + escritura (sin garantía ante concurrencia)
+        stmt = select(Alerta).where(Alerta.clave_dedup == db_obj.clave_dedup, Alerta.resuelta == False)  # noqa: E712
+        existente = (await session.exec(stmt)).first()
+        if existente is None:
+            session.add(db_obj)
+            await session.flush()
+            return db_obj, True
+        existente.ocurrencias += 1
+        existente.ultima_ocurrencia_en = ahora
+        for col in _COLUMNAS_REFRESCADAS:
+            setattr(existente, col, getattr(db_obj, col))
+        session.add(existente)
+        await session.flush()
+        return existente, False
+
+
+alerta = CRUDAlerta(Alerta)
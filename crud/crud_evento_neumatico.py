@@ -1,8 +1,164 @@
 from crud.base import CRUDBase
 from models.evento_neumatico import EventoNeumatico
-from schemas.evento_neumatico import EventoNeumaticoCreate, EventoNeumaticoUpdate
+from models.motivo_desecho import MotivoDesecho
+from models.posicion_neumatico import PosicionNeumatico
+from models.proveedor import Proveedor
+from models.usuario import Usuario
+from models.vehiculo import Vehiculo
+from schemas.common import TipoEventoNeumaticoEnum
+from schemas.evento_neumatico import EventoNeumaticoCreate
 
-class CRUDEventoNeumatico(CRUDBase[EventoNeumatico, EventoNeumaticoCreate, EventoNeumaticoUpdate]):
-    pass # No custom logic needed for now
+import uuid
+from datetime import datetime
 
-evento_neumatico = CRUDEventoNeumatico(EventoNeumatico)
\ No newline at end of file
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.cursor import aplicar_cursor, paginar
+
+# Los eventos no se editan (historial de solo inserción): no hay schema de actualización
+class CRUDEventoNeumatico(CRUDBase[EventoNeumatico, EventoNeumaticoCreate, EventoNeumaticoCreate]):
+    def _consulta_historial(
+        self,
+        neumatico_ids: Sequence[uuid.UUID],
+        *,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        tipos_evento: Optional[Sequence[TipoEventoNeumaticoEnum]] = None,
+    ):
+        """
+        SELECT del historial con los campos de HistorialNeumaticoItem: las mismas
+        etiquetas que vw_historial_neumaticos (usuario, placa, posición, proveedor,
+        motivo de desecho), pero partiendo de 'eventos_neumaticos' filtrado por
+        neumatico_id para que el rango de fechas y el cursor usen el índice
+        (neumatico_id, timestamp_evento, id). La vista numera los eventos con
+        row_number() antes de filtrar y no admite ese recorrido.
+
+        `desde` es inclusivo y `hasta` exclusivo.
+        """
+        stmt = (
+            select(
+                EventoNeumatico.id,
+                EventoNeumatico.neumatico_id,
+                EventoNeumatico.tipo_evento,
+                EventoNeumatico.timestamp_evento,
+                Usuario.username.label("usuario_registra"),
+                Vehiculo.placa,
+                Vehiculo.numero_economico,
+                PosicionNeumatico.codigo_posicion,
+                EventoNeumatico.odometro_vehiculo_en_evento,
+                EventoNeumatico.profundidad_remanente_mm,
+                EventoNeumatico.presion_psi,
+                EventoNeumatico.costo_evento,
+                EventoNeumatico.moneda_costo,
+                Proveedor.nombre.label("proveedor_servicio"),
+                MotivoDesecho.descripcion.label("motivo_desecho"),
+                EventoNeumatico.notas,
+            )
+            .outerjoin(Usuario, EventoNeumatico.usuario_id == Usuario.id)
+            .outerjoin(Vehiculo, EventoNeumatico.vehiculo_id == Vehiculo.id)
+            .outerjoin(PosicionNeumatico, EventoNeumatico.posicion_id == PosicionNeumatico.id)
+            .outerjoin(Proveedor, EventoNeumatico.proveedor_servicio_id == Proveedor.id)
+            .outerjoin(MotivoDesecho, EventoNeumatico.motivo_desecho_id_evento == MotivoDesecho.id)
+        )
+        if len(neumatico_ids) == 1:
+            stmt = stmt.where(EventoNeumatico.neumatico_id == neumatico_ids[0])
+        else:
+            stmt = stmt.where(EventoNeumatico.neumatico_id.in_(neumatico_ids))
+        if desde is not None:
+            stmt = stmt.where(EventoNeumatico.timestamp_evento >= desde)
+        if hasta is not None:
+            stmt = stmt.where(EventoNeumatico.timestamp_evento < hasta)
+        if tipos_evento:
+            stmt = stmt.where(EventoNeumatico.tipo_evento.in_(tipos_evento))
+        return stmt
+
+    async def get_historial(
+        self, session: AsyncSession, neumatico_id: uuid.UUID, **filtros: Any
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve the full event history of a tire, most recent first.
+
+        Args:
+            session: The database session.
+            neumatico_id: The ID of the tire.
+            **filtros: Filters of `_consulta_historial` (desde, hasta, tipos_evento).
+
+        Returns:
+            A list of dicts with the fields of HistorialNeumaticoItem.
+        """
+        stmt = self._consulta_historial([neumatico_id], **filtros).order_by(
+            EventoNeumatico.timestamp_evento.desc(), EventoNeumatico.id.desc()
+        )
+        result = await session.exec(stmt)
+        return [self._sin_neumatico_id(fila) for fila in result.mappings()]
+
+    async def get_pagina_historial(
+        self, session: AsyncSession, neumatico_id: uuid.UUID, *, limit: int, cursor: Optional[str] = None,
+        **filtros: Any,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Retrieve one page of a tire's history, keyset-paginated over (timestamp_evento, id) descending.
+
+        Returns:
+            The rows of the page and the cursor of the next one (None on the last page).
+
+        Raises:
+            CursorInvalidoError: If the cursor is not valid.
+        """
+        stmt = aplicar_cursor(
+            self._consulta_historial([neumatico_id], **filtros),
+            EventoNeumatico.timestamp_evento, EventoNeumatico.id, cursor, limit,
+        )
+        result = await session.exec(stmt)
+        filas, siguiente = paginar(
+            [self._sin_neumatico_id(fila) for fila in result.mappings()], limit,
+            lambda f: (f["timestamp_evento"], f["id"]),
+        )
+        return filas, siguiente
+
+    async def get_historiales(
+        self, session: AsyncSession, neumatico_ids: Sequence[uuid.UUID], *,
+        limit_por_neumatico: Optional[int] = None, **filtros: Any,
+    ) -> Dict[uuid.UUID, List[Dict[str, Any]]]:
+        """
+        Retrieve the histories of several tires in a single query.
+
+        Args:
+            session: The database session.
+            neumatico_ids: The IDs of the tires.
+            limit_por_neumatico: Keep only the N most recent events of each tire
+                (row_number() over each tire's events, after the filters).
+            **filtros: Filters of `_consulta_historial` (desde, hasta, tipos_evento).
+
+        Returns:
+            A dict tire ID -> its events, most recent first (empty list if it has none).
+        """
+        stmt = self._consulta_historial(neumatico_ids, **filtros)
+        orden = (EventoNeumatico.timestamp_evento.desc(), EventoNeumatico.id.desc())
+        if limit_por_neumatico is not None:
+            numerados = stmt.add_columns(
+                func.row_number().over(partition_by=EventoNeumatico.neumatico_id, order_by=orden).label("_n")
+            ).subquery()
+            columnas = [columna for columna in numerados.c if columna.key != "_n"]
+            stmt = (
+                select(*columnas)
+                .where(numerados.c._n <= limit_por_neumatico)
+                .order_by(numerados.c.neumatico_id, numerados.c._n)
+            )
+        else:
+            stmt = stmt.order_by(EventoNeumatico.neumatico_id, *orden)
+        result = await session.exec(stmt)
+        historiales: Dict[uuid.UUID, List[Dict[str, Any]]] = {neumatico_id: [] for neumatico_id in neumatico_ids}
+        for fila in result.mappings():
+            historiales[fila["neumatico_id"]].append(self._sin_neumatico_id(fila))
+        return historiales
+
+    @staticmethod
+    def _sin_neumatico_id(fila) -> Dict[str, Any]:
+        datos = dict(fila)
+        del datos["neumatico_id"]
+        return datos
+
+evento_neumatico = CRUDEventoNeumatico(EventoNeumatico)
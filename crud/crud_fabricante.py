@@ -1,12 +1,21 @@
-from crud.base import CRUDBase
+from crud.base import CRUDBase, EspecificacionListado
 from models.fabricante import FabricanteNeumatico # Corregir la importación del modelo
 from schemas.fabricante import FabricanteNeumaticoCreate, FabricanteNeumaticoUpdate # Corregir la importación de schemas
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Union
+
+from services.catalogo_cache import catalogo_cache
 
 class CRUDFabricante(CRUDBase[FabricanteNeumatico, FabricanteNeumaticoCreate, FabricanteNeumaticoUpdate]):
+    listado = EspecificacionListado(
+        filtros=("activo", "pais_origen"),
+        busqueda=("nombre", "codigo_abreviado"),
+        orden=("nombre", "codigo_abreviado", "creado_en"),
+        orden_por_defecto=("nombre",),
+    )
+
     async def get_by_name(self, session: AsyncSession, *, name: str) -> Optional[FabricanteNeumatico]:
         """
         Retrieve a manufacturer by its name.
@@ -87,5 +96,23 @@ class CRUDFabricante(CRUDBase[FabricanteNeumatico, FabricanteNeumaticoCreate, Fa
         result = await session.exec(statement)
         return result.scalars().all()
 
+    async def update(
+        self,
+        session: AsyncSession,
+        *,
+        db_obj: FabricanteNeumatico,
+        obj_in: Union[FabricanteNeumaticoUpdate, Dict[str, Any]]
+    ) -> FabricanteNeumatico:
+        """Update a manufacturer and invalidate its cached catalog entry."""
+        db_obj = await super().update(session, db_obj=db_obj, obj_in=obj_in)
+        catalogo_cache.invalidar_fabricante(db_obj.id)
+        return db_obj
+
+    async def remove(self, session: AsyncSession, *, id: Any) -> Optional[FabricanteNeumatico]:
+        """Delete a manufacturer and invalidate its cached catalog entry."""
+        db_obj = await super().remove(session, id=id)
+        catalogo_cache.invalidar_fabricante(id)
+        return db_obj
+
 
 fabricante = CRUDFabricante(FabricanteNeumatico)
\ No newline at end of file
@@ -1,9 +1,35 @@
 # crud/crud_modelo.py
+from typing import Any, Dict, Optional, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from crud.base import CRUDBase
-from models.modelo import Modelo
+from models.modelo import ModeloNeumatico
 from schemas.modelo import ModeloCreate, ModeloUpdate
+from services.catalogo_cache import catalogo_cache
+
+class CRUDModelo(CRUDBase[ModeloNeumatico, ModeloCreate, ModeloUpdate]):
+    """CRUD de modelos de neumático; toda escritura invalida la caché de catálogo."""
+
+    async def create(self, session: AsyncSession, *, obj_in: ModeloCreate) -> ModeloNeumatico:
+        db_obj = await super().create(session, obj_in=obj_in)
+        catalogo_cache.invalidar_modelo(db_obj.id)
+        return db_obj
+
+    async def update(
+        self,
+        session: AsyncSession,
+        *,
+        db_obj: ModeloNeumatico,
+        obj_in: Union[ModeloUpdate, Dict[str, Any]]
+    ) -> ModeloNeumatico:
+        db_obj = await super().update(session, db_obj=db_obj, obj_in=obj_in)
+        catalogo_cache.invalidar_modelo(db_obj.id)
+        return db_obj
 
-class CRUDModelo(CRUDBase[Modelo, ModeloCreate, ModeloUpdate]):
-    pass # No custom logic needed for now
+    async def remove(self, session: AsyncSession, *, id: Any) -> Optional[ModeloNeumatico]:
+        db_obj = await super().remove(session, id=id)
+        catalogo_cache.invalidar_modelo(id)
+        return db_obj
 
-modelo = CRUDModelo(Modelo)
\ No newline at end of file
+modelo = CRUDModelo(ModeloNeumatico)
@@ -1,29 +1,128 @@
 from crud.base import CRUDBase
+from models.fabricante import FabricanteNeumatico
+from models.modelo import ModeloNeumatico
 from models.neumatico import Neumatico
+from models.posicion_neumatico import PosicionNeumatico
+from models.tipo_vehiculo import TipoVehiculo
+from models.vehiculo import Vehiculo
+from schemas.common import EstadoNeumaticoEnum
 from schemas.neumatico import NeumaticoCreate, NeumaticoUpdate
 
+import uuid
+
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql import text # Importar text para usar vistas
-from typing import List, Dict, Any # Importar tipos para la respuesta de la vista
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple # Importar tipos para la respuesta
+
+from utils.cursor import aplicar_cursor, paginar
 
 class CRUDNeumatico(CRUDBase[Neumatico, NeumaticoCreate, NeumaticoUpdate]):
-    async def get_neumaticos_instalados(self, session: AsyncSession) -> List[Dict[str, Any]]:
+    def _consulta_instalados(
+        self,
+        *,
+        vehiculo_id: Optional[uuid.UUID] = None,
+        tipo_vehiculo_id: Optional[uuid.UUID] = None,
+        fabricante_id: Optional[uuid.UUID] = None,
+        profundidad_min: Optional[float] = None,
+        profundidad_max: Optional[float] = None,
+    ):
         """
-        Retrieve a list of currently installed tires from the optimized view.
+        SELECT de los neumáticos instalados con los campos de NeumaticoInstaladoItem
+        y los filtros aplicados en SQL.
+
+        La condición actual (profundidad, presión, fecha de la última inspección)
+        se lee de las columnas desnormalizadas de 'neumaticos', sin buscar la
+        última inspección en 'eventos_neumaticos'.
+        """
+        stmt = (
+            select(
+                Neumatico.id,
+                Neumatico.numero_serie,
+                Neumatico.dot,
+                ModeloNeumatico.nombre_modelo,
+                ModeloNeumatico.medida,
+                FabricanteNeumatico.nombre.label("fabricante"),
+                Vehiculo.placa,
+                Vehiculo.numero_economico,
+                TipoVehiculo.nombre.label("tipo_vehiculo"),
+                PosicionNeumatico.codigo_posicion,
+                Neumatico.profundidad_actual_mm,
+                Neumatico.presion_actual_psi,
+                Neumatico.fecha_ultima_inspeccion,
+                Neumatico.kilometraje_acumulado.label("kilometraje_neumatico_acumulado"),
+                Neumatico.vida_actual,
+                Neumatico.reencauches_realizados,
+            )
+            .join(ModeloNeumatico, Neumatico.modelo_id == ModeloNeumatico.id)
+            .join(FabricanteNeumatico, ModeloNeumatico.fabricante_id == FabricanteNeumatico.id)
+            .outerjoin(Vehiculo, Neumatico.ubicacion_actual_vehiculo_id == Vehiculo.id)
+            .outerjoin(TipoVehiculo, Vehiculo.tipo_vehiculo_id == TipoVehiculo.id)
+            .outerjoin(PosicionNeumatico, Neumatico.ubicacion_actual_posicion_id == PosicionNeumatico.id)
+            .where(Neumatico.estado_actual == EstadoNeumaticoEnum.INSTALADO)
+        )
+        if vehiculo_id is not None:
+            stmt = stmt.where(Neumatico.ubicacion_actual_vehiculo_id == vehiculo_id)
+        if tipo_vehiculo_id is not None:
+            # vehiculos.tipo_vehiculo_id se guarda como texto
+            stmt = stmt.where(Vehiculo.tipo_vehiculo_id == str(tipo_vehiculo_id))
+        if fabricante_id is not None:
+            stmt = stmt.where(ModeloNeumatico.fabricante_id == fabricante_id)
+        if profundidad_min is not None:
+            stmt = stmt.where(Neumatico.profundidad_actual_mm >= profundidad_min)
+        if profundidad_max is not None:
+            stmt = stmt.where(Neumatico.profundidad_actual_mm <= profundidad_max)
+        return stmt
+
+    async def get_neumaticos_instalados(self, session: AsyncSession, **filtros: Any) -> List[Dict[str, Any]]:
+        """
+        Retrieve a list of currently installed tires.
 
         Args:
             session: The database session.
+            **filtros: Filters of `_consulta_instalados` (vehiculo_id, tipo_vehiculo_id,
+                fabricante_id, profundidad_min, profundidad_max).
 
         Returns:
-            A list of dictionaries representing the installed tires from the view.
-        """
-        # Asegúrate que la vista 'vw_neumaticos_instalados_optimizada' existe en tu BD
-        view_query = text("SELECT * FROM vw_neumaticos_instalados_optimizada")
-        # Para consultas SQL directas con text(), debemos seguir usando execute()
-        # ya que exec() no funciona con consultas SQL directas
-        result = await session.execute(view_query)
-        # Obtener como lista de diccionarios (o RowMapping)
-        instalados_data = result.mappings().all()
-        return instalados_data
-
-neumatico = CRUDNeumatico(Neumatico)
\ No newline at end of file
+            A list of dicts with the fields of NeumaticoInstaladoItem.
+        """
+        result = await session.execute(self._consulta_instalados(**filtros))
+        return [dict(fila) for fila in result.mappings()]
+
+    async def get_pagina_instalados(
+        self, session: AsyncSession, *, limit: int, cursor: Optional[str] = None, **filtros: Any
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Retrieve one page of installed tires, keyset-paginated over (creado_en, id).
+
+        Returns:
+            The rows of the page and the cursor of the next one (None on the last page).
+
+        Raises:
+            CursorInvalidoError: If the cursor is not valid.
+        """
+        stmt = self._consulta_instalados(**filtros).add_columns(Neumatico.creado_en.label("_creado_en"))
+        stmt = aplicar_cursor(stmt, Neumatico.creado_en, Neumatico.id, cursor, limit, descendente=False)
+        result = await session.execute(stmt)
+        filas, siguiente = paginar(
+            [dict(fila) for fila in result.mappings()], limit, lambda f: (f["_creado_en"], f["id"])
+        )
+        for fila in filas:
+            del fila["_creado_en"]
+        return filas, siguiente
+
+    async def iterar_neumaticos_instalados(
+        self, session: AsyncSession, *, lote: int = 1000, **filtros: Any
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield the installed tires in batches of `lote` rows from a server-side
+        cursor (stream_results), so memory stays constant whatever the fleet size.
+        """
+        stmt = self._consulta_instalados(**filtros).execution_options(stream_results=True, yield_per=lote)
+        result = await session.stream(stmt)
+        try:
+            async for filas in result.mappings().partitions(lote):
+                yield [dict(fila) for fila in filas]
+        finally:
+            await result.close()
+
+neumatico = CRUDNeumatico(Neumatico)
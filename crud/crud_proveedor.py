@@ -1,4 +1,4 @@
-from crud.base import CRUDBase
+from crud.base import CRUDBase, EspecificacionListado
 from models.proveedor import Proveedor
 from schemas.proveedor import ProveedorCreate, ProveedorUpdate
 
@@ -7,6 +7,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 
 class CRUDProveedor(CRUDBase[Proveedor, ProveedorCreate, ProveedorUpdate]):
+    listado = EspecificacionListado(
+        filtros=("activo", "tipo"),
+        busqueda=("nombre", "rfc", "email"),
+        orden=("nombre", "creado_en"),
+        orden_por_defecto=("nombre",),
+    )
+
     async def get_by_name(self, session: AsyncSession, *, name: str) -> Optional[Proveedor]:
         """
         Retrieve a provider by its name.
@@ -1,4 +1,4 @@
-from crud.base import CRUDBase
+from crud.base import CRUDBase, EspecificacionListado
 from models.tipo_vehiculo import TipoVehiculo
 from schemas.tipo_vehiculo import TipoVehiculoCreate, TipoVehiculoUpdate
 
@@ -7,6 +7,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 
 class CRUDTipoVehiculo(CRUDBase[TipoVehiculo, TipoVehiculoCreate, TipoVehiculoUpdate]):
+    listado = EspecificacionListado(
+        filtros=("activo",),
+        busqueda=("nombre", "descripcion"),
+        orden=("nombre", "creado_en"),
+        orden_por_defecto=("nombre",),
+    )
+
     async def get_by_name(self, session: AsyncSession, *, name: str) -> Optional[TipoVehiculo]:
         """
         Retrieve a vehicle type by its name.
@@ -7,7 +7,8 @@ from sqlmodel import select # <--- IMPORTACIÓN AÑADIDA AQUÍ
 from crud.base import CRUDBase
 from models.usuario import Usuario
 from schemas.usuario import UsuarioCreate, UsuarioUpdate # Asegúrate que este archivo exista y sea correcto
-from core.security import get_password_hash
+from core.security import get_password_hash_async
+from services.usuario_cache import usuario_cache
 
 class CRUDUsuario(CRUDBase[Usuario, UsuarioCreate, UsuarioUpdate]):
     async def create(self, session: AsyncSession, *, obj_in: UsuarioCreate) -> Usuario:
@@ -22,7 +23,7 @@ class CRUDUsuario(CRUDBase[Usuario, UsuarioCreate, UsuarioUpdate]):
             The created user instance.
         """
         # Hash the password before creating the user
-        hashed_password = get_password_hash(obj_in.password)
+        hashed_password = await get_password_hash_async(obj_in.password)
         # Create a dictionary from the input object, excluding the plain password
         # For Pydantic V2, model_dump() is the successor to dict()
         obj_in_data = obj_in.model_dump(exclude={"password"}) 
@@ -60,12 +61,31 @@ class CRUDUsuario(CRUDBase[Usuario, UsuarioCreate, UsuarioUpdate]):
 
         # If password is in update data, hash it
         if "password" in update_data and update_data["password"]:
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await get_password_hash_async(update_data["password"])
             update_data["hashed_password"] = hashed_password
             del update_data["password"] # Remove plain password from update data
 
         # Call the superclass update method
-        return await super().update(session, db_obj=db_obj, obj_in=update_data)
+        usuario_actualizado = await super().update(session, db_obj=db_obj, obj_in=update_data)
+        # Tras el commit: la caché de get_current_user no debe servir la versión anterior
+        usuario_cache.invalidar_usuario(usuario_actualizado.username)
+        return usuario_actualizado
+
+    async def remove(self, session: AsyncSession, *, id: Any) -> Optional[Usuario]:
+        """
+        Delete a user and drop it from the authenticated-user cache.
+
+        Args:
+            session: The database session.
+            id: The ID of the user to delete.
+
+        Returns:
+            The deleted user instance, or None if it did not exist.
+        """
+        db_obj = await super().remove(session, id=id)
+        if db_obj is not None:
+            usuario_cache.invalidar_usuario(db_obj.username)
+        return db_obj
 
     async def get_by_email(self, session: AsyncSession, *, email: str) -> Optional[Usuario]:
         """
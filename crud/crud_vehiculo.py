@@ -1,12 +1,91 @@
-from crud.base import CRUDBase
+import uuid
+
+from crud.base import CRUDBase, EspecificacionListado
+from models.configuracion_eje import ConfiguracionEje
+from models.neumatico import Neumatico
+from models.posicion_neumatico import PosicionNeumatico
 from models.vehiculo import Vehiculo
+from schemas.common import EstadoNeumaticoEnum
 from schemas.vehiculo import VehiculoCreate, VehiculoUpdate
 
-from sqlalchemy import select
+from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 
 class CRUDVehiculo(CRUDBase[Vehiculo, VehiculoCreate, VehiculoUpdate]):
+    # Sin orden por defecto: GET /vehiculos pagina por cursor sobre (creado_en, id)
+    listado = EspecificacionListado(
+        filtros=("activo", "tipo_vehiculo_id", "marca"),
+        busqueda=("numero_economico", "placa", "vin", "marca", "modelo_vehiculo"),
+        orden=("creado_en", "numero_economico", "placa", "marca", "anio_fabricacion", "odometro_actual"),
+    )
+
+    async def get_layout(self, session: AsyncSession, *, vehiculo_id: uuid.UUID) -> List[Dict[str, Any]]:
+        """
+        Retrieve the tire layout of a vehicle in a single query.
+
+        One row per position of the vehicle type (vehicle LEFT JOIN axle
+        configurations LEFT JOIN positions LEFT JOIN the tire installed there,
+        with its denormalized current condition), ordered by axle and position.
+
+        Args:
+            session: The database session.
+            vehiculo_id: The ID of the vehicle.
+
+        Returns:
+            The flat rows as dicts; an empty list if the vehicle does not exist.
+        """
+        if session.bind.dialect.name == "sqlite":
+            # En SQLite vehiculos.tipo_vehiculo_id es texto con guiones y el UUID de los ejes, hex sin guiones
+            mismo_tipo = func.replace(Vehiculo.tipo_vehiculo_id, "-", "") == ConfiguracionEje.tipo_vehiculo_id
+        else:
+            mismo_tipo = Vehiculo.tipo_vehiculo_id == ConfiguracionEje.tipo_vehiculo_id
+        statement = (
+            select(
+                Vehiculo.id.label("vehiculo_id"),
+                Vehiculo.numero_economico,
+                Vehiculo.tipo_vehiculo_id,
+                Vehiculo.actualizado_en.label("vehiculo_actualizado_en"),
+                ConfiguracionEje.id.label("eje_id"),
+                ConfiguracionEje.numero_eje,
+                ConfiguracionEje.nombre_eje,
+                ConfiguracionEje.tipo_eje,
+                ConfiguracionEje.numero_posiciones,
+                ConfiguracionEje.posiciones_duales,
+                ConfiguracionEje.neumaticos_por_posicion,
+                PosicionNeumatico.id.label("posicion_id"),
+                PosicionNeumatico.codigo_posicion,
+                PosicionNeumatico.lado,
+                PosicionNeumatico.posicion_relativa,
+                PosicionNeumatico.es_interna,
+                PosicionNeumatico.es_direccion,
+                PosicionNeumatico.es_traccion,
+                Neumatico.id.label("neumatico_id"),
+                Neumatico.numero_serie,
+                Neumatico.profundidad_actual_mm,
+                Neumatico.presion_actual_psi,
+                Neumatico.fecha_ultima_inspeccion,
+                Neumatico.fecha_ultimo_evento,
+                Neumatico.fecha_instalacion,
+                Neumatico.km_instalacion,
+                Neumatico.kilometraje_acumulado,
+                Neumatico.vida_actual,
+                Neumatico.actualizado_en.label("neumatico_actualizado_en"),
+            )
+            .select_from(Vehiculo)
+            .outerjoin(ConfiguracionEje, mismo_tipo)
+            .outerjoin(PosicionNeumatico, PosicionNeumatico.configuracion_eje_id == ConfiguracionEje.id)
+            .outerjoin(Neumatico, and_(
+                Neumatico.ubicacion_actual_posicion_id == PosicionNeumatico.id,
+                Neumatico.ubicacion_actual_vehiculo_id == Vehiculo.id,
+                Neumatico.estado_actual == EstadoNeumaticoEnum.INSTALADO,
+            ))
+            .where(Vehiculo.id == vehiculo_id)
+            .order_by(ConfiguracionEje.numero_eje, PosicionNeumatico.posicion_relativa, PosicionNeumatico.codigo_posicion)
+        )
+        result = await session.exec(statement)
+        return [dict(fila) for fila in result.mappings()]
+
     async def get_by_numero_economico(self, session: AsyncSession, *, numero_economico: str) -> Optional[Vehiculo]:
         """
         Retrieve a vehicle by its economic number.
@@ -12,9 +12,11 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel # Necesario para init_db
+from sqlmodel.ext.asyncio.session import AsyncSession as SQLModelAsyncSession
 
 # --- Importar la configuración centralizada ---
 from core.config import settings # <-- IMPORTANTE: Usar la instancia de settings
+from core.pool_metrics import PoolMedido, instrumentar_engine
 
 # --- Usar la URL de la base de datos desde settings ---
 # Ya no se necesita leer desde os.getenv aquí
@@ -32,13 +34,34 @@ if not DATABASE_URL_FROM_SETTINGS:
 # connect_args solo es necesario para SQLite
 connect_args = {"check_same_thread": False} if DATABASE_URL_FROM_SETTINGS.startswith("sqlite") else {}
 
+# --- Parámetros del pool (desde settings; SQLite usa su pool por defecto) ---
+NOMBRE_POOL_PRINCIPAL = "principal"
+
+
+def _pool_kwargs(url: str, nombre: str) -> dict:
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": PoolMedido,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_logging_name": nombre,
+    }
+
+
 # Usar la URL de settings para crear el engine
 engine = create_async_engine(
     DATABASE_URL_FROM_SETTINGS,
     echo=False, # Poner True para debug de SQL
     future=True,
-    connect_args=connect_args
+    connect_args=connect_args,
+    **_pool_kwargs(DATABASE_URL_FROM_SETTINGS, NOMBRE_POOL_PRINCIPAL)
 )
+# Telemetría del pool (GET /admin/pool)
+instrumentar_engine(engine, NOMBRE_POOL_PRINCIPAL)
 
 # --- Crear una factoría de sesión asíncrona ---
 # (Sin cambios aquí)
@@ -48,6 +71,35 @@ AsyncSessionFactory = sessionmaker(
     expire_on_commit=False
 )
 
+# --- Factoría para tareas en segundo plano (worker de alertas, barridos, scheduler) ---
+# Usa la sesión de sqlmodel, que expone .exec() como la que reciben los servicios
+TareasSessionFactory = sessionmaker(
+    engine,
+    class_=SQLModelAsyncSession,
+    expire_on_commit=False
+)
+
+# --- Réplica de lectura (opcional) ---
+# Mismos parámetros de pool que la primaria; sin DATABASE_READ_URL no hay réplica
+# y get_read_session entrega la sesión de la primaria.
+NOMBRE_POOL_REPLICA = "replica"
+read_engine = None
+LecturaSessionFactory = None
+if settings.DATABASE_READ_URL:
+    read_engine = create_async_engine(
+        settings.DATABASE_READ_URL,
+        echo=False,
+        future=True,
+        connect_args={"check_same_thread": False} if settings.DATABASE_READ_URL.startswith("sqlite") else {},
+        **_pool_kwargs(settings.DATABASE_READ_URL, NOMBRE_POOL_REPLICA)
+    )
+    instrumentar_engine(read_engine, NOMBRE_POOL_REPLICA)
+    LecturaSessionFactory = sessionmaker(
+        read_engine,
+        class_=SQLModelAsyncSession,
+        expire_on_commit=False
+    )
+
 # --- Función para obtener una sesión asíncrona ---
 # (Sin cambios aquí - Asumiendo que este es el 'get_session' que usan tus endpoints)
 
@@ -1,6 +1,7 @@
 # main.py (Versión Corregida)
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware # Asegúrate de importar CORS
 
@@ -20,6 +21,31 @@ from routers.proveedores import router as proveedores_router
 from routers.tipos_vehiculo import router as tipos_vehiculo_router
 from routers.fabricantes_neumatico import router as fabricantes_router
 from routers.alertas import router as alertas_router
+from routers.admin import router as admin_router
+from routers.inventario import router as inventario_router
+from routers.analitica import router as analitica_router
+from services.alert_outbox_worker import AlertOutboxWorker
+from services.barrido_alertas_service import NOMBRE_TAREA as TAREA_BARRIDO_ALERTAS, barrido_alertas_programado
+from services.inventario_service import NOMBRE_TAREA as TAREA_REFRESCO_INVENTARIO, refresco_inventario_programado
+from services.alertas_contadores_service import (
+    NOMBRE_TAREA as TAREA_CONTADORES_ALERTAS, NOMBRE_TAREA_PLEGADO as TAREA_PLEGADO_CONTADORES_ALERTAS,
+    plegado_contadores_programado, reconciliacion_contadores_programada,
+)
+from services.cpk_service import NOMBRE_TAREA as TAREA_REFRESCO_CPK, refresco_cpk_programado
+from services.pronostico_desgaste_service import (
+    NOMBRE_TAREA as TAREA_PRONOSTICO_DESGASTE, refresco_pronosticos_programado,
+)
+from core.scheduler import scheduler
+from core.escrituras_recientes import EscriturasRecientesMiddleware
+from core.request_id import CABECERA_REQUEST_ID, RequestIdMiddleware
+from utils.logging import setup_logging
+from core.pool_hash import PoolHashSaturadoError, pool_hash
+from services.notification_dispatcher import despachador
+from core.consultas_sql import CABECERA_CONSULTAS, CABECERA_TIEMPO_DB, ConsultasSQLMiddleware
+from core.metricas_http import RUTA_METRICAS, MetricasMiddleware, exponer_metricas, instrumentar_rutas, marcar_proceso_terminado
+
+# --- Logging central: cola asíncrona, JSON con id de petición (utils/logging.py) ---
+setup_logging()
 
 # --- Definir el lifespan ---
 @asynccontextmanager
@@ -28,8 +54,39 @@ async def lifespan(app: FastAPI):
     # Considera si realmente quieres inicializar la BD en cada inicio
     # await init_db()
     # print("Base de datos inicializada.")
+    if settings.NOTIFICACIONES_HABILITADAS:
+        despachador.iniciar()
+    outbox_worker = None
+    if settings.ALERTAS_OUTBOX_WORKER_EN_PROCESO:
+        outbox_worker = AlertOutboxWorker()
+        outbox_worker.iniciar()
+    if settings.SCHEDULER_HABILITADO:
+        scheduler.registrar(TAREA_BARRIDO_ALERTAS, barrido_alertas_programado, settings.BARRIDO_ALERTAS_INTERVALO_SEGUNDOS)
+        scheduler.registrar(
+            TAREA_REFRESCO_INVENTARIO, refresco_inventario_programado, settings.INVENTARIO_REFRESCO_INTERVALO_SEGUNDOS
+        )
+        scheduler.registrar(
+            TAREA_CONTADORES_ALERTAS, reconciliacion_contadores_programada,
+            settings.ALERTAS_CONTADORES_RECONCILIACION_SEGUNDOS,
+        )
+        scheduler.registrar(
+            TAREA_PLEGADO_CONTADORES_ALERTAS, plegado_contadores_programado, settings.ALERTAS_CONTADORES_PLEGADO_SEGUNDOS
+        )
+        scheduler.registrar(TAREA_REFRESCO_CPK, refresco_cpk_programado, settings.CPK_REFRESCO_INTERVALO_SEGUNDOS)
+        scheduler.registrar(
+            TAREA_PRONOSTICO_DESGASTE, refresco_pronosticos_programado, settings.PRONOSTICO_DESGASTE_INTERVALO_SEGUNDOS
+        )
+        scheduler.iniciar()
     yield
     print("Apagando aplicación...")
+    if settings.SCHEDULER_HABILITADO:
+        await scheduler.detener()
+    if outbox_worker is not None:
+        await outbox_worker.detener()
+    # Tras el worker del outbox, para enviar también las alertas de su último lote
+    await despachador.detener()
+    marcar_proceso_terminado()
+    pool_hash.cerrar()
 
 # --- Crear la app CON el lifespan ---
 app = FastAPI(
@@ -53,6 +110,30 @@ if origins:
         allow_credentials=True,
         allow_methods=["*"], # Permite todos los métodos
         allow_headers=["*"], # Permite todos los headers
+        expose_headers=[ # Legibles desde el navegador
+            "X-Next-Cursor", CABECERA_REQUEST_ID, "Server-Timing", CABECERA_CONSULTAS, CABECERA_TIEMPO_DB,
+        ],
+    )
+
+
+# --- Read-your-writes: las lecturas de un usuario que acaba de escribir van a la primaria ---
+app.add_middleware(EscriturasRecientesMiddleware)
+# --- Consultas SQL por petición: cabeceras, log y presupuestos (core/consultas_sql.py) ---
+app.add_middleware(ConsultasSQLMiddleware)
+# --- Métricas Prometheus y Server-Timing (externo a los anteriores: mide todo lo demás) ---
+app.add_middleware(MetricasMiddleware)
+# --- Id de petición en logs y respuestas. El último añadido es el más externo: así los
+# logs de los demás middlewares (y el informe de exceso de consultas) llevan la id ---
+app.add_middleware(RequestIdMiddleware)
+
+
+@app.exception_handler(PoolHashSaturadoError)
+async def pool_hash_saturado_handler(request: Request, exc: PoolHashSaturadoError):
+    # Avalancha de logins/altas: se rechaza rápido en vez de encolar sin límite
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Servicio ocupado, reintente en unos segundos"},
+        headers={"Retry-After": "1"},
     )
 
 
@@ -68,9 +149,19 @@ app.include_router(tipos_vehiculo_router, prefix=f"{api_prefix}/tipos-vehiculo",
 app.include_router(proveedores_router, prefix=f"{api_prefix}/proveedores", tags=["Proveedores"]) # Añadido prefijo
 app.include_router(fabricantes_router, prefix=f"{api_prefix}/fabricantes-neumatico", tags=["Fabricantes Neumático"]) # Añadido prefijo
 app.include_router(alertas_router, prefix=f"{api_prefix}/alertas", tags=["Alertas"]) # Nuevo router para alertas
+app.include_router(admin_router, prefix=f"{api_prefix}/admin", tags=["Administración"])
+app.include_router(inventario_router, prefix=f"{api_prefix}/inventario", tags=["Inventario"])
+app.include_router(analitica_router, prefix=f"{api_prefix}/analitica", tags=["Analítica"])
 
 # --- Ruta Raíz ---
 @app.get("/", tags=["Root"])
 async def read_root():
     return {"message": f"Bienvenido a {settings.PROJECT_NAME}"} # <-- CORREGIDO
 
+# --- Métricas Prometheus (sin autenticación: restringir el acceso en el proxy) ---
+app.add_route(RUTA_METRICAS, exponer_metricas, include_in_schema=False)
+# Marca el fin de cada endpoint para separar handler y serialización en Server-Timing
+instrumentar_rutas(
+    app.router, auth_router, usuarios_router, vehiculos_router, neumaticos_router, tipos_vehiculo_router,
+    proveedores_router, fabricantes_router, alertas_router, admin_router, inventario_router, analitica_router,
+)
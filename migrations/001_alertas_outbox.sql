@@ -0,0 +1,26 @@
+-- 001_alertas_outbox.sql
+-- Outbox de alertas: cada evento de neumático deja una fila que el worker
+-- (services/alert_outbox_worker.py) consume para evaluar las reglas de alerta.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.alertas_outbox (
+    id uuid DEFAULT public.gen_random_uuid() NOT NULL,
+    evento_id uuid NOT NULL,
+    neumatico_id uuid NOT NULL,
+    creado_en timestamp with time zone DEFAULT now() NOT NULL,
+    disponible_en timestamp with time zone DEFAULT now() NOT NULL,
+    procesado_en timestamp with time zone,
+    intentos integer DEFAULT 0 NOT NULL,
+    ultimo_error text,
+    CONSTRAINT alertas_outbox_pkey PRIMARY KEY (id),
+    CONSTRAINT alertas_outbox_evento_id_fkey FOREIGN KEY (evento_id) REFERENCES public.eventos_neumaticos(id) ON DELETE CASCADE,
+    CONSTRAINT alertas_outbox_neumatico_id_fkey FOREIGN KEY (neumatico_id) REFERENCES public.neumaticos(id) ON DELETE CASCADE
+);
+
+-- Solo se indexa lo pendiente: es lo único que recorre el worker
+CREATE INDEX IF NOT EXISTS ix_alertas_outbox_pendientes
+    ON public.alertas_outbox USING btree (disponible_en)
+    WHERE (procesado_en IS NULL);
+
+COMMIT;
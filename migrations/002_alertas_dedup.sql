@@ -0,0 +1,63 @@
+-- 002_alertas_dedup.sql
+-- Deduplicación de alertas abiertas: una sola fila abierta por
+-- (tipo_alerta, neumático | vehículo | modelo+almacén); las repeticiones
+-- incrementan 'ocurrencias' (ver crud_alerta.upsert_abierta).
+
+BEGIN;
+
+ALTER TABLE public.alertas
+    ADD COLUMN IF NOT EXISTS clave_dedup character varying(200),
+    ADD COLUMN IF NOT EXISTS ocurrencias integer DEFAULT 1 NOT NULL,
+    ADD COLUMN IF NOT EXISTS ultima_ocurrencia_en timestamp with time zone;
+
+-- Misma expresión que models.alerta.clave_dedup_alerta
+UPDATE public.alertas
+SET clave_dedup = CASE
+        WHEN neumatico_id IS NOT NULL THEN tipo_alerta || ':N:' || neumatico_id::text
+        WHEN vehiculo_id IS NOT NULL THEN tipo_alerta || ':V:' || vehiculo_id::text
+        ELSE tipo_alerta || ':M:' || COALESCE(modelo_id::text, '-') || ':' || COALESCE(almacen_id::text, '-')
+    END,
+    ultima_ocurrencia_en = COALESCE(ultima_ocurrencia_en, creado_en)
+WHERE clave_dedup IS NULL;
+
+-- Colapsar duplicados abiertos: se conserva la alerta más antigua de cada clave,
+-- con el total de ocurrencias, la última fecha y los datos de la más reciente.
+WITH grupos AS (
+    SELECT
+        id,
+        clave_dedup,
+        row_number() OVER (PARTITION BY clave_dedup ORDER BY creado_en ASC, id ASC) AS orden,
+        first_value(id) OVER (PARTITION BY clave_dedup ORDER BY creado_en DESC, id DESC) AS id_reciente,
+        sum(ocurrencias) OVER (PARTITION BY clave_dedup) AS total_ocurrencias,
+        max(creado_en) OVER (PARTITION BY clave_dedup) AS ultima
+    FROM public.alertas
+    WHERE resuelta = false
+),
+conservadas AS (
+    SELECT g.id, g.total_ocurrencias, g.ultima, r.descripcion, r.nivel_severidad, r.datos_contexto
+    FROM grupos g
+    JOIN public.alertas r ON r.id = g.id_reciente
+    WHERE g.orden = 1 AND g.total_ocurrencias > 1
+)
+UPDATE public.alertas a
+SET ocurrencias = c.total_ocurrencias,
+    ultima_ocurrencia_en = c.ultima,
+    descripcion = c.descripcion,
+    nivel_severidad = c.nivel_severidad,
+    datos_contexto = c.datos_contexto
+FROM conservadas c
+WHERE a.id = c.id;
+
+DELETE FROM public.alertas a
+USING (
+    SELECT id, row_number() OVER (PARTITION BY clave_dedup ORDER BY creado_en ASC, id ASC) AS orden
+    FROM public.alertas
+    WHERE resuelta = false
+) d
+WHERE a.id = d.id AND d.orden > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_alertas_abiertas_clave_dedup
+    ON public.alertas USING btree (clave_dedup)
+    WHERE (resuelta = false);
+
+COMMIT;
@@ -0,0 +1,96 @@
+-- 003_neumaticos_condicion_actual.sql
+-- Condición actual desnormalizada en 'neumaticos' (profundidad, presión y fecha
+-- de la última inspección). La mantiene NeumaticoService al registrar eventos
+-- INSPECCION / REENCAUCHE_SALIDA; aquí se crean las columnas, se rellenan desde
+-- el historial y se reescribe la vista de instalados sin el LATERAL sobre eventos.
+
+BEGIN;
+
+ALTER TABLE public.neumaticos
+    ADD COLUMN IF NOT EXISTS profundidad_actual_mm numeric(5,2),
+    ADD COLUMN IF NOT EXISTS presion_actual_psi numeric(5,2),
+    ADD COLUMN IF NOT EXISTS fecha_ultima_inspeccion timestamp with time zone;
+
+-- Backfill: última inspección de cada neumático (profundidad y presión se toman
+-- de la última medición no nula de cada una, como hace el servicio).
+WITH ultima_inspeccion AS (
+    SELECT DISTINCT ON (e.neumatico_id) e.neumatico_id, e.timestamp_evento
+    FROM public.eventos_neumaticos e
+    WHERE e.tipo_evento = 'INSPECCION'::public.tipo_evento_neumatico_enum
+    ORDER BY e.neumatico_id, e.timestamp_evento DESC
+), ultima_profundidad AS (
+    SELECT DISTINCT ON (e.neumatico_id) e.neumatico_id, e.timestamp_evento,
+           CASE WHEN e.tipo_evento = 'INSPECCION'::public.tipo_evento_neumatico_enum
+                THEN e.profundidad_remanente_mm
+                ELSE e.profundidad_post_reencauche_mm END AS profundidad
+    FROM public.eventos_neumaticos e
+    WHERE (e.tipo_evento = 'INSPECCION'::public.tipo_evento_neumatico_enum AND e.profundidad_remanente_mm IS NOT NULL)
+       OR (e.tipo_evento = 'REENCAUCHE_SALIDA'::public.tipo_evento_neumatico_enum AND e.profundidad_post_reencauche_mm IS NOT NULL)
+    ORDER BY e.neumatico_id, e.timestamp_evento DESC
+), ultima_presion AS (
+    SELECT DISTINCT ON (e.neumatico_id) e.neumatico_id, e.presion_psi
+    FROM public.eventos_neumaticos e
+    WHERE e.tipo_evento = 'INSPECCION'::public.tipo_evento_neumatico_enum AND e.presion_psi IS NOT NULL
+    ORDER BY e.neumatico_id, e.timestamp_evento DESC
+)
+UPDATE public.neumaticos n
+SET profundidad_actual_mm = up.profundidad,
+    presion_actual_psi = upr.presion_psi,
+    fecha_ultima_inspeccion = ui.timestamp_evento
+FROM public.neumaticos n2
+LEFT JOIN ultima_inspeccion ui ON ui.neumatico_id = n2.id
+LEFT JOIN ultima_profundidad up ON up.neumatico_id = n2.id
+LEFT JOIN ultima_presion upr ON upr.neumatico_id = n2.id
+WHERE n.id = n2.id
+  AND (ui.neumatico_id IS NOT NULL OR up.neumatico_id IS NOT NULL);
+
+-- Umbral de profundidad (barrido de alertas, tablero) y filtro por rango de
+-- GET /neumaticos/instalados: solo neumáticos en uso. Es el único índice sobre
+-- la columna; 'INSTALADO' implica '<> DESECHADO', así que también sirve al
+-- listado de instalados.
+CREATE INDEX IF NOT EXISTS ix_neumaticos_profundidad_actual_mm
+    ON public.neumaticos USING btree (profundidad_actual_mm)
+    WHERE estado_actual <> 'DESECHADO'::public.estado_neumatico_enum;
+
+CREATE OR REPLACE VIEW public.vw_neumaticos_instalados_optimizada AS
+ SELECT n.id AS neumatico_id,
+    n.numero_serie,
+    n.dot,
+    mn.nombre_modelo,
+    mn.medida,
+    fn.nombre AS fabricante,
+    ((mn.indice_carga)::text || (mn.indice_velocidad)::text) AS indice_completo,
+    v.placa,
+    v.numero_economico,
+    tv.nombre AS tipo_vehiculo,
+    pn.codigo_posicion,
+    pn.etiqueta_posicion,
+    pn.lado,
+    pn.es_interna,
+    ce.nombre_eje,
+    ce.tipo_eje,
+    n.fecha_ultimo_evento AS fecha_instalacion,
+    n.fecha_ultima_inspeccion,
+    n.profundidad_actual_mm,
+    n.presion_actual_psi,
+    mn.profundidad_original_mm,
+        CASE
+            WHEN ((mn.profundidad_original_mm > (0)::numeric) AND (n.profundidad_actual_mm IS NOT NULL)) THEN round(((n.profundidad_actual_mm / mn.profundidad_original_mm) * 100.0), 1)
+            ELSE NULL::numeric
+        END AS porcentaje_vida_util_remanente,
+    v.odometro_actual AS odometro_vehiculo_actual,
+    n.kilometraje_acumulado AS kilometraje_neumatico_acumulado,
+    n.vida_actual,
+    n.reencauches_realizados
+   FROM ((((((public.neumaticos n
+     JOIN public.modelos_neumatico mn ON ((n.modelo_id = mn.id)))
+     JOIN public.fabricantes_neumatico fn ON ((mn.fabricante_id = fn.id)))
+     LEFT JOIN public.vehiculos v ON ((n.ubicacion_actual_vehiculo_id = v.id)))
+     LEFT JOIN public.tipos_vehiculo tv ON ((v.tipo_vehiculo_id = tv.id)))
+     LEFT JOIN public.posiciones_neumatico pn ON ((n.ubicacion_actual_posicion_id = pn.id)))
+     LEFT JOIN public.configuraciones_eje ce ON ((pn.configuracion_eje_id = ce.id)))
+  WHERE (n.estado_actual = 'INSTALADO'::public.estado_neumatico_enum);
+
+COMMENT ON VIEW public.vw_neumaticos_instalados_optimizada IS 'Neumáticos instalados con su condición actual (columnas desnormalizadas de neumaticos).';
+
+COMMIT;
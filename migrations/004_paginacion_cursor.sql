@@ -0,0 +1,18 @@
+-- 004_paginacion_cursor.sql
+-- Índices compuestos para la paginación por cursor (utils/cursor.py):
+-- GET /alertas y GET /vehiculos sobre (creado_en, id) y el historial de
+-- neumáticos sobre (neumatico_id, timestamp_evento, id).
+-- CONCURRENTLY no puede ir dentro de una transacción: ejecutar sin BEGIN/COMMIT.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_alertas_creado_en_id
+    ON public.alertas USING btree (creado_en, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_alertas_abiertas_creado_en_id
+    ON public.alertas USING btree (creado_en, id)
+    WHERE resuelta = false;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vehiculos_creado_en_id
+    ON public.vehiculos USING btree (creado_en, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_eventos_neumaticos_neumatico_timestamp_id
+    ON public.eventos_neumaticos USING btree (neumatico_id, timestamp_evento, id);
@@ -0,0 +1,66 @@
+-- 005_filtros_listados.sql
+-- Índices de los filtros, búsquedas y órdenes de los listados de catálogo
+-- (crud/base.py, EspecificacionListado de cada CRUD):
+-- - btree para los filtros de igualdad combinados con el orden por defecto;
+-- - GIN con pg_trgm para la búsqueda de texto (ILIKE '%texto%'), que un
+--   btree no puede resolver.
+-- CONCURRENTLY no puede ir dentro de una transacción: ejecutar sin BEGIN/COMMIT.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- vehiculos: activo + cursor (creado_en, id), tipo y marca
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vehiculos_activo_creado_en_id
+    ON public.vehiculos USING btree (activo, creado_en, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vehiculos_tipo_vehiculo_id
+    ON public.vehiculos USING btree (tipo_vehiculo_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vehiculos_marca
+    ON public.vehiculos USING btree (marca);
+
+-- Búsqueda: un índice trigram por columna; el OR de ILIKE se resuelve con BitmapOr
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vehiculos_numero_economico_trgm
+    ON public.vehiculos USING gin (numero_economico gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vehiculos_placa_trgm
+    ON public.vehiculos USING gin (placa gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vehiculos_vin_trgm
+    ON public.vehiculos USING gin (vin gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vehiculos_marca_trgm
+    ON public.vehiculos USING gin (marca gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vehiculos_modelo_vehiculo_trgm
+    ON public.vehiculos USING gin (modelo_vehiculo gin_trgm_ops);
+
+-- proveedores, fabricantes y tipos de vehículo: activo + orden por nombre y búsqueda
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_proveedores_activo_nombre
+    ON public.proveedores USING btree (activo, nombre);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_proveedores_nombre_trgm
+    ON public.proveedores USING gin (nombre gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_proveedores_rfc_trgm
+    ON public.proveedores USING gin (rfc gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_proveedores_email_trgm
+    ON public.proveedores USING gin (email gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fabricantes_neumatico_activo_nombre
+    ON public.fabricantes_neumatico USING btree (activo, nombre);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fabricantes_neumatico_nombre_trgm
+    ON public.fabricantes_neumatico USING gin (nombre gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fabricantes_neumatico_codigo_abreviado_trgm
+    ON public.fabricantes_neumatico USING gin (codigo_abreviado gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tipos_vehiculo_activo_nombre
+    ON public.tipos_vehiculo USING btree (activo, nombre);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tipos_vehiculo_nombre_trgm
+    ON public.tipos_vehiculo USING gin (nombre gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tipos_vehiculo_descripcion_trgm
+    ON public.tipos_vehiculo USING gin (descripcion gin_trgm_ops);
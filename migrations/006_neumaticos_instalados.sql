@@ -0,0 +1,16 @@
+-- 006_neumaticos_instalados.sql
+-- GET /neumaticos/instalados (crud_neumatico._consulta_instalados):
+-- - paginación por cursor sobre (creado_en, id), solo de los instalados;
+-- - filtro por rango de profundidad actual: usa ix_neumaticos_profundidad_actual_mm
+--   (003, parcial sobre los no desechados), no hace falta otro índice.
+-- Los filtros por vehículo y fabricante usan los índices existentes de
+-- neumaticos.ubicacion_actual_vehiculo_id y modelos_neumatico.fabricante_id.
+-- CONCURRENTLY no puede ir dentro de una transacción: ejecutar sin BEGIN/COMMIT.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_neumaticos_instalados_creado_en_id
+    ON public.neumaticos USING btree (creado_en, id)
+    WHERE estado_actual = 'INSTALADO'::public.estado_neumatico_enum;
+
+-- Versiones anteriores de esta migración creaban un segundo índice sobre
+-- profundidad_actual_mm, redundante con el de 003
+DROP INDEX CONCURRENTLY IF EXISTS public.ix_neumaticos_instalados_profundidad;
@@ -0,0 +1,49 @@
+-- 007_inventario_materializado.sql
+-- vw_inventario_neumaticos pasa de vista a vista materializada: el panel de
+-- almacén la consulta cada pocos segundos y la vista agregaba toda la tabla
+-- 'neumaticos' en cada lectura. La refresca services/inventario_service.py
+-- (scheduler de la API cada INVENTARIO_REFRESCO_INTERVALO_SEGUNDOS y
+-- POST /inventario/resumen/refrescar) con REFRESH ... CONCURRENTLY, que no
+-- bloquea las lecturas y necesita el índice único de abajo.
+--
+-- Cambios respecto a la vista:
+-- - calculado_en: instante del último refresco (antigüedad de los datos en la API).
+-- - antiguedad_promedio_dias se congela en cada refresco (usa now()).
+-- - Sin ORDER BY (la API ordena al leer).
+
+BEGIN;
+
+DROP VIEW IF EXISTS public.vw_inventario_neumaticos;
+
+CREATE MATERIALIZED VIEW public.vw_inventario_neumaticos AS
+ SELECT mn.id AS modelo_id,
+    mn.nombre_modelo,
+    mn.medida,
+    fn.nombre AS fabricante,
+    n.estado_actual,
+    n.es_reencauchado,
+    n.vida_actual,
+    count(*) AS cantidad,
+    sum(n.costo_compra) FILTER (WHERE ((n.moneda_compra)::text = 'PEN'::text)) AS valor_total_pen,
+    sum(n.costo_compra) FILTER (WHERE ((n.moneda_compra)::text = 'USD'::text)) AS valor_total_usd,
+    avg(n.kilometraje_acumulado) FILTER (WHERE ((n.estado_actual <> 'EN_STOCK'::public.estado_neumatico_enum) AND (n.kilometraje_acumulado > 0))) AS km_promedio_por_vida,
+    min(n.fecha_compra) AS fecha_compra_mas_antigua,
+    max(n.fecha_compra) AS fecha_compra_mas_reciente,
+    (avg((EXTRACT(epoch FROM (now() - (n.fecha_compra)::timestamp with time zone)) / 86400.0)))::integer AS antiguedad_promedio_dias,
+    now() AS calculado_en
+   FROM ((public.neumaticos n
+     JOIN public.modelos_neumatico mn ON ((n.modelo_id = mn.id)))
+     JOIN public.fabricantes_neumatico fn ON ((mn.fabricante_id = fn.id)))
+  WHERE (n.estado_actual <> 'DESECHADO'::public.estado_neumatico_enum)
+  GROUP BY mn.id, mn.nombre_modelo, mn.medida, fn.nombre, n.estado_actual, n.es_reencauchado, n.vida_actual
+WITH DATA;
+
+ALTER MATERIALIZED VIEW public.vw_inventario_neumaticos OWNER TO postgres;
+
+COMMENT ON MATERIALIZED VIEW public.vw_inventario_neumaticos IS 'Resume el inventario de neumáticos activos, agrupado por modelo, fabricante, estado y vida. Materializada: se refresca periódicamente (columna calculado_en).';
+
+-- Una fila por grupo (nombre, medida y fabricante dependen del modelo); requerido por REFRESH CONCURRENTLY
+CREATE UNIQUE INDEX ux_vw_inventario_neumaticos_grupo
+    ON public.vw_inventario_neumaticos USING btree (modelo_id, estado_actual, es_reencauchado, vida_actual);
+
+COMMIT;
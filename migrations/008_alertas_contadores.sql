@@ -0,0 +1,102 @@
+-- 008_alertas_contadores.sql
+-- Contadores de alertas por (tipo_alerta, resuelta) para GET /alertas/dashboard/resumen.
+--
+-- Las escrituras de alertas no actualizan contadores compartidos (filas calientes
+-- bloqueadas hasta el COMMIT que serializarían el outbox y el barrido, con riesgo
+-- de interbloqueo): triggers por sentencia, con tablas de transición, añaden a
+-- 'alertas_contadores_deltas' una fila por grupo cuyo total cambió, con el delta
+-- agregado de la sentencia (incluidos los upserts en bloque: ON CONFLICT DO UPDATE
+-- dispara los triggers de INSERT y de UPDATE). Las repeticiones de una alerta
+-- abierta no cambian el grupo y no generan deltas.
+-- El total vigente es alertas_contadores.total + la suma de los deltas pendientes;
+-- services/alertas_contadores_service.py los pliega y reconcilia periódicamente.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.alertas_contadores (
+    tipo_alerta character varying(50) NOT NULL,
+    resuelta boolean NOT NULL,
+    total bigint DEFAULT 0 NOT NULL,
+    version bigint DEFAULT 0 NOT NULL,
+    CONSTRAINT alertas_contadores_pkey PRIMARY KEY (tipo_alerta, resuelta)
+);
+
+ALTER TABLE public.alertas_contadores OWNER TO postgres;
+
+CREATE TABLE IF NOT EXISTS public.alertas_contadores_deltas (
+    id bigint GENERATED ALWAYS AS IDENTITY,
+    tipo_alerta character varying(50) NOT NULL,
+    resuelta boolean NOT NULL,
+    delta integer NOT NULL,
+    CONSTRAINT alertas_contadores_deltas_pkey PRIMARY KEY (id)
+);
+
+ALTER TABLE public.alertas_contadores_deltas OWNER TO postgres;
+
+-- Un delta agrega todas las filas de un grupo tocadas por una sentencia (un
+-- UPDATE o DELETE masivo puede pasar de 32767): integer. Versiones anteriores
+-- de esta migración usaban smallint.
+ALTER TABLE public.alertas_contadores_deltas ALTER COLUMN delta TYPE integer;
+
+-- Un delta agregado por grupo y sentencia; los grupos sin cambio neto no se escriben
+CREATE OR REPLACE FUNCTION public.fn_alertas_contadores_deltas() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO public.alertas_contadores_deltas (tipo_alerta, resuelta, delta)
+        SELECT tipo_alerta, resuelta, count(*)
+        FROM nuevas
+        GROUP BY tipo_alerta, resuelta;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO public.alertas_contadores_deltas (tipo_alerta, resuelta, delta)
+        SELECT tipo_alerta, resuelta, -count(*)
+        FROM antiguas
+        GROUP BY tipo_alerta, resuelta;
+    ELSE
+        INSERT INTO public.alertas_contadores_deltas (tipo_alerta, resuelta, delta)
+        SELECT tipo_alerta, resuelta, sum(d)
+        FROM (
+            SELECT tipo_alerta, resuelta, 1 AS d FROM nuevas
+            UNION ALL
+            SELECT tipo_alerta, resuelta, -1 AS d FROM antiguas
+        ) t
+        GROUP BY tipo_alerta, resuelta
+        HAVING sum(d) <> 0;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Versiones anteriores de esta migración usaban un trigger por fila
+DROP TRIGGER IF EXISTS trg_alertas_contadores ON public.alertas;
+DROP FUNCTION IF EXISTS public.fn_alertas_contadores();
+
+DROP TRIGGER IF EXISTS trg_alertas_contadores_insert ON public.alertas;
+CREATE TRIGGER trg_alertas_contadores_insert
+    AFTER INSERT ON public.alertas
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.fn_alertas_contadores_deltas();
+
+DROP TRIGGER IF EXISTS trg_alertas_contadores_update ON public.alertas;
+CREATE TRIGGER trg_alertas_contadores_update
+    AFTER UPDATE ON public.alertas
+    REFERENCING OLD TABLE AS antiguas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.fn_alertas_contadores_deltas();
+
+DROP TRIGGER IF EXISTS trg_alertas_contadores_delete ON public.alertas;
+CREATE TRIGGER trg_alertas_contadores_delete
+    AFTER DELETE ON public.alertas
+    REFERENCING OLD TABLE AS antiguas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.fn_alertas_contadores_deltas();
+
+-- Carga inicial, con las escrituras de alertas bloqueadas hasta el COMMIT
+LOCK TABLE public.alertas IN SHARE MODE;
+DELETE FROM public.alertas_contadores_deltas;
+DELETE FROM public.alertas_contadores;
+INSERT INTO public.alertas_contadores (tipo_alerta, resuelta, total, version)
+SELECT tipo_alerta, resuelta, count(*), 1
+FROM public.alertas
+GROUP BY tipo_alerta, resuelta;
+
+COMMIT;
@@ -0,0 +1,62 @@
+-- 009_cpk_agregados.sql
+-- Agregados diarios de costo por kilómetro (services/cpk_service.py) y marcas
+-- de los refrescos incrementales. Las tablas se llenan con el primer refresco
+-- (sin marca = reconstrucción completa): scheduler de la API,
+-- POST /analitica/cpk/refrescar o `python -m services.cpk_service --completo`.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.marcas_refresco (
+    nombre character varying(50) NOT NULL,
+    marca timestamp with time zone NOT NULL,
+    actualizado_en timestamp with time zone,
+    CONSTRAINT marcas_refresco_pkey PRIMARY KEY (nombre)
+);
+
+-- Por neumático y día: unidad del refresco incremental (sin FK: datos derivados)
+CREATE TABLE IF NOT EXISTS public.cpk_neumatico_diario (
+    neumatico_id uuid NOT NULL,
+    dia date NOT NULL,
+    modelo_id uuid NOT NULL,
+    proveedor_id uuid,
+    tipo_vehiculo_id uuid,
+    costo_pen numeric(14,2) DEFAULT 0 NOT NULL,
+    costo_usd numeric(14,2) DEFAULT 0 NOT NULL,
+    km bigint DEFAULT 0 NOT NULL,
+    CONSTRAINT cpk_neumatico_diario_pkey PRIMARY KEY (neumatico_id, dia)
+);
+
+-- Por día y dimensiones: lo que leen los endpoints de /analitica/cpk
+CREATE TABLE IF NOT EXISTS public.cpk_grupo_diario (
+    id bigint GENERATED BY DEFAULT AS IDENTITY NOT NULL,
+    dia date NOT NULL,
+    modelo_id uuid NOT NULL,
+    proveedor_id uuid,
+    tipo_vehiculo_id uuid,
+    costo_pen numeric(14,2) DEFAULT 0 NOT NULL,
+    costo_usd numeric(14,2) DEFAULT 0 NOT NULL,
+    km bigint DEFAULT 0 NOT NULL,
+    CONSTRAINT cpk_grupo_diario_pkey PRIMARY KEY (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_cpk_grupo_diario_dia ON public.cpk_grupo_diario USING btree (dia);
+
+ALTER TABLE public.marcas_refresco OWNER TO postgres;
+ALTER TABLE public.cpk_neumatico_diario OWNER TO postgres;
+ALTER TABLE public.cpk_grupo_diario OWNER TO postgres;
+
+COMMIT;
+
+-- Neumáticos y eventos modificados desde la última marca (fuera de la
+-- transacción: CONCURRENTLY no bloquea las escrituras en tablas grandes)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_eventos_neumaticos_creado_en
+    ON public.eventos_neumaticos USING btree (creado_en);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_neumaticos_actualizado_en
+    ON public.neumaticos USING btree (actualizado_en);
+
+-- Filtros por modelo o fabricante (el fabricante se resuelve a sus modelos):
+-- ver benchmarks/cpk_lectura.py. Los índices por proveedor_id o tipo_vehiculo_id
+-- no compensaron en la medición. CONCURRENTLY no puede ir dentro de una
+-- transacción: ejecutar fuera del BEGIN/COMMIT anterior.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cpk_grupo_diario_modelo_dia
+    ON public.cpk_grupo_diario USING btree (modelo_id, dia);
@@ -0,0 +1,32 @@
+-- 010_pronosticos_desgaste.sql
+-- Pronóstico de desgaste por neumático instalado (services/pronostico_desgaste_service.py):
+-- ajuste profundidad ~ odómetro de sus inspecciones y fecha estimada de retiro.
+-- Se llena con el primer refresco (sin marca en marcas_refresco = cálculo completo).
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.pronosticos_desgaste (
+    neumatico_id uuid NOT NULL,
+    modelo_id uuid NOT NULL,
+    vehiculo_id uuid,
+    puntos integer DEFAULT 0 NOT NULL,
+    profundidad_minima_mm double precision NOT NULL,
+    desgaste_mm_por_1000km double precision,
+    profundidad_estimada_mm double precision,
+    odometro_ultimo integer,
+    odometro_retiro_estimado integer,
+    km_restantes integer,
+    km_por_dia double precision,
+    fecha_retiro_estimada date,
+    ultima_medicion_en timestamp with time zone,
+    calculado_en timestamp with time zone NOT NULL,
+    CONSTRAINT pronosticos_desgaste_pkey PRIMARY KEY (neumatico_id)
+);
+
+ALTER TABLE public.pronosticos_desgaste OWNER TO postgres;
+
+-- GET /analitica/desgaste/proximos: retiros previstos hasta una fecha
+CREATE INDEX IF NOT EXISTS ix_pronosticos_desgaste_fecha_retiro
+    ON public.pronosticos_desgaste USING btree (fecha_retiro_estimada);
+
+COMMIT;
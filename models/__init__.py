@@ -1,14 +1,19 @@
 # Importar todos los modelos para que SQLAlchemy los descubra
 from .alerta import Alerta
+from .alerta_contador import AlertaContador, AlertaContadorDelta
+from .alerta_outbox import AlertaOutbox
 from .almacen import Almacen
 from .configuracion_eje import ConfiguracionEje
+from .cpk_diario import CpkGrupoDiario, CpkNeumaticoDiario
 from .evento_neumatico import EventoNeumatico
 from .fabricante import FabricanteNeumatico
+from .marca_refresco import MarcaRefresco
 from .modelo import ModeloNeumatico
 from .motivo_desecho import MotivoDesecho
 from .neumatico import Neumatico
 from .parametro_inventario import ParametroInventario
 from .posicion_neumatico import PosicionNeumatico
+from .pronostico_desgaste import PronosticoDesgaste
 from .proveedor import Proveedor
 from .registro_odometro import RegistroOdometro
 from .tipo_vehiculo import TipoVehiculo
@@ -21,15 +26,22 @@ from .vehiculo import Vehiculo
 # Esto asegura que todos los modelos estén registrados con SQLModel/SQLAlchemy
 __all__ = [
     "Alerta",
+    "AlertaContador",
+    "AlertaContadorDelta",
+    "AlertaOutbox",
     "Almacen",
     "ConfiguracionEje",
+    "CpkGrupoDiario",
+    "CpkNeumaticoDiario",
     "EventoNeumatico",
     "FabricanteNeumatico",
+    "MarcaRefresco",
     "ModeloNeumatico",
     "MotivoDesecho",
     "Neumatico",
     "ParametroInventario",
     "PosicionNeumatico",
+    "PronosticoDesgaste",
     "Proveedor",
     "RegistroOdometro",
     "TipoVehiculo",
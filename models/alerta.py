@@ -6,7 +6,7 @@ from pydantic import ConfigDict
 
 import sqlalchemy # <--- IMPORTACIÓN AÑADIDA AQUÍ
 from sqlmodel import Field, SQLModel, Relationship 
-from sqlalchemy import Column, ForeignKey, text, JSON, TIMESTAMP 
+from sqlalchemy import Column, ForeignKey, Index, text, JSON, TIMESTAMP 
 # Eliminar Enum de sqlalchemy si no se usa directamente aquí para definir columnas Enum
 # from sqlalchemy import Enum as SAEnum 
 
@@ -25,6 +25,26 @@ if TYPE_CHECKING:
     from .parametro_inventario import ParametroInventario
 
 
+def clave_dedup_alerta(
+    tipo_alerta: Any,
+    neumatico_id: Optional[uuid.UUID] = None,
+    vehiculo_id: Optional[uuid.UUID] = None,
+    modelo_id: Optional[uuid.UUID] = None,
+    almacen_id: Optional[uuid.UUID] = None,
+) -> str:
+    """
+    Clave de deduplicación de una alerta: tipo + sujeto (neumático, si no vehículo,
+    si no modelo+almacén). Debe coincidir con la expresión usada en
+    migrations/002_alertas_dedup.sql para recalcular las claves existentes.
+    """
+    tipo = getattr(tipo_alerta, "value", tipo_alerta)
+    if neumatico_id:
+        return f"{tipo}:N:{neumatico_id}"
+    if vehiculo_id:
+        return f"{tipo}:V:{vehiculo_id}"
+    return f"{tipo}:M:{modelo_id or '-'}:{almacen_id or '-'}"
+
+
 # Definir una clase base para los campos específicos de Alerta
 class AlertaBase(SQLModel):
     tipo_alerta: TipoAlertaEnum = Field(index=True, max_length=50) # Usar el Enum
@@ -48,9 +68,32 @@ class AlertaBase(SQLModel):
 # Modelo de tabla Alerta, heredando los campos de auditoría de SQLModelTimestamp
 class Alerta(SQLModelTimestamp, AlertaBase, table=True):
     __tablename__ = "alertas"
+    __table_args__ = (
+        # Como mucho una alerta abierta por clave: las repeticiones incrementan 'ocurrencias'
+        Index(
+            "uq_alertas_abiertas_clave_dedup", "clave_dedup", unique=True,
+            postgresql_where=text("resuelta = false"),
+            sqlite_where=text("resuelta = 0"),
+        ),
+        # Paginación por cursor de GET /alertas (keyset sobre creado_en, id)
+        Index("ix_alertas_creado_en_id", "creado_en", "id"),
+        Index(
+            "ix_alertas_abiertas_creado_en_id", "creado_en", "id",
+            postgresql_where=text("resuelta = false"),
+            sqlite_where=text("resuelta = 0"),
+        ),
+    )
 
     id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True, index=True) 
 
+    # --- Deduplicación (ver clave_dedup_alerta y crud_alerta.upsert_abierta) ---
+    clave_dedup: Optional[str] = Field(default=None, max_length=200)
+    ocurrencias: int = Field(default=1, nullable=False)
+    ultima_ocurrencia_en: Optional[datetime] = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(TIMESTAMP(timezone=True), nullable=True)
+    )
+
     # --- Campos heredados de AlertaBase ---
     # tipo_alerta, descripcion, nivel_severidad, resuelta, FKs, datos_contexto
 
@@ -0,0 +1,67 @@
+# gesneu_api2/models/alerta_contador.py
+from typing import Optional
+
+from sqlalchemy import BigInteger, Column, DDL, Integer, event
+from sqlmodel import Field, SQLModel
+
+from .alerta import Alerta
+
+
+class AlertaContador(SQLModel, table=True):
+    """
+    Representa la tabla 'alertas_contadores': número de alertas por
+    (tipo_alerta, resuelta) ya consolidado, para que el resumen del dashboard
+    no agregue la tabla 'alertas' en cada lectura.
+
+    Las escrituras de alertas no la tocan (serían filas calientes bloqueadas
+    hasta el COMMIT): los triggers solo añaden filas a 'alertas_contadores_deltas'.
+    El total vigente es `total` más la suma de los deltas pendientes, y `version`
+    más el número de deltas pendientes; services/alertas_contadores_service.py
+    pliega los deltas aquí y reconcilia con un GROUP BY. `version` solo sube
+    cuando cambia el total y alimenta el ETag del resumen.
+    """
+    __tablename__ = "alertas_contadores"
+
+    tipo_alerta: str = Field(primary_key=True, max_length=50)
+    resuelta: bool = Field(primary_key=True)
+    total: int = Field(default=0, nullable=False)
+    version: int = Field(default=0, nullable=False)
+
+
+class AlertaContadorDelta(SQLModel, table=True):
+    """
+    Representa la tabla 'alertas_contadores_deltas' (solo inserciones): cambio
+    del número de alertas de un grupo. En PostgreSQL un trigger por sentencia
+    añade una fila por grupo afectado con el delta agregado
+    (migrations/008_alertas_contadores.sql); en SQLite, los DDL de abajo, una
+    por fila de 'alertas'.
+    """
+    __tablename__ = "alertas_contadores_deltas"
+
+    id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(BigInteger().with_variant(Integer(), "sqlite"), primary_key=True, autoincrement=True),
+    )
+    tipo_alerta: str = Field(max_length=50, nullable=False)
+    resuelta: bool = Field(nullable=False)
+    # Agregado por sentencia en PostgreSQL: un UPDATE masivo puede pasar de 32767
+    delta: int = Field(sa_column=Column(Integer, nullable=False))
+
+
+# --- Triggers de SQLite (pruebas); los de PostgreSQL están en la migración 008 ---
+_SUMAR_NEW = """
+    INSERT INTO alertas_contadores_deltas (tipo_alerta, resuelta, delta) VALUES (NEW.tipo_alerta, NEW.resuelta, 1);
+"""
+_RESTAR_OLD = """
+    INSERT INTO alertas_contadores_deltas (tipo_alerta, resuelta, delta) VALUES (OLD.tipo_alerta, OLD.resuelta, -1);
+"""
+_TRIGGERS_SQLITE = (
+    f"CREATE TRIGGER trg_alertas_contadores_insert AFTER INSERT ON alertas BEGIN {_SUMAR_NEW} END",
+    f"CREATE TRIGGER trg_alertas_contadores_delete AFTER DELETE ON alertas BEGIN {_RESTAR_OLD} END",
+    # Solo el cambio de grupo mueve contadores; las repeticiones y notas no generan deltas
+    f"""CREATE TRIGGER trg_alertas_contadores_cambio_grupo AFTER UPDATE ON alertas
+    WHEN OLD.tipo_alerta IS NOT NEW.tipo_alerta OR OLD.resuelta IS NOT NEW.resuelta
+    BEGIN {_RESTAR_OLD} {_SUMAR_NEW} END""",
+)
+for _ddl in _TRIGGERS_SQLITE:
+    event.listen(Alerta.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite"))
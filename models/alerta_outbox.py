@@ -0,0 +1,47 @@
+# gesneu_api2/models/alerta_outbox.py
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, ClassVar, Dict, Any
+from pydantic import ConfigDict
+
+import sqlalchemy
+from sqlmodel import Field, SQLModel
+from sqlalchemy import Column, Index, TIMESTAMP, text
+
+
+class AlertaOutbox(SQLModel, table=True):
+    """
+    Representa la tabla 'alertas_outbox'.
+    Cada evento de neumático deja aquí una fila en su misma transacción; el worker
+    de alertas (services/alert_outbox_worker.py) las consume y evalúa las reglas.
+    """
+    __tablename__ = "alertas_outbox"
+    __table_args__ = (
+        # Solo interesa indexar lo pendiente, que es lo que el worker recorre
+        Index(
+            "ix_alertas_outbox_pendientes", "disponible_en",
+            postgresql_where=text("procesado_en IS NULL"),
+            sqlite_where=text("procesado_en IS NULL"),
+        ),
+    )
+
+    id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
+    evento_id: uuid.UUID = Field(foreign_key="eventos_neumaticos.id", nullable=False)
+    neumatico_id: uuid.UUID = Field(foreign_key="neumaticos.id", nullable=False)
+
+    creado_en: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(TIMESTAMP(timezone=True), nullable=False)
+    )
+    # Momento a partir del cual la fila puede (re)intentarse; se retrasa tras cada fallo
+    disponible_en: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(TIMESTAMP(timezone=True), nullable=False)
+    )
+    procesado_en: Optional[datetime] = Field(default=None, sa_column=Column(TIMESTAMP(timezone=True), nullable=True))
+    intentos: int = Field(default=0, nullable=False)
+    ultimo_error: Optional[str] = Field(default=None, sa_column=Column(sqlalchemy.Text))
+
+    model_config: ClassVar[Dict[str, Any]] = ConfigDict(
+        from_attributes=True
+    )
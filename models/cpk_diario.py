@@ -0,0 +1,56 @@
+# gesneu_api2/models/cpk_diario.py
+import uuid
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import BigInteger, Column, Date, Index, Integer, Numeric
+from sqlmodel import Field, SQLModel
+
+
+class CpkNeumaticoDiario(SQLModel, table=True):
+    """
+    Representa la tabla 'cpk_neumatico_diario': costos y kilómetros de un
+    neumático agregados por día. Es la unidad del refresco incremental de
+    services/cpk_service.py: las filas de un neumático se borran y recalculan
+    enteras cuando el neumático o sus eventos cambian.
+
+    Las dimensiones (modelo, proveedor de compra, tipo de vehículo) se copian
+    del neumático en cada refresco; no llevan FK porque son datos derivados.
+    """
+    __tablename__ = "cpk_neumatico_diario"
+
+    neumatico_id: uuid.UUID = Field(primary_key=True)
+    dia: date = Field(sa_column=Column(Date, primary_key=True))
+    modelo_id: uuid.UUID = Field(nullable=False)
+    proveedor_id: Optional[uuid.UUID] = Field(default=None, nullable=True)
+    tipo_vehiculo_id: Optional[uuid.UUID] = Field(default=None, nullable=True)
+    costo_pen: Decimal = Field(default=Decimal("0"), sa_column=Column(Numeric(14, 2), nullable=False))
+    costo_usd: Decimal = Field(default=Decimal("0"), sa_column=Column(Numeric(14, 2), nullable=False))
+    km: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
+
+
+class CpkGrupoDiario(SQLModel, table=True):
+    """
+    Representa la tabla 'cpk_grupo_diario': la suma de cpk_neumatico_diario
+    por día y combinación de dimensiones. Es lo que leen los endpoints de
+    /analitica/cpk (el fabricante sale del modelo al consultar). Se reconstruye
+    por días completos: los días tocados por los neumáticos recalculados.
+
+    Índices según benchmarks/cpk_lectura.py: 'dia' para los rangos sin filtro
+    de dimensión y (modelo_id, dia) para los filtros por modelo o fabricante.
+    """
+    __tablename__ = "cpk_grupo_diario"
+    __table_args__ = (
+        Index("ix_cpk_grupo_diario_dia", "dia"),
+        Index("ix_cpk_grupo_diario_modelo_dia", "modelo_id", "dia"),
+    )
+
+    id: Optional[int] = Field(default=None, sa_column=Column(BigInteger().with_variant(Integer(), "sqlite"), primary_key=True))
+    dia: date = Field(sa_column=Column(Date, nullable=False))
+    modelo_id: uuid.UUID = Field(nullable=False)
+    proveedor_id: Optional[uuid.UUID] = Field(default=None, nullable=True)
+    tipo_vehiculo_id: Optional[uuid.UUID] = Field(default=None, nullable=True)
+    costo_pen: Decimal = Field(default=Decimal("0"), sa_column=Column(Numeric(14, 2), nullable=False))
+    costo_usd: Decimal = Field(default=Decimal("0"), sa_column=Column(Numeric(14, 2), nullable=False))
+    km: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
@@ -14,7 +14,8 @@ from sqlalchemy import (
     ForeignKey,
     Enum as SAEnum,
     JSON,
-    Numeric
+    Numeric,
+    Index
 )
 
 from schemas.common import TipoEventoNeumaticoEnum, EstadoNeumaticoEnum 
@@ -36,6 +37,12 @@ class EventoNeumatico(SQLModel, table=True):
     Registra cada evento significativo en el ciclo de vida de un neumático.
     """
     __tablename__ = "eventos_neumaticos"
+    # Historial paginado por cursor (keyset sobre timestamp_evento, id dentro de cada neumático)
+    # Refresco incremental de CPK: eventos registrados desde la última marca (creado_en)
+    __table_args__ = (
+        Index("ix_eventos_neumaticos_neumatico_timestamp_id", "neumatico_id", "timestamp_evento", "id"),
+        Index("ix_eventos_neumaticos_creado_en", "creado_en"),
+    )
 
     id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
 
@@ -6,6 +6,7 @@ from datetime import datetime, timezone # Asegurarse que timezone esté importad
 from typing import Optional, List, TYPE_CHECKING, ClassVar, Dict, Any
 
 from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import Index
 # Column, text, ForeignKey ya no son necesarios aquí para los campos de auditoría
 # from sqlalchemy import Column, text, ForeignKey 
 
@@ -24,6 +25,8 @@ if TYPE_CHECKING:
 # y los campos base (incluyendo 'activo') de FabricanteSchemaBase.
 class FabricanteNeumatico(SQLModelTimestamp, FabricanteSchemaBase, table=True):
     __tablename__ = "fabricantes_neumatico"
+    # Listado filtrado por estado y ordenado por nombre (crud_fabricante.listado)
+    __table_args__ = (Index("ix_fabricantes_neumatico_activo_nombre", "activo", "nombre"),)
 
     # --- Clave Primaria ---
     # FabricanteSchemaBase no define 'id', así que lo definimos aquí.
@@ -0,0 +1,19 @@
+# gesneu_api2/models/marca_refresco.py
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import TIMESTAMP, Column
+from sqlmodel import Field, SQLModel
+
+
+class MarcaRefresco(SQLModel, table=True):
+    """
+    Representa la tabla 'marcas_refresco': hasta qué instante ha procesado
+    cada tabla derivada con refresco incremental (una fila por proceso). El
+    siguiente refresco solo revisa lo modificado después de `marca`.
+    """
+    __tablename__ = "marcas_refresco"
+
+    nombre: str = Field(primary_key=True, max_length=50)
+    marca: datetime = Field(sa_column=Column(TIMESTAMP(timezone=True), nullable=False))
+    actualizado_en: Optional[datetime] = Field(default=None, sa_column=Column(TIMESTAMP(timezone=True), nullable=True))
@@ -6,7 +6,7 @@ from datetime import date, datetime, timezone
 from typing import Optional, List, TYPE_CHECKING , ClassVar, Dict, Any
 
 from sqlmodel import Field, SQLModel, Relationship 
-from sqlalchemy import Column, text, TIMESTAMP, ForeignKey, Numeric, Date
+from sqlalchemy import Column, text, TIMESTAMP, ForeignKey, Numeric, Date, Index
 from sqlalchemy import Enum as SAEnum
 
 # --- Importar Base y Enum desde schemas ---
@@ -32,6 +32,25 @@ if TYPE_CHECKING:
 class Neumatico(NeumaticoSchemaBase, table=True): # <--- CORREGIDO: Quitado SQLModel explícito de aquí
     __tablename__ = "neumaticos"
     # __table_args__ = {'extend_existing': True} # Usar con precaución
+    # GET /neumaticos/instalados: keyset sobre (creado_en, id) de los instalados
+    # (parcial en PostgreSQL, migrations/006_neumaticos_instalados.sql)
+    __table_args__ = (
+        Index(
+            "ix_neumaticos_instalados_creado_en_id", "creado_en", "id",
+            postgresql_where=text("estado_actual = 'INSTALADO'"),
+            sqlite_where=text("estado_actual = 'INSTALADO'"),
+        ),
+        # Umbral de profundidad (barrido de alertas) y filtro por rango de
+        # GET /neumaticos/instalados: un único índice, parcial sobre los no
+        # desechados (migrations/003_neumaticos_condicion_actual.sql)
+        Index(
+            "ix_neumaticos_profundidad_actual_mm", "profundidad_actual_mm",
+            postgresql_where=text("estado_actual <> 'DESECHADO'"),
+            sqlite_where=text("estado_actual <> 'DESECHADO'"),
+        ),
+        # Refresco incremental de CPK: neumáticos modificados desde la última marca
+        Index("ix_neumaticos_actualizado_en", "actualizado_en"),
+    )
 
     # --- Clave Primaria ---
     # NeumaticoSchemaBase (de schemas/neumatico.py) NO define 'id'.
@@ -85,6 +104,19 @@ class Neumatico(NeumaticoSchemaBase, table=True): # <--- CORREGIDO: Quitado SQLM
     profundidad_inicial_mm: Optional[float] = Field( 
         default=None, sa_column=Column(Numeric(5, 2), nullable=True)
     )
+    # --- Condición actual (desnormalizada) ---
+    # Última medición, mantenida por NeumaticoService en la misma transacción que el
+    # evento INSPECCION / REENCAUCHE_SALIDA; evita buscar la última inspección en eventos.
+    profundidad_actual_mm: Optional[float] = Field(
+        default=None, sa_column=Column(Numeric(5, 2), nullable=True)
+    )
+    # Misma precisión que eventos_neumaticos.presion_psi, que la vista de instalados exponía
+    presion_actual_psi: Optional[float] = Field(
+        default=None, sa_column=Column(Numeric(5, 2), nullable=True)
+    )
+    fecha_ultima_inspeccion: Optional[datetime] = Field(
+        default=None, sa_column=Column(TIMESTAMP(timezone=True), nullable=True)
+    )
     kilometraje_acumulado: int = Field(default=0, nullable=False)
     reencauches_realizados: int = Field(default=0, nullable=False)
     vida_actual: int = Field(default=1, nullable=False)
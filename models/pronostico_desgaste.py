@@ -0,0 +1,36 @@
+# gesneu_api2/models/pronostico_desgaste.py
+import uuid
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import TIMESTAMP, Column, Date, Index
+from sqlmodel import Field, SQLModel
+
+
+class PronosticoDesgaste(SQLModel, table=True):
+    """
+    Representa la tabla 'pronosticos_desgaste': para cada neumático instalado,
+    el ajuste lineal profundidad ~ odómetro de sus inspecciones desde la última
+    instalación y la proyección de cuándo llegará a la profundidad mínima.
+
+    La calcula services/pronostico_desgaste_service.py (refresco incremental);
+    los campos del ajuste quedan a None si no hay datos suficientes.
+    """
+    __tablename__ = "pronosticos_desgaste"
+    # GET /analitica/desgaste/proximos: retiros previstos hasta una fecha
+    __table_args__ = (Index("ix_pronosticos_desgaste_fecha_retiro", "fecha_retiro_estimada"),)
+
+    neumatico_id: uuid.UUID = Field(primary_key=True)
+    modelo_id: uuid.UUID = Field(nullable=False)
+    vehiculo_id: Optional[uuid.UUID] = Field(default=None, nullable=True)
+    puntos: int = Field(default=0, nullable=False)  # Mediciones usadas en el ajuste (incluida la de instalación)
+    profundidad_minima_mm: float = Field(nullable=False)
+    desgaste_mm_por_1000km: Optional[float] = Field(default=None, nullable=True)
+    profundidad_estimada_mm: Optional[float] = Field(default=None, nullable=True)  # En el último odómetro medido
+    odometro_ultimo: Optional[int] = Field(default=None, nullable=True)
+    odometro_retiro_estimado: Optional[int] = Field(default=None, nullable=True)
+    km_restantes: Optional[int] = Field(default=None, nullable=True)
+    km_por_dia: Optional[float] = Field(default=None, nullable=True)
+    fecha_retiro_estimada: Optional[date] = Field(default=None, sa_column=Column(Date, nullable=True))
+    ultima_medicion_en: Optional[datetime] = Field(default=None, sa_column=Column(TIMESTAMP(timezone=True), nullable=True))
+    calculado_en: datetime = Field(sa_column=Column(TIMESTAMP(timezone=True), nullable=False))
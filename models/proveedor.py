@@ -4,6 +4,7 @@ from pydantic import ConfigDict
 from typing import Optional, List, TYPE_CHECKING, ClassVar, Dict, Any # Añadido ClassVar, Dict y Any
 
 from sqlmodel import Field, SQLModel, Relationship # Añadido Relationship
+from sqlalchemy import Index
 # Column, text, ForeignKey ya no son necesarios aquí para los campos de auditoría
 # from sqlalchemy import Column, text, ForeignKey
 
@@ -24,6 +25,8 @@ if TYPE_CHECKING:
 # y los campos base (incluyendo 'activo') de ProveedorSchemaBase.
 class Proveedor(SQLModelTimestamp, ProveedorSchemaBase, table=True):
     __tablename__ = "proveedores"
+    # Listado filtrado por estado y ordenado por nombre (crud_proveedor.listado)
+    __table_args__ = (Index("ix_proveedores_activo_nombre", "activo", "nombre"),)
 
     # --- Clave Primaria ---
     # ProveedorSchemaBase no define 'id', así que lo definimos aquí.
@@ -1,6 +1,7 @@
 # gesneu_api2/models/tipo_vehiculo.py
 from typing import Optional, List, TYPE_CHECKING, ClassVar, Dict, Any, Union
 from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import Index
 import uuid
 # Se importarán SQLModelTimestamp y EstadoItem para heredar de ellos
 from .common import SQLModelTimestamp, EstadoItem # <--- Importación corregida
@@ -15,6 +16,8 @@ class TipoVehiculoBase(SQLModel):
 
 class TipoVehiculo(SQLModelTimestamp, EstadoItem, TipoVehiculoBase, table=True): # <--- Herencia actualizada
     __tablename__ = "tipos_vehiculo"
+    # Listado filtrado por estado y ordenado por nombre (crud_tipo_vehiculo.listado)
+    __table_args__ = (Index("ix_tipos_vehiculo_activo_nombre", "activo", "nombre"),)
 
     id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
     
@@ -4,7 +4,7 @@ from pydantic import ConfigDict, field_serializer, field_validator
 from typing import Optional, List, TYPE_CHECKING, ClassVar, Dict, Any, Union, Annotated
 from datetime import date, datetime
 from sqlmodel import Field, SQLModel, Relationship, Column
-from sqlalchemy import UUID as SQLAlchemyUUID, Date as SQLAlchemyDate, String
+from sqlalchemy import UUID as SQLAlchemyUUID, Date as SQLAlchemyDate, String, Index
 from .common import SQLModelTimestamp, EstadoItem
 
 # Bloque para importaciones solo visibles por analizadores de tipo (Pylance, MyPy)
@@ -36,6 +36,14 @@ class VehiculoBase(SQLModel):
 
 class Vehiculo(VehiculoBase, SQLModelTimestamp, EstadoItem, table=True):
     __tablename__ = "vehiculos"
+    # Paginación por cursor de GET /vehiculos (keyset sobre creado_en, id) y
+    # filtros del listado (crud_vehiculo.listado; migrations/005_filtros_listados.sql)
+    __table_args__ = (
+        Index("ix_vehiculos_creado_en_id", "creado_en", "id"),
+        Index("ix_vehiculos_activo_creado_en_id", "activo", "creado_en", "id"),
+        Index("ix_vehiculos_tipo_vehiculo_id", "tipo_vehiculo_id"),
+        Index("ix_vehiculos_marca", "marca"),
+    )
 
     id: Optional[uuid.UUID] = Field(
         default_factory=uuid.uuid4, # Default para el modelo Pydantic/SQLModel
@@ -0,0 +1,91 @@
+# routers/admin.py
+import logging
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, status
+
+from core.dependencies import get_current_active_superuser
+from core.pool_hash import pool_hash
+from core.pool_metrics import reiniciar_metricas, todas_las_metricas
+from models.usuario import Usuario
+from services.catalogo_cache import catalogo_cache
+from services.notification_dispatcher import despachador
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get(
+    "/pool",
+    status_code=status.HTTP_200_OK,
+    summary="Estado y métricas del pool de conexiones"
+)
+async def estado_pool(
+    current_user: Usuario = Depends(get_current_active_superuser)
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Devuelve, por cada pool instrumentado (core/pool_metrics.py), las conexiones
+    en uso, ociosas y de overflow, los contadores de checkouts/checkins y los
+    tiempos de espera por conexión (total, máximo y percentiles).
+    """
+    return todas_las_metricas()
+
+
+@router.post(
+    "/pool/reiniciar",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Reiniciar los contadores del pool"
+)
+async def reiniciar_metricas_pool(
+    current_user: Usuario = Depends(get_current_active_superuser)
+):
+    """Pone a cero los contadores acumulados (útil antes de una prueba de carga)."""
+    reiniciar_metricas()
+    logger.info(f"Métricas del pool reiniciadas por {current_user.username}")
+
+
+@router.get(
+    "/hash-pool",
+    status_code=status.HTTP_200_OK,
+    summary="Métricas del pool de hashing de contraseñas"
+)
+async def estado_pool_hash(
+    current_user: Usuario = Depends(get_current_active_superuser)
+) -> Dict[str, Any]:
+    """
+    Tamaño del pool de bcrypt (core/pool_hash.py), operaciones en cola y en
+    curso, rechazos por saturación y tiempos medios de espera y ejecución.
+    """
+    return pool_hash.metricas()
+
+
+@router.get(
+    "/catalogo-cache",
+    status_code=status.HTTP_200_OK,
+    summary="Métricas de la caché de catálogo"
+)
+async def estado_catalogo_cache(
+    current_user: Usuario = Depends(get_current_active_superuser)
+) -> Dict[str, Any]:
+    """
+    Caché en proceso de modelos y fabricantes (services/catalogo_cache.py): por
+    tabla, entradas, aciertos, fallos y tasa de aciertos; además la versión de
+    invalidación y el TTL. Los contadores son de este proceso.
+    """
+    return catalogo_cache.stats()
+
+
+@router.get(
+    "/notificaciones",
+    status_code=status.HTTP_200_OK,
+    summary="Métricas del despachador de notificaciones"
+)
+async def estado_notificaciones(
+    current_user: Usuario = Depends(get_current_active_superuser)
+) -> Dict[str, Any]:
+    """
+    Estado de la cola de notificaciones por correo (services/notification_dispatcher.py):
+    pendientes, descartadas por cola llena, resúmenes enviados, reintentos,
+    fallos y conexiones SMTP abiertas.
+    """
+    return despachador.metricas()
@@ -5,16 +5,20 @@ from typing import List, Optional
 from schemas.common import TipoAlertaEnum
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Path, Response
 from sqlmodel import select
-from sqlalchemy.sql import func
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from core.dependencies import get_session, get_current_active_user
+from core.dependencies import get_session, get_read_session, get_current_active_user
+from core.consultas_sql import presupuesto_consultas
 from models.usuario import Usuario
 from models.alerta import Alerta
 from schemas.alerta import AlertaResponse, AlertaUpdate, AlertaConDetallesResponse
 from crud.crud_alerta import alerta as crud_alerta
+from services.alertas_contadores_service import etag_contadores, leer_contadores
+from utils.cursor import CABECERA_SIGUIENTE_CURSOR, CursorInvalidoError, aplicar_cursor, paginar
+from utils.etag import CABECERA_ETAG, etag_coincide, respuesta_no_modificada
+from utils.serializacion import RespuestaORJSON
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -24,13 +28,16 @@ logger = logging.getLogger(__name__)
     response_model=List[AlertaResponse],
     status_code=status.HTTP_200_OK,
     summary="Listar alertas",
+    dependencies=[Depends(presupuesto_consultas(3))],
     description="Obtiene todas las alertas con opción de filtrar por tipo o estado"
 )
 async def listar_alertas(
-    session: AsyncSession = Depends(get_session),
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_active_user),
     skip: int = 0,
     limit: int = Query(default=100, le=200),
+    cursor: Optional[str] = Query(default=None, description="Cursor de la página siguiente (cabecera X-Next-Cursor); sustituye a skip"),
     resuelta: Optional[bool] = Query(default=None, description="Filtrar por estado de resolución"),
     tipo_alerta: Optional[str] = Query(default=None, description="Filtrar por tipo de alerta"),
     neumatico_id: Optional[uuid.UUID] = Query(default=None, description="Filtrar por neumático"),
@@ -49,7 +56,9 @@ async def listar_alertas(
     - Modelo de neumático
     - Almacén
     
-    Soporta paginación con skip y limit.
+    Soporta paginación por cursor (keyset sobre creado_en, id): la cabecera
+    X-Next-Cursor de la respuesta trae el cursor de la página siguiente.
+    skip/limit (OFFSET) se mantiene por compatibilidad.
     """
     try:
         # Construir la consulta base
@@ -69,17 +78,20 @@ async def listar_alertas(
         if almacen_id:
             query = query.where(Alerta.almacen_id == almacen_id)
         
-        # Ordenar por timestamp (más recientes primero)
-        query = query.order_by(Alerta.creado_en.desc())
-        
-        # Aplicar paginación
-        query = query.offset(skip).limit(limit)
+        # Más recientes primero; el id desempata para que el orden sea estable entre páginas
+        query = aplicar_cursor(query, Alerta.creado_en, Alerta.id, cursor, limit)
+        if not cursor and skip:
+            query = query.offset(skip)
         
         # Ejecutar la consulta
         result = await session.exec(query)
-        alertas = result.all()
+        alertas, siguiente = paginar(result.all(), limit, lambda a: (a.creado_en, a.id))
+        if siguiente:
+            response.headers[CABECERA_SIGUIENTE_CURSOR] = siguiente
         
         return alertas
+    except CursorInvalidoError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error al listar alertas: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -91,11 +103,12 @@ async def listar_alertas(
     "/{alerta_id}",
     response_model=AlertaConDetallesResponse,
     status_code=status.HTTP_200_OK,
-    summary="Obtener detalles de una alerta"
+    summary="Obtener detalles de una alerta",
+    dependencies=[Depends(presupuesto_consultas(3))],
 )
 async def obtener_alerta(
     alerta_id: uuid.UUID = Path(..., description="ID único de la alerta"),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_active_user)
 ):
     """
@@ -147,6 +160,17 @@ async def actualizar_alerta(
     
     # Preparar datos de actualización
     update_data = alerta_update.model_dump(exclude_unset=True)
+
+    # Reabrir una alerta no puede duplicar otra abierta con la misma clave
+    if alerta.resuelta and update_data.get("resuelta") is False and alerta.clave_dedup:
+        abierta = (await session.exec(select(Alerta.id).where(
+            Alerta.clave_dedup == alerta.clave_dedup, Alerta.resuelta == False  # noqa: E712
+        ))).first()
+        if abierta is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Ya existe una alerta abierta equivalente ({abierta})"
+            )
     
     # Si se está marcando como resuelta y no se proporcionó timestamp_gestion
     if update_data.get("resuelta") and not update_data.get("timestamp_gestion"):
@@ -196,12 +220,14 @@ async def actualizar_alerta(
 @router.get(
     "/dashboard/resumen",
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(presupuesto_consultas(3))],
     summary="Resumen de alertas",
     description="Muestra métricas clave de alertas activas agrupadas por tipo y severidad"
 )
 async def obtener_resumen_alertas(
-    session: AsyncSession = Depends(get_session),
-    current_user: Usuario = Depends(get_current_active_user)
+    session: AsyncSession = Depends(get_read_session),
+    current_user: Usuario = Depends(get_current_active_user),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     Proporciona un resumen de alertas para mostrar en un dashboard.
@@ -210,58 +236,31 @@ async def obtener_resumen_alertas(
     - Conteo de alertas por tipo
     - Conteo de alertas resueltas vs no resueltas
     - Alertas recientes (últimas 10)
+
+    Los conteos salen de alertas_contadores y sus deltas pendientes (mantenidos
+    por triggers, ver services/alertas_contadores_service.py), no de agregar
+    'alertas'. El ETag cambia cuando cambia algún conteo o lo que se muestra de
+    las alertas recientes (una repetición puede cambiar su descripción o
+    severidad sin mover conteos): con `If-None-Match` vigente se responde 304
+    tras dos consultas.
     """
     try:
-        # Contar alertas no resueltas por tipo
-        query_por_tipo = select(
-            Alerta.tipo_alerta, 
-            func.count(Alerta.id).label("total")
+        contadores = await leer_contadores(session)
+
+        # Las 10 alertas más recientes no resueltas (solo las columnas que se devuelven)
+        query_recientes = select(
+            Alerta.id, Alerta.tipo_alerta, Alerta.descripcion, Alerta.nivel_severidad, Alerta.resuelta, Alerta.creado_en
         ).where(
-            Alerta.resuelta == False
-        ).group_by(
-            Alerta.tipo_alerta
-        )
-        result_por_tipo = await session.exec(query_por_tipo)
-        # Convertir los valores a TipoAlertaEnum para evitar warnings de serialización
-        # Primero intentamos convertir a enum, si falla usamos el valor original como string
-        conteo_por_tipo = {}
-        for tipo, total in result_por_tipo:
-            try:
-                # Intentar convertir a enum
-                enum_tipo = TipoAlertaEnum(tipo)
-                conteo_por_tipo[enum_tipo] = total
-            except ValueError:
-                # Si no es un valor válido del enum, usar el string
-                conteo_por_tipo[str(tipo)] = total
-        
-        # Contar total de alertas resueltas vs no resueltas
-        query_por_estado = select(
-            Alerta.resuelta, 
-            func.count(Alerta.id).label("total")
-        ).group_by(
-            Alerta.resuelta
-        )
-        result_por_estado = await session.exec(query_por_estado)
-        conteo_por_estado = {str(resuelta): total for resuelta, total in result_por_estado}
-        
-        # Obtener las 10 alertas más recientes no resueltas
-        query_recientes = select(Alerta).where(
-            Alerta.resuelta == False
+            Alerta.resuelta == False  # noqa: E712
         ).order_by(
             Alerta.creado_en.desc()
         ).limit(10)
-        result_recientes = await session.exec(query_recientes)
-        alertas_obj = result_recientes.all()
-        
-        # Convertir las alertas a diccionarios para evitar problemas de serialización
         alertas_recientes = []
-        for alerta in alertas_obj:
-            # Convertir el tipo_alerta a enum si es posible
+        for alerta in (await session.exec(query_recientes)).all():
             try:
                 tipo_alerta = TipoAlertaEnum(alerta.tipo_alerta)
             except ValueError:
                 tipo_alerta = alerta.tipo_alerta
-                
             alertas_recientes.append({
                 "id": str(alerta.id),
                 "tipo_alerta": tipo_alerta,
@@ -270,12 +269,31 @@ async def obtener_resumen_alertas(
                 "resuelta": alerta.resuelta,
                 "creado_en": alerta.creado_en.isoformat() if alerta.creado_en else None
             })
+
+        etag = etag_contadores(contadores, alertas_recientes)
+        if etag_coincide(if_none_match, etag):
+            return respuesta_no_modificada(etag)
+
+        # Alertas no resueltas por tipo, y totales resueltas vs no resueltas
+        conteo_por_tipo = {}
+        conteo_por_estado = {}
+        for contador in contadores:
+            if contador.total <= 0:
+                continue
+            clave_estado = str(contador.resuelta)
+            conteo_por_estado[clave_estado] = conteo_por_estado.get(clave_estado, 0) + contador.total
+            if not contador.resuelta:
+                # Convertir a TipoAlertaEnum si es un valor válido; si no, se deja el string
+                try:
+                    conteo_por_tipo[TipoAlertaEnum(contador.tipo_alerta)] = contador.total
+                except ValueError:
+                    conteo_por_tipo[str(contador.tipo_alerta)] = contador.total
         
-        return {
+        return RespuestaORJSON({
             "conteo_por_tipo": conteo_por_tipo,
             "conteo_por_estado": conteo_por_estado,
             "alertas_recientes": alertas_recientes
-        }
+        }, headers={CABECERA_ETAG: etag})
     except Exception as e:
         logger.error(f"Error al obtener resumen de alertas: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -0,0 +1,176 @@
+# routers/analitica.py
+import logging
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Annotated, Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.consultas_sql import presupuesto_consultas
+from core.dependencies import get_current_active_superuser, get_current_active_user, get_read_session, get_session
+from core.scheduler import scheduler
+from models.usuario import Usuario
+from schemas.analitica import CpkResumenRead, CpkSerieRead, RetirosProximosRead
+from schemas.common import AgrupacionCpkEnum, GranularidadEnum
+from services import pronostico_desgaste_service
+from services.cpk_service import NOMBRE_TAREA, leer_cpk, leer_marca, leer_serie_cpk, refrescar_cpk
+from utils.serializacion import RespuestaORJSON
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def _validar_rango(desde: Optional[date], hasta: Optional[date]) -> None:
+    if desde and hasta and desde > hasta:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'desde' debe ser anterior o igual a 'hasta'")
+
+
+@router.get(
+    "/cpk",
+    response_model=CpkResumenRead,
+    dependencies=[Depends(get_current_active_user), Depends(presupuesto_consultas(3))],
+    summary="Costo por kilómetro agrupado por modelo, fabricante, proveedor o tipo de vehículo"
+)
+async def leer_cpk_agrupado(
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+    agrupar_por: AgrupacionCpkEnum = Query(default=AgrupacionCpkEnum.MODELO),
+    desde: Optional[date] = Query(default=None, description="Primer día incluido"),
+    hasta: Optional[date] = Query(default=None, description="Último día incluido"),
+    modelo_id: Optional[uuid.UUID] = Query(default=None),
+    fabricante_id: Optional[uuid.UUID] = Query(default=None),
+    proveedor_id: Optional[uuid.UUID] = Query(default=None),
+    tipo_vehiculo_id: Optional[uuid.UUID] = Query(default=None),
+):
+    """
+    CPK del periodo: costos (compra y eventos) y km registrados entre `desde` y
+    `hasta`, por grupo. Lee los agregados diarios de services/cpk_service.py;
+    `calculado_hasta` indica hasta cuándo están al día.
+    """
+    _validar_rango(desde, hasta)
+    grupos = await leer_cpk(
+        session, agrupar_por=agrupar_por, desde=desde, hasta=hasta, modelo_id=modelo_id,
+        fabricante_id=fabricante_id, proveedor_id=proveedor_id, tipo_vehiculo_id=tipo_vehiculo_id,
+    )
+    return RespuestaORJSON({
+        "agrupar_por": agrupar_por,
+        "desde": desde,
+        "hasta": hasta,
+        "calculado_hasta": await leer_marca(session),
+        "grupos": grupos,
+    })
+
+
+@router.get(
+    "/cpk/serie",
+    response_model=CpkSerieRead,
+    dependencies=[Depends(get_current_active_user), Depends(presupuesto_consultas(3))],
+    summary="Serie temporal de costo por kilómetro"
+)
+async def leer_serie_cpk_periodos(
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+    granularidad: GranularidadEnum = Query(default=GranularidadEnum.MES),
+    desde: Optional[date] = Query(default=None, description="Primer día incluido"),
+    hasta: Optional[date] = Query(default=None, description="Último día incluido"),
+    modelo_id: Optional[uuid.UUID] = Query(default=None),
+    fabricante_id: Optional[uuid.UUID] = Query(default=None),
+    proveedor_id: Optional[uuid.UUID] = Query(default=None),
+    tipo_vehiculo_id: Optional[uuid.UUID] = Query(default=None),
+):
+    """Costos, km y CPK por día o mes, con los mismos filtros que GET /cpk."""
+    _validar_rango(desde, hasta)
+    periodos = await leer_serie_cpk(
+        session, granularidad=granularidad, desde=desde, hasta=hasta, modelo_id=modelo_id,
+        fabricante_id=fabricante_id, proveedor_id=proveedor_id, tipo_vehiculo_id=tipo_vehiculo_id,
+    )
+    return RespuestaORJSON({
+        "granularidad": granularidad,
+        "calculado_hasta": await leer_marca(session),
+        "periodos": periodos,
+    })
+
+
+@router.post(
+    "/cpk/refrescar",
+    status_code=status.HTTP_200_OK,
+    summary="Refrescar los agregados de CPK bajo demanda"
+)
+async def refrescar_agregados_cpk(
+    response: Response,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    current_user: Annotated[Usuario, Depends(get_current_active_superuser)],
+    esperar: bool = Query(default=True, description="Esperar al refresco; con False solo se adelanta la tarea programada (202)"),
+    completo: bool = Query(default=False, description="Reconstruir todos los agregados en vez de solo los neumáticos modificados"),
+) -> Dict[str, Any]:
+    """
+    Refresco incremental (o completo) de los agregados. El incremental usa la
+    tarea programada si está registrada (nunca se solapa con la periódica); el
+    completo y el caso sin scheduler usan la sesión de la petición.
+    """
+    logger.info(f"Refresco de CPK solicitado por {current_user.username} (esperar={esperar}, completo={completo})")
+    if not completo:
+        try:
+            if not esperar:
+                scheduler.solicitar(NOMBRE_TAREA)
+                response.status_code = status.HTTP_202_ACCEPTED
+                return {"solicitado": True}
+            return await scheduler.ejecutar_ahora(NOMBRE_TAREA)
+        except KeyError:
+            pass
+    return await refrescar_cpk(session, completo=completo)
+
+
+@router.get(
+    "/desgaste/proximos",
+    response_model=RetirosProximosRead,
+    dependencies=[Depends(get_current_active_user), Depends(presupuesto_consultas(3))],
+    summary="Neumáticos instalados que llegarán a su profundidad mínima en los próximos días"
+)
+async def leer_retiros_proximos(
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+    dias: int = Query(default=30, ge=0, le=3650, description="Horizonte en días (incluye los ya vencidos)"),
+    vehiculo_id: Optional[uuid.UUID] = Query(default=None),
+    modelo_id: Optional[uuid.UUID] = Query(default=None),
+    limit: int = Query(default=500, ge=1, le=5000),
+):
+    """
+    Lee los pronósticos precalculados (services/pronostico_desgaste_service.py),
+    ordenados por fecha estimada de retiro. Los neumáticos sin inspecciones
+    suficientes no tienen fecha y no aparecen.
+    """
+    hasta = datetime.now(timezone.utc).date() + timedelta(days=dias)
+    items = await pronostico_desgaste_service.leer_retiros_proximos(
+        session, hasta=hasta, vehiculo_id=vehiculo_id, modelo_id=modelo_id, limit=limit,
+    )
+    return RespuestaORJSON({
+        "dias": dias,
+        "hasta": hasta,
+        "calculado_hasta": await pronostico_desgaste_service.leer_marca(session),
+        "items": items,
+    })
+
+
+@router.post(
+    "/desgaste/refrescar",
+    status_code=status.HTTP_200_OK,
+    summary="Refrescar los pronósticos de desgaste bajo demanda"
+)
+async def refrescar_pronosticos_desgaste(
+    response: Response,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    current_user: Annotated[Usuario, Depends(get_current_active_superuser)],
+    esperar: bool = Query(default=True, description="Esperar al refresco; con False solo se adelanta la tarea programada (202)"),
+    completo: bool = Query(default=False, description="Recalcular todos los neumáticos instalados"),
+) -> Dict[str, Any]:
+    """Igual que POST /cpk/refrescar, para los pronósticos de desgaste."""
+    logger.info(f"Refresco de pronósticos de desgaste solicitado por {current_user.username} (esperar={esperar}, completo={completo})")
+    if not completo:
+        try:
+            if not esperar:
+                scheduler.solicitar(pronostico_desgaste_service.NOMBRE_TAREA)
+                response.status_code = status.HTTP_202_ACCEPTED
+                return {"solicitado": True}
+            return await scheduler.ejecutar_ahora(pronostico_desgaste_service.NOMBRE_TAREA)
+        except KeyError:
+            pass
+    return await pronostico_desgaste_service.refrescar_pronosticos(session, completo=completo)
@@ -5,7 +5,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select # Asegurar que select esté importado
 
 # --- Importar verify_password y create_access_token ---
-from core.security import create_access_token, verify_password
+from core.security import create_access_token, verify_password_async
 # --- Fin de importación ---
 
 from core.dependencies import get_session # Usar la dependencia centralizada
@@ -28,7 +28,8 @@ async def login_for_access_token(
     if user and user.hashed_password:
         # ¡Llamar a la función de verificación!
         #password_ok = verify_password(form_data.password, user.password_hash)
-        password_ok = verify_password(form_data.password, user.hashed_password)
+        # bcrypt se ejecuta en el pool de hashing (core/pool_hash.py), no en el event loop
+        password_ok = await verify_password_async(form_data.password, user.hashed_password)
 
     # --- Fin de la verificación segura ---
 
@@ -22,6 +22,7 @@ from schemas.fabricante import (
 )
 # Importar el objeto CRUD
 from crud.crud_fabricante import fabricante as crud_fabricante
+from crud.base import FiltroInvalidoError
 
 # --- CORRECCIÓN FINAL: Eliminar el argumento prefix ---
 router = APIRouter(
@@ -108,26 +109,19 @@ async def leer_fabricantes(
     session: AsyncSession = Depends(get_session),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
-    activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo")
+    activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
+    pais_origen: Optional[str] = Query(None, description="Filtrar por país de origen"),
+    busqueda: Optional[str] = Query(None, max_length=100, description="Texto a buscar (contiene, sin distinguir mayúsculas)"),
+    orden: Optional[str] = Query(None, description=f"Claves de orden separadas por comas; '-' para descendente ({', '.join(crud_fabricante.listado.orden)})"),
 ):
-    """Obtiene una lista paginada de fabricantes."""
-    if activo is True:
-        # Usar el método específico para activos
-        fabricantes = await crud_fabricante.get_multi_active(session, skip=skip, limit=limit)
-    elif activo is False:
-        # Si se pide inactivos, necesitamos un método específico o filtrar aquí
-        # Por ahora, obtendremos todos y filtraremos (menos eficiente para grandes datasets)
-        # O mejor, añadimos un método get_multi_inactive al CRUD si es necesario frecuentemente
-        # Para simplificar, usaremos get_multi y filtraremos si activo is False
-        all_fabricantes = await crud_fabricante.get_multi(session, skip=skip, limit=limit)
-        fabricantes = [f for f in all_fabricantes if not f.activo]
-    else: # activo is None (obtener todos)
-        fabricantes = await crud_fabricante.get_multi(session, skip=skip, limit=limit)
-
-    # Nota: La ordenación por nombre no está en el CRUD base get_multi.
-    # Si la ordenación es crucial, se debe añadir al método CRUD o manejar aquí.
-    # Por ahora, devolvemos como vienen del CRUD base/filtrado.
-    return fabricantes
+    """Obtiene una lista paginada de fabricantes; filtros, búsqueda y orden se resuelven en SQL (por defecto, por nombre)."""
+    try:
+        return await crud_fabricante.get_multi(
+            session, skip=skip, limit=limit,
+            filtros={"activo": activo, "pais_origen": pais_origen}, busqueda=busqueda, orden=orden,
+        )
+    except FiltroInvalidoError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.get(
     "/{fabricante_id}",
@@ -0,0 +1,70 @@
+# routers/inventario.py
+import logging
+from datetime import datetime, timezone
+from typing import Annotated, Any, Dict
+
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.consultas_sql import presupuesto_consultas
+from core.dependencies import get_current_active_superuser, get_current_active_user, get_read_session, get_session
+from core.scheduler import scheduler
+from models.usuario import Usuario
+from schemas.inventario import InventarioResumenRead
+from services.inventario_service import NOMBRE_TAREA, es_materializada, leer_resumen, refrescar_resumen
+from utils.serializacion import RespuestaORJSON
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get(
+    "/resumen",
+    response_model=InventarioResumenRead,
+    dependencies=[Depends(get_current_active_user), Depends(presupuesto_consultas(2))],
+    summary="Resumen de inventario por modelo, estado y vida"
+)
+async def leer_resumen_inventario(
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+):
+    """
+    Lee vw_inventario_neumaticos (materializada en PostgreSQL). `calculado_en`
+    y `antiguedad_segundos` indican cuánto tiempo llevan los datos sin refrescarse.
+    """
+    items, calculado_en = await leer_resumen(session)
+    antiguedad = None
+    if calculado_en is not None:
+        antiguedad = round((datetime.now(timezone.utc) - calculado_en).total_seconds(), 3)
+    return RespuestaORJSON({
+        "calculado_en": calculado_en,
+        "antiguedad_segundos": antiguedad,
+        "materializado": es_materializada(session),
+        "items": items,
+    })
+
+
+@router.post(
+    "/resumen/refrescar",
+    status_code=status.HTTP_200_OK,
+    summary="Refrescar el resumen de inventario bajo demanda"
+)
+async def refrescar_resumen_inventario(
+    response: Response,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    current_user: Annotated[Usuario, Depends(get_current_active_superuser)],
+    esperar: bool = Query(default=True, description="Esperar al refresco; con False solo se adelanta la tarea programada (202)"),
+) -> Dict[str, Any]:
+    """
+    Refresca la vista materializada. Si la tarea programada está registrada se
+    usa su ejecución (nunca se solapa con la periódica); si no (scheduler
+    desactivado), se refresca con la sesión de la petición.
+    """
+    logger.info(f"Refresco del resumen de inventario solicitado por {current_user.username} (esperar={esperar})")
+    try:
+        if not esperar:
+            scheduler.solicitar(NOMBRE_TAREA)
+            response.status_code = status.HTTP_202_ACCEPTED
+            return {"solicitado": True}
+        return await scheduler.ejecutar_ahora(NOMBRE_TAREA)
+    except KeyError:
+        return await refrescar_resumen(session)
@@ -1,9 +1,13 @@
 # routers/neumaticos.py (Completo y Corregido v2)
 import uuid
+import json
 import logging
-from typing import List, Annotated, Optional # Asegúrate que Annotated esté importado
+from datetime import datetime
+from typing import Callable, List, Annotated, Optional, Literal # Asegúrate que Annotated esté importado
 
-from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
@@ -11,16 +15,22 @@ from sqlalchemy import func # Para usar func.lower si refinas el check
 from sqlalchemy.sql import text # Solo para vistas
 
 # --- Dependencias de BD y Autenticación ---
-from core.dependencies import get_session # Usar la dependencia centralizada
+from core.dependencies import get_session, get_read_session # Usar la dependencia centralizada
+from core.dependencies import get_read_session_factory, get_session_factory # Sesiones propias del streaming
 from core.dependencies import get_current_active_user # Usar la dependencia centralizada
+from core.config import settings
+from core.consultas_sql import presupuesto_consultas
 from models.usuario import Usuario # Modelo de Usuario
 
 # --- Modelos y Schemas ---
 from models.neumatico import Neumatico
 from models.evento_neumatico import EventoNeumatico
 # Importa los schemas necesarios
-from schemas.evento_neumatico import EventoNeumaticoCreate, EventoNeumaticoRead
-from schemas.neumatico import HistorialNeumaticoItem, NeumaticoInstaladoItem
+from schemas.evento_neumatico import (
+    EventoNeumaticoCreate, EventoNeumaticoRead,
+    EventoNeumaticoBatchCreate, EventoNeumaticoBatchItemResult, EventoNeumaticoBatchResponse
+)
+from schemas.neumatico import HistorialLoteRequest, HistorialLoteResponse, HistorialNeumaticoItem, NeumaticoInstaladoItem
 # Importar Enums desde su ubicación correcta
 from models.evento_neumatico import TipoEventoNeumaticoEnum
 from pydantic import ValidationError as PydanticValidationError
@@ -29,10 +39,14 @@ from pydantic import ValidationError as PydanticValidationError
 # Importar el servicio y sus excepciones personalizadas
 from services.neumatico_service import (
     NeumaticoService,
+    ServiceError,
     NeumaticoNotFoundError,
     ValidationError as ServiceValidationError, # Renombrar para evitar conflicto
     ConflictError as ServiceConflictError     # Renombrar para evitar conflicto
 )
+from services.inspeccion_import_service import InspeccionImportService, iterar_lineas
+from utils.cursor import CABECERA_SIGUIENTE_CURSOR, CursorInvalidoError
+from utils.serializacion import RespuestaORJSON, lineas_ndjson
 # !! Ya NO se importan check_profundidad_baja, check_stock_minimo aquí !!
 
 # --- Configuración del Router ---
@@ -43,6 +57,17 @@ router = APIRouter(
 )
 logger = logging.getLogger(__name__)
 
+
+def _status_code_para_error(service_exc: ServiceError) -> int:
+    """Traduce una excepción del servicio al código HTTP correspondiente."""
+    if isinstance(service_exc, NeumaticoNotFoundError):
+        return status.HTTP_404_NOT_FOUND
+    if isinstance(service_exc, ServiceValidationError):
+        return status.HTTP_422_UNPROCESSABLE_ENTITY
+    if isinstance(service_exc, ServiceConflictError):
+        return status.HTTP_409_CONFLICT
+    return status.HTTP_500_INTERNAL_SERVER_ERROR
+
 # --- Endpoint PING ---
 @router.get("/ping", status_code=status.HTTP_200_OK, summary="Ping de prueba para el router")
 async def ping_neumaticos():
@@ -55,6 +80,7 @@ async def ping_neumaticos():
 @router.post(
     "/eventos",
     response_model=EventoNeumaticoRead, # Schema de respuesta
+    dependencies=[Depends(presupuesto_consultas(16))],
     status_code=status.HTTP_201_CREATED,
     summary="Registrar nuevo evento para un neumático (vía Servicio)",
     description="Crea un evento y desencadena la actualización del neumático asociado en la capa de servicio."
@@ -102,13 +128,7 @@ async def crear_evento_neumatico(
 
     except (NeumaticoNotFoundError, ServiceValidationError, ServiceConflictError) as service_exc:
         await session.rollback()
-        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-        if isinstance(service_exc, NeumaticoNotFoundError):
-            status_code = status.HTTP_404_NOT_FOUND
-        elif isinstance(service_exc, ServiceValidationError):
-             status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
-        elif isinstance(service_exc, ServiceConflictError):
-            status_code = status.HTTP_409_CONFLICT
+        status_code = _status_code_para_error(service_exc)
         logger.warning(f"Error de servicio manejado en router /eventos: {service_exc.message} (Status Code: {status_code})")
         raise HTTPException(status_code=status_code, detail=service_exc.message)
     except IntegrityError as e:
@@ -124,73 +144,280 @@ async def crear_evento_neumatico(
         logger.error(f"Error inesperado en router /eventos: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor.")
 
+
+@router.post(
+    "/eventos/batch",
+    response_model=EventoNeumaticoBatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Registrar un lote de eventos de neumáticos",
+    description=(
+        "Procesa los eventos en orden con las mismas reglas que POST /eventos, en una sola transacción "
+        "(o en bloques de `tamano_bloque`). Un evento inválido no aborta el lote: su error se informa "
+        "en `resultados` con el código HTTP que habría recibido individualmente."
+    )
+)
+async def crear_eventos_neumatico_batch(
+    lote_in: EventoNeumaticoBatchCreate,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    current_user: Annotated[Usuario, Depends(get_current_active_user)]
+):
+    """Endpoint de ingesta masiva de eventos (sincronizaciones de taller, importaciones)."""
+    if len(lote_in.eventos) > settings.EVENTOS_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"El lote supera el máximo de {settings.EVENTOS_BATCH_MAX_ITEMS} eventos."
+        )
+    for evento_in in lote_in.eventos:
+        if evento_in.usuario_id is None:
+            evento_in.usuario_id = current_user.id
+
+    neumatico_service = NeumaticoService(session=session)
+    tamano_bloque = lote_in.tamano_bloque or settings.EVENTOS_BATCH_CHUNK_SIZE or None
+    logger.info(f"Router: Iniciando lote de {len(lote_in.eventos)} eventos (bloque: {tamano_bloque or 'completo'})")
+    try:
+        resultados = await neumatico_service.registrar_eventos_batch(
+            lote_in.eventos, current_user=current_user, chunk_size=tamano_bloque
+        )
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logger.error(f"Error SQLAlchemy en router /eventos/batch: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error inesperado en BD.")
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Error inesperado en router /eventos/batch: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor.")
+
+    items = []
+    for indice, (evento_in, (db_evento, error)) in enumerate(zip(lote_in.eventos, resultados)):
+        if error is None:
+            items.append(EventoNeumaticoBatchItemResult(
+                indice=indice, exito=True, codigo_estado=status.HTTP_201_CREATED,
+                evento_id=db_evento.id, neumatico_id=db_evento.neumatico_id
+            ))
+        else:
+            items.append(EventoNeumaticoBatchItemResult(
+                indice=indice, exito=False, codigo_estado=_status_code_para_error(error),
+                neumatico_id=evento_in.neumatico_id, error=error.message
+            ))
+    exitosos = sum(1 for item in items if item.exito)
+    logger.info(f"Router: Lote procesado: {exitosos} exitosos, {len(items) - exitosos} fallidos.")
+    return EventoNeumaticoBatchResponse(
+        total=len(items), exitosos=exitosos, fallidos=len(items) - exitosos, resultados=items
+    )
+
+
+class _ImportacionStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse que no escucha la desconexión en paralelo: el generador lee el
+    cuerpo de la petición mientras responde, y con servidores ASGI < 2.4 (uvicorn
+    declara 2.3) ese listener le robaría los mensajes del cuerpo. La desconexión del
+    cliente se detecta igualmente al leer el cuerpo. No usa tareas en segundo plano.
+    """
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+
+
+@router.post(
+    "/inspecciones/importar",
+    summary="Importar lecturas de inspección en streaming (NDJSON o CSV)",
+    description=(
+        "Consume el cuerpo fila a fila sin cargarlo completo en memoria. Cada fila (por `numero_serie`) "
+        "se registra como evento INSPECCION con las reglas de POST /eventos, por bloques de "
+        "IMPORTACION_BLOQUE_FILAS filas. La respuesta es NDJSON: una línea de progreso por bloque "
+        "confirmado y un resumen final."
+    ),
+    response_class=StreamingResponse,
+)
+async def importar_inspecciones(
+    request: Request,
+    session_factory: Annotated[Callable[[], AsyncSession], Depends(get_session_factory)],
+    current_user: Annotated[Usuario, Depends(get_current_active_user)],
+    formato: Optional[Literal["ndjson", "csv"]] = Query(None, description="Por defecto se deduce del Content-Type"),
+    tamano_bloque: Optional[int] = Query(None, ge=1, le=10000),
+):
+    if formato is None:
+        formato = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    logger.info(f"Router: Iniciando importación de inspecciones ({formato}) por {current_user.username}")
+
+    async def _progreso():
+        # Sesión propia: la de get_session puede estar cerrada cuando empieza el streaming
+        session = session_factory()
+        servicio = InspeccionImportService(session, current_user, tamano_bloque=tamano_bloque)
+        try:
+            async for registro in servicio.importar(iterar_lineas(request.stream()), formato):
+                yield json.dumps(registro, default=str) + "\n"
+        except ClientDisconnect:
+            await session.rollback()
+            logger.warning("Importación de inspecciones interrumpida: el cliente se desconectó.")
+        except Exception as e:
+            # Los bloques ya confirmados se mantienen; se informa el error en el propio flujo
+            await session.rollback()
+            logger.error(f"Error en importación de inspecciones: {e}", exc_info=True)
+            yield json.dumps({"completado": False, "error": str(e)}) + "\n"
+        finally:
+            await session.close()
+
+    return _ImportacionStreamingResponse(_progreso(), media_type="application/x-ndjson")
+
 # ... (resto del router) ...
 
 
 # --- Endpoints de Lectura ---
+@router.post(
+    "/historial/lote",
+    response_model=HistorialLoteResponse,
+    dependencies=[Depends(get_current_active_user), Depends(presupuesto_consultas(3))],
+    summary="Historiales de varios neumáticos (hasta 500) en una sola consulta"
+)
+async def leer_historiales_neumaticos(
+    lote_in: HistorialLoteRequest,
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+):
+    """
+    Devuelve `{neumatico_id: [eventos]}` para los neumáticos pedidos, con los
+    mismos filtros que el historial individual; `limit_por_neumatico` se queda
+    con los N eventos más recientes de cada uno. Los ids sin eventos (o
+    inexistentes) aparecen con una lista vacía.
+    """
+    if lote_in.desde and lote_in.hasta and lote_in.desde >= lote_in.hasta:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'desde' debe ser anterior a 'hasta'.")
+    neumatico_ids = list(dict.fromkeys(lote_in.neumatico_ids))
+    historiales = await NeumaticoService(session=session).get_historiales(
+        neumatico_ids, limit_por_neumatico=lote_in.limit_por_neumatico,
+        desde=lote_in.desde, hasta=lote_in.hasta, tipos_evento=lote_in.tipos_evento,
+    )
+    logger.info(f"Historial en lote: {len(neumatico_ids)} neumáticos, {sum(map(len, historiales.values()))} eventos")
+    return RespuestaORJSON(historiales)
+
 @router.get(
     "/{neumatico_id}/historial",
     response_model=List[HistorialNeumaticoItem], # Usa el schema correcto para el historial
+    dependencies=[Depends(presupuesto_consultas(3))],
     summary="Obtener historial de eventos para un neumático"
 )
 async def leer_historial_neumatico(
     # --- PARÁMETROS REORDENADOS PARA EVITAR WARNING PYLANCE ---
-    session: Annotated[AsyncSession, Depends(get_session)], # Primero la sesión
-    neumatico_id: uuid.UUID = Path(..., description="ID del neumático") # Luego el ID de la ruta
+    session: Annotated[AsyncSession, Depends(get_read_session)], # Primero la sesión
+    neumatico_id: uuid.UUID = Path(..., description="ID del neumático"), # Luego el ID de la ruta
     # --- FIN REORDENAMIENTO ---
+    desde: Optional[datetime] = Query(default=None, description="Eventos desde este instante (inclusivo)"),
+    hasta: Optional[datetime] = Query(default=None, description="Eventos hasta este instante (exclusivo)"),
+    tipo_evento: Optional[List[TipoEventoNeumaticoEnum]] = Query(default=None, description="Tipos de evento (repetible)"),
+    limit: Optional[int] = Query(default=None, ge=1, le=500, description="Eventos por página; sin limit ni cursor se devuelve el historial completo"),
+    cursor: Optional[str] = Query(default=None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)")
 ):
-    """Obtiene la lista de eventos históricos para un neumático específico, ordenados por fecha descendente."""
+    """
+    Obtiene la lista de eventos históricos para un neumático específico, ordenados por fecha descendente,
+    con usuario, placa, posición, proveedor y motivo de desecho resueltos en la misma consulta.
+
+    Con `limit` (o `cursor`) se pagina por keyset sobre (timestamp_evento, id) y la
+    cabecera X-Next-Cursor trae la página siguiente.
+    """
     logger.info(f"Solicitando historial para neumático ID: {neumatico_id}")
-    # Verificar si el neumático existe
-    neumatico = await session.get(Neumatico, neumatico_id)
-    if not neumatico:
-         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Neumático con ID {neumatico_id} no encontrado.")
+    if desde and hasta and desde >= hasta:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'desde' debe ser anterior a 'hasta'.")
+    filtros = dict(desde=desde, hasta=hasta, tipos_evento=tipo_evento)
 
     # Obtener historial usando el servicio
+    siguiente = None
     try:
         neumatico_service = NeumaticoService(session=session) # Instanciar servicio
-        eventos = await neumatico_service.get_historial(neumatico_id)
-        logger.info(f"Encontrados {len(eventos)} eventos para neumático {neumatico_id} (vía servicio)")
-        # Validar con el schema de respuesta
-        return [HistorialNeumaticoItem.model_validate(evento) for evento in eventos]
-    except PydanticValidationError as e:
-         logger.error(f"Error validando eventos del historial para neumático {neumatico_id}: {e}", exc_info=True)
-         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error al procesar datos del historial.")
+        if limit is None and cursor is None:
+            eventos = await neumatico_service.get_historial(neumatico_id, **filtros)
+        else:
+            eventos, siguiente = await neumatico_service.get_historial_pagina(neumatico_id, limit or 100, cursor, **filtros)
+    except CursorInvalidoError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error inesperado al leer historial neumático {neumatico_id}: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno al obtener historial.")
 
+    # Solo un historial vacío necesita distinguir "sin eventos" de "no existe"
+    if not eventos and not await session.get(Neumatico, neumatico_id):
+         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Neumático con ID {neumatico_id} no encontrado.")
+    logger.info(f"Encontrados {len(eventos)} eventos para neumático {neumatico_id} (vía servicio)")
+    respuesta = RespuestaORJSON(eventos)
+    if siguiente:
+        respuesta.headers[CABECERA_SIGUIENTE_CURSOR] = siguiente
+    return respuesta
+
 # ... (el resto de las funciones del router van aquí) ...
 
 @router.get(
     "/instalados",
-    response_model=List[NeumaticoInstaladoItem], # Usa el schema correcto para instalados
-    summary="Listar todos los neumáticos actualmente instalados"
+    response_model=List[NeumaticoInstaladoItem], # Solo documentación: se responde con RespuestaORJSON o NDJSON
+    dependencies=[Depends(presupuesto_consultas(3))],
+    summary="Listar todos los neumáticos actualmente instalados",
+    responses={200: {"content": {"application/x-ndjson": {}}}},
 )
 async def leer_neumaticos_instalados(
-    session: Annotated[AsyncSession, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+    session_factory: Annotated[Callable[[], AsyncSession], Depends(get_read_session_factory)],
+    vehiculo_id: Optional[uuid.UUID] = Query(None, description="Filtrar por vehículo"),
+    tipo_vehiculo_id: Optional[uuid.UUID] = Query(None, description="Filtrar por tipo de vehículo"),
+    fabricante_id: Optional[uuid.UUID] = Query(None, description="Filtrar por fabricante"),
+    profundidad_min: Optional[float] = Query(None, ge=0, description="Profundidad actual mínima (mm)"),
+    profundidad_max: Optional[float] = Query(None, ge=0, description="Profundidad actual máxima (mm)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Neumáticos por página; sin limit ni cursor se devuelven todos"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    formato: Literal["json", "ndjson"] = Query("json", description="ndjson: una línea JSON por neumático, en streaming y sin paginar"),
     # current_user: Usuario = Depends(get_current_active_user) # Ya está en dependencies
 ):
-    """Obtiene la lista de neumáticos instalados desde la vista optimizada `vw_neumaticos_instalados_optimizada`."""
-    logger.info(f"Solicitando lista de neumáticos instalados.")
-    # Importar el objeto CRUD de neumático si no está ya importado
+    """
+    Obtiene los neumáticos instalados con su condición actual (columnas desnormalizadas de `neumaticos`).
+
+    Los filtros se aplican en SQL. Con `limit` (o `cursor`) se pagina por keyset
+    sobre (creado_en, id). Con `formato=ndjson` la flota completa se envía fila a
+    fila desde un cursor de servidor (`stream_results`), con memoria constante.
+    """
     from crud.crud_neumatico import neumatico as crud_neumatico # Importar aquí o al inicio
 
+    filtros = {
+        nombre: valor for nombre, valor in dict(
+            vehiculo_id=vehiculo_id, tipo_vehiculo_id=tipo_vehiculo_id, fabricante_id=fabricante_id,
+            profundidad_min=profundidad_min, profundidad_max=profundidad_max,
+        ).items() if valor is not None
+    }
+    if formato == "ndjson":
+        if limit is not None or cursor is not None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El formato ndjson no se pagina")
+
+        async def _lineas():
+            enviados = 0
+            # Sesión propia: la de get_read_session puede estar cerrada cuando empieza el streaming
+            lectura = session_factory()
+            try:
+                async for filas in crud_neumatico.iterar_neumaticos_instalados(
+                    lectura, lote=settings.INSTALADOS_STREAM_LOTE, **filtros
+                ):
+                    enviados += len(filas)
+                    yield lineas_ndjson(filas)
+            except Exception as e:
+                # Las cabeceras ya salieron: el error se informa en el propio flujo
+                logger.error(f"Error en el streaming de neumáticos instalados: {e}", exc_info=True)
+                yield lineas_ndjson([{"error": "Error interno al procesar neumáticos instalados."}])
+            finally:
+                await lectura.close()
+            logger.info("Enviados %d neumáticos instalados en NDJSON.", enviados)
+
+        return StreamingResponse(_lineas(), media_type="application/x-ndjson")
+
     try:
-        # Obtener datos de la vista usando el CRUD
-        instalados_data = await crud_neumatico.get_neumaticos_instalados(session)
-        logger.info(f"Encontrados {len(instalados_data)} neumáticos instalados desde la vista (vía CRUD).")
-        # Validar cada fila contra el schema Pydantic
-        validated_items = [NeumaticoInstaladoItem.model_validate(item_data) for item_data in instalados_data]
-        return validated_items
-    except PydanticValidationError as e:
-        logger.error(f"Error validando datos de la vista 'vw_neumaticos_instalados_optimizada': {e}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Inconsistencia entre la vista de BD y el schema esperado para neumáticos instalados."
-        )
+        if limit is None and cursor is None:
+            instalados, siguiente = await crud_neumatico.get_neumaticos_instalados(session, **filtros), None
+        else:
+            instalados, siguiente = await crud_neumatico.get_pagina_instalados(
+                session, limit=limit or 100, cursor=cursor, **filtros
+            )
+        logger.info("Encontrados %d neumáticos instalados (vía CRUD).", len(instalados))
+        respuesta = RespuestaORJSON(instalados)
+        if siguiente:
+            respuesta.headers[CABECERA_SIGUIENTE_CURSOR] = siguiente
+        return respuesta
+    except CursorInvalidoError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
-        logger.error(f"Error inesperado al leer neumáticos instalados desde la vista: {e}", exc_info=True)
+        logger.error(f"Error inesperado al leer neumáticos instalados: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno al procesar neumáticos instalados."
@@ -14,8 +14,10 @@ from core.dependencies import get_current_active_user # Usar la dependencia cent
 from models.proveedor import Proveedor
 from models.usuario import Usuario # Para obtener el current_user
 from schemas.proveedor import ProveedorCreate, ProveedorRead, ProveedorUpdate
+from schemas.common import TipoProveedorEnum
 # Importar el objeto CRUD
 from crud.crud_proveedor import proveedor as crud_proveedor
+from crud.base import FiltroInvalidoError
 
 # Crear el router específico para proveedores
 router = APIRouter(
@@ -80,27 +82,20 @@ async def leer_proveedores(
     session: AsyncSession = Depends(get_session),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
-    activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo")
+    activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
+    tipo: Optional[TipoProveedorEnum] = Query(None, description="Filtrar por tipo de proveedor"),
+    busqueda: Optional[str] = Query(None, max_length=100, description="Texto a buscar (contiene, sin distinguir mayúsculas)"),
+    orden: Optional[str] = Query(None, description=f"Claves de orden separadas por comas; '-' para descendente ({', '.join(crud_proveedor.listado.orden)})"),
     # current_user: Usuario = Depends(get_current_active_user) # Ya protegido a nivel router
 ):
-    """Obtiene una lista paginada de proveedores, opcionalmente filtrada por estado."""
-    if activo is True:
-        # Usar el método específico para activos
-        proveedores = await crud_proveedor.get_multi_active(session, skip=skip, limit=limit)
-    elif activo is False:
-        # Si se pide inactivos, necesitamos un método específico o filtrar aquí
-        # Por ahora, obtendremos todos y filtraremos (menos eficiente para grandes datasets)
-        # O mejor, añadimos un método get_multi_inactive al CRUD si es necesario frecuentemente
-        # Para simplificar, usaremos get_multi y filtraremos si activo is False
-        all_proveedores = await crud_proveedor.get_multi(session, skip=skip, limit=limit)
-        proveedores = [p for p in all_proveedores if not p.activo]
-    else: # activo is None (obtener todos)
-        proveedores = await crud_proveedor.get_multi(session, skip=skip, limit=limit)
-
-    # Nota: La ordenación por nombre no está en el CRUD base get_multi.
-    # Si la ordenación es crucial, se debe añadir al método CRUD o manejar aquí.
-    # Por ahora, devolvemos como vienen del CRUD base/filtrado.
-    return proveedores
+    """Obtiene una lista paginada de proveedores; filtros, búsqueda y orden se resuelven en SQL (por defecto, por nombre)."""
+    try:
+        return await crud_proveedor.get_multi(
+            session, skip=skip, limit=limit,
+            filtros={"activo": activo, "tipo": tipo}, busqueda=busqueda, orden=orden,
+        )
+    except FiltroInvalidoError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.get(
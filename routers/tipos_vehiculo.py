@@ -17,6 +17,7 @@ from models.usuario import Usuario
 from schemas.tipo_vehiculo import TipoVehiculoCreate, TipoVehiculoRead, TipoVehiculoUpdate
 # Importar el objeto CRUD
 from crud.crud_tipo_vehiculo import tipo_vehiculo as crud_tipo_vehiculo
+from crud.base import FiltroInvalidoError
 
 # Crear el router específico
 router = APIRouter(
@@ -81,26 +82,18 @@ async def leer_tipos_vehiculo(
     session: AsyncSession = Depends(get_session),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
-    activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo")
+    activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
+    busqueda: Optional[str] = Query(None, max_length=100, description="Texto a buscar (contiene, sin distinguir mayúsculas)"),
+    orden: Optional[str] = Query(None, description=f"Claves de orden separadas por comas; '-' para descendente ({', '.join(crud_tipo_vehiculo.listado.orden)})"),
 ):
-    """Obtiene una lista paginada de tipos de vehículo."""
-    if activo is True:
-        # Usar el método específico para activos
-        tipos_vehiculo = await crud_tipo_vehiculo.get_multi_active(session, skip=skip, limit=limit)
-    elif activo is False:
-        # Si se pide inactivos, necesitamos un método específico o filtrar aquí
-        # Por ahora, obtendremos todos y filtraremos (menos eficiente para grandes datasets)
-        # O mejor, añadimos un método get_multi_inactive al CRUD si es necesario frecuentemente
-        # Para simplificar, usaremos get_multi y filtraremos si activo is False
-        all_tipos_vehiculo = await crud_tipo_vehiculo.get_multi(session, skip=skip, limit=limit)
-        tipos_vehiculo = [tv for tv in all_tipos_vehiculo if not tv.activo]
-    else: # activo is None (obtener todos)
-        tipos_vehiculo = await crud_tipo_vehiculo.get_multi(session, skip=skip, limit=limit)
-
-    # Nota: La ordenación por nombre no está en el CRUD base get_multi.
-    # Si la ordenación es crucial, se debe añadir al método CRUD o manejar aquí.
-    # Por ahora, devolvemos como vienen del CRUD base/filtrado.
-    return tipos_vehiculo
+    """Obtiene una lista paginada de tipos de vehículo; filtros, búsqueda y orden se resuelven en SQL (por defecto, por nombre)."""
+    try:
+        return await crud_tipo_vehiculo.get_multi(
+            session, skip=skip, limit=limit,
+            filtros={"activo": activo}, busqueda=busqueda, orden=orden,
+        )
+    except FiltroInvalidoError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.get(
     "/{tipo_vehiculo_id}", # Ruta relativa: /tipos-vehiculo/{id}
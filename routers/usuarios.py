@@ -4,6 +4,7 @@ from datetime import datetime, timezone # <--- IMPORTACIÓN AÑADIDA Y ACTUALIZA
 from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, select
 from sqlalchemy.exc import IntegrityError
 import traceback
 
@@ -12,9 +13,15 @@ from schemas.usuario import UsuarioCreate, UsuarioRead, UsuarioUpdate
 from models.usuario import Usuario as ModelUsuario
 from core.dependencies import get_session, get_current_active_user, get_current_active_superuser
 from core.config import settings # Para el prefijo de la API
+from core.pool_hash import PoolHashSaturadoError
 from utils.logging import logger
+from utils.serializacion import RespuestaORJSON, columnas_de_schema, filas_como_dicts
 
 router = APIRouter()
+# Proyección del listado: columnas de UsuarioRead; el rol se deriva de es_superusuario
+COLUMNAS_USUARIO_READ = columnas_de_schema(
+    ModelUsuario, UsuarioRead, rol=case((ModelUsuario.es_superusuario, "ADMIN"), else_="OPERADOR")
+)
 
 @router.post("/", response_model=UsuarioRead, status_code=status.HTTP_201_CREATED)
 async def crear_usuario_endpoint(
@@ -57,6 +64,10 @@ async def crear_usuario_endpoint(
             status_code=status.HTTP_409_CONFLICT,
             detail="Error de base de datos: el nombre de usuario o email podría ya existir.",
         )
+    except PoolHashSaturadoError:
+        # El handler global responde 503 con Retry-After
+        await session.rollback()
+        raise
     except Exception as e:
         logger.error(f"Error inesperado al crear usuario: {e}")
         await session.rollback()
@@ -84,74 +95,16 @@ async def leer_usuarios(
     Obtiene una lista de usuarios. Solo para superusuarios.
     """
     try:
-        # Usar un enfoque directo con SQLAlchemy raw
-        from sqlalchemy import select
-        from models.usuario import Usuario
-        import logging
-        
-        logger = logging.getLogger("GesNeuAPI")
-        
-        # Construir la consulta seleccionando el modelo completo
-        statement = select(Usuario).offset(skip).limit(limit)
-        logger.info(f"Ejecutando consulta: {statement}")
-        
+        statement = select(*COLUMNAS_USUARIO_READ).offset(skip).limit(limit)
         result = await session.exec(statement)
-        
-        # CORRECCIÓN: Usar scalars().all() para obtener directamente instancias del modelo Usuario
-        usuario_models = result.scalars().all()  # Esto devuelve List[Usuario]
-        logger.info(f"Número de usuarios encontrados: {len(usuario_models)}")
-        
-        # Convertir a lista de diccionarios para la respuesta
-        usuarios_response = []
-        
-        # Imprimir el tipo de objeto para depuración
-        if usuario_models:
-            logger.info(f"Tipo de objeto usuario: {type(usuario_models[0])}")
-        
-        for i, usuario_model in enumerate(usuario_models):
-            try:
-                logger.info(f"Procesando usuario {i+1}: {usuario_model.username}")
-                
-                # 'usuario_model' es ahora una instancia de tu modelo 'Usuario'
-                usuario_dict = {
-                    "id": str(usuario_model.id),  # Correcto: accede al 'id' del modelo
-                    "username": usuario_model.username,
-                    "email": usuario_model.email,
-                    "activo": usuario_model.activo,
-                    "creado_en": usuario_model.creado_en,
-                }
-                
-                # Añadir atributos opcionales solo si existen
-                if hasattr(usuario_model, 'nombre_completo'):
-                    usuario_dict["nombre_completo"] = usuario_model.nombre_completo
-                else:
-                    usuario_dict["nombre_completo"] = None
-                    
-                # Determinar el rol basado en los permisos del usuario
-                if hasattr(usuario_model, 'es_superusuario') and usuario_model.es_superusuario:
-                    usuario_dict["rol"] = "ADMIN"
-                else:
-                    usuario_dict["rol"] = "OPERADOR"  # Valor predeterminado para usuarios no superusuarios
-                    
-                if hasattr(usuario_model, 'actualizado_en'):
-                    usuario_dict["actualizado_en"] = usuario_model.actualizado_en
-                else:
-                    usuario_dict["actualizado_en"] = None
-                    
-                usuarios_response.append(usuario_dict)
-                logger.info(f"Usuario añadido a la respuesta: {usuario_dict['username']}")
-            except Exception as e:
-                logger.error(f"Error procesando usuario {i+1}: {str(e)}")
-                # Continuar con el siguiente usuario
-        
-        logger.info(f"Total de usuarios en la respuesta: {len(usuarios_response)}")
-        return usuarios_response
-    
+        usuarios = filas_como_dicts(result)
+        logger.debug("Total de usuarios en la respuesta: %d", len(usuarios))
+        return RespuestaORJSON(usuarios)
     except Exception as e:
         error_msg = f"Error en leer_usuarios: {e}"
         stack_trace = traceback.format_exc()
         logger.error(f"{error_msg}\n{stack_trace}")
-        
+
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error interno del servidor: {str(e)}"
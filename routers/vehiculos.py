@@ -4,22 +4,79 @@ import logging
 from datetime import date, datetime, timezone
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Path
 from sqlmodel import select
 # --- Asegurar importación de AsyncSession desde SQLModel ---
 from sqlmodel.ext.asyncio.session import AsyncSession # <--- Desde SQLModel
 from sqlalchemy.exc import IntegrityError
 
-from core.dependencies import get_session # Usar la dependencia centralizada
+from core.dependencies import get_session, get_read_session # Usar la dependencia centralizada
 from core.dependencies import get_current_active_user # Usar la dependencia centralizada
+from core.consultas_sql import presupuesto_consultas
 from models.vehiculo import Vehiculo
-from schemas.vehiculo import VehiculoCreate, VehiculoRead, VehiculoUpdate
+from schemas.vehiculo import VehiculoCreate, VehiculoLayoutRead, VehiculoRead, VehiculoUpdate
 from models.usuario import Usuario # Asumiendo que Usuario está definido
 # Importar el objeto CRUD
 from crud.crud_vehiculo import vehiculo as crud_vehiculo
+from crud.base import FiltroInvalidoError
+from utils.etag import CABECERA_ETAG, calcular_etag, etag_coincide, respuesta_no_modificada
+from utils.cursor import CABECERA_SIGUIENTE_CURSOR, CursorInvalidoError, aplicar_cursor, paginar
+from utils.serializacion import RespuestaORJSON, columnas_de_schema, filas_como_dicts
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+# Proyección de las lecturas: columnas de VehiculoRead etiquetadas con el nombre del campo
+COLUMNAS_VEHICULO_READ = columnas_de_schema(Vehiculo, VehiculoRead)
+
+# Columnas de las filas de crud_vehiculo.get_layout que forman cada nivel del layout
+_CAMPOS_EJE = ("numero_eje", "nombre_eje", "tipo_eje", "numero_posiciones", "posiciones_duales", "neumaticos_por_posicion")
+_CAMPOS_POSICION = ("codigo_posicion", "lado", "posicion_relativa", "es_interna", "es_direccion", "es_traccion")
+_CAMPOS_NEUMATICO = (
+    "numero_serie", "profundidad_actual_mm", "presion_actual_psi", "fecha_ultima_inspeccion", "fecha_ultimo_evento",
+    "fecha_instalacion", "km_instalacion", "kilometraje_acumulado", "vida_actual",
+)
+
+
+def _etag_layout(filas: List[dict]) -> str:
+    """
+    ETag del layout: última modificación (actualizado_en del vehículo y de sus
+    neumáticos, fecha_ultimo_evento) más la ocupación posición -> neumático, que
+    cambia al desmontar aunque el neumático retirado ya no salga en las filas.
+    """
+    marcas = [
+        marca for fila in filas
+        for marca in (fila["vehiculo_actualizado_en"], fila["neumatico_actualizado_en"], fila["fecha_ultimo_evento"])
+        if marca is not None
+    ]
+    ultima = max(marcas).isoformat() if marcas else ""
+    ocupacion = ",".join(f"{fila['posicion_id']}={fila['neumatico_id']}" for fila in filas)
+    return calcular_etag(filas[0]["vehiculo_id"], ultima, ocupacion)
+
+
+def _armar_layout(filas: List[dict]) -> dict:
+    """Agrupa las filas planas (ordenadas por eje y posición) en ejes -> posiciones -> neumático."""
+    primera = filas[0]
+    ejes: dict = {}
+    for fila in filas:
+        if fila["eje_id"] is None:
+            continue  # Tipo de vehículo sin configuración de ejes
+        eje = ejes.get(fila["eje_id"])
+        if eje is None:
+            eje = ejes[fila["eje_id"]] = {"id": fila["eje_id"], **{c: fila[c] for c in _CAMPOS_EJE}, "posiciones": []}
+        if fila["posicion_id"] is None:
+            continue
+        neumatico = None
+        if fila["neumatico_id"] is not None:
+            neumatico = {"id": fila["neumatico_id"], **{c: fila[c] for c in _CAMPOS_NEUMATICO}}
+        eje["posiciones"].append(
+            {"id": fila["posicion_id"], **{c: fila[c] for c in _CAMPOS_POSICION}, "neumatico": neumatico}
+        )
+    return {
+        "vehiculo_id": primera["vehiculo_id"],
+        "numero_economico": primera["numero_economico"],
+        "tipo_vehiculo_id": primera["tipo_vehiculo_id"],
+        "ejes": list(ejes.values()),
+    }
 
 @router.post(
     "/",
@@ -60,27 +117,7 @@ async def crear_vehiculo(
         db_vehiculo = await crud_vehiculo.create(session, obj_in=vehiculo_in)
         logger.info(f"Vehículo {db_vehiculo.numero_economico} creado por {current_user.username}")
         
-        # Convertir explícitamente a diccionario con los campos necesarios para VehiculoRead
-        vehiculo_dict = {
-            "id": str(db_vehiculo.id),
-            "tipo_vehiculo_id": str(db_vehiculo.tipo_vehiculo_id),
-            "numero_economico": db_vehiculo.numero_economico,
-            "placa": db_vehiculo.placa,
-            "vin": db_vehiculo.vin,
-            "marca": db_vehiculo.marca,
-            "modelo_vehiculo": db_vehiculo.modelo_vehiculo,
-            "anio_fabricacion": db_vehiculo.anio_fabricacion,
-            "fecha_alta": str(db_vehiculo.fecha_alta) if db_vehiculo.fecha_alta else None,
-            "activo": db_vehiculo.activo,
-            "ubicacion_actual": db_vehiculo.ubicacion_actual,
-            "notas": db_vehiculo.notas,
-            "odometro_actual": db_vehiculo.odometro_actual,
-            "fecha_ultimo_odometro": db_vehiculo.fecha_ultimo_odometro,
-            "creado_en": db_vehiculo.creado_en,
-            "actualizado_en": db_vehiculo.actualizado_en
-        }
-        
-        return vehiculo_dict
+        return VehiculoRead.model_validate(db_vehiculo)
     except IntegrityError as e: # Captura específica para errores de BD al guardar
         # El CRUD base ya hizo rollback si falló el commit
         logger.error(f"Error de integridad (inesperado aquí?) al crear vehículo: {str(e)}", exc_info=True)
@@ -99,62 +136,61 @@ async def crear_vehiculo(
 
 @router.get(
     "/",
-    # Usar Any para evitar problemas de validación
-    response_model=None,
-    summary="Listar vehículos"
+    response_model=List[VehiculoRead], # Solo documentación: se responde con RespuestaORJSON
+    summary="Listar vehículos",
+    dependencies=[Depends(presupuesto_consultas(3))],
 )
 async def leer_vehiculos(
-    session: AsyncSession = Depends(get_session), # Recibe sesión SQLModel
+    session: AsyncSession = Depends(get_read_session), # Recibe sesión SQLModel
     current_user: Usuario = Depends(get_current_active_user), # Usar la dependencia centralizada
     skip: int = 0,
     limit: int = Query(default=100, le=200),
-    activo: Optional[bool] = Query(default=None, description="Filtrar por estado activo/inactivo") # Default None para ver todos
+    activo: Optional[bool] = Query(default=None, description="Filtrar por estado activo/inactivo"), # Default None para ver todos
+    tipo_vehiculo_id: Optional[uuid.UUID] = Query(default=None, description="Filtrar por tipo de vehículo"),
+    marca: Optional[str] = Query(default=None, max_length=50, description="Filtrar por marca (exacta)"),
+    busqueda: Optional[str] = Query(default=None, max_length=100, description="Texto a buscar en número económico, placa, VIN, marca o modelo"),
+    orden: Optional[str] = Query(default=None, description=f"Claves de orden separadas por comas; '-' para descendente ({', '.join(crud_vehiculo.listado.orden)}). Incompatible con cursor"),
+    cursor: Optional[str] = Query(default=None, description="Cursor de la página siguiente (cabecera X-Next-Cursor); sustituye a skip")
 ):
-    """Obtiene una lista de vehículos filtrados por estado"""
+    """
+    Obtiene una lista de vehículos; filtros, búsqueda y orden se resuelven en
+    SQL antes de paginar (crud/base.py, EspecificacionListado).
+
+    Sin `orden`, paginación por cursor (keyset sobre creado_en, id; la cabecera
+    X-Next-Cursor trae la página siguiente) o por skip/limit por compatibilidad.
+    Con `orden`, solo skip/limit.
+    """
+    if orden and cursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El cursor solo admite el orden por defecto")
     try:
-        # Obtener todos los vehículos y filtrar manualmente para mayor control
-        statement = select(Vehiculo).offset(skip).limit(limit)
-        result = await session.exec(statement)
-        all_vehiculos = [v for v in result if v and hasattr(v, 'id')]
-        
-        # Filtrar según el parámetro activo
-        if activo is True:
-            vehiculos_db = [v for v in all_vehiculos if v.activo]
-        elif activo is False:
-            vehiculos_db = [v for v in all_vehiculos if not v.activo]
-        else: # activo is None (obtener todos)
-            vehiculos_db = all_vehiculos
-        
-        # Convertir explícitamente a la lista de objetos VehiculoRead para asegurar validación correcta
-        vehiculos_response = []
-        for vehiculo in vehiculos_db:
-            # Convertir a diccionario con los campos necesarios para VehiculoRead
-            vehiculo_dict = {
-                "id": str(vehiculo.id),
-                "tipo_vehiculo_id": str(vehiculo.tipo_vehiculo_id),
-                "numero_economico": vehiculo.numero_economico,
-                "placa": vehiculo.placa,
-                "vin": vehiculo.vin,
-                "marca": vehiculo.marca,
-                "modelo_vehiculo": vehiculo.modelo_vehiculo,
-                "anio_fabricacion": vehiculo.anio_fabricacion,
-                "fecha_alta": str(vehiculo.fecha_alta) if vehiculo.fecha_alta else None,
-                "activo": vehiculo.activo,
-                "ubicacion_actual": vehiculo.ubicacion_actual,
-                "notas": vehiculo.notas,
-                "odometro_actual": vehiculo.odometro_actual,
-                "fecha_ultimo_odometro": vehiculo.fecha_ultimo_odometro,
-                "creado_en": vehiculo.creado_en,
-                "actualizado_en": vehiculo.actualizado_en
-            }
-            vehiculos_response.append(vehiculo_dict)
-            
-        # Imprimir información de depuración
-        logger.info(f"Filtro activo: {activo}, Vehículos encontrados: {len(vehiculos_response)}")
-        for v in vehiculos_response:
-            logger.info(f"ID: {v['id']}, Activo: {v['activo']}, Numero: {v['numero_economico']}")
-        
-        return vehiculos_response
+        # Solo las columnas de VehiculoRead, serializadas con orjson (utils/serializacion.py)
+        statement = crud_vehiculo.aplicar_listado(
+            select(*COLUMNAS_VEHICULO_READ),
+            filtros={
+                "activo": activo,
+                "tipo_vehiculo_id": str(tipo_vehiculo_id) if tipo_vehiculo_id else None,
+                "marca": marca,
+            },
+            busqueda=busqueda,
+            orden=orden,
+        )
+        if orden:
+            # El cursor codifica (creado_en, id): con otro orden se pagina con skip/limit
+            result = await session.exec(statement.offset(skip).limit(limit))
+            vehiculos, siguiente = filas_como_dicts(result), None
+        else:
+            statement = aplicar_cursor(statement, Vehiculo.creado_en, Vehiculo.id, cursor, limit, descendente=False)
+            if not cursor and skip:
+                statement = statement.offset(skip)
+            result = await session.exec(statement)
+            vehiculos, siguiente = paginar(filas_como_dicts(result), limit, lambda v: (v["creado_en"], v["id"]))
+        logger.debug("Filtro activo: %s, Vehículos encontrados: %d", activo, len(vehiculos))
+        respuesta = RespuestaORJSON(vehiculos)
+        if siguiente:
+            respuesta.headers[CABECERA_SIGUIENTE_CURSOR] = siguiente
+        return respuesta
+    except (CursorInvalidoError, FiltroInvalidoError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error en leer_vehiculos: {e}")
         raise HTTPException(
@@ -165,17 +201,18 @@ async def leer_vehiculos(
 @router.get(
     "/{vehiculo_id}",
     response_model=VehiculoRead,
-    summary="Obtener vehículo por ID"
+    summary="Obtener vehículo por ID",
+    dependencies=[Depends(presupuesto_consultas(2))],
 )
 async def leer_vehiculo_por_id(
-    session: AsyncSession = Depends(get_session), # Recibe sesión SQLModel
+    session: AsyncSession = Depends(get_read_session), # Recibe sesión SQLModel
     current_user: Usuario = Depends(get_current_active_user), # Usar la dependencia centralizada
     vehiculo_id: uuid.UUID = Path(..., description="ID único del vehículo a obtener") # '...' indica requerido
 ):
     """Obtiene los detalles de un vehículo específico por su ID."""
     try:
-        # Usar el método get del CRUD
-        vehiculo = await crud_vehiculo.get(session, id=vehiculo_id)
+        result = await session.exec(select(*COLUMNAS_VEHICULO_READ).where(Vehiculo.id == vehiculo_id))
+        vehiculo = result.mappings().first()
         if not vehiculo:
             # Registrar el error y lanzar la excepción 404
             logger.info(f"Vehículo con ID {vehiculo_id} no encontrado.")
@@ -183,28 +220,7 @@ async def leer_vehiculo_por_id(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Vehículo con ID {vehiculo_id} no encontrado."
             )
-            
-        # Convertir explícitamente a diccionario con los campos necesarios para VehiculoRead
-        vehiculo_dict = {
-            "id": str(vehiculo.id),
-            "tipo_vehiculo_id": str(vehiculo.tipo_vehiculo_id),
-            "numero_economico": vehiculo.numero_economico,
-            "placa": vehiculo.placa,
-            "vin": vehiculo.vin,
-            "marca": vehiculo.marca,
-            "modelo_vehiculo": vehiculo.modelo_vehiculo,
-            "anio_fabricacion": vehiculo.anio_fabricacion,
-            "fecha_alta": str(vehiculo.fecha_alta) if vehiculo.fecha_alta else None,
-            "activo": vehiculo.activo,
-            "ubicacion_actual": vehiculo.ubicacion_actual,
-            "notas": vehiculo.notas,
-            "odometro_actual": vehiculo.odometro_actual,
-            "fecha_ultimo_odometro": vehiculo.fecha_ultimo_odometro,
-            "creado_en": vehiculo.creado_en,
-            "actualizado_en": vehiculo.actualizado_en
-        }
-        
-        return vehiculo_dict
+        return RespuestaORJSON(dict(vehiculo))
     except HTTPException as http_exc:
         # Re-lanzar las excepciones HTTP que ya hemos generado
         logger.error(f"HTTPException en leer_vehiculo_por_id: {http_exc.detail}")
@@ -216,6 +232,35 @@ async def leer_vehiculo_por_id(
             detail=f"Error interno al obtener vehículo: {str(e)}"
         )
 
+@router.get(
+    "/{vehiculo_id}/layout",
+    response_model=VehiculoLayoutRead,
+    summary="Layout de neumáticos del vehículo (ejes, posiciones y neumático montado)",
+    responses={304: {"description": "El layout no cambió desde el ETag de If-None-Match"}},
+    dependencies=[Depends(presupuesto_consultas(2))],
+)
+async def leer_layout_vehiculo(
+    vehiculo_id: uuid.UUID = Path(..., description="ID único del vehículo"),
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: Usuario = Depends(get_current_active_user),
+):
+    """
+    Ejes del tipo de vehículo, sus posiciones y el neumático instalado en cada
+    una con su condición actual, en una sola consulta. Con `If-None-Match` igual
+    al ETag vigente responde 304 sin construir el cuerpo.
+    """
+    filas = await crud_vehiculo.get_layout(session, vehiculo_id=vehiculo_id)
+    if not filas:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Vehículo con ID {vehiculo_id} no encontrado."
+        )
+    etag = _etag_layout(filas)
+    if etag_coincide(if_none_match, etag):
+        return respuesta_no_modificada(etag)
+    return RespuestaORJSON(_armar_layout(filas), headers={CABECERA_ETAG: etag})
+
 @router.put(
     "/{vehiculo_id}",
     response_model=VehiculoRead,
@@ -261,27 +306,7 @@ async def actualizar_vehiculo(
         db_vehiculo = await crud_vehiculo.update(session, db_obj=db_vehiculo, obj_in=update_data)
         logger.info(f"Vehículo {vehiculo_id} actualizado por {current_user.username}")
         
-        # Convertir explícitamente a diccionario con los campos necesarios para VehiculoRead
-        vehiculo_dict = {
-            "id": str(db_vehiculo.id),
-            "tipo_vehiculo_id": str(db_vehiculo.tipo_vehiculo_id),
-            "numero_economico": db_vehiculo.numero_economico,
-            "placa": db_vehiculo.placa,
-            "vin": db_vehiculo.vin,
-            "marca": db_vehiculo.marca,
-            "modelo_vehiculo": db_vehiculo.modelo_vehiculo,
-            "anio_fabricacion": db_vehiculo.anio_fabricacion,
-            "fecha_alta": str(db_vehiculo.fecha_alta) if db_vehiculo.fecha_alta else None,
-            "activo": db_vehiculo.activo,
-            "ubicacion_actual": db_vehiculo.ubicacion_actual,
-            "notas": db_vehiculo.notas,
-            "odometro_actual": db_vehiculo.odometro_actual,
-            "fecha_ultimo_odometro": db_vehiculo.fecha_ultimo_odometro,
-            "creado_en": db_vehiculo.creado_en,
-            "actualizado_en": db_vehiculo.actualizado_en
-        }
-        
-        return vehiculo_dict
+        return VehiculoRead.model_validate(db_vehiculo)
     except IntegrityError as e:
         # El CRUD base ya hizo rollback si falló el commit
         logger.error(f"Error de integridad al actualizar vehículo {vehiculo_id}: {str(e)}", exc_info=True)
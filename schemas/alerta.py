@@ -40,6 +40,8 @@ class AlertaInDBBase(AlertaBase):
     actualizado_en: Optional[datetime] = None
     creado_por: Optional[uuid.UUID] = None
     actualizado_por: Optional[uuid.UUID] = None
+    ocurrencias: int = 1
+    ultima_ocurrencia_en: Optional[datetime] = None
     
     model_config: ClassVar[Dict[str, Any]] = ConfigDict(
         from_attributes=True
@@ -85,3 +87,5 @@ class AlertaRead(BaseModel):
     notas_resolucion: Optional[str] = None
     creado_por: Optional[uuid.UUID] = None
     actualizado_por: Optional[uuid.UUID] = None
+    ocurrencias: int = 1
+    ultima_ocurrencia_en: Optional[datetime] = None
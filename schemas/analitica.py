@@ -0,0 +1,69 @@
+# schemas/analitica.py
+import uuid
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlmodel import SQLModel
+
+from schemas.common import AgrupacionCpkEnum, GranularidadEnum
+
+
+class CpkGrupoRead(SQLModel):
+    """Costo por kilómetro de un grupo (modelo, fabricante, proveedor o tipo de vehículo)."""
+    id: Optional[uuid.UUID] = None  # None: neumáticos sin proveedor / nunca instalados
+    nombre: Optional[str] = None
+    costo_pen: float
+    costo_usd: float
+    km: int
+    cpk_pen: Optional[float] = None  # None si el grupo no tiene km en el periodo
+    cpk_usd: Optional[float] = None
+
+
+class CpkResumenRead(SQLModel):
+    agrupar_por: AgrupacionCpkEnum
+    desde: Optional[date] = None
+    hasta: Optional[date] = None
+    calculado_hasta: Optional[datetime] = None  # Marca del último refresco (None: aún sin datos)
+    grupos: List[CpkGrupoRead] = []
+
+
+class CpkPeriodoRead(SQLModel):
+    periodo: date  # Día, o primer día del mes
+    costo_pen: float
+    costo_usd: float
+    km: int
+    cpk_pen: Optional[float] = None
+    cpk_usd: Optional[float] = None
+
+
+class CpkSerieRead(SQLModel):
+    granularidad: GranularidadEnum
+    calculado_hasta: Optional[datetime] = None
+    periodos: List[CpkPeriodoRead] = []
+
+
+class RetiroProximoRead(SQLModel):
+    """Pronóstico de desgaste de un neumático instalado (pronosticos_desgaste)."""
+    neumatico_id: uuid.UUID
+    numero_serie: Optional[str] = None
+    vehiculo_id: Optional[uuid.UUID] = None
+    numero_economico: Optional[str] = None
+    modelo_id: uuid.UUID
+    nombre_modelo: Optional[str] = None
+    puntos: int
+    profundidad_minima_mm: float
+    desgaste_mm_por_1000km: Optional[float] = None
+    profundidad_estimada_mm: Optional[float] = None
+    odometro_ultimo: Optional[int] = None
+    odometro_retiro_estimado: Optional[int] = None
+    km_restantes: Optional[int] = None
+    km_por_dia: Optional[float] = None
+    fecha_retiro_estimada: date
+    ultima_medicion_en: Optional[datetime] = None
+
+
+class RetirosProximosRead(SQLModel):
+    dias: int
+    hasta: date
+    calculado_hasta: Optional[datetime] = None  # Último refresco de los pronósticos
+    items: List[RetiroProximoRead] = []
@@ -82,6 +82,20 @@ class SeveridadAlerta(str, Enum):
     WARN = "WARN"
     HIGH = "HIGH"
     CRITICAL = "CRITICAL"
+
+
+class AgrupacionCpkEnum(str, Enum):
+    """Dimensiones por las que se agrupa el costo por kilómetro (GET /analitica/cpk)."""
+    MODELO = "modelo"
+    FABRICANTE = "fabricante"
+    PROVEEDOR = "proveedor"
+    TIPO_VEHICULO = "tipo_vehiculo"
+
+
+class GranularidadEnum(str, Enum):
+    """Periodo de las series temporales de analítica."""
+    DIA = "dia"
+    MES = "mes"
 # --------------------
 
 # --- Clases Base de Schemas Comunes (si las tienes aquí) ---
@@ -2,7 +2,7 @@
 
 import uuid
 from datetime import date, datetime, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from decimal import Decimal
 from pydantic import field_validator, ValidationInfo, ConfigDict
 from sqlmodel import SQLModel, Field
@@ -125,4 +125,24 @@ class EventoNeumaticoRead(EventoNeumaticoBase):
     # usuario: Optional[UsuarioRead] = None # Requeriría definir UsuarioRead
 
     # Configuración para permitir la lectura desde atributos del objeto modelo
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Schemas de Ingesta por Lotes ---
+class EventoNeumaticoBatchCreate(SQLModel):
+    eventos: List[EventoNeumaticoCreate] = Field(..., min_length=1) # Se procesan en el orden recibido
+    # Eventos por transacción; None = usar EVENTOS_BATCH_CHUNK_SIZE (0 = todo el lote en una)
+    tamano_bloque: Optional[int] = Field(default=None, ge=1)
+
+class EventoNeumaticoBatchItemResult(SQLModel):
+    indice: int # Posición del evento en la lista de entrada
+    exito: bool
+    codigo_estado: int # Código HTTP que habría devuelto POST /eventos para este evento
+    evento_id: Optional[uuid.UUID] = None
+    neumatico_id: Optional[uuid.UUID] = None
+    error: Optional[str] = None
+
+class EventoNeumaticoBatchResponse(SQLModel):
+    total: int
+    exitosos: int
+    fallidos: int
+    resultados: List[EventoNeumaticoBatchItemResult]
@@ -0,0 +1,33 @@
+# schemas/inventario.py
+import uuid
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlmodel import SQLModel
+
+from schemas.common import EstadoNeumaticoEnum
+
+
+class InventarioResumenItem(SQLModel):
+    """Una fila de vw_inventario_neumaticos (modelo x estado x vida)."""
+    modelo_id: uuid.UUID
+    nombre_modelo: str
+    medida: Optional[str] = None
+    fabricante: str
+    estado_actual: EstadoNeumaticoEnum
+    es_reencauchado: bool
+    vida_actual: int
+    cantidad: int
+    valor_total_pen: Optional[float] = None
+    valor_total_usd: Optional[float] = None
+    km_promedio_por_vida: Optional[float] = None
+    fecha_compra_mas_antigua: Optional[date] = None
+    fecha_compra_mas_reciente: Optional[date] = None
+    antiguedad_promedio_dias: Optional[int] = None
+
+
+class InventarioResumenRead(SQLModel):
+    calculado_en: Optional[datetime] = None  # Último refresco de la vista (None: aún sin datos)
+    antiguedad_segundos: Optional[float] = None
+    materializado: bool  # False: agregación en vivo (SQLite)
+    items: List[InventarioResumenItem] = []
@@ -1,4 +1,5 @@
 # gesneu_api2/schemas/modelo.py
+import uuid
 from typing import Optional, List, ClassVar, Dict, Any
 from pydantic import BaseModel, Field, ConfigDict
 from decimal import Decimal
@@ -9,7 +10,7 @@ from .common import EstadoItem # Asumo que tienes EstadoItem en schemas/common.p
 
 # Properties to receive via API on creation
 class ModeloBase(BaseModel):
-    fabricante_id: int
+    fabricante_id: uuid.UUID
     nombre_modelo: str = Field(..., max_length=100)
     descripcion: Optional[str] = Field(None, max_length=255)
     ancho_seccion_mm: Optional[int] = Field(None, gt=0)
@@ -20,7 +21,7 @@ class ModeloBase(BaseModel):
     simbolo_velocidad: Optional[str] = Field(None, max_length=5)
     profundidad_original_mm: Optional[Decimal] = Field(None, gt=0, decimal_places=2)
     presion_maxima_psi: Optional[int] = Field(None, gt=0)
-    reencauches_maximos: Optional[int] = Field(None, ge=0, default=0) # ge=0 para permitir 0 reencauches
+    reencauches_maximos: Optional[int] = Field(default=0, ge=0) # ge=0 para permitir 0 reencauches
     permite_reencauche: bool = False
     # activo: bool = True # Se manejará a través de EstadoItem o por defecto en el modelo
 
@@ -29,7 +30,7 @@ class ModeloCreate(ModeloBase):
 
 # Properties to receive via API on update, all optional
 class ModeloUpdate(BaseModel):
-    fabricante_id: Optional[int] = None
+    fabricante_id: Optional[uuid.UUID] = None
     nombre_modelo: Optional[str] = Field(None, max_length=100)
     descripcion: Optional[str] = Field(None, max_length=255)
     ancho_seccion_mm: Optional[int] = Field(None, gt=0)
@@ -46,7 +47,7 @@ class ModeloUpdate(BaseModel):
 
 # Properties shared by models stored in DB
 class ModeloInDBBase(ModeloBase, EstadoItem):
-    id: int
+    id: uuid.UUID
 
     # Configuración moderna usando model_config con ConfigDict
         
@@ -1,7 +1,7 @@
 # schemas/neumatico.py
 import uuid
 from datetime import date, datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from sqlmodel import SQLModel, Field
 # Importar Enums
 from schemas.common import EstadoNeumaticoEnum, TipoEventoNeumaticoEnum
@@ -26,6 +26,9 @@ class NeumaticoRead(NeumaticoBase):
     ubicacion_actual_posicion_id: Optional[uuid.UUID] = None
     fecha_ultimo_evento: Optional[datetime] = None
     profundidad_inicial_mm: Optional[float] = None
+    profundidad_actual_mm: Optional[float] = None
+    presion_actual_psi: Optional[float] = None
+    fecha_ultima_inspeccion: Optional[datetime] = None
     kilometraje_acumulado: int
     reencauches_realizados: int
     vida_actual: int
@@ -38,8 +41,18 @@ class NeumaticoRead(NeumaticoBase):
 class HistorialNeumaticoItem(SQLModel):
     id: uuid.UUID; tipo_evento: TipoEventoNeumaticoEnum; timestamp_evento: datetime; usuario_registra: Optional[str]=None; placa: Optional[str]=None; numero_economico: Optional[str]=None; codigo_posicion: Optional[str]=None; odometro_vehiculo_en_evento: Optional[int]=None; profundidad_remanente_mm: Optional[float]=None; presion_psi: Optional[float]=None; costo_evento: Optional[float]=None; moneda_costo: Optional[str]=None; proveedor_servicio: Optional[str]=None; motivo_desecho: Optional[str]=None; notas: Optional[str]=None
 
+class HistorialLoteRequest(SQLModel):
+    """Cuerpo de POST /neumaticos/historial/lote."""
+    neumatico_ids: List[uuid.UUID] = Field(min_length=1, max_length=500)
+    desde: Optional[datetime] = None  # Inclusivo
+    hasta: Optional[datetime] = None  # Exclusivo
+    tipos_evento: Optional[List[TipoEventoNeumaticoEnum]] = None
+    limit_por_neumatico: Optional[int] = Field(default=None, ge=1, le=1000)
+
+HistorialLoteResponse = Dict[uuid.UUID, List[HistorialNeumaticoItem]]
+
 class NeumaticoInstaladoItem(SQLModel):
-    id: uuid.UUID; numero_serie: Optional[str]=None; dot: Optional[str]=None; nombre_modelo: Optional[str]=None; medida: Optional[str]=None; fabricante: Optional[str]=None; placa: Optional[str]=None; numero_economico: Optional[str]=None; tipo_vehiculo: Optional[str]=None; codigo_posicion: Optional[str]=None; profundidad_actual_mm: Optional[float]=None; presion_actual_psi: Optional[float]=None; kilometraje_neumatico_acumulado: Optional[int]=None; vida_actual: Optional[int]=None; reencauches_realizados: Optional[int]=None
+    id: uuid.UUID; numero_serie: Optional[str]=None; dot: Optional[str]=None; nombre_modelo: Optional[str]=None; medida: Optional[str]=None; fabricante: Optional[str]=None; placa: Optional[str]=None; numero_economico: Optional[str]=None; tipo_vehiculo: Optional[str]=None; codigo_posicion: Optional[str]=None; profundidad_actual_mm: Optional[float]=None; presion_actual_psi: Optional[float]=None; fecha_ultima_inspeccion: Optional[datetime]=None; kilometraje_neumatico_acumulado: Optional[int]=None; vida_actual: Optional[int]=None; reencauches_realizados: Optional[int]=None
 
 class NeumaticoUpdate(SQLModel):
     """Esquema para actualizar un neumático."""
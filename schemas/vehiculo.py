@@ -3,7 +3,7 @@
 
 import uuid
 from datetime import date, datetime, timezone
-from typing import Optional, Union, Any
+from typing import List, Optional, Union, Any
 # --- AÑADIR IMPORT PARA ConfigDict y field_validator ---
 from pydantic import ConfigDict, field_validator, ValidationInfo, BeforeValidator
 from typing_extensions import Annotated
@@ -93,4 +93,46 @@ class VehiculoUpdate(SQLModel): # Todos opcionales para PATCH/PUT
     odometro_actual: Optional[int] = Field(default=None)
     fecha_ultimo_odometro: Optional[datetime] = Field(default=None)
     # Configuración para permitir conversión de atributos
-    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+# --- Layout de neumáticos del vehículo (GET /vehiculos/{id}/layout) ---
+class NeumaticoEnPosicion(SQLModel):
+    id: uuid.UUID
+    numero_serie: str
+    profundidad_actual_mm: Optional[float] = None
+    presion_actual_psi: Optional[float] = None
+    fecha_ultima_inspeccion: Optional[datetime] = None
+    fecha_ultimo_evento: Optional[datetime] = None
+    fecha_instalacion: Optional[date] = None
+    km_instalacion: Optional[int] = None
+    kilometraje_acumulado: int = 0
+    vida_actual: int = 1
+
+
+class PosicionLayout(SQLModel):
+    id: uuid.UUID
+    codigo_posicion: str
+    lado: str
+    posicion_relativa: int
+    es_interna: bool
+    es_direccion: bool
+    es_traccion: bool
+    neumatico: Optional[NeumaticoEnPosicion] = None  # None: posición vacía
+
+
+class EjeLayout(SQLModel):
+    id: uuid.UUID
+    numero_eje: int
+    nombre_eje: str
+    tipo_eje: str
+    numero_posiciones: int
+    posiciones_duales: bool
+    neumaticos_por_posicion: int
+    posiciones: List[PosicionLayout] = []
+
+
+class VehiculoLayoutRead(SQLModel):
+    vehiculo_id: uuid.UUID
+    numero_economico: str
+    tipo_vehiculo_id: str
+    ejes: List[EjeLayout] = []
@@ -0,0 +1,187 @@
+# services/alert_outbox_worker.py
+"""
+Worker que consume la tabla 'alertas_outbox' y evalúa las reglas de alerta
+fuera del camino de la petición.
+
+Cada evento de neumático deja una fila en el outbox en su misma transacción.
+El worker toma lotes de filas pendientes (FOR UPDATE SKIP LOCKED en PostgreSQL,
+de modo que varios workers pueden convivir), evalúa las alertas de cada una y
+marca la fila como procesada en la MISMA transacción en que se crean sus
+alertas: si el proceso cae a mitad de lote no queda nada confirmado y las filas
+se vuelven a procesar (entrega al menos una vez, sin alertas duplicadas).
+
+Puede ejecutarse dentro de la aplicación (lifespan de main.py, ver
+ALERTAS_OUTBOX_WORKER_EN_PROCESO) o como proceso independiente:
+
+    python -m services.alert_outbox_worker [--una-vez]
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from utils.logging import setup_logging
+from database import TareasSessionFactory, engine
+from models.alerta_outbox import AlertaOutbox
+from models.evento_neumatico import EventoNeumatico
+from models.neumatico import Neumatico
+from services.alert_service import AlertService
+from services.notification_dispatcher import despachador
+
+logger = logging.getLogger(__name__)
+
+# Retardo máximo entre reintentos de una misma fila
+MAX_ESPERA_REINTENTO_SEGUNDOS = 3600
+
+
+class AlertOutboxWorker:
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        tamano_lote: Optional[int] = None,
+        intervalo_segundos: Optional[float] = None,
+        max_intentos: Optional[int] = None,
+    ):
+        self.session_factory = session_factory or TareasSessionFactory
+        self.tamano_lote = tamano_lote or settings.ALERTAS_OUTBOX_LOTE
+        self.intervalo_segundos = intervalo_segundos if intervalo_segundos is not None else settings.ALERTAS_OUTBOX_INTERVALO_SEGUNDOS
+        self.max_intentos = max_intentos or settings.ALERTAS_OUTBOX_MAX_INTENTOS
+        self._tarea: Optional[asyncio.Task] = None
+        self._detener = asyncio.Event()
+
+    async def procesar_lote(self, session: AsyncSession) -> Dict[str, int]:
+        """
+        Procesa un lote de filas pendientes y lo confirma con un único commit.
+
+        Returns:
+            Contadores del lote: filas tomadas, procesadas y fallidas.
+        """
+        ahora = datetime.now(timezone.utc)
+        stmt = (
+            select(AlertaOutbox)
+            .where(AlertaOutbox.procesado_en.is_(None), AlertaOutbox.disponible_en <= ahora)
+            .order_by(AlertaOutbox.disponible_en)
+            .limit(self.tamano_lote)
+            .with_for_update(skip_locked=True)
+        )
+        filas = (await session.exec(stmt)).all()
+        if not filas:
+            return {"tomadas": 0, "procesadas": 0, "fallidas": 0}
+
+        # Precarga de neumáticos y eventos del lote (una consulta IN por entidad)
+        neumaticos = {n.id: n for n in (await session.exec(
+            select(Neumatico).where(Neumatico.id.in_({f.neumatico_id for f in filas}))
+        )).all()}
+        eventos = {e.id: e for e in (await session.exec(
+            select(EventoNeumatico).where(EventoNeumatico.id.in_({f.evento_id for f in filas}))
+        )).all()}
+
+        alert_service = AlertService(session, autocommit=False)
+        procesadas = fallidas = 0
+        for fila in filas:
+            neumatico = neumaticos.get(fila.neumatico_id)
+            evento = eventos.get(fila.evento_id)
+            marca_notificaciones = len(alert_service.notificaciones_pendientes)
+            try:
+                async with session.begin_nested():
+                    if neumatico is not None and evento is not None:
+                        await alert_service.evaluar_evento(neumatico, evento)
+                    else:
+                        logger.warning(f"Outbox {fila.id}: evento o neumático inexistente, se descarta.")
+                fila.procesado_en = datetime.now(timezone.utc)
+                fila.ultimo_error = None
+                procesadas += 1
+            except Exception as e:
+                fallidas += 1
+                # El savepoint deshizo las alertas de esta fila: no se notifican
+                del alert_service.notificaciones_pendientes[marca_notificaciones:]
+                fila.intentos += 1
+                fila.ultimo_error = str(e)[:2000]
+                if fila.intentos >= self.max_intentos:
+                    # Se abandona la fila para que no bloquee el outbox; queda el error registrado
+                    logger.error(f"Outbox {fila.id}: abandonada tras {fila.intentos} intentos: {e}", exc_info=True)
+                    fila.procesado_en = datetime.now(timezone.utc)
+                else:
+                    espera = min(2 ** fila.intentos, MAX_ESPERA_REINTENTO_SEGUNDOS)
+                    fila.disponible_en = datetime.now(timezone.utc) + timedelta(seconds=espera)
+                    logger.warning(f"Outbox {fila.id}: error evaluando alertas (intento {fila.intentos}), reintento en {espera}s: {e}")
+            session.add(fila)
+
+        await session.commit()
+        alert_service.despachar_notificaciones()
+        logger.debug(f"Outbox de alertas: lote de {len(filas)} filas ({procesadas} procesadas, {fallidas} fallidas).")
+        return {"tomadas": len(filas), "procesadas": procesadas, "fallidas": fallidas}
+
+    async def drenar(self, session: Optional[AsyncSession] = None) -> Dict[str, int]:
+        """Procesa lotes hasta que no quedan filas disponibles."""
+        totales = {"tomadas": 0, "procesadas": 0, "fallidas": 0}
+        while True:
+            if session is not None:
+                resultado = await self.procesar_lote(session)
+            else:
+                async with self.session_factory() as nueva_sesion:
+                    resultado = await self.procesar_lote(nueva_sesion)
+            for clave in totales:
+                totales[clave] += resultado[clave]
+            # Un lote incompleto, o solo con fallos (que quedan diferidos), agota lo disponible
+            if resultado["tomadas"] < self.tamano_lote or resultado["procesadas"] == 0:
+                return totales
+
+    async def ejecutar(self) -> None:
+        """Bucle de sondeo; termina cuando se llama a detener()."""
+        logger.info(f"Worker de outbox de alertas iniciado (lote={self.tamano_lote}, intervalo={self.intervalo_segundos}s).")
+        while not self._detener.is_set():
+            try:
+                await self.drenar()
+            except Exception as e:
+                # Errores de conexión, etc.: se reintenta en la siguiente vuelta
+                logger.error(f"Worker de outbox de alertas: error procesando lote: {e}", exc_info=True)
+            try:
+                await asyncio.wait_for(self._detener.wait(), timeout=self.intervalo_segundos)
+            except asyncio.TimeoutError:
+                pass
+        logger.info("Worker de outbox de alertas detenido.")
+
+    def iniciar(self) -> None:
+        """Lanza el bucle como tarea asyncio del proceso actual."""
+        if self._tarea is None or self._tarea.done():
+            self._detener.clear()
+            self._tarea = asyncio.create_task(self.ejecutar(), name="alertas-outbox-worker")
+
+    async def detener(self) -> None:
+        """Pide la parada y espera a que termine el lote en curso."""
+        self._detener.set()
+        if self._tarea is not None:
+            await self._tarea
+            self._tarea = None
+
+
+async def _main(una_vez: bool) -> None:
+    worker = AlertOutboxWorker()
+    # Como proceso aparte, las notificaciones de las alertas se envían desde aquí
+    despachador.iniciar()
+    try:
+        if una_vez:
+            totales = await worker.drenar()
+            logger.info(f"Outbox de alertas drenado: {totales}")
+            return
+        await worker.ejecutar()
+    finally:
+        await despachador.detener()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker del outbox de alertas de GesNeu.")
+    parser.add_argument("--una-vez", action="store_true", help="Drena el outbox y termina.")
+    args = parser.parse_args()
+    setup_logging()
+    try:
+        asyncio.run(_main(args.una_vez))
+    except KeyboardInterrupt:
+        pass
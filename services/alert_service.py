@@ -10,10 +10,13 @@ from utils.safe_uuid import SafeUUID, patch_uuid_class
 # Apply UUID patch to handle string methods
 patch_uuid_class()
 from sqlmodel import select
+from sqlalchemy import or_
 from sqlalchemy.sql import func
 from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timezone
 
+from core.config import settings
+
 # Importar modelos y schemas necesarios
 from models.neumatico import Neumatico
 from models.evento_neumatico import EventoNeumatico
@@ -27,16 +30,50 @@ from models.evento_neumatico import TipoEventoNeumaticoEnum
 from schemas.common import TipoAlertaEnum, SeveridadAlerta
 from schemas.alerta import AlertaCreate, AlertaRead
 from services.notification_service import NotificationService
+from services.notification_dispatcher import AlertaNotificable
+from services.catalogo_cache import catalogo_cache
 from crud.crud_alerta import alerta as crud_alerta
 
 logger = logging.getLogger(__name__)
 
+# Límites de vida útil (compartidos con el barrido de flota, services/barrido_alertas_service.py)
+EDAD_MAXIMA_ANIOS = 7
+KM_MAXIMO = 80000
+# Reencauches permitidos cuando el modelo no define un máximo
+REENCAUCHES_MAXIMOS_POR_DEFECTO = 2
+
 # Resto de las funciones auxiliares...
 
 class AlertService:
-    def __init__(self, session: AsyncSession, bg_tasks=None):
+    def __init__(self, session: AsyncSession, bg_tasks=None, autocommit: bool = True):
         self.session = session
         self.notifier = NotificationService(bg_tasks)
+        # Con autocommit=False las alertas solo se envían a la BD (flush) y
+        # el commit queda en manos de quien controla la transacción (p.ej. lotes)
+        self.autocommit = autocommit
+        # Notificaciones de alertas nuevas aún no confirmadas (solo con autocommit=False)
+        self.notificaciones_pendientes: List[AlertaNotificable] = []
+
+    def _notificar(self, alerta: Alerta) -> None:
+        # Sin autocommit la alerta podría deshacerse: se notifica tras el commit (despachar_notificaciones)
+        if self.autocommit:
+            self.notifier.enqueue_alert_notification(alerta)
+        else:
+            self.notificaciones_pendientes.append(AlertaNotificable.desde_alerta(alerta))
+
+    def despachar_notificaciones(self) -> int:
+        """Encola las notificaciones pendientes; llamar tras confirmar la transacción."""
+        pendientes, self.notificaciones_pendientes = self.notificaciones_pendientes, []
+        for alerta in pendientes:
+            self.notifier.enqueue_alert_notification(alerta)
+        return len(pendientes)
+
+    async def _commit(self) -> None:
+        """Confirma la transacción o, si autocommit está desactivado, solo hace flush."""
+        if self.autocommit:
+            await self.session.commit()
+        else:
+            await self.session.flush()
 
     async def _crear_alerta(
         self,
@@ -86,11 +123,15 @@ class AlertService:
             actualizado_por=safe_uuid(neumatico.actualizado_por) if hasattr(neumatico, 'actualizado_por') else None
         )
         
-        self.session.add(alerta)
-        await self.session.commit()
+        alerta, nueva = await crud_alerta.upsert_abierta(self.session, db_obj=alerta)
+        await self._commit()
         await self.session.refresh(alerta)
-        
-        logger.info(f"Alerta creada: {alerta.id} - {tipo} - {severidad}")
+
+        if nueva:
+            logger.info(f"Alerta creada: {alerta.id} - {tipo} - {severidad}")
+            self._notificar(alerta)
+        else:
+            logger.info(f"Alerta {alerta.id} repetida ({alerta.ocurrencias} ocurrencias) - {tipo}")
         return alerta
 
     async def _create_alert(self, **kwargs):
@@ -98,8 +139,12 @@ class AlertService:
         tipo_alerta = kwargs.pop('tipo_alerta', TipoAlertaEnum.LIMITE_REENCAUCHES)
         descripcion = kwargs.pop('descripcion', 'Límite de reencauches alcanzado')
         alerta = AlertaCreate(tipo_alerta=tipo_alerta, descripcion=descripcion, **kwargs)
-        db_alerta = await crud_alerta.create(self.session, obj_in=alerta)
-        self.notifier.enqueue_alert_notification(db_alerta)
+        db_alerta, nueva = await crud_alerta.upsert_abierta(self.session, db_obj=Alerta(**alerta.model_dump()))
+        await self._commit()
+        await self.session.refresh(db_alerta)
+        # Las repeticiones de una alerta abierta solo suman ocurrencias: no se vuelve a notificar
+        if nueva:
+            self._notificar(db_alerta)
         return db_alerta
 
     async def _check_fin_vida_util(self, neumatico: Neumatico, evento: Optional[EventoNeumatico] = None) -> Optional[Alerta]:
@@ -113,7 +158,7 @@ class AlertService:
             logger.warning(f"Neumático {neumatico.id} sin modelo asignado")
             return None
             
-        modelo = await self.session.get(ModeloNeumatico, neumatico.modelo_id)
+        modelo = await catalogo_cache.get_modelo(self.session, neumatico.modelo_id)
         if not modelo:
             logger.warning(f"Modelo {neumatico.modelo_id} no encontrado")
             return None
@@ -136,14 +181,14 @@ class AlertService:
                         "unidad": "mm"
                     }
                 )
-                await self.session.commit()
+                await self._commit()
                 return alerta
 
-        # Verificación por edad (7 años máximo)
+        # Verificación por edad (EDAD_MAXIMA_ANIOS)
         fecha_inicio = neumatico.fecha_fabricacion or neumatico.fecha_compra
         if fecha_inicio:
             edad_anios = (datetime.now(timezone.utc).date() - fecha_inicio).days / 365.25
-            if edad_anios >= 7:
+            if edad_anios >= EDAD_MAXIMA_ANIOS:
                 return await self._crear_alerta(
                     neumatico=neumatico,
                     tipo=TipoAlertaEnum.FIN_VIDA_UTIL_ESTIMADO.value,
@@ -153,14 +198,14 @@ class AlertService:
                         "tipo": "EDAD",
                         "motivos": ["EDAD_MAXIMA"],
                         "edad_actual": round(edad_anios, 1),
-                        "edad_maxima": 7,
+                        "edad_maxima": EDAD_MAXIMA_ANIOS,
                         "unidad": "años",
                         "fecha_inicio": fecha_inicio.isoformat()
                     }
                 )
 
-        # Verificación por kilometraje (80,000 km máximo)
-        if neumatico.kilometraje_acumulado >= 80000:
+        # Verificación por kilometraje (KM_MAXIMO)
+        if neumatico.kilometraje_acumulado >= KM_MAXIMO:
             return await self._crear_alerta(
                 neumatico=neumatico,
                 tipo=TipoAlertaEnum.FIN_VIDA_UTIL_ESTIMADO.value,
@@ -170,7 +215,7 @@ class AlertService:
                     "tipo": "KILOMETRAJE",
                     "motivos": ["KILOMETRAJE_MAXIMO"],
                     "km_actual": neumatico.kilometraje_acumulado,
-                    "km_maximo": 80000,
+                    "km_maximo": KM_MAXIMO,
                     "unidad": "km"
                 }
             )
@@ -185,7 +230,7 @@ class AlertService:
             logger.warning(f"Neumático {neumatico.id} sin modelo asignado")
             return None
             
-        modelo = await self.session.get(ModeloNeumatico, neumatico.modelo_id)
+        modelo = await catalogo_cache.get_modelo(self.session, neumatico.modelo_id)
         if not modelo:
             logger.warning(f"Modelo {neumatico.modelo_id} no encontrado")
             return None
@@ -195,7 +240,7 @@ class AlertService:
             return None
             
         # Si no se especifica un límite de reencauches, usar un valor por defecto
-        reencauches_maximos = modelo.reencauches_maximos or 2
+        reencauches_maximos = modelo.reencauches_maximos or REENCAUCHES_MAXIMOS_POR_DEFECTO
         
         if neumatico.reencauches_realizados >= reencauches_maximos:
             alerta = await self._crear_alerta(
@@ -209,7 +254,7 @@ class AlertService:
                     "motivos": ["LIMITE_REENCAUCHES"]
                 }
             )
-            await self.session.commit()
+            await self._commit()
             return alerta
         
         return None
@@ -236,7 +281,7 @@ class AlertService:
             logger.warning(f"Neumático {neumatico.id} sin modelo asignado")
             return None
             
-        modelo = await self.session.get(ModeloNeumatico, neumatico.modelo_id)
+        modelo = await catalogo_cache.get_modelo(self.session, neumatico.modelo_id)
         if not modelo or not modelo.presion_recomendada_psi:
             return None
             
@@ -343,7 +388,7 @@ class AlertService:
                     "comentarios": evento.notas if hasattr(evento, 'notas') else None
                 }
             )
-            await self.session.commit()
+            await self._commit()
             return alerta
             
         return None
@@ -368,46 +413,60 @@ class AlertService:
             
         return alertas
 
+    async def evaluar_evento(self, neumatico: Neumatico, evento: EventoNeumatico) -> List[Alerta]:
+        """
+        Evalúa todas las reglas de alerta que aplican a un evento ya registrado.
+        Es el punto de entrada del worker del outbox (services/alert_outbox_worker.py).
+        """
+        alertas = await self.check_and_create_alerts(neumatico, evento)
+        # Las reglas por parámetro de inventario solo se aplican si la regla general
+        # no generó ya una alerta del mismo tipo para este evento
+        tipos_generados = {a.tipo_alerta for a in alertas}
+        if evento.tipo_evento == TipoEventoNeumaticoEnum.INSPECCION:
+            if TipoAlertaEnum.PROFUNDIDAD_BAJA not in tipos_generados:
+                await self.check_profundidad(neumatico.id)
+        elif evento.tipo_evento == TipoEventoNeumaticoEnum.REENCAUCHE_SALIDA:
+            if TipoAlertaEnum.LIMITE_REENCAUCHES not in tipos_generados:
+                await self.check_reencauches(neumatico.id)
+        return alertas
+
     async def check_profundidad(self, neumatico_id: uuid.UUID):
-        # Get the tire
+        # Get the tire (con su condición actual desnormalizada: no hace falta buscar la última inspección)
         statement = select(Neumatico).where(Neumatico.id == neumatico_id)
         result = await self.session.exec(statement)
         neumatico = result.one()
+
+        if neumatico.profundidad_actual_mm is None:
+            return  # No inspection with depth measurement found
         
-        # Get the minimum depth parameter for this tire model
-        statement = select(ParametroInventario).where(
+        # Get the minimum depth parameter for this tire model: the one for the tire's
+        # almacén first, then the general one; without either, the global setting
+        # (same resolution as the fleet sweep, barrido_alertas_service.umbral_profundidad)
+        statement = select(ParametroInventario.valor_numerico).where(
             ParametroInventario.modelo_id == neumatico.modelo_id,
-            ParametroInventario.tipo_parametro == 'PROFUNDIDAD_MINIMA'
-        )
-        result = await self.session.exec(statement)
-        parametro = result.first()
-        
-        if not parametro or not parametro.valor_numerico:
-            return  # No depth parameter set for this model
-            
-        # Get the latest inspection event for this tire
-        statement = select(EventoNeumatico).where(
-            EventoNeumatico.neumatico_id == neumatico_id,
-            EventoNeumatico.tipo_evento == TipoEventoNeumaticoEnum.INSPECCION.value
-        ).order_by(EventoNeumatico.timestamp_evento.desc()).limit(1)
-        
+            ParametroInventario.tipo_parametro == 'PROFUNDIDAD_MINIMA',
+            ParametroInventario.activo == True,  # noqa: E712
+            ParametroInventario.valor_numerico.is_not(None),
+            or_(
+                ParametroInventario.almacen_id == neumatico.ubicacion_almacen_id,
+                ParametroInventario.almacen_id.is_(None),
+            ),
+        ).order_by(ParametroInventario.almacen_id.is_(None))
         result = await self.session.exec(statement)
-        ultima_inspeccion = result.first()
-        
-        if not ultima_inspeccion or not ultima_inspeccion.profundidad_remanente_mm:
-            return  # No inspection with depth measurement found
-            
+        valor = result.first()
+        profundidad_minima = float(valor) if valor is not None else settings.UMBRAL_PROFUNDIDAD_MINIMA_MM
+
         # Check if the depth is below the minimum
-        if ultima_inspeccion.profundidad_remanente_mm < parametro.valor_numerico:
+        if neumatico.profundidad_actual_mm < profundidad_minima:
             await self._create_alert(
                 neumatico_id=neumatico_id,
                 tipo_alerta=TipoAlertaEnum.PROFUNDIDAD_BAJA,
-                descripcion=f'Profundidad {ultima_inspeccion.profundidad_remanente_mm}mm < {parametro.valor_numerico}mm',
+                descripcion=f'Profundidad {neumatico.profundidad_actual_mm}mm < {profundidad_minima}mm',
                 nivel_severidad=SeveridadAlerta.WARN,
                 datos_contexto={
-                    'profundidad_actual': ultima_inspeccion.profundidad_remanente_mm,
-                    'profundidad_minima': parametro.valor_numerico,
-                    'fecha_ultima_inspeccion': ultima_inspeccion.timestamp_evento.isoformat()
+                    'profundidad_actual': float(neumatico.profundidad_actual_mm),
+                    'profundidad_minima': profundidad_minima,
+                    'fecha_ultima_inspeccion': neumatico.fecha_ultima_inspeccion.isoformat() if neumatico.fecha_ultima_inspeccion else None
                 }
             )
 
@@ -415,15 +474,16 @@ class AlertService:
         statement = select(Neumatico).where(Neumatico.id == neumatico_id)
         result = await self.session.exec(statement)
         neumatico = result.one()
-        if neumatico.modelo and neumatico.reencauches_realizados >= neumatico.modelo.reencauches_maximos:
+        modelo = await catalogo_cache.get_modelo(self.session, neumatico.modelo_id)
+        if modelo and modelo.reencauches_maximos is not None and neumatico.reencauches_realizados >= modelo.reencauches_maximos:
             await self._create_alert(
                 neumatico_id=neumatico_id,
                 tipo_alerta=TipoAlertaEnum.LIMITE_REENCAUCHES,
-                descripcion=f'Alcanzado límite de {neumatico.modelo.reencauches_maximos} reencauches',
+                descripcion=f'Alcanzado límite de {modelo.reencauches_maximos} reencauches',
                 nivel_severidad=SeveridadAlerta.WARN,
                 datos_contexto={
                     'reencauches_realizados': neumatico.reencauches_realizados,
-                    'reencauches_maximos': neumatico.modelo.reencauches_maximos
+                    'reencauches_maximos': modelo.reencauches_maximos
                 }
             )
 
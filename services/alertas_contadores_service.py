@@ -0,0 +1,218 @@
+# services/alertas_contadores_service.py
+"""
+Contadores de alertas para el resumen del dashboard.
+
+Los triggers sobre 'alertas' (migrations/008_alertas_contadores.sql; en SQLite,
+models/alerta_contador.py) solo añaden filas a 'alertas_contadores_deltas', así
+que una escritura de alertas no bloquea filas compartidas: el outbox, el
+barrido y las peticiones no se serializan entre sí ni pueden interbloquearse
+por los contadores. La lectura suma los totales consolidados de
+'alertas_contadores' y los deltas pendientes (unas pocas filas en vez de un
+GROUP BY sobre 'alertas').
+
+- El plegado mueve los deltas pendientes a 'alertas_contadores' (DELETE ...
+  RETURNING, sin bloquear 'alertas'): scheduler, cada
+  ALERTAS_CONTADORES_PLEGADO_SEGUNDOS.
+- La reconciliación pliega y además recalcula los contadores con un GROUP BY,
+  corrigiendo las desviaciones de cargas con los triggers desactivados
+  (`session_replication_role = replica`, restauraciones parciales...):
+  scheduler, cada ALERTAS_CONTADORES_RECONCILIACION_SEGUNDOS, y la CLI
+  `python -m services.alertas_contadores_service` (`--plegar` solo pliega).
+"""
+import asyncio
+import json
+import logging
+import sys
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import delete, func, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import TareasSessionFactory, engine
+from models.alerta import Alerta
+from models.alerta_contador import AlertaContador, AlertaContadorDelta
+from utils.etag import calcular_etag
+from utils.logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+NOMBRE_TAREA = "reconciliacion_contadores_alertas"
+NOMBRE_TAREA_PLEGADO = "plegado_contadores_alertas"
+
+# Bloquea las escrituras de alertas (no las lecturas) mientras se compara, para
+# que ningún trigger añada deltas entre el GROUP BY y la corrección
+_LOCK_ALERTAS = text("LOCK TABLE public.alertas IN SHARE MODE")
+_INSERT_POR_DIALECTO = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+async def leer_contadores(session: AsyncSession) -> List[AlertaContador]:
+    """
+    Retrieve the current counters (consolidated totals plus pending deltas) in one query.
+
+    Returns:
+        Transient AlertaContador objects ordered by (tipo_alerta, resuelta),
+        including groups whose total dropped to zero. `version` counts the
+        consolidated changes plus the pending deltas, so it only moves when a
+        total does.
+    """
+    consolidados = select(
+        AlertaContador.tipo_alerta, AlertaContador.resuelta,
+        AlertaContador.total.label("total"), AlertaContador.version.label("version"),
+    )
+    pendientes = select(
+        AlertaContadorDelta.tipo_alerta, AlertaContadorDelta.resuelta,
+        func.sum(AlertaContadorDelta.delta).label("total"), func.count().label("version"),
+    ).group_by(AlertaContadorDelta.tipo_alerta, AlertaContadorDelta.resuelta)
+    grupos = consolidados.union_all(pendientes).subquery()
+    consulta = select(
+        grupos.c.tipo_alerta, grupos.c.resuelta, func.sum(grupos.c.total), func.sum(grupos.c.version)
+    ).group_by(grupos.c.tipo_alerta, grupos.c.resuelta).order_by(grupos.c.tipo_alerta, grupos.c.resuelta)
+    return [
+        AlertaContador(tipo_alerta=tipo, resuelta=bool(resuelta), total=int(total), version=int(version))
+        for tipo, resuelta, total, version in (await session.exec(consulta)).all()
+    ]
+
+
+def etag_contadores(contadores: List[AlertaContador], recientes: Sequence[Dict[str, Any]] = ()) -> str:
+    """
+    ETag del resumen: cambia cuando cambia algún total (columna `version`) o
+    alguno de los valores devueltos de las alertas recientes (`recientes`, los
+    dicts del cuerpo). Las repeticiones que no cambian lo devuelto no lo mueven.
+    """
+    return calcular_etag(
+        *(f"{c.tipo_alerta}:{c.resuelta}:{c.total}:{c.version}" for c in contadores),
+        *(f"{a['id']}:{a['nivel_severidad']}:{a['descripcion']}" for a in recientes),
+    )
+
+
+async def _sumar_a_contador(session: AsyncSession, tipo_alerta: str, resuelta: bool, total: int, version: int) -> None:
+    # Suma atómica sobre el contador consolidado (lo crea si el grupo es nuevo)
+    dialecto = session.bind.dialect.name
+    insert = _INSERT_POR_DIALECTO.get(dialecto)
+    if insert is None:
+        contador = await session.get(AlertaContador, (tipo_alerta, resuelta))
+        contador = contador or AlertaContador(tipo_alerta=tipo_alerta, resuelta=resuelta, total=0, version=0)
+        contador.total += total
+        contador.version += version
+        session.add(contador)
+        await session.flush()
+        return
+    tabla = AlertaContador.__table__
+    stmt = insert(tabla).values(tipo_alerta=tipo_alerta, resuelta=resuelta, total=total, version=version)
+    await session.exec(stmt.on_conflict_do_update(
+        index_elements=[tabla.c.tipo_alerta, tabla.c.resuelta],
+        set_={"total": tabla.c.total + stmt.excluded.total, "version": tabla.c.version + stmt.excluded.version},
+    ))
+
+
+async def plegar_deltas(session: AsyncSession) -> int:
+    """
+    Move the pending deltas into alertas_contadores. Does not commit.
+
+    DELETE ... RETURNING takes exactly the deltas it removes, so it is safe
+    alongside concurrent writers; the groups are updated in a fixed key order.
+    The visible totals and versions do not change.
+
+    Returns:
+        Number of delta rows folded.
+    """
+    tabla = AlertaContadorDelta.__table__
+    borrados = (await session.exec(
+        delete(AlertaContadorDelta).returning(tabla.c.tipo_alerta, tabla.c.resuelta, tabla.c.delta)
+    )).all()
+    grupos: Dict[Tuple[str, bool], List[int]] = {}
+    for tipo, resuelta, delta in borrados:
+        acumulado = grupos.setdefault((tipo, bool(resuelta)), [0, 0])
+        acumulado[0] += delta
+        acumulado[1] += 1
+    for (tipo, resuelta), (total, version) in sorted(grupos.items()):
+        await _sumar_a_contador(session, tipo, resuelta, total, version)
+    return len(borrados)
+
+
+async def reconciliar_contadores(session: AsyncSession) -> Dict[str, Any]:
+    """
+    Pliega los deltas, recalcula los contadores desde 'alertas' y corrige los
+    que difieran.
+
+    Returns:
+        Informe con los grupos revisados, los deltas plegados y las
+        correcciones aplicadas (tipo, resuelta, total anterior y total real).
+    """
+    if session.bind.dialect.name == "postgresql":
+        await session.exec(_LOCK_ALERTAS)
+    plegados = await plegar_deltas(session)
+
+    reales: Dict[Tuple[str, bool], int] = {
+        (tipo, bool(resuelta)): total
+        for tipo, resuelta, total in (
+            await session.exec(
+                select(Alerta.tipo_alerta, Alerta.resuelta, func.count()).group_by(Alerta.tipo_alerta, Alerta.resuelta)
+            )
+        ).all()
+    }
+    consolidados = {
+        (tipo, bool(resuelta)): total
+        for tipo, resuelta, total in (
+            await session.exec(select(AlertaContador.tipo_alerta, AlertaContador.resuelta, AlertaContador.total))
+        ).all()
+    }
+
+    correcciones = []
+    for clave in sorted(reales.keys() | consolidados.keys()):
+        real = reales.get(clave, 0)
+        anterior = consolidados.get(clave, 0)
+        if anterior == real:
+            continue
+        correcciones.append({"tipo_alerta": clave[0], "resuelta": clave[1], "total_anterior": anterior, "total_real": real})
+        if clave in consolidados:
+            # Sube la versión para invalidar los ETag ya entregados
+            await session.exec(
+                update(AlertaContador)
+                .where(AlertaContador.tipo_alerta == clave[0], AlertaContador.resuelta == clave[1])
+                .values(total=real, version=AlertaContador.version + 1)
+            )
+        else:
+            await _sumar_a_contador(session, clave[0], clave[1], real, 1)
+    await session.commit()
+
+    if correcciones:
+        logger.warning(f"Contadores de alertas desviados, corregidos: {correcciones}")
+    else:
+        logger.info(f"Contadores de alertas al día ({len(reales)} grupos, {plegados} deltas plegados)")
+    return {"grupos": len(reales), "deltas_plegados": plegados, "correcciones": correcciones}
+
+
+async def plegado_contadores_programado() -> Dict[str, Any]:
+    """Punto de entrada para el scheduler (plegado): abre su propia sesión."""
+    async with TareasSessionFactory() as session:
+        plegados = await plegar_deltas(session)
+        await session.commit()
+    return {"deltas_plegados": plegados}
+
+
+async def reconciliacion_contadores_programada() -> Dict[str, Any]:
+    """Punto de entrada para el scheduler: abre su propia sesión."""
+    async with TareasSessionFactory() as session:
+        return await reconciliar_contadores(session)
+
+
+async def _main(solo_plegar: bool) -> None:
+    try:
+        if solo_plegar:
+            informe = await plegado_contadores_programado()
+        else:
+            informe = await reconciliacion_contadores_programada()
+        print(json.dumps(informe, indent=2, ensure_ascii=False))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(_main(solo_plegar="--plegar" in sys.argv[1:]))
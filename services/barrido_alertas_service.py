@@ -0,0 +1,278 @@
+# services/barrido_alertas_service.py
+"""
+Barrido periódico de toda la flota para reglas de alerta que no dependen de un evento.
+
+Las reglas de edad y kilometraje (y las de límite de reencauches y profundidad)
+solo se evalúan en AlertService cuando el neumático recibe un evento, de modo que
+un neumático parado en almacén o en un vehículo inactivo nunca se marca. Este
+barrido recorre todos los neumáticos no desechados por bloques (paginación por id),
+carga solo las columnas necesarias (la profundidad sale de la columna desnormalizada
+neumaticos.profundidad_actual_mm; el umbral, del parámetro del almacén del
+neumático o del general del modelo), evalúa las reglas como operaciones vectoriales
+de NumPy e inserta las alertas resultantes en bloque con el upsert deduplicado de
+crud_alerta (una alerta ya abierta solo actualiza su última ocurrencia).
+
+Se ejecuta desde el scheduler de la aplicación (core/scheduler.py) o por CLI:
+
+    python -m services.barrido_alertas_service [--bloque N]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Float, String, type_coerce
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from utils.logging import setup_logging
+from crud.crud_alerta import alerta as crud_alerta
+from database import TareasSessionFactory, engine
+from models.modelo import ModeloNeumatico
+from models.neumatico import Neumatico
+from models.parametro_inventario import ParametroInventario
+from schemas.common import EstadoNeumaticoEnum, SeveridadAlerta, TipoAlertaEnum, TipoParametroEnum
+from services.alert_service import EDAD_MAXIMA_ANIOS, KM_MAXIMO, REENCAUCHES_MAXIMOS_POR_DEFECTO
+
+logger = logging.getLogger(__name__)
+
+NOMBRE_TAREA = "barrido_alertas"
+
+FIN_VIDA_UTIL_ESTIMADO = TipoAlertaEnum.FIN_VIDA_UTIL_ESTIMADO.value
+LIMITE_REENCAUCHES = TipoAlertaEnum.LIMITE_REENCAUCHES.value
+PROFUNDIDAD_BAJA = TipoAlertaEnum.PROFUNDIDAD_BAJA.value
+
+
+UmbralesProfundidad = Dict[Tuple[uuid.UUID, Optional[uuid.UUID]], float]
+
+
+async def cargar_umbrales_profundidad(session: AsyncSession) -> UmbralesProfundidad:
+    """
+    Profundidad mínima por (modelo, almacén) de los parámetros PROFUNDIDAD_MINIMA
+    activos; la clave (modelo, None) es el parámetro general del modelo. Se
+    resuelve con umbral_profundidad().
+    """
+    parametros = (await session.exec(
+        select(ParametroInventario.modelo_id, ParametroInventario.almacen_id, ParametroInventario.valor_numerico).where(
+            ParametroInventario.tipo_parametro == TipoParametroEnum.PROFUNDIDAD_MINIMA,
+            ParametroInventario.activo == True,  # noqa: E712
+            ParametroInventario.modelo_id.is_not(None),
+            ParametroInventario.valor_numerico.is_not(None),
+        )
+    )).all()
+    return {(modelo_id, almacen_id): float(valor) for modelo_id, almacen_id, valor in parametros}
+
+
+def umbral_profundidad(
+    umbrales: UmbralesProfundidad, modelo_id: Optional[uuid.UUID], almacen_id: Optional[uuid.UUID]
+) -> float:
+    """
+    La misma regla que AlertService.check_profundidad: el parámetro del almacén
+    del neumático y, si no hay, el general del modelo; sin ninguno,
+    settings.UMBRAL_PROFUNDIDAD_MINIMA_MM.
+    """
+    if almacen_id is not None and (modelo_id, almacen_id) in umbrales:
+        return umbrales[(modelo_id, almacen_id)]
+    return umbrales.get((modelo_id, None), settings.UMBRAL_PROFUNDIDAD_MINIMA_MM)
+
+
+class _LimitesModelo:
+    """
+    Límites por modelo como arrays indexables por la posición del modelo. Los
+    umbrales de profundidad propios de un almacén ocupan posiciones adicionales
+    de `umbral_profundidad` (indice_almacen).
+    """
+
+    def __init__(self, modelos: List[Tuple[uuid.UUID, Any, bool, Optional[int]]], umbrales: UmbralesProfundidad):
+        # Indexado por el id del modelo tal como llega del driver, sin convertir (ver _cargar_bloque)
+        self.indice: Dict[Any, int] = {}
+        # Posición 0 reservada para neumáticos sin modelo conocido (sin límites)
+        max_reencauches = [np.inf]
+        umbral_profundidad = [settings.UMBRAL_PROFUNDIDAD_MINIMA_MM]
+        crudos: Dict[uuid.UUID, Any] = {}
+        for posicion, (modelo_id, crudo, permite_reencauche, reencauches_maximos) in enumerate(modelos, start=1):
+            self.indice[crudo] = posicion
+            crudos[modelo_id] = crudo
+            max_reencauches.append(
+                float(reencauches_maximos or REENCAUCHES_MAXIMOS_POR_DEFECTO) if permite_reencauche else np.inf
+            )
+            umbral_profundidad.append(umbrales.get((modelo_id, None), settings.UMBRAL_PROFUNDIDAD_MINIMA_MM))
+        self.indice_almacen: Dict[Tuple[Any, uuid.UUID], int] = {}
+        for (modelo_id, almacen_id), valor in umbrales.items():
+            if almacen_id is not None and modelo_id in crudos:
+                self.indice_almacen[(crudos[modelo_id], almacen_id)] = len(umbral_profundidad)
+                umbral_profundidad.append(valor)
+        self.max_reencauches = np.array(max_reencauches, dtype=np.float64)
+        self.umbral_profundidad = np.array(umbral_profundidad, dtype=np.float64)
+
+
+def _uuid(valor: Any) -> Optional[uuid.UUID]:
+    # Columnas leídas sin conversión de tipo: hex en SQLite, UUID del driver en PostgreSQL
+    return None if valor is None else uuid.UUID(str(valor))
+
+
+class BarridoAlertasService:
+    def __init__(self, session: AsyncSession, tamano_bloque: Optional[int] = None, hoy: Optional[date] = None):
+        self.session = session
+        self.tamano_bloque = tamano_bloque or settings.BARRIDO_ALERTAS_BLOQUE
+        self.hoy = hoy or datetime.now(timezone.utc).date()
+
+    async def _cargar_limites(self) -> _LimitesModelo:
+        modelos = (await self.session.exec(
+            select(
+                ModeloNeumatico.id, type_coerce(ModeloNeumatico.id, String).label("id_crudo"),
+                ModeloNeumatico.permite_reencauche, ModeloNeumatico.reencauches_maximos,
+            )
+        )).all()
+        umbrales = await cargar_umbrales_profundidad(self.session)
+        return _LimitesModelo([tuple(m) for m in modelos], umbrales)
+
+    async def _cargar_bloque(self, despues_de: Optional[uuid.UUID]) -> List[Any]:
+        # Sin conversiones por fila (el grueso del coste de carga): los UUID llegan
+        # como los entrega el driver y solo se convierten en los neumáticos con
+        # alerta, las fechas las interpreta NumPy y la profundidad se lee como float,
+        # sin Decimal. Solo el almacén, casi siempre nulo, se convierte.
+        stmt = select(
+            type_coerce(Neumatico.id, String), type_coerce(Neumatico.modelo_id, String),
+            type_coerce(Neumatico.fecha_fabricacion, String), type_coerce(Neumatico.fecha_compra, String),
+            Neumatico.kilometraje_acumulado, Neumatico.reencauches_realizados,
+            type_coerce(Neumatico.ubicacion_actual_vehiculo_id, String),
+            type_coerce(Neumatico.profundidad_actual_mm, Float), Neumatico.ubicacion_almacen_id,
+        ).where(Neumatico.estado_actual != EstadoNeumaticoEnum.DESECHADO)
+        if despues_de is not None:
+            stmt = stmt.where(Neumatico.id > despues_de)
+        # Ejecución Core (sin capa ORM): solo se necesitan tuplas de columnas
+        conexion = await self.session.connection()
+        return list((await conexion.execute(stmt.order_by(Neumatico.id).limit(self.tamano_bloque))).all())
+
+    def _evaluar(self, filas: List[Any], limites: _LimitesModelo) -> List[Dict[str, Any]]:
+        """Evalúa todas las reglas sobre el bloque con operaciones vectoriales."""
+        n = len(filas)
+        idx_modelo = np.fromiter((limites.indice.get(f[1], 0) for f in filas), dtype=np.int64, count=n)
+        if limites.indice_almacen:
+            idx_umbral = np.fromiter(
+                (limites.indice_almacen.get((f[1], f[8]), i) for f, i in zip(filas, idx_modelo.tolist())),
+                dtype=np.int64, count=n,
+            )
+        else:
+            idx_umbral = idx_modelo
+        fechas = np.array([f[2] or f[3] for f in filas], dtype="datetime64[D]")
+        km = np.fromiter((f[4] or 0 for f in filas), dtype=np.int64, count=n)
+        reencauches = np.fromiter((f[5] or 0 for f in filas), dtype=np.int64, count=n)
+        profundidad = np.fromiter((np.nan if f[7] is None else float(f[7]) for f in filas), dtype=np.float64, count=n)
+
+        sin_fecha = np.isnat(fechas)
+        edad_anios = np.where(sin_fecha, 0.0, (np.datetime64(self.hoy, "D") - fechas).astype(np.float64) / 365.25)
+        max_reencauches = limites.max_reencauches[idx_modelo]
+        umbral = limites.umbral_profundidad[idx_umbral]
+
+        # Igual que AlertService._check_fin_vida_util: la edad tiene prioridad sobre los km
+        mask_edad = ~sin_fecha & (edad_anios >= EDAD_MAXIMA_ANIOS)
+        mask_km = ~mask_edad & (km >= KM_MAXIMO)
+        mask_reencauches = reencauches >= max_reencauches
+        with np.errstate(invalid="ignore"):
+            mask_profundidad = profundidad < umbral  # NaN (sin medición) nunca dispara
+
+        alertas: List[Dict[str, Any]] = []
+        severidad = SeveridadAlerta.WARN.value
+
+        def _base(i: int, tipo: str, descripcion: str, datos: Dict[str, Any]) -> Dict[str, Any]:
+            fila = filas[i]
+            return {
+                "tipo_alerta": tipo, "descripcion": descripcion, "nivel_severidad": severidad,
+                "neumatico_id": _uuid(fila[0]), "modelo_id": _uuid(fila[1]), "vehiculo_id": _uuid(fila[6]),
+                "datos_contexto": {**datos, "origen": NOMBRE_TAREA},
+            }
+
+        for i in np.flatnonzero(mask_edad):
+            edad = round(float(edad_anios[i]), 1)
+            alertas.append(_base(i, FIN_VIDA_UTIL_ESTIMADO,
+                f"Edad del neumático: {edad:.1f} años, superando el máximo recomendado",
+                {"tipo": "EDAD", "motivos": ["EDAD_MAXIMA"], "edad_actual": edad, "edad_maxima": EDAD_MAXIMA_ANIOS,
+                 "unidad": "años", "fecha_inicio": str(fechas[i])}))
+        for i in np.flatnonzero(mask_km):
+            alertas.append(_base(i, FIN_VIDA_UTIL_ESTIMADO,
+                f"Kilometraje del neumático: {int(km[i])} km, superando el máximo recomendado",
+                {"tipo": "KILOMETRAJE", "motivos": ["KILOMETRAJE_MAXIMO"], "km_actual": int(km[i]),
+                 "km_maximo": KM_MAXIMO, "unidad": "km"}))
+        for i in np.flatnonzero(mask_reencauches):
+            maximo = int(max_reencauches[i])
+            alertas.append(_base(i, LIMITE_REENCAUCHES,
+                f"Se ha alcanzado el límite de {maximo} reencauche{'s' if maximo > 1 else ''} permitido{'s' if maximo > 1 else ''}.",
+                {"reencauches_realizados": int(reencauches[i]), "reencauches_maximos": maximo, "motivos": ["LIMITE_REENCAUCHES"]}))
+        for i in np.flatnonzero(mask_profundidad):
+            alertas.append(_base(i, PROFUNDIDAD_BAJA,
+                f"Profundidad {float(profundidad[i])}mm < {float(umbral[i])}mm",
+                {"profundidad_actual": float(profundidad[i]), "profundidad_minima": float(umbral[i])}))
+        return alertas
+
+    async def ejecutar(self) -> Dict[str, Any]:
+        """Recorre la flota completa; confirma una transacción por bloque y devuelve el informe con tiempos."""
+        tiempos = {"carga": 0.0, "evaluacion": 0.0, "insercion": 0.0}
+        inicio_total = time.perf_counter()
+        limites = await self._cargar_limites()
+
+        neumaticos = bloques = 0
+        por_tipo: Dict[str, int] = {}
+        ultimo_id: Optional[uuid.UUID] = None
+        while True:
+            t0 = time.perf_counter()
+            filas = await self._cargar_bloque(ultimo_id)
+            if not filas:
+                break
+            t1 = time.perf_counter()
+            alertas = self._evaluar(filas, limites)
+            t2 = time.perf_counter()
+            await crud_alerta.upsert_abiertas_bulk(self.session, filas=alertas, contar_ocurrencia=False)
+            await self.session.commit()
+            t3 = time.perf_counter()
+
+            tiempos["carga"] += t1 - t0
+            tiempos["evaluacion"] += t2 - t1
+            tiempos["insercion"] += t3 - t2
+            for a in alertas:
+                por_tipo[a["tipo_alerta"]] = por_tipo.get(a["tipo_alerta"], 0) + 1
+            neumaticos += len(filas)
+            bloques += 1
+            ultimo_id = _uuid(filas[-1][0])
+            if len(filas) < self.tamano_bloque:
+                break
+
+        tiempos = {k: round(v, 4) for k, v in tiempos.items()}
+        tiempos["total"] = round(time.perf_counter() - inicio_total, 4)
+        informe = {
+            "neumaticos": neumaticos, "bloques": bloques, "alertas": sum(por_tipo.values()),
+            "alertas_por_tipo": por_tipo, "tiempos_segundos": tiempos,
+        }
+        logger.info(f"Barrido de alertas: {neumaticos} neumáticos en {bloques} bloques, "
+                    f"{informe['alertas']} alertas, tiempos {tiempos}")
+        return informe
+
+
+async def barrido_alertas_programado() -> Dict[str, Any]:
+    """Punto de entrada para el scheduler: abre su propia sesión."""
+    async with TareasSessionFactory() as session:
+        return await BarridoAlertasService(session).ejecutar()
+
+
+async def _main(tamano_bloque: Optional[int]) -> None:
+    try:
+        async with TareasSessionFactory() as session:
+            informe = await BarridoAlertasService(session, tamano_bloque=tamano_bloque).ejecutar()
+        print(json.dumps(informe, indent=2, ensure_ascii=False))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Barrido de alertas de edad/km/reencauches/profundidad sobre toda la flota.")
+    parser.add_argument("--bloque", type=int, default=None, help="Neumáticos por bloque (por defecto BARRIDO_ALERTAS_BLOQUE).")
+    args = parser.parse_args()
+    setup_logging()
+    asyncio.run(_main(args.bloque))
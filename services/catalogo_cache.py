@@ -0,0 +1,217 @@
+# services/catalogo_cache.py
+"""
+Caché de proceso (read-through) del catálogo de modelos y fabricantes de neumáticos.
+
+Los modelos casi nunca cambian pero se consultan en cada evento (reglas de alertas,
+reencauches). Las entradas se guardan como instantáneas inmutables, con TTL. Cada
+invalidación toma un número de secuencia y lo anota en la clave invalidada (o en
+todo el catálogo): invalidar un modelo no descarta los demás, y una carga que empezó
+antes de invalidar su clave no puede dejar un valor viejo en la caché.
+
+La invalidación es explícita desde el CRUD y, además, automática: los cambios ORM
+sobre modelos y fabricantes se anotan en la sesión y se invalidan al confirmarse la
+transacción (after_commit), no en el flush; un rollback los descarta sin invalidar.
+Entre procesos distintos el TTL acota la obsolescencia.
+"""
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, Generic, Optional, Tuple, TypeVar
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models.fabricante import FabricanteNeumatico
+from models.modelo import ModeloNeumatico
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModeloCatalogo:
+    """Instantánea de solo lectura de un ModeloNeumatico."""
+    id: uuid.UUID
+    fabricante_id: Optional[uuid.UUID]
+    nombre_modelo: str
+    medida: Optional[str]
+    profundidad_original_mm: Optional[Decimal]
+    presion_recomendada_psi: Optional[float]
+    permite_reencauche: bool
+    reencauches_maximos: Optional[int]
+    activo: bool
+
+    @classmethod
+    def desde_modelo(cls, modelo: ModeloNeumatico) -> "ModeloCatalogo":
+        return cls(
+            id=modelo.id, fabricante_id=modelo.fabricante_id, nombre_modelo=modelo.nombre_modelo,
+            medida=modelo.medida, profundidad_original_mm=modelo.profundidad_original_mm,
+            presion_recomendada_psi=modelo.presion_recomendada_psi,
+            permite_reencauche=bool(modelo.permite_reencauche),
+            reencauches_maximos=modelo.reencauches_maximos, activo=bool(modelo.activo),
+        )
+
+
+@dataclass(frozen=True)
+class FabricanteCatalogo:
+    """Instantánea de solo lectura de un FabricanteNeumatico."""
+    id: uuid.UUID
+    nombre: str
+    codigo_abreviado: Optional[str]
+    activo: bool
+
+    @classmethod
+    def desde_modelo(cls, fabricante: FabricanteNeumatico) -> "FabricanteCatalogo":
+        return cls(
+            id=fabricante.id, nombre=fabricante.nombre,
+            codigo_abreviado=fabricante.codigo_abreviado, activo=bool(fabricante.activo),
+        )
+
+
+T = TypeVar("T")
+
+
+class _Tabla(Generic[T]):
+    """
+    Entradas de un tipo de catálogo: id -> (expira_en, instantánea), y la
+    secuencia de la última invalidación de cada id.
+    """
+
+    def __init__(self) -> None:
+        self.entradas: Dict[uuid.UUID, Tuple[float, T]] = {}
+        self.invalidada_en: Dict[uuid.UUID, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+
+class CatalogoCache:
+    def __init__(self, ttl_segundos: float):
+        self.ttl_segundos = ttl_segundos
+        # Secuencia de invalidaciones; una carga anota la vigente al empezar
+        self.version = 0
+        self._todo_invalidado_en = 0
+        self._modelos: _Tabla[ModeloCatalogo] = _Tabla()
+        self._fabricantes: _Tabla[FabricanteCatalogo] = _Tabla()
+
+    def _leer(self, tabla: _Tabla[T], clave: uuid.UUID) -> Optional[T]:
+        entrada = tabla.entradas.get(clave)
+        if entrada is not None:
+            expira_en, valor = entrada
+            if expira_en > time.monotonic():
+                tabla.hits += 1
+                return valor
+            tabla.entradas.pop(clave, None)
+        tabla.misses += 1
+        return None
+
+    def _guardar(self, tabla: _Tabla[T], clave: uuid.UUID, valor: T, version: int) -> None:
+        # Si la clave (o todo el catálogo) se invalidó mientras se cargaba, no se guarda el valor leído
+        if max(tabla.invalidada_en.get(clave, 0), self._todo_invalidado_en) <= version:
+            tabla.entradas[clave] = (time.monotonic() + self.ttl_segundos, valor)
+
+    def _invalidar_clave(self, tabla: _Tabla[T], clave: uuid.UUID) -> None:
+        self.version += 1
+        tabla.invalidada_en[clave] = self.version
+        tabla.entradas.pop(clave, None)
+
+    async def get_modelo(self, session: AsyncSession, modelo_id: Optional[uuid.UUID]) -> Optional[ModeloCatalogo]:
+        """Devuelve el modelo desde la caché o, si no está, lo lee con la sesión dada."""
+        if modelo_id is None:
+            return None
+        valor = self._leer(self._modelos, modelo_id)
+        if valor is not None:
+            return valor
+        version = self.version
+        modelo = await session.get(ModeloNeumatico, modelo_id)
+        if modelo is None:
+            return None
+        valor = ModeloCatalogo.desde_modelo(modelo)
+        self._guardar(self._modelos, modelo_id, valor, version)
+        return valor
+
+    async def get_fabricante(self, session: AsyncSession, fabricante_id: Optional[uuid.UUID]) -> Optional[FabricanteCatalogo]:
+        """Devuelve el fabricante desde la caché o, si no está, lo lee con la sesión dada."""
+        if fabricante_id is None:
+            return None
+        valor = self._leer(self._fabricantes, fabricante_id)
+        if valor is not None:
+            return valor
+        version = self.version
+        fabricante = await session.get(FabricanteNeumatico, fabricante_id)
+        if fabricante is None:
+            return None
+        valor = FabricanteCatalogo.desde_modelo(fabricante)
+        self._guardar(self._fabricantes, fabricante_id, valor, version)
+        return valor
+
+    def invalidar_modelo(self, modelo_id: Optional[uuid.UUID] = None) -> None:
+        """Descarta un modelo o, sin ID, todo el catálogo."""
+        if modelo_id is None:
+            self.invalidar()
+            return
+        self._invalidar_clave(self._modelos, modelo_id)
+
+    def invalidar_fabricante(self, fabricante_id: Optional[uuid.UUID] = None) -> None:
+        """Descarta un fabricante o, sin ID, todo el catálogo."""
+        if fabricante_id is None:
+            self.invalidar()
+            return
+        self._invalidar_clave(self._fabricantes, fabricante_id)
+
+    def invalidar(self) -> None:
+        """Invalida todo el catálogo."""
+        self.version += 1
+        self._todo_invalidado_en = self.version
+        for tabla in (self._modelos, self._fabricantes):
+            tabla.entradas.clear()
+            tabla.invalidada_en.clear()
+        logger.debug(f"Caché de catálogo invalidada (versión {self.version}).")
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de aciertos/fallos y tamaño actual de la caché."""
+        resultado: Dict[str, Any] = {"version": self.version, "ttl_segundos": self.ttl_segundos}
+        for nombre, tabla in (("modelos", self._modelos), ("fabricantes", self._fabricantes)):
+            total = tabla.hits + tabla.misses
+            resultado[nombre] = {
+                "entradas": len(tabla.entradas),
+                "hits": tabla.hits,
+                "misses": tabla.misses,
+                "hit_ratio": round(tabla.hits / total, 4) if total else None,
+            }
+        return resultado
+
+
+catalogo_cache = CatalogoCache(ttl_segundos=settings.CATALOGO_CACHE_TTL_SEGUNDOS)
+
+
+# --- Invalidación automática ante cambios ORM sobre el catálogo ---
+# Los IDs modificados o borrados en el flush se anotan en la sesión y se invalidan
+# al confirmar la transacción: antes del COMMIT otra petición aún leería la fila
+# anterior y podría volver a cachearla. Las altas no invalidan: un ID inexistente
+# nunca se guarda en la caché.
+_CLAVE_PENDIENTES = "catalogo_cache_pendientes"
+
+
+@event.listens_for(Session, "after_flush")
+def _anotar_cambios_catalogo(session: Session, flush_context) -> None:
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (ModeloNeumatico, FabricanteNeumatico)):
+            # identity no dispara cargas (la sesión puede ser asíncrona)
+            session.info.setdefault(_CLAVE_PENDIENTES, set()).add((type(obj), inspect(obj).identity[0]))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_cambios_catalogo(session: Session) -> None:
+    for tipo, clave in session.info.pop(_CLAVE_PENDIENTES, ()):
+        if tipo is ModeloNeumatico:
+            catalogo_cache.invalidar_modelo(clave)
+        else:
+            catalogo_cache.invalidar_fabricante(clave)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios_catalogo(session: Session) -> None:
+    session.info.pop(_CLAVE_PENDIENTES, None)
@@ -0,0 +1,435 @@
+# services/cpk_service.py
+"""
+Costo por kilómetro (CPK) por modelo, fabricante, proveedor y tipo de vehículo.
+
+El costo de un neumático es su `costo_compra` (el día de la compra) más el
+`costo_evento` de sus eventos (reparaciones, reencauches...; el día del
+evento). Los km no salen de `kilometraje_acumulado`, que se reinicia en cada
+reencauche y no tiene fecha: se reconstruyen desde los eventos con odómetro,
+igual que hace NeumaticoService al desmontar o rotar (odómetro del evento
+menos el de la instalación / rotación anterior), y cuentan el día del evento
+que cierra el ciclo. El tipo de vehículo de un neumático es el del vehículo
+de su última instalación.
+
+Dos tablas de agregados diarios (models/cpk_diario.py):
+
+- cpk_neumatico_diario: por neumático y día, calculada con GROUP BY en SQL;
+- cpk_grupo_diario: su suma por día y dimensiones. Los endpoints solo leen
+  esta tabla (unas filas por día y grupo, índice por día), así que su coste
+  no depende del número de eventos.
+
+El refresco es incremental: solo recalcula los neumáticos modificados o con
+eventos registrados desde la última marca (tabla marcas_refresco), y después
+los grupos de los días que esas filas tocan. La marca se retrocede
+CPK_REFRESCO_MARGEN_SEGUNDOS para no perder transacciones que confirmaron
+tarde; reprocesar un neumático es idempotente. Se ejecuta desde:
+
+- el scheduler de la API, cada CPK_REFRESCO_INTERVALO_SEGUNDOS;
+- POST /analitica/cpk/refrescar, bajo demanda (`completo` reconstruye todo,
+  p. ej. tras cambiar el tipo de un vehículo);
+- la CLI: `python -m services.cpk_service [--completo]`.
+"""
+import asyncio
+import json
+import logging
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert, text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from database import TareasSessionFactory, engine
+from models.cpk_diario import CpkGrupoDiario, CpkNeumaticoDiario
+from models.evento_neumatico import EventoNeumatico
+from models.fabricante import FabricanteNeumatico
+from models.marca_refresco import MarcaRefresco
+from models.modelo import ModeloNeumatico
+from models.neumatico import Neumatico
+from models.proveedor import Proveedor
+from models.tipo_vehiculo import TipoVehiculo
+from models.vehiculo import Vehiculo
+from schemas.common import AgrupacionCpkEnum, GranularidadEnum, TipoEventoNeumaticoEnum
+from utils.logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+NOMBRE_TAREA = "refresco_cpk"
+MARCA = "cpk"
+
+_LOCK_REFRESCO = text("SELECT pg_try_advisory_xact_lock(hashtext('refresco_cpk'))")
+# Días por sentencia al reconstruir cpk_grupo_diario
+_DIAS_POR_LOTE = 500
+
+# Eventos que abren un ciclo de uso y eventos que lo cierran (sumando km)
+_INICIO_CICLO = (TipoEventoNeumaticoEnum.INSTALACION, TipoEventoNeumaticoEnum.ROTACION)
+_FIN_CICLO = (TipoEventoNeumaticoEnum.ROTACION, TipoEventoNeumaticoEnum.DESMONTAJE, TipoEventoNeumaticoEnum.DESECHO)
+_COLUMNA_MONEDA = {"PEN": "costo_pen", "USD": "costo_usd"}
+
+
+def _es_sqlite(session: AsyncSession) -> bool:
+    return session.bind.dialect.name == "sqlite"
+
+
+def _dia(session: AsyncSession, columna):
+    """Fecha (día) de un timestamp; en SQLite CAST(... AS DATE) daría un número."""
+    return func.date(columna) if _es_sqlite(session) else cast(columna, Date)
+
+
+def _a_fecha(valor: Any) -> date:
+    return date.fromisoformat(valor) if isinstance(valor, str) else valor
+
+
+def _a_uuid(valor: Any) -> Optional[uuid.UUID]:
+    # vehiculos.tipo_vehiculo_id es texto en el modelo
+    return None if valor is None else uuid.UUID(str(valor))
+
+
+def _en_lotes(valores: List[Any], tamano: int) -> Iterable[List[Any]]:
+    for inicio in range(0, len(valores), tamano):
+        yield valores[inicio:inicio + tamano]
+
+
+# --- Refresco ---
+
+async def _neumaticos_tocados(session: AsyncSession, desde: Optional[datetime]) -> List[uuid.UUID]:
+    """Neumáticos a recalcular: todos (desde=None) o los modificados / con eventos nuevos desde `desde`."""
+    if desde is None:
+        return list((await session.exec(select(Neumatico.id))).all())
+    # actualizado_en también se rellena al crear el neumático
+    modificados = select(Neumatico.id).where(Neumatico.actualizado_en >= desde)
+    con_eventos = select(EventoNeumatico.neumatico_id).where(EventoNeumatico.creado_en >= desde)
+    return list((await session.exec(modificados.union(con_eventos))).scalars().all())
+
+
+async def _calcular_filas(session: AsyncSession, neumatico_ids: List[uuid.UUID]) -> List[Dict[str, Any]]:
+    """Filas de cpk_neumatico_diario de los neumáticos dados (3 consultas agregadas + 1 de neumáticos)."""
+    E = EventoNeumatico
+    neumaticos = (await session.exec(
+        select(
+            Neumatico.id, Neumatico.modelo_id, Neumatico.proveedor_compra_id,
+            Neumatico.fecha_compra, Neumatico.costo_compra, Neumatico.moneda_compra,
+        ).where(Neumatico.id.in_(neumatico_ids))
+    )).all()
+    if not neumaticos:
+        return []
+
+    # Tipo de vehículo de la última instalación
+    instalaciones = select(
+        E.neumatico_id,
+        Vehiculo.tipo_vehiculo_id,
+        func.row_number().over(
+            partition_by=E.neumatico_id, order_by=(E.timestamp_evento.desc(), E.id.desc())
+        ).label("orden"),
+    ).join(Vehiculo, Vehiculo.id == E.vehiculo_id).where(
+        E.neumatico_id.in_(neumatico_ids), E.tipo_evento == TipoEventoNeumaticoEnum.INSTALACION
+    ).subquery()
+    tipos = {
+        neumatico_id: _a_uuid(tipo_id)
+        for neumatico_id, tipo_id in (await session.exec(
+            select(instalaciones.c.neumatico_id, instalaciones.c.tipo_vehiculo_id).where(instalaciones.c.orden == 1)
+        )).all()
+    }
+
+    dia_evento = _dia(session, E.timestamp_evento)
+    costos = (await session.exec(
+        select(E.neumatico_id, dia_evento, E.moneda_costo, func.sum(E.costo_evento))
+        .where(E.neumatico_id.in_(neumatico_ids), E.costo_evento.is_not(None))
+        .group_by(E.neumatico_id, dia_evento, E.moneda_costo)
+    )).all()
+
+    # Km por ciclo: odómetro del evento que cierra menos el del evento anterior que lo abrió
+    orden_ciclo = dict(partition_by=E.neumatico_id, order_by=(E.timestamp_evento, E.id))
+    ciclos = select(
+        E.neumatico_id,
+        E.timestamp_evento,
+        E.tipo_evento,
+        E.odometro_vehiculo_en_evento.label("odometro"),
+        func.lag(E.tipo_evento, type_=E.tipo_evento.type).over(**orden_ciclo).label("tipo_anterior"),
+        func.lag(E.odometro_vehiculo_en_evento).over(**orden_ciclo).label("odometro_anterior"),
+    ).where(
+        E.neumatico_id.in_(neumatico_ids), E.tipo_evento.in_(_INICIO_CICLO + _FIN_CICLO)
+    ).subquery()
+    dia_ciclo = _dia(session, ciclos.c.timestamp_evento)
+    kms = (await session.exec(
+        select(ciclos.c.neumatico_id, dia_ciclo, func.sum(ciclos.c.odometro - ciclos.c.odometro_anterior))
+        .where(
+            ciclos.c.tipo_evento.in_(_FIN_CICLO),
+            ciclos.c.tipo_anterior.in_(_INICIO_CICLO),
+            ciclos.c.odometro >= ciclos.c.odometro_anterior,
+        )
+        .group_by(ciclos.c.neumatico_id, dia_ciclo)
+    )).all()
+
+    dimensiones = {
+        n.id: {"modelo_id": n.modelo_id, "proveedor_id": n.proveedor_compra_id, "tipo_vehiculo_id": tipos.get(n.id)}
+        for n in neumaticos
+    }
+    filas: Dict[Tuple[uuid.UUID, date], Dict[str, Any]] = {}
+    monedas_ignoradas: Dict[str, int] = defaultdict(int)
+
+    def fila(neumatico_id: uuid.UUID, dia: Any) -> Optional[Dict[str, Any]]:
+        if neumatico_id not in dimensiones:
+            return None
+        clave = (neumatico_id, _a_fecha(dia))
+        if clave not in filas:
+            filas[clave] = {
+                "neumatico_id": neumatico_id, "dia": clave[1], **dimensiones[neumatico_id],
+                "costo_pen": Decimal("0"), "costo_usd": Decimal("0"), "km": 0,
+            }
+        return filas[clave]
+
+    def sumar_costo(destino: Optional[Dict[str, Any]], moneda: Optional[str], importe: Any) -> None:
+        columna = _COLUMNA_MONEDA.get(moneda or "PEN")
+        if columna is None:
+            monedas_ignoradas[moneda] += 1
+        elif destino is not None:
+            destino[columna] += Decimal(str(importe))
+
+    for n in neumaticos:
+        if n.costo_compra and n.fecha_compra:
+            sumar_costo(fila(n.id, n.fecha_compra), n.moneda_compra, n.costo_compra)
+    for neumatico_id, dia, moneda, importe in costos:
+        sumar_costo(fila(neumatico_id, dia), moneda, importe)
+    for neumatico_id, dia, km in kms:
+        destino = fila(neumatico_id, dia)
+        if destino is not None:
+            destino["km"] += int(km or 0)
+
+    if monedas_ignoradas:
+        logger.warning(f"CPK: costos en monedas no soportadas ignorados: {dict(monedas_ignoradas)}")
+    return list(filas.values())
+
+
+async def _recalcular_neumaticos(session: AsyncSession, neumatico_ids: List[uuid.UUID]) -> Set[date]:
+    """Reemplaza las filas diarias de los neumáticos. Devuelve los días afectados (anteriores y nuevos)."""
+    N = CpkNeumaticoDiario
+    dias = {_a_fecha(d) for d in (await session.exec(select(N.dia).where(N.neumatico_id.in_(neumatico_ids)).distinct())).all()}
+    await session.exec(delete(N).where(N.neumatico_id.in_(neumatico_ids)))
+    filas = await _calcular_filas(session, neumatico_ids)
+    if filas:
+        await session.exec(insert(N), params=filas)
+    return dias | {f["dia"] for f in filas}
+
+
+async def _reconstruir_grupos(session: AsyncSession, dias: Optional[Set[date]]) -> None:
+    """Recalcula cpk_grupo_diario desde cpk_neumatico_diario: los días dados o, con None, todos."""
+    N, G = CpkNeumaticoDiario, CpkGrupoDiario
+    agregado = select(
+        N.dia, N.modelo_id, N.proveedor_id, N.tipo_vehiculo_id, func.sum(N.costo_pen), func.sum(N.costo_usd), func.sum(N.km),
+    ).group_by(N.dia, N.modelo_id, N.proveedor_id, N.tipo_vehiculo_id)
+    columnas = ["dia", "modelo_id", "proveedor_id", "tipo_vehiculo_id", "costo_pen", "costo_usd", "km"]
+
+    if dias is None:
+        await session.exec(delete(G))
+        await session.exec(insert(G).from_select(columnas, agregado))
+        return
+    for lote in _en_lotes(sorted(dias), _DIAS_POR_LOTE):
+        await session.exec(delete(G).where(G.dia.in_(lote)))
+        await session.exec(insert(G).from_select(columnas, agregado.where(N.dia.in_(lote))))
+
+
+async def refrescar_cpk(session: AsyncSession, *, completo: bool = False) -> Dict[str, Any]:
+    """
+    Refresca los agregados de CPK: incremental desde la última marca o, con
+    `completo` (o si aún no hay marca), reconstruyéndolos enteros. Todo en una
+    transacción: los lectores nunca ven los grupos a medio recalcular.
+
+    Returns:
+        Informe con `refrescado` (False si otro proceso ya estaba refrescando),
+        si fue completo, los neumáticos y días recalculados y la duración.
+    """
+    inicio = time.perf_counter()
+    # El lock de transacción se libera con el COMMIT que cierra el refresco
+    if not _es_sqlite(session) and not (await session.exec(_LOCK_REFRESCO)).scalar():
+        await session.rollback()
+        logger.info("Refresco de CPK omitido: otro proceso lo está ejecutando.")
+        return {"refrescado": False, "motivo": "refresco_en_curso", "duracion_segundos": 0.0}
+
+    corte = datetime.now(timezone.utc)
+    marca = await session.get(MarcaRefresco, MARCA)
+    completo = completo or marca is None
+    desde = None
+    if not completo:
+        anterior = marca.marca if marca.marca.tzinfo else marca.marca.replace(tzinfo=timezone.utc)
+        desde = anterior - timedelta(seconds=settings.CPK_REFRESCO_MARGEN_SEGUNDOS)
+
+    neumatico_ids = await _neumaticos_tocados(session, desde)
+    if completo:
+        # También desaparecen los neumáticos que ya no existen
+        await session.exec(delete(CpkNeumaticoDiario))
+    dias: Set[date] = set()
+    for lote in _en_lotes(neumatico_ids, settings.CPK_REFRESCO_BLOQUE):
+        dias |= await _recalcular_neumaticos(session, lote)
+    await _reconstruir_grupos(session, None if completo else dias)
+
+    if marca is None:
+        marca = MarcaRefresco(nombre=MARCA, marca=corte)
+    marca.marca = corte
+    marca.actualizado_en = datetime.now(timezone.utc)
+    session.add(marca)
+    await session.commit()
+
+    duracion = round(time.perf_counter() - inicio, 4)
+    logger.info(f"CPK refrescado ({'completo' if completo else 'incremental'}): "
+                f"{len(neumatico_ids)} neumáticos, {len(dias)} días en {duracion}s")
+    return {
+        "refrescado": True, "completo": completo, "neumaticos": len(neumatico_ids),
+        "dias": len(dias), "duracion_segundos": duracion,
+    }
+
+
+# --- Lecturas ---
+
+async def leer_marca(session: AsyncSession) -> Optional[datetime]:
+    """Instante hasta el que están calculados los agregados (None si nunca se refrescaron)."""
+    return (await session.exec(select(MarcaRefresco.marca).where(MarcaRefresco.nombre == MARCA))).first()
+
+
+def _filtrar(
+    consulta,
+    *,
+    desde: Optional[date],
+    hasta: Optional[date],
+    modelo_id: Optional[uuid.UUID],
+    fabricante_id: Optional[uuid.UUID],
+    proveedor_id: Optional[uuid.UUID],
+    tipo_vehiculo_id: Optional[uuid.UUID],
+):
+    G = CpkGrupoDiario
+    condiciones = [
+        (desde, lambda: G.dia >= desde),
+        (hasta, lambda: G.dia <= hasta),
+        (modelo_id, lambda: G.modelo_id == modelo_id),
+        (fabricante_id, lambda: ModeloNeumatico.fabricante_id == fabricante_id),
+        (proveedor_id, lambda: G.proveedor_id == proveedor_id),
+        (tipo_vehiculo_id, lambda: G.tipo_vehiculo_id == tipo_vehiculo_id),
+    ]
+    for valor, condicion in condiciones:
+        if valor is not None:
+            consulta = consulta.where(condicion())
+    return consulta
+
+
+def _con_cpk(fila: Dict[str, Any]) -> Dict[str, Any]:
+    fila["costo_pen"] = float(fila["costo_pen"] or 0)
+    fila["costo_usd"] = float(fila["costo_usd"] or 0)
+    fila["km"] = int(fila["km"] or 0)
+    fila["cpk_pen"] = round(fila["costo_pen"] / fila["km"], 6) if fila["km"] else None
+    fila["cpk_usd"] = round(fila["costo_usd"] / fila["km"], 6) if fila["km"] else None
+    return fila
+
+
+async def leer_cpk(
+    session: AsyncSession,
+    *,
+    agrupar_por: AgrupacionCpkEnum,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    modelo_id: Optional[uuid.UUID] = None,
+    fabricante_id: Optional[uuid.UUID] = None,
+    proveedor_id: Optional[uuid.UUID] = None,
+    tipo_vehiculo_id: Optional[uuid.UUID] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve cost and km totals per group from cpk_grupo_diario.
+
+    Args:
+        session: Database session
+        agrupar_por: Dimension to group by
+        desde / hasta: Inclusive day range (optional)
+        modelo_id, fabricante_id, proveedor_id, tipo_vehiculo_id: Optional filters
+
+    Returns:
+        One dict per group (id, nombre, costs, km and CPK), most km first
+    """
+    G = CpkGrupoDiario
+    clave, nombre = {
+        AgrupacionCpkEnum.MODELO: (G.modelo_id, ModeloNeumatico.nombre_modelo),
+        AgrupacionCpkEnum.FABRICANTE: (ModeloNeumatico.fabricante_id, FabricanteNeumatico.nombre),
+        AgrupacionCpkEnum.PROVEEDOR: (G.proveedor_id, Proveedor.nombre),
+        AgrupacionCpkEnum.TIPO_VEHICULO: (G.tipo_vehiculo_id, TipoVehiculo.nombre),
+    }[agrupar_por]
+    consulta = select(
+        clave.label("id"), nombre.label("nombre"),
+        func.sum(G.costo_pen).label("costo_pen"), func.sum(G.costo_usd).label("costo_usd"), func.sum(G.km).label("km"),
+    ).join(ModeloNeumatico, ModeloNeumatico.id == G.modelo_id)
+    if agrupar_por == AgrupacionCpkEnum.FABRICANTE:
+        consulta = consulta.join(FabricanteNeumatico, FabricanteNeumatico.id == ModeloNeumatico.fabricante_id)
+    elif agrupar_por == AgrupacionCpkEnum.PROVEEDOR:
+        consulta = consulta.outerjoin(Proveedor, Proveedor.id == G.proveedor_id)
+    elif agrupar_por == AgrupacionCpkEnum.TIPO_VEHICULO:
+        consulta = consulta.outerjoin(TipoVehiculo, TipoVehiculo.id == G.tipo_vehiculo_id)
+    consulta = _filtrar(
+        consulta, desde=desde, hasta=hasta, modelo_id=modelo_id, fabricante_id=fabricante_id,
+        proveedor_id=proveedor_id, tipo_vehiculo_id=tipo_vehiculo_id,
+    ).group_by(clave, nombre).order_by(func.sum(G.km).desc(), nombre)
+    return [_con_cpk(dict(fila)) for fila in (await session.exec(consulta)).mappings()]
+
+
+async def leer_serie_cpk(
+    session: AsyncSession,
+    *,
+    granularidad: GranularidadEnum,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    modelo_id: Optional[uuid.UUID] = None,
+    fabricante_id: Optional[uuid.UUID] = None,
+    proveedor_id: Optional[uuid.UUID] = None,
+    tipo_vehiculo_id: Optional[uuid.UUID] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve cost and km totals per day or month from cpk_grupo_diario.
+
+    Returns:
+        One dict per period (periodo, costs, km and CPK), oldest first
+    """
+    G = CpkGrupoDiario
+    if granularidad == GranularidadEnum.DIA:
+        periodo = G.dia
+    elif _es_sqlite(session):
+        periodo = func.strftime("%Y-%m-01", G.dia)
+    else:
+        periodo = cast(func.date_trunc("month", G.dia), Date)
+    consulta = select(
+        periodo.label("periodo"),
+        func.sum(G.costo_pen).label("costo_pen"), func.sum(G.costo_usd).label("costo_usd"), func.sum(G.km).label("km"),
+    )
+    if fabricante_id is not None:
+        consulta = consulta.join(ModeloNeumatico, ModeloNeumatico.id == G.modelo_id)
+    consulta = _filtrar(
+        consulta, desde=desde, hasta=hasta, modelo_id=modelo_id, fabricante_id=fabricante_id,
+        proveedor_id=proveedor_id, tipo_vehiculo_id=tipo_vehiculo_id,
+    ).group_by(periodo).order_by(periodo)
+    filas = []
+    for fila in (await session.exec(consulta)).mappings():
+        fila = dict(fila)
+        fila["periodo"] = _a_fecha(fila["periodo"])
+        filas.append(_con_cpk(fila))
+    return filas
+
+
+async def refresco_cpk_programado() -> Dict[str, Any]:
+    """Punto de entrada para el scheduler: abre su propia sesión."""
+    async with TareasSessionFactory() as session:
+        return await refrescar_cpk(session)
+
+
+async def _main(completo: bool) -> None:
+    try:
+        async with TareasSessionFactory() as session:
+            informe = await refrescar_cpk(session, completo=completo)
+        print(json.dumps(informe, indent=2, ensure_ascii=False))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(_main(completo="--completo" in sys.argv[1:]))
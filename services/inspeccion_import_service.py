@@ -0,0 +1,190 @@
+# services/inspeccion_import_service.py
+"""
+Importación en streaming de lecturas de inspección (profundidad / presión)
+exportadas por los medidores de mano, en formato NDJSON o CSV.
+
+El cuerpo se consume línea a línea y se procesa por bloques de tamaño fijo,
+de modo que la memoria usada no depende del tamaño del archivo.
+"""
+import codecs
+import csv
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError as PydanticValidationError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models.neumatico import Neumatico
+from models.usuario import Usuario
+from schemas.common import TipoEventoNeumaticoEnum
+from schemas.evento_neumatico import EventoNeumaticoCreate
+from services.neumatico_service import NeumaticoService
+
+logger = logging.getLogger(__name__)
+
+FORMATOS_IMPORTACION = ("ndjson", "csv")
+
+# Columnas reconocidas en cada fila (el resto se ignora)
+CAMPOS_INSPECCION = (
+    "profundidad_remanente_mm",
+    "presion_psi",
+    "odometro_vehiculo_en_evento",
+    "fecha_evento",
+    "notas",
+)
+
+
+async def iterar_lineas(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Convierte un flujo de bytes en líneas de texto sin acumular el cuerpo completo."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pendiente = ""
+    async for chunk in chunks:
+        pendiente += decoder.decode(chunk)
+        *lineas, pendiente = pendiente.split("\n")
+        for linea in lineas:
+            yield linea.rstrip("\r")
+    pendiente += decoder.decode(b"", final=True)
+    if pendiente:
+        yield pendiente.rstrip("\r")
+
+
+class InspeccionImportService:
+    """
+    Aplica filas de inspección como eventos INSPECCION a través de
+    NeumaticoService.registrar_eventos_batch, con las mismas reglas que POST /eventos.
+    """
+
+    def __init__(self, session: AsyncSession, current_user: Usuario, tamano_bloque: Optional[int] = None):
+        self.session = session
+        self.current_user = current_user
+        self.tamano_bloque = tamano_bloque or settings.IMPORTACION_BLOQUE_FILAS
+        self.neumatico_service = NeumaticoService(session)
+
+    def _filas(self, lineas: AsyncIterator[str], formato: str) -> AsyncIterator[Tuple[int, Any]]:
+        if formato == "csv":
+            return self._filas_csv(lineas)
+        return self._filas_ndjson(lineas)
+
+    async def _filas_ndjson(self, lineas: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+        numero = 0
+        async for linea in lineas:
+            numero += 1
+            if not linea.strip():
+                continue
+            try:
+                yield numero, json.loads(linea)
+            except json.JSONDecodeError as e:
+                yield numero, ValueError(f"JSON inválido: {e.msg}")
+
+    async def _filas_csv(self, lineas: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+        # Cada línea es un registro: los medidores no exportan campos con saltos de línea
+        cabecera: Optional[List[str]] = None
+        numero = 0
+        async for linea in lineas:
+            numero += 1
+            if not linea.strip():
+                continue
+            valores = next(csv.reader([linea]))
+            if cabecera is None:
+                cabecera = [c.strip().lower() for c in valores]
+                if "numero_serie" not in cabecera:
+                    raise ValueError("La cabecera CSV debe incluir la columna 'numero_serie'.")
+                continue
+            yield numero, dict(zip(cabecera, valores))
+
+    @staticmethod
+    def _normalizar_fila(fila: Any) -> Dict[str, Any]:
+        if not isinstance(fila, dict):
+            raise ValueError("Cada fila debe ser un objeto.")
+        serie = str(fila.get("numero_serie") or "").strip()
+        if not serie:
+            raise ValueError("numero_serie requerido.")
+        datos: Dict[str, Any] = {"numero_serie": serie}
+        for campo in CAMPOS_INSPECCION:
+            valor = fila.get(campo)
+            if isinstance(valor, str):
+                valor = valor.strip() or None
+            if valor is not None:
+                datos[campo] = valor
+        return datos
+
+    async def _procesar_bloque(self, bloque: List[Tuple[int, Any]]) -> Dict[str, Any]:
+        errores: List[Dict[str, Any]] = []
+        filas_validas: List[Tuple[int, Dict[str, Any]]] = []
+        for numero, fila in bloque:
+            if isinstance(fila, Exception):
+                errores.append({"fila": numero, "error": str(fila)})
+                continue
+            try:
+                filas_validas.append((numero, self._normalizar_fila(fila)))
+            except ValueError as e:
+                errores.append({"fila": numero, "error": str(e)})
+
+        # Resolución masiva de números de serie: una sola consulta por bloque
+        series = {datos["numero_serie"] for _, datos in filas_validas}
+        ids_por_serie: Dict[str, Any] = {}
+        if series:
+            stmt = select(Neumatico.id, Neumatico.numero_serie).where(Neumatico.numero_serie.in_(series))
+            ids_por_serie = {serie: id_ for id_, serie in (await self.session.exec(stmt)).all()}
+
+        eventos: List[EventoNeumaticoCreate] = []
+        origen: List[Tuple[int, str]] = []
+        for numero, datos in filas_validas:
+            serie = datos.pop("numero_serie")
+            neumatico_id = ids_por_serie.get(serie)
+            if neumatico_id is None:
+                errores.append({"fila": numero, "numero_serie": serie, "error": f"Neumático serie {serie} no encontrado."})
+                continue
+            try:
+                eventos.append(EventoNeumaticoCreate.model_validate({
+                    **datos,
+                    "neumatico_id": neumatico_id,
+                    "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION,
+                    "usuario_id": self.current_user.id,
+                }))
+            except PydanticValidationError as e:
+                errores.append({"fila": numero, "numero_serie": serie, "error": e.errors()[0].get("msg", str(e))})
+                continue
+            origen.append((numero, serie))
+
+        exitosas = 0
+        if eventos:
+            resultados = await self.neumatico_service.registrar_eventos_batch(eventos, self.current_user)
+            for (numero, serie), (_, error) in zip(origen, resultados):
+                if error is None:
+                    exitosas += 1
+                else:
+                    errores.append({"fila": numero, "numero_serie": serie, "error": error.message})
+
+        errores.sort(key=lambda e: e["fila"])
+        return {"filas": len(bloque), "exitosas": exitosas, "fallidas": len(errores), "errores": errores}
+
+    async def importar(self, lineas: AsyncIterator[str], formato: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Procesa el flujo de líneas y emite un registro de progreso por cada bloque
+        confirmado, más un resumen final.
+        """
+        totales = {"filas": 0, "exitosas": 0, "fallidas": 0}
+        numero_bloque = 0
+        bloque: List[Tuple[int, Any]] = []
+
+        async def _emitir() -> Dict[str, Any]:
+            nonlocal numero_bloque
+            numero_bloque += 1
+            progreso = await self._procesar_bloque(bloque)
+            for clave in totales:
+                totales[clave] += progreso[clave]
+            logger.info(f"Importación inspecciones: bloque {numero_bloque} ({progreso['exitosas']}/{progreso['filas']} filas aplicadas).")
+            return {"bloque": numero_bloque, **progreso, "acumulado": dict(totales)}
+
+        async for numero, fila in self._filas(lineas, formato):
+            bloque.append((numero, fila))
+            if len(bloque) >= self.tamano_bloque:
+                yield await _emitir()
+                bloque = []
+        if bloque:
+            yield await _emitir()
+        yield {"completado": True, "bloques": numero_bloque, **totales}
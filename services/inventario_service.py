@@ -0,0 +1,156 @@
+# services/inventario_service.py
+"""
+Resumen de inventario (vw_inventario_neumaticos) para el panel de almacén.
+
+En PostgreSQL la vista está materializada (migrations/007_inventario_materializado.sql):
+las lecturas son un SELECT sobre unas pocas filas ya agregadas y la antigüedad
+de los datos sale de su columna `calculado_en`. La refresca
+`REFRESH MATERIALIZED VIEW CONCURRENTLY` (no bloquea a los lectores) desde:
+
+- el scheduler de la API, cada INVENTARIO_REFRESCO_INTERVALO_SEGUNDOS;
+- POST /inventario/resumen/refrescar, bajo demanda;
+- la CLI: `python -m services.inventario_service`.
+
+Con varios workers, un advisory lock evita que dos refrescos se pisen: el que
+no lo obtiene se salta la ejecución.
+
+En SQLite (pruebas) no hay vistas materializadas: se calcula la misma
+agregación en vivo y `calculado_en` es el instante de la consulta.
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import TareasSessionFactory, engine
+from models.fabricante import FabricanteNeumatico
+from models.modelo import ModeloNeumatico
+from models.neumatico import Neumatico
+from schemas.common import EstadoNeumaticoEnum
+from utils.logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+NOMBRE_TAREA = "refresco_inventario"
+VISTA = "public.vw_inventario_neumaticos"
+
+_SELECT_MATERIALIZADA = text(
+    "SELECT modelo_id, nombre_modelo, medida, fabricante, estado_actual, es_reencauchado, vida_actual, "
+    "cantidad, valor_total_pen, valor_total_usd, km_promedio_por_vida, fecha_compra_mas_antigua, "
+    "fecha_compra_mas_reciente, antiguedad_promedio_dias, calculado_en "
+    f"FROM {VISTA} ORDER BY fabricante, nombre_modelo, medida, estado_actual, es_reencauchado, vida_actual"
+)
+_REFRESCO = text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {VISTA}")
+_LOCK_REFRESCO = text("SELECT pg_try_advisory_xact_lock(hashtext('vw_inventario_neumaticos'))")
+
+
+def es_materializada(session: AsyncSession) -> bool:
+    """True si la base tiene la vista materializada (PostgreSQL); False en SQLite."""
+    return session.bind.dialect.name == "postgresql"
+
+
+def _consulta_en_vivo():
+    """La agregación de la vista, para bases sin vista materializada (SQLite)."""
+    def valor_en(moneda: str):
+        return func.sum(Neumatico.costo_compra).filter(Neumatico.moneda_compra == moneda)
+
+    return (
+        select(
+            ModeloNeumatico.id.label("modelo_id"),
+            ModeloNeumatico.nombre_modelo,
+            ModeloNeumatico.medida,
+            FabricanteNeumatico.nombre.label("fabricante"),
+            Neumatico.estado_actual,
+            Neumatico.es_reencauchado,
+            Neumatico.vida_actual,
+            func.count().label("cantidad"),
+            valor_en("PEN").label("valor_total_pen"),
+            valor_en("USD").label("valor_total_usd"),
+            func.avg(Neumatico.kilometraje_acumulado).filter(
+                Neumatico.estado_actual != EstadoNeumaticoEnum.EN_STOCK, Neumatico.kilometraje_acumulado > 0
+            ).label("km_promedio_por_vida"),
+            func.min(Neumatico.fecha_compra).label("fecha_compra_mas_antigua"),
+            func.max(Neumatico.fecha_compra).label("fecha_compra_mas_reciente"),
+            func.avg(func.julianday("now") - func.julianday(Neumatico.fecha_compra)).label("antiguedad_promedio_dias"),
+        )
+        .join(ModeloNeumatico, Neumatico.modelo_id == ModeloNeumatico.id)
+        .join(FabricanteNeumatico, ModeloNeumatico.fabricante_id == FabricanteNeumatico.id)
+        .where(Neumatico.estado_actual != EstadoNeumaticoEnum.DESECHADO)
+        .group_by(
+            ModeloNeumatico.id, ModeloNeumatico.nombre_modelo, ModeloNeumatico.medida, FabricanteNeumatico.nombre,
+            Neumatico.estado_actual, Neumatico.es_reencauchado, Neumatico.vida_actual,
+        )
+        .order_by(
+            FabricanteNeumatico.nombre, ModeloNeumatico.nombre_modelo, ModeloNeumatico.medida,
+            Neumatico.estado_actual, Neumatico.es_reencauchado, Neumatico.vida_actual,
+        )
+    )
+
+
+async def leer_resumen(session: AsyncSession) -> Tuple[List[Dict[str, Any]], Optional[datetime]]:
+    """
+    Filas del resumen y el instante en que se calcularon (None si la vista
+    materializada está vacía).
+    """
+    if es_materializada(session):
+        filas = [dict(fila) for fila in (await session.exec(_SELECT_MATERIALIZADA)).mappings()]
+        # Todas las filas comparten calculado_en (se escriben en el mismo REFRESH)
+        calculado_en = filas[0]["calculado_en"] if filas else None
+        for fila in filas:
+            del fila["calculado_en"]
+        return filas, calculado_en
+
+    calculado_en = datetime.now(timezone.utc)
+    filas = [dict(fila) for fila in (await session.exec(_consulta_en_vivo())).mappings()]
+    for fila in filas:
+        if fila["antiguedad_promedio_dias"] is not None:
+            fila["antiguedad_promedio_dias"] = round(fila["antiguedad_promedio_dias"])
+    return filas, calculado_en
+
+
+async def refrescar_resumen(session: AsyncSession) -> Dict[str, Any]:
+    """
+    REFRESH MATERIALIZED VIEW CONCURRENTLY de la vista (no-op en SQLite).
+
+    Returns:
+        Informe con `refrescada` (False si otro proceso ya estaba refrescando o
+        no hay vista materializada) y la duración.
+    """
+    if not es_materializada(session):
+        return {"refrescada": False, "motivo": "sin_vista_materializada", "duracion_segundos": 0.0}
+    inicio = time.perf_counter()
+    # El lock de transacción se libera con el COMMIT que cierra el refresco
+    if not (await session.exec(_LOCK_REFRESCO)).scalar():
+        await session.rollback()
+        logger.info("Refresco de inventario omitido: otro proceso lo está ejecutando.")
+        return {"refrescada": False, "motivo": "refresco_en_curso", "duracion_segundos": 0.0}
+    await session.exec(_REFRESCO)
+    await session.commit()
+    duracion = round(time.perf_counter() - inicio, 4)
+    logger.info(f"Vista {VISTA} refrescada en {duracion}s")
+    return {"refrescada": True, "duracion_segundos": duracion}
+
+
+async def refresco_inventario_programado() -> Dict[str, Any]:
+    """Punto de entrada para el scheduler: abre su propia sesión."""
+    async with TareasSessionFactory() as session:
+        return await refrescar_resumen(session)
+
+
+async def _main() -> None:
+    try:
+        informe = await refresco_inventario_programado()
+        print(json.dumps(informe, indent=2, ensure_ascii=False))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(_main())
@@ -1,11 +1,11 @@
 # services/neumatico_service.py (Completo - v9 Diagnóstico)
 import logging
-import sys
 from datetime import date, datetime, timezone
-from typing import Optional, Tuple, List, cast
+from typing import Any, Dict, Optional, Tuple, List, Set, cast
 from uuid import UUID
 from decimal import Decimal
 
+from sqlalchemy import insert
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -13,6 +13,7 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 # --- Modelos y Schemas ---
 from models.evento_neumatico import EventoNeumatico, TipoEventoNeumaticoEnum
+from models.alerta_outbox import AlertaOutbox
 from models.neumatico import EstadoNeumaticoEnum, Neumatico
 from models.posicion_neumatico import PosicionNeumatico
 from models.vehiculo import Vehiculo
@@ -24,17 +25,11 @@ from models.modelo import ModeloNeumatico
 from models.configuracion_eje import ConfiguracionEje
 from models.tipo_vehiculo import TipoVehiculo
 from schemas.evento_neumatico import EventoNeumaticoCreate
-from services.alert_service import AlertService
+from services.catalogo_cache import catalogo_cache
+from crud.crud_evento_neumatico import evento_neumatico as crud_evento_neumatico
 
 logger = logging.getLogger(__name__)
 
-logging.basicConfig(
-    level=logging.DEBUG, # <-- Nivel DEBUG para ver todo
-    format='%(levelname)-8s %(name)s:%(filename)s:%(lineno)d %(message)s',
-    stream=sys.stdout, # <-- Asegurar que vaya a la consola
-    force=True # <-- Forzar reconfiguración si ya estaba configurado
-)
-
 # --- Excepciones ---
 class ServiceError(Exception):
     def __init__(self, message="Error en el servicio"): self.message = message; super().__init__(self.message)
@@ -49,7 +44,13 @@ class ConflictError(ServiceError):
 class NeumaticoService:
     def __init__(self, session: AsyncSession):
         self.session = session
-        self.alert_service = AlertService(session)
+        # Estado del modo lote (ver registrar_eventos_batch)
+        self._modo_lote = False
+        self._neumaticos_bloqueados: Set[UUID] = set()
+        # Referencias fuertes a lo precargado: el identity map de la sesión es débil
+        self._precargados: List[Any] = []
+        # Eventos del bloque en curso, pendientes de la inserción en bloque (_insertar_pendientes)
+        self._eventos_pendientes: List[EventoNeumatico] = []
 
     # ... (_get..., _validate..., _check_posicion_ocupada sin cambios desde v7) ...
     async def _get_neumatico_by_id(self, neumatico_id: UUID) -> Optional[Neumatico]:
@@ -60,7 +61,11 @@ class NeumaticoService:
         return (await self.session.exec(statement)).first()
 
     async def _get_neumatico_for_update(self, neumatico_id: UUID) -> Neumatico:
-        result = await self.session.get(Neumatico, neumatico_id, with_for_update=True)
+        if neumatico_id in self._neumaticos_bloqueados:
+            # Ya bloqueado (FOR UPDATE) y cargado por _precargar_lote: sale del identity map
+            result = await self.session.get(Neumatico, neumatico_id)
+        else:
+            result = await self.session.get(Neumatico, neumatico_id, with_for_update=True)
         if not result: raise NeumaticoNotFoundError(f"Neumático con ID {neumatico_id} no encontrado.")
         return result
 
@@ -98,16 +103,21 @@ class NeumaticoService:
  
         # --- Inicio Corrección: Forzar recarga de objetos ---
         # Esto es un intento de mitigar posibles problemas de caché de sesión
-        await self.session.refresh(vehiculo)
-        await self.session.refresh(posicion)
+        # (en modo lote los objetos se acaban de leer en _precargar_lote)
+        if not self._modo_lote:
+            await self.session.refresh(vehiculo)
+            await self.session.refresh(posicion)
         # --- Fin Corrección ---
  
         # Validar si la posición pertenece al tipo de vehículo (comparando IDs)
         if posicion.configuracion_eje_id and vehiculo.tipo_vehiculo_id:
-            # Obtener explícitamente el objeto ConfiguracionEje usando su ID
-            # Usar selectinload para cargar la relación tipo_vehiculo en ConfiguracionEje
-            stmt_config_eje = select(ConfiguracionEje).where(ConfiguracionEje.id == posicion.configuracion_eje_id).options(selectinload(ConfiguracionEje.tipo_vehiculo))
-            config_eje = (await self.session.exec(stmt_config_eje)).first()
+            if self._modo_lote:
+                config_eje = await self.session.get(ConfiguracionEje, posicion.configuracion_eje_id)
+            else:
+                # Obtener explícitamente el objeto ConfiguracionEje usando su ID
+                # Usar selectinload para cargar la relación tipo_vehiculo en ConfiguracionEje
+                stmt_config_eje = select(ConfiguracionEje).where(ConfiguracionEje.id == posicion.configuracion_eje_id).options(selectinload(ConfiguracionEje.tipo_vehiculo))
+                config_eje = (await self.session.exec(stmt_config_eje)).first()
  
             logger.debug(f"SERVICIO: Vehiculo ID: {vehiculo.id}, TipoVehiculo ID en Vehiculo: {vehiculo.tipo_vehiculo_id}")
             logger.debug(f"SERVICIO: Posicion ID: {posicion.id}, ConfigEje ID en Posicion: {posicion.configuracion_eje_id}")
@@ -148,7 +158,7 @@ class NeumaticoService:
         if not event_data.destino_almacen_id: raise ValidationError("destino_almacen_id requerido.")
         await self._validate_and_get_proveedor(event_data.proveedor_compra_id)
         almacen_destino = await self._validate_and_get_almacen(event_data.destino_almacen_id)
-        modelo = await self.session.get(ModeloNeumatico, event_data.modelo_id)
+        modelo = await catalogo_cache.get_modelo(self.session, event_data.modelo_id)
         if not modelo: raise ValidationError(f"Modelo ID {event_data.modelo_id} no encontrado.")
         if await self._get_neumatico_by_serie(event_data.numero_serie):
             raise ConflictError(f"Neumático serie {event_data.numero_serie} ya existe.")
@@ -191,7 +201,7 @@ class NeumaticoService:
             match tipo_evento:
                 case TipoEventoNeumaticoEnum.INSTALACION: neumatico_modificado = await self._handle_instalacion(evento_in, db_neumatico, fecha_evento)
                 case TipoEventoNeumaticoEnum.DESMONTAJE: neumatico_modificado = await self._handle_desmontaje(evento_in, db_neumatico, fecha_evento)
-                case TipoEventoNeumaticoEnum.INSPECCION: neumatico_modificado = await self._handle_inspeccion(evento_in, db_neumatico)
+                case TipoEventoNeumaticoEnum.INSPECCION: neumatico_modificado = await self._handle_inspeccion(evento_in, db_neumatico, timestamp_evento)
                 case TipoEventoNeumaticoEnum.ROTACION: neumatico_modificado = await self._handle_rotacion(evento_in, db_neumatico, fecha_evento)
                 case TipoEventoNeumaticoEnum.REPARACION_ENTRADA: neumatico_modificado = await self._handle_reparacion_entrada(evento_in, db_neumatico)
                 case TipoEventoNeumaticoEnum.REPARACION_SALIDA: neumatico_modificado = await self._handle_reparacion_salida(evento_in, db_neumatico)
@@ -206,33 +216,219 @@ class NeumaticoService:
             db_neumatico.fecha_ultimo_evento = timestamp_evento
             self.session.add(db_neumatico)
         db_evento = EventoNeumatico.model_validate(event_data_dict)
+        if self._modo_lote:
+            # El evento y su entrada del outbox se insertan con los del resto del bloque
+            self._eventos_pendientes.append(db_evento)
+            return db_neumatico, db_evento
         self.session.add(db_evento)
+        # Las reglas de alerta no se evalúan aquí: el evento deja una entrada en el outbox,
+        # dentro de la misma transacción, y el worker de alertas la procesa después.
+        self.session.add(AlertaOutbox(evento_id=db_evento.id, neumatico_id=db_neumatico.id))
         logger.info(f"Evento {tipo_evento.value} para neumático {db_neumatico.id} añadido a sesión.")
-        await self.alert_service.check_and_create_alerts(db_neumatico, db_evento)
         return db_neumatico, db_evento
 
-    async def get_historial(self, neumatico_id: UUID) -> List[EventoNeumatico]:
+    async def _precargar_lote(self, eventos: List[EventoNeumaticoCreate]) -> None:
+        """
+        Carga en la sesión, con una consulta IN (...) por entidad, todo lo que un bloque
+        de eventos va a referenciar. Los handlers obtienen después esos objetos con
+        session.get(), que los resuelve desde el identity map sin ir a la BD.
+        Los modelos de neumático no se precargan: salen de catalogo_cache.
+        """
+        neumatico_ids = {e.neumatico_id for e in eventos if e.neumatico_id}
+        vehiculo_ids = {e.vehiculo_id for e in eventos if e.vehiculo_id}
+        posicion_ids = {e.posicion_id for e in eventos if e.posicion_id}
+        almacen_ids = {e.destino_almacen_id for e in eventos if e.destino_almacen_id}
+        motivo_ids = {e.motivo_desecho_id_evento for e in eventos if e.motivo_desecho_id_evento}
+        proveedor_ids = {p for e in eventos for p in (e.proveedor_compra_id, e.proveedor_servicio_id) if p}
+
+        if neumatico_ids:
+            stmt = select(Neumatico).where(Neumatico.id.in_(neumatico_ids)).with_for_update()
+            neumaticos = (await self.session.exec(stmt)).all()
+            self._precargados.extend(neumaticos)
+            self._neumaticos_bloqueados.update(n.id for n in neumaticos)
+
+        posiciones: List[PosicionNeumatico] = []
+        for modelo_tabla, ids in (
+            (Vehiculo, vehiculo_ids), (PosicionNeumatico, posicion_ids), (Almacen, almacen_ids),
+            (MotivoDesecho, motivo_ids), (Proveedor, proveedor_ids),
+        ):
+            if not ids:
+                continue
+            filas = (await self.session.exec(select(modelo_tabla).where(modelo_tabla.id.in_(ids)))).all()
+            self._precargados.extend(filas)
+            if modelo_tabla is PosicionNeumatico:
+                posiciones = list(filas)
+
+        config_eje_ids = {p.configuracion_eje_id for p in posiciones if p.configuracion_eje_id}
+        if config_eje_ids:
+            filas = (await self.session.exec(select(ConfiguracionEje).where(ConfiguracionEje.id.in_(config_eje_ids)))).all()
+            self._precargados.extend(filas)
+        logger.debug(f"Lote precargado: {len(self._precargados)} objetos para {len(eventos)} eventos.")
+
+    async def _insertar_pendientes(self) -> None:
+        """Inserta los eventos pendientes del bloque y sus entradas del outbox (executemany)."""
+        if not self._eventos_pendientes:
+            return
+        tabla_eventos = EventoNeumatico.__table__
+        tabla_outbox = AlertaOutbox.__table__
+        eventos = [{c.name: getattr(e, c.name) for c in tabla_eventos.columns} for e in self._eventos_pendientes]
+        outbox = [
+            {c.name: getattr(o, c.name) for c in tabla_outbox.columns}
+            for o in (AlertaOutbox(evento_id=e.id, neumatico_id=e.neumatico_id) for e in self._eventos_pendientes)
+        ]
+        self._eventos_pendientes.clear()
+        await self.session.exec(insert(tabla_eventos), params=eventos)
+        await self.session.exec(insert(tabla_outbox), params=outbox)
+
+    async def _registrar_bloque(
+        self, bloque: List[EventoNeumaticoCreate], current_user: Usuario
+    ) -> List[Tuple[Optional[EventoNeumatico], Optional[ServiceError]]]:
+        """
+        Aplica un bloque por tramos, cada uno dentro de un SAVEPOINT, sin SAVEPOINT por
+        evento; los eventos y el outbox de cada tramo se insertan juntos al cerrarlo.
+        Cuando un evento falla se deshace el tramo (también lo que el evento fallido
+        hubiera aplicado a medias), se vuelven a aplicar los eventos anteriores del
+        tramo, que son válidos porque las reglas son deterministas, y el siguiente tramo
+        empieza tras el fallido: cada evento se aplica como mucho dos veces. Ante un
+        IntegrityError, el resto del bloque se procesa con un SAVEPOINT por evento.
+        """
+        resultados: List[Tuple[Optional[EventoNeumatico], Optional[ServiceError]]] = []
+        inicio = 0
+        while inicio < len(bloque):
+            tramo: List[EventoNeumatico] = []
+            fallo: Optional[ServiceError] = None
+            self._eventos_pendientes.clear()
+            punto = await self.session.begin_nested()
+            try:
+                for evento_in in bloque[inicio:]:
+                    try:
+                        _, db_evento = await self.registrar_evento(evento_in, current_user)
+                    except ServiceError as exc:
+                        fallo = exc
+                        break
+                    tramo.append(db_evento)
+                if fallo is not None:
+                    await punto.rollback()
+                    self._eventos_pendientes.clear()
+                    # El rollback expira lo modificado en el tramo: se recarga con las mismas
+                    # consultas IN (...) en lugar de un SELECT por objeto al volver a usarlo
+                    await self._precargar_lote(bloque[inicio:inicio + len(tramo) + 1])
+                    punto = await self.session.begin_nested()
+                    tramo = [
+                        (await self.registrar_evento(evento_in, current_user))[1]
+                        for evento_in in bloque[inicio:inicio + len(tramo)]
+                    ]
+                await self._insertar_pendientes()
+                await punto.commit()
+            except (IntegrityError, ServiceError) as exc:
+                # Un IntegrityError, o un evento que falla al repetirlo: evento a evento
+                logger.warning(f"Lote: el tramo desde el evento {inicio} no se pudo aplicar en bloque, se procesa evento a evento: {exc}")
+                await punto.rollback()
+                await self._precargar_lote(bloque[inicio:])
+                return resultados + await self._registrar_bloque_por_evento(bloque[inicio:], current_user)
+            resultados.extend((db_evento, None) for db_evento in tramo)
+            inicio += len(tramo)
+            if fallo is not None:
+                logger.debug(f"Lote: evento {inicio} fallido ({fallo.message}).")
+                resultados.append((None, fallo))
+                inicio += 1
+        return resultados
+
+    async def _registrar_bloque_por_evento(
+        self, bloque: List[EventoNeumaticoCreate], current_user: Usuario
+    ) -> List[Tuple[Optional[EventoNeumatico], Optional[ServiceError]]]:
+        # Un SAVEPOINT por evento: un error solo descarta ese evento
+        resultados: List[Tuple[Optional[EventoNeumatico], Optional[ServiceError]]] = []
+        for evento_in in bloque:
+            self._eventos_pendientes.clear()
+            try:
+                async with self.session.begin_nested():
+                    _, db_evento = await self.registrar_evento(evento_in, current_user)
+                    await self._insertar_pendientes()
+                resultados.append((db_evento, None))
+            except ServiceError as exc:
+                resultados.append((None, exc))
+            except IntegrityError as exc:
+                logger.warning(f"Error de integridad en evento de lote: {exc}")
+                resultados.append((None, ConflictError("Conflicto de datos al guardar.")))
+        return resultados
+
+    async def registrar_eventos_batch(
+        self,
+        eventos: List[EventoNeumaticoCreate],
+        current_user: Usuario,
+        chunk_size: Optional[int] = None
+    ) -> List[Tuple[Optional[EventoNeumatico], Optional[ServiceError]]]:
+        """
+        Registra una lista de eventos en orden aplicando las mismas reglas que registrar_evento.
+
+        Cada bloque de `chunk_size` eventos (todo el lote si es None) se procesa en una única
+        transacción: se precargan las entidades referenciadas, los eventos y sus entradas del
+        outbox se insertan en bloque (executemany) y el bloque se confirma con un único commit.
+        Un evento inválido solo descarta ese evento (ver _registrar_bloque).
+
+        Returns:
+            Una tupla (evento, error) por cada evento de entrada, en el mismo orden.
+        """
+        resultados: List[Tuple[Optional[EventoNeumatico], Optional[ServiceError]]] = []
+        tamano_bloque = chunk_size or len(eventos) or 1
+        self._modo_lote = True
+        try:
+            for inicio in range(0, len(eventos), tamano_bloque):
+                bloque = eventos[inicio:inicio + tamano_bloque]
+                await self._precargar_lote(bloque)
+                resultados.extend(await self._registrar_bloque(bloque, current_user))
+                await self.session.commit()
+                logger.info(f"Lote: bloque de {len(bloque)} eventos confirmado (desde índice {inicio}).")
+                self._neumaticos_bloqueados.clear()
+                self._precargados.clear()
+        finally:
+            self._modo_lote = False
+            self._eventos_pendientes.clear()
+            self._neumaticos_bloqueados.clear()
+            self._precargados.clear()
+        return resultados
+
+    async def get_historial(self, neumatico_id: UUID, **filtros: Any) -> List[dict]:
         """
         Retrieve the history of events for a specific tire, ordered by timestamp descending.
 
         Args:
             neumatico_id: The ID of the tire.
+            **filtros: desde, hasta, tipos_evento (see crud_evento_neumatico).
 
         Returns:
-            A list of EventoNeumatico instances.
+            A list of dicts with the fields of HistorialNeumaticoItem (labels joined in the same query).
         """
         logger.info(f"Service: Getting historial for neumático ID: {neumatico_id}")
-        # Verificar si el neumático existe (opcional aquí, el router ya lo hace, pero buena práctica)
-        # neumatico = await self.session.get(Neumatico, neumatico_id)
-        # if not neumatico:
-        #      raise NeumaticoNotFoundError(f"Neumático con ID {neumatico_id} no encontrado.")
-
-        stmt = select(EventoNeumatico).where(EventoNeumatico.neumatico_id == neumatico_id).order_by(EventoNeumatico.timestamp_evento.desc())
-        result = await self.session.exec(stmt)
-        eventos = result.all()
+        eventos = await crud_evento_neumatico.get_historial(self.session, neumatico_id, **filtros)
         logger.info(f"Service: Found {len(eventos)} events for neumático {neumatico_id}")
         return eventos
 
+    async def get_historial_pagina(
+        self, neumatico_id: UUID, limit: int, cursor: Optional[str] = None, **filtros: Any
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Página del historial (keyset sobre timestamp_evento, id, más recientes primero).
+
+        Returns:
+            Los eventos de la página y el cursor de la siguiente (None si es la última).
+
+        Raises:
+            CursorInvalidoError: si el cursor no es válido.
+        """
+        return await crud_evento_neumatico.get_pagina_historial(
+            self.session, neumatico_id, limit=limit, cursor=cursor, **filtros
+        )
+
+    async def get_historiales(
+        self, neumatico_ids: List[UUID], limit_por_neumatico: Optional[int] = None, **filtros: Any
+    ) -> dict:
+        """Historiales de varios neumáticos en una sola consulta (neumatico_id -> eventos)."""
+        return await crud_evento_neumatico.get_historiales(
+            self.session, neumatico_ids, limit_por_neumatico=limit_por_neumatico, **filtros
+        )
+
     # --- Métodos Helper ---
     def _calculate_km_recorridos(self, event_data: EventoNeumaticoCreate, db_neumatico: Neumatico) -> int:
         """Calcula KM recorridos desde la última instalación/rotación."""
@@ -345,7 +541,7 @@ class NeumaticoService:
 
 
 
-    async def _handle_inspeccion(self, event_data: EventoNeumaticoCreate, db_neumatico: Neumatico):
+    async def _handle_inspeccion(self, event_data: EventoNeumaticoCreate, db_neumatico: Neumatico, timestamp_evento: datetime):
         logger.info(f"Procesando INSPECCION para neumático {db_neumatico.id}")
         # Validar que el neumático esté instalado
         if db_neumatico.estado_actual != EstadoNeumaticoEnum.INSTALADO:
@@ -356,18 +552,14 @@ class NeumaticoService:
         if not event_data.profundidad_remanente_mm and not event_data.presion_psi:
             raise ValidationError("Se requiere al menos un dato de inspección (profundidad o presión)")
 
-        # No hay cambios de estado en una inspección, solo se registra el evento
-        # Nota: No actualizamos la profundidad en el modelo Neumatico ya que no tiene un campo para profundidad actual
-        # Solo registramos la profundidad en el evento de inspección
+        # No hay cambios de estado en una inspección; se actualiza la condición actual
+        # del neumático (columnas desnormalizadas) en la misma transacción que el evento
         if event_data.profundidad_remanente_mm is not None:
-            logger.info(f"Registrada profundidad de neumático {db_neumatico.id}: {event_data.profundidad_remanente_mm}mm (en evento)")
-            # Para futuras mejoras: Si se añade un campo profundidad_actual_mm al modelo Neumatico,
-            # se podría actualizar aquí
-
-        # También se podría registrar la presión actual si se implementa ese campo
-        # db_neumatico.presion_actual_psi = event_data.presion_actual_psi
-        
-        await self.alert_service.check_profundidad(db_neumatico.id)
+            db_neumatico.profundidad_actual_mm = event_data.profundidad_remanente_mm
+            logger.info(f"Registrada profundidad de neumático {db_neumatico.id}: {event_data.profundidad_remanente_mm}mm")
+        if event_data.presion_psi is not None:
+            db_neumatico.presion_actual_psi = event_data.presion_psi
+        db_neumatico.fecha_ultima_inspeccion = timestamp_evento
         return True
 
     
@@ -460,7 +652,7 @@ class NeumaticoService:
         # Validación del límite de reencauches (parece correcta)
         modelo_neum = None
         if db_neumatico.modelo_id:
-            modelo_neum = await self.session.get(ModeloNeumatico, db_neumatico.modelo_id)
+            modelo_neum = await catalogo_cache.get_modelo(self.session, db_neumatico.modelo_id)
 
         # Añadir manejo si el modelo no se encuentra
         if not modelo_neum:
@@ -500,7 +692,7 @@ class NeumaticoService:
         # Validación de límite (ya presente en v9 y parece correcta)
         modelo_neum = None
         if db_neumatico.modelo_id:
-            modelo_neum = await self.session.get(ModeloNeumatico, db_neumatico.modelo_id)
+            modelo_neum = await catalogo_cache.get_modelo(self.session, db_neumatico.modelo_id)
 
         # Añadir manejo si el modelo no se encuentra
         if not modelo_neum:
@@ -530,11 +722,11 @@ class NeumaticoService:
         # -----------------------
         db_neumatico.es_reencauchado = True
         db_neumatico.profundidad_inicial_mm = event_data.profundidad_post_reencauche_mm # Actualizar profundidad inicial
+        db_neumatico.profundidad_actual_mm = event_data.profundidad_post_reencauche_mm # La banda nueva es la condición actual
         # Limpiar datos de instalación si los hubiera
         db_neumatico.km_instalacion = None
         db_neumatico.fecha_instalacion = None
 
-        await self.alert_service.check_reencauches(db_neumatico.id)
         logger.info(f"Neumático {db_neumatico.id} actualizado post-reencauche. Reencauche #{db_neumatico.reencauches_realizados}. KM reseteados.")
         return True
 
@@ -0,0 +1,339 @@
+# services/notification_dispatcher.py
+"""
+Despachador de notificaciones de alertas por correo.
+
+Antes cada alerta abría su propia conexión SMTP, de forma síncrona, dentro de
+una BackgroundTask: un barrido con miles de alertas abría miles de conexiones y
+bloqueaba hilos del worker. Ahora:
+
+- Las alertas se encolan (sin E/S) en una cola acotada de pares
+  (destinatario, alerta). Si está llena, la notificación se descarta y se
+  cuenta en las métricas (`descartadas`): nunca se frena la creación de alertas.
+- Un bucle asyncio espera NOTIF_VENTANA_SEGUNDOS desde la primera alerta
+  pendiente y agrupa todo lo acumulado en un resumen por destinatario.
+- Los resúmenes se envían por un pool de conexiones SMTP persistentes
+  (PoolSMTP); smtplib es bloqueante, así que cada envío corre en un hilo y el
+  número de envíos simultáneos está limitado al tamaño del pool.
+- Los errores transitorios (conexión, códigos 4xx) se reintentan con backoff
+  exponencial con jitter; los permanentes (5xx) no.
+
+El bucle se arranca en el lifespan de main.py (NOTIFICACIONES_HABILITADAS) y en
+el worker del outbox cuando corre como proceso aparte.
+"""
+import asyncio
+import logging
+import random
+import smtplib
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from email.message import EmailMessage
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AlertaNotificable:
+    """Copia de los campos de una alerta necesarios para el correo (sin estado ORM)."""
+    id: Any
+    tipo_alerta: str
+    nivel_severidad: str
+    descripcion: str
+    creado_en: Optional[datetime]
+
+    @classmethod
+    def desde_alerta(cls, alerta: Any) -> "AlertaNotificable":
+        if isinstance(alerta, cls):
+            return alerta
+        return cls(
+            id=alerta.id,
+            tipo_alerta=getattr(alerta.tipo_alerta, "value", alerta.tipo_alerta),
+            nivel_severidad=getattr(alerta.nivel_severidad, "value", alerta.nivel_severidad),
+            descripcion=alerta.descripcion or "",
+            creado_en=alerta.creado_en,
+        )
+
+
+class ErrorSMTPPermanente(Exception):
+    """El servidor rechazó el envío de forma definitiva (código 5xx): no se reintenta."""
+
+
+class PoolSMTP:
+    """Conexiones smtplib persistentes reutilizadas entre envíos (thread-safe)."""
+
+    def __init__(self, host: str, port: int, tamano: int, timeout_segundos: float):
+        self.host = host
+        self.port = port
+        self.tamano = max(tamano, 1)
+        self.timeout_segundos = timeout_segundos
+        self._libres: List[smtplib.SMTP] = []
+        self._lock = threading.Lock()
+        self.conexiones_abiertas = 0
+
+    def _abrir(self) -> smtplib.SMTP:
+        conexion = smtplib.SMTP(self.host, self.port, timeout=self.timeout_segundos)
+        with self._lock:
+            self.conexiones_abiertas += 1
+        return conexion
+
+    @staticmethod
+    def _cerrar(conexion: smtplib.SMTP) -> None:
+        try:
+            conexion.quit()
+        except (smtplib.SMTPException, OSError):
+            conexion.close()
+
+    def enviar(self, mensaje: EmailMessage) -> None:
+        """Envía el mensaje por una conexión del pool (bloqueante: llamar desde un hilo)."""
+        with self._lock:
+            conexion = self._libres.pop() if self._libres else None
+        reutilizada = conexion is not None
+        if conexion is None:
+            conexion = self._abrir()
+        try:
+            conexion.send_message(mensaje)
+        except smtplib.SMTPServerDisconnected:
+            conexion.close()
+            if not reutilizada:
+                raise
+            # El servidor cerró la conexión ociosa: un intento más con una nueva
+            conexion = self._abrir()
+            try:
+                conexion.send_message(mensaje)
+            except Exception:
+                conexion.close()
+                raise
+        except smtplib.SMTPResponseException as e:
+            # La conexión sigue siendo válida tras un rechazo; se resetea la transacción
+            self._devolver(conexion, reset=True)
+            if 500 <= e.smtp_code < 600:
+                raise ErrorSMTPPermanente(f"{e.smtp_code} {e.smtp_error!r}") from e
+            raise
+        except smtplib.SMTPRecipientsRefused as e:
+            self._devolver(conexion, reset=True)
+            raise ErrorSMTPPermanente(str(e.recipients)) from e
+        except Exception:
+            conexion.close()
+            raise
+        self._devolver(conexion)
+
+    def _devolver(self, conexion: smtplib.SMTP, reset: bool = False) -> None:
+        if reset:
+            try:
+                conexion.rset()
+            except (smtplib.SMTPException, OSError):
+                conexion.close()
+                return
+        with self._lock:
+            if len(self._libres) < self.tamano:
+                self._libres.append(conexion)
+                return
+        self._cerrar(conexion)
+
+    def cerrar(self) -> None:
+        with self._lock:
+            libres, self._libres = self._libres, []
+        for conexion in libres:
+            self._cerrar(conexion)
+
+    def en_pool(self) -> int:
+        return len(self._libres)
+
+
+class DespachadorNotificaciones:
+    def __init__(
+        self,
+        pool: Optional[PoolSMTP] = None,
+        remitente: Optional[str] = None,
+        ventana_segundos: Optional[float] = None,
+        max_cola: Optional[int] = None,
+        max_reintentos: Optional[int] = None,
+        reintento_base_segundos: Optional[float] = None,
+        max_alertas_por_resumen: Optional[int] = None,
+    ):
+        self.pool = pool or PoolSMTP(
+            settings.SMTP_HOST, settings.SMTP_PORT, settings.NOTIF_SMTP_CONEXIONES, settings.NOTIF_SMTP_TIMEOUT_SEGUNDOS
+        )
+        self.remitente = remitente or settings.EMAIL_FROM
+        self.ventana_segundos = ventana_segundos if ventana_segundos is not None else settings.NOTIF_VENTANA_SEGUNDOS
+        self.max_cola = max_cola if max_cola is not None else settings.NOTIF_MAX_COLA
+        self.max_reintentos = max_reintentos if max_reintentos is not None else settings.NOTIF_MAX_REINTENTOS
+        self.reintento_base_segundos = (
+            reintento_base_segundos if reintento_base_segundos is not None else settings.NOTIF_REINTENTO_BASE_SEGUNDOS
+        )
+        self.max_alertas_por_resumen = max_alertas_por_resumen or settings.NOTIF_MAX_ALERTAS_POR_RESUMEN
+        self._cola: Deque[Tuple[str, AlertaNotificable]] = deque()
+        self._tarea: Optional[asyncio.Task] = None
+        self._hay_trabajo: Optional[asyncio.Event] = None
+        self._detener: Optional[asyncio.Event] = None
+        # Métricas
+        self.encoladas = 0
+        self.descartadas = 0
+        self.max_cola_observada = 0
+        self.resumenes_enviados = 0
+        self.alertas_enviadas = 0
+        self.reintentos = 0
+        self.fallidos = 0
+        self.ultimo_error: Optional[str] = None
+
+    # --- Productores ---
+    def encolar(self, destinatarios: Sequence[str], alerta: Any) -> int:
+        """
+        Encola la alerta para cada destinatario; no hace E/S.
+
+        Returns:
+            Número de notificaciones encoladas (las que no caben se descartan).
+        """
+        notificable = AlertaNotificable.desde_alerta(alerta)
+        encoladas = 0
+        for destinatario in destinatarios:
+            if len(self._cola) >= self.max_cola:
+                self.descartadas += 1
+                continue
+            self._cola.append((destinatario, notificable))
+            encoladas += 1
+        if encoladas:
+            self.encoladas += encoladas
+            self.max_cola_observada = max(self.max_cola_observada, len(self._cola))
+            if self._hay_trabajo is not None:
+                self._hay_trabajo.set()
+        elif destinatarios:
+            logger.warning(f"Cola de notificaciones llena ({self.max_cola}): alerta {notificable.id} descartada.")
+        return encoladas
+
+    # --- Envío ---
+    def _componer(self, destinatario: str, alertas: Sequence[AlertaNotificable]) -> EmailMessage:
+        msg = EmailMessage()
+        if len(alertas) == 1:
+            msg["Subject"] = f"Alerta GesNeu: {alertas[0].tipo_alerta}"
+            cuerpo = alertas[0].descripcion
+        else:
+            msg["Subject"] = f"GesNeu: {len(alertas)} alertas nuevas"
+            cuerpo = "\n".join(
+                f"[{a.nivel_severidad}] {a.tipo_alerta}: {a.descripcion}"
+                + (f" ({a.creado_en:%Y-%m-%d %H:%M})" if a.creado_en else "")
+                for a in alertas
+            )
+        msg["From"] = self.remitente
+        msg["To"] = destinatario
+        msg.set_content(cuerpo)
+        return msg
+
+    async def _enviar_resumen(self, destinatario: str, alertas: Sequence[AlertaNotificable]) -> bool:
+        mensaje = self._componer(destinatario, alertas)
+        for intento in range(self.max_reintentos + 1):
+            try:
+                await asyncio.to_thread(self.pool.enviar, mensaje)
+                self.resumenes_enviados += 1
+                self.alertas_enviadas += len(alertas)
+                return True
+            except ErrorSMTPPermanente as e:
+                self.fallidos += 1
+                self.ultimo_error = str(e)
+                logger.error(f"Resumen de {len(alertas)} alertas para {destinatario} rechazado: {e}")
+                return False
+            except Exception as e:
+                self.ultimo_error = str(e)
+                if intento == self.max_reintentos:
+                    self.fallidos += 1
+                    logger.error(f"Resumen de {len(alertas)} alertas para {destinatario} abandonado "
+                                 f"tras {intento + 1} intentos: {e}")
+                    return False
+                self.reintentos += 1
+                espera = self.reintento_base_segundos * (2 ** intento) * random.uniform(0.5, 1.0)
+                logger.warning(f"Error enviando a {destinatario} (intento {intento + 1}), reintento en {espera:.1f}s: {e}")
+                await asyncio.sleep(espera)
+        return False
+
+    async def vaciar(self) -> Dict[str, int]:
+        """Envía ya todo lo encolado, agrupado en un resumen por destinatario."""
+        lote: Dict[str, List[AlertaNotificable]] = {}
+        while self._cola:
+            destinatario, alerta = self._cola.popleft()
+            lote.setdefault(destinatario, []).append(alerta)
+        if not lote:
+            return {"resumenes": 0, "enviados": 0}
+
+        semaforo = asyncio.Semaphore(self.pool.tamano)
+        tamano = self.max_alertas_por_resumen
+
+        async def enviar(destinatario: str, alertas: List[AlertaNotificable]) -> bool:
+            async with semaforo:
+                return await self._enviar_resumen(destinatario, alertas)
+
+        resultados = await asyncio.gather(*(
+            enviar(destinatario, alertas[i:i + tamano])
+            for destinatario, alertas in lote.items()
+            for i in range(0, len(alertas), tamano)
+        ))
+        return {"resumenes": len(resultados), "enviados": sum(resultados)}
+
+    async def ejecutar(self) -> None:
+        """Bucle: espera la primera alerta, deja pasar la ventana y envía los resúmenes."""
+        logger.info(f"Despachador de notificaciones iniciado (ventana={self.ventana_segundos}s, "
+                    f"cola={self.max_cola}, conexiones={self.pool.tamano}).")
+        while not self._detener.is_set():
+            if not self._cola:
+                self._hay_trabajo.clear()
+                esperas = [asyncio.ensure_future(self._hay_trabajo.wait()), asyncio.ensure_future(self._detener.wait())]
+                _, pendientes = await asyncio.wait(esperas, return_when=asyncio.FIRST_COMPLETED)
+                for tarea in pendientes:
+                    tarea.cancel()
+                if self._detener.is_set():
+                    break
+            try:
+                await asyncio.wait_for(self._detener.wait(), timeout=self.ventana_segundos)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.vaciar()
+            except Exception as e:
+                logger.error(f"Despachador de notificaciones: error enviando resúmenes: {e}", exc_info=True)
+        # Al parar se envía lo pendiente
+        try:
+            await self.vaciar()
+        finally:
+            self.pool.cerrar()
+        logger.info("Despachador de notificaciones detenido.")
+
+    def iniciar(self) -> None:
+        """Lanza el bucle como tarea asyncio del proceso actual."""
+        if self._tarea is None or self._tarea.done():
+            self._hay_trabajo = asyncio.Event()
+            self._detener = asyncio.Event()
+            if self._cola:
+                self._hay_trabajo.set()
+            self._tarea = asyncio.create_task(self.ejecutar(), name="despachador-notificaciones")
+
+    async def detener(self) -> None:
+        """Pide la parada, envía lo pendiente y cierra las conexiones."""
+        if self._tarea is not None:
+            self._detener.set()
+            await self._tarea
+            self._tarea = None
+        self._hay_trabajo = None
+
+    def metricas(self) -> Dict[str, Any]:
+        return {
+            "activo": self._tarea is not None and not self._tarea.done(),
+            "en_cola": len(self._cola),
+            "max_cola": self.max_cola,
+            "max_cola_observada": self.max_cola_observada,
+            "encoladas": self.encoladas,
+            "descartadas": self.descartadas,
+            "resumenes_enviados": self.resumenes_enviados,
+            "alertas_enviadas": self.alertas_enviadas,
+            "reintentos": self.reintentos,
+            "fallidos": self.fallidos,
+            "ultimo_error": self.ultimo_error,
+            "conexiones_abiertas": self.pool.conexiones_abiertas,
+            "conexiones_en_pool": self.pool.en_pool(),
+        }
+
+
+despachador = DespachadorNotificaciones()
@@ -4,6 +4,7 @@ from fastapi import BackgroundTasks
 import smtplib
 from email.message import EmailMessage
 from core.config import settings
+from services.notification_dispatcher import despachador
 
 class NotificationService:
     def __init__(
@@ -19,12 +20,16 @@ class NotificationService:
         self.email_from = email_from if email_from is not None else getattr(settings, 'EMAIL_FROM', 'noreply@example.com')
         # Asegurarse de que los destinatarios no tengan espacios después de las comas
         alert_recipients_value = alert_recipients if alert_recipients is not None else getattr(settings, 'ALERT_RECIPIENTS', 'admin@example.com')
-        self.alert_recipients = ', '.join([r.strip() for r in alert_recipients_value.split(',')])
+        self.destinatarios = [r.strip() for r in alert_recipients_value.split(',') if r.strip()]
+        self.alert_recipients = ', '.join(self.destinatarios)
         self.smtp_host = smtp_host if smtp_host is not None else getattr(settings, 'SMTP_HOST', 'localhost')
         self.smtp_port = smtp_port if smtp_port is not None else getattr(settings, 'SMTP_PORT', 25)
 
     async def send_alert_notification(self, alerta: AlertaRead):
         """Envía una notificación por correo electrónico sobre una alerta.
+
+        Envío inmediato, con una conexión propia; las alertas del sistema pasan
+        por enqueue_alert_notification (resúmenes y conexiones reutilizadas).
         
         Args:
             alerta: La alerta a notificar
@@ -40,6 +45,10 @@ class NotificationService:
             # Asegurarse de que se cierre la conexión correctamente
             server.quit()
 
-    def enqueue_alert_notification(self, alerta: AlertaRead):
-        if self.bg_tasks:
-            self.bg_tasks.add_task(self.send_alert_notification, alerta)
+    def enqueue_alert_notification(self, alerta: AlertaRead) -> int:
+        """Encola la alerta en el despachador (resumen por destinatario, conexiones SMTP reutilizadas).
+
+        No hace E/S; devuelve el número de notificaciones encoladas (las que no
+        caben en la cola se descartan y se contabilizan en sus métricas).
+        """
+        return despachador.encolar(self.destinatarios, alerta)
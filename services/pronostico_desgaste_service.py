@@ -0,0 +1,345 @@
+# services/pronostico_desgaste_service.py
+"""
+Pronóstico de desgaste: cuándo llegará cada neumático instalado a su
+profundidad mínima, para planificar compras.
+
+Para cada neumático se ajusta una recta profundidad ~ odómetro con las
+inspecciones (INSPECCION con profundidad y odómetro) desde su última
+instalación: dentro de una instalación el odómetro es el del mismo vehículo
+y las lecturas son comparables. El punto de partida es la propia instalación
+si registró profundidad o, si el neumático aún no acumula km en su vida
+(nuevo o recién reencauchado), su profundidad inicial o la original del
+modelo. Una segunda recta odómetro ~ fecha da los km por día del vehículo y,
+con ellos, la fecha estimada de retiro. La profundidad mínima es la del
+parámetro PROFUNDIDAD_MINIMA del modelo (o UMBRAL_PROFUNDIDAD_MINIMA_MM).
+
+Los ajustes de un bloque de neumáticos se calculan a la vez con NumPy
+(sumas por grupo con np.bincount), sin bucles por neumático, y se guardan en
+pronosticos_desgaste. El refresco es incremental, como el de CPK (marca propia
+en marcas_refresco): solo se recalculan los neumáticos modificados o con
+eventos registrados desde la última ejecución. Se ejecuta desde:
+
+- el scheduler de la API, cada PRONOSTICO_DESGASTE_INTERVALO_SEGUNDOS;
+- POST /analitica/desgaste/refrescar, bajo demanda;
+- la CLI: `python -m services.pronostico_desgaste_service [--completo]`.
+"""
+import asyncio
+import json
+import logging
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, delete, func, insert, text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from database import TareasSessionFactory, engine
+from models.evento_neumatico import EventoNeumatico
+from models.marca_refresco import MarcaRefresco
+from models.modelo import ModeloNeumatico
+from models.neumatico import Neumatico
+from models.pronostico_desgaste import PronosticoDesgaste
+from models.vehiculo import Vehiculo
+from schemas.common import EstadoNeumaticoEnum, TipoEventoNeumaticoEnum
+from services.barrido_alertas_service import UmbralesProfundidad, cargar_umbrales_profundidad, umbral_profundidad
+from utils.logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+NOMBRE_TAREA = "pronostico_desgaste"
+MARCA = "pronostico_desgaste"
+
+_LOCK_REFRESCO = text("SELECT pg_try_advisory_xact_lock(hashtext('pronostico_desgaste'))")
+_EPOCA = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Más allá de este horizonte la fecha de retiro no es informativa (desgaste casi nulo)
+_HORIZONTE_MAXIMO_DIAS = 100 * 365
+
+
+def _a_dias(momento: datetime) -> float:
+    """Días (fraccionarios) desde 1970; SQLite devuelve los timestamps sin zona (UTC)."""
+    if momento.tzinfo is None:
+        momento = momento.replace(tzinfo=timezone.utc)
+    return (momento - _EPOCA).total_seconds() / 86400.0
+
+
+def _regresion(grupo: np.ndarray, x: np.ndarray, y: np.ndarray, n_grupos: int) -> Tuple[np.ndarray, ...]:
+    """
+    Mínimos cuadrados y = a + b·x por grupo, con sumas por grupo (np.bincount).
+
+    Returns:
+        (puntos, media_x, media_y, pendiente) por grupo; la pendiente es NaN
+        si el grupo tiene menos de dos valores distintos de x.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        puntos = np.bincount(grupo, minlength=n_grupos)
+        media_x = np.bincount(grupo, x, n_grupos) / puntos
+        media_y = np.bincount(grupo, y, n_grupos) / puntos
+        # Centrado por grupo: evita la cancelación con odómetros grandes
+        dx = x - media_x[grupo]
+        sxx = np.bincount(grupo, dx * dx, n_grupos)
+        sxy = np.bincount(grupo, dx * (y - media_y[grupo]), n_grupos)
+        pendiente = np.where(sxx > 0, sxy / sxx, np.nan)
+    return puntos, media_x, media_y, pendiente
+
+
+def calcular_pronosticos(
+    neumaticos: List[Any],
+    mediciones: List[Tuple[uuid.UUID, datetime, float, float]],
+    umbrales: UmbralesProfundidad,
+    calculado_en: datetime,
+) -> List[Dict[str, Any]]:
+    """
+    Filas de pronosticos_desgaste para un bloque de neumáticos.
+
+    Args:
+        neumaticos: (id, modelo_id, vehiculo_id) de cada neumático
+        mediciones: (neumatico_id, momento, odómetro, profundidad_mm), en cualquier orden
+        umbrales: Profundidad mínima por (modelo, almacén), de cargar_umbrales_profundidad
+        calculado_en: Instante del cálculo
+
+    Returns:
+        Una fila por neumático; sin ajuste válido (menos de dos puntos o sin
+        desgaste) los campos del pronóstico quedan a None.
+    """
+    n_grupos = len(neumaticos)
+    posicion = {fila[0]: i for i, fila in enumerate(neumaticos)}
+    grupo = np.fromiter((posicion[m[0]] for m in mediciones), dtype=np.int64, count=len(mediciones))
+    t = np.fromiter((_a_dias(m[1]) for m in mediciones), dtype=np.float64, count=len(mediciones))
+    x = np.fromiter((m[2] for m in mediciones), dtype=np.float64, count=len(mediciones))
+    y = np.fromiter((m[3] for m in mediciones), dtype=np.float64, count=len(mediciones))
+    # Solo neumáticos instalados: sin almacén, se aplica el umbral general del modelo
+    minimo = np.fromiter(
+        (umbral_profundidad(umbrales, fila[1], None) for fila in neumaticos), dtype=np.float64, count=n_grupos
+    )
+
+    puntos, media_x, media_y, pendiente = _regresion(grupo, x, y, n_grupos)
+    # Km por día: pendiente de odómetro ~ fecha con las mismas mediciones
+    _, _, _, km_por_dia = _regresion(grupo, t, x, n_grupos)
+    x_ultimo = np.full(n_grupos, -np.inf)
+    np.maximum.at(x_ultimo, grupo, x)
+    t_ultimo = np.full(n_grupos, -np.inf)
+    np.maximum.at(t_ultimo, grupo, t)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Pendiente negativa: la profundidad baja con los km
+        valido = (puntos >= 2) & (pendiente < 0)
+        profundidad_estimada = media_y + pendiente * (x_ultimo - media_x)
+        x_retiro = media_x + (minimo - media_y) / pendiente
+        km_restantes = np.maximum(x_retiro - x_ultimo, 0.0)
+        con_ritmo = valido & (km_por_dia > 0)
+        dias_restantes = km_restantes / km_por_dia
+        con_fecha = con_ritmo & (dias_restantes <= _HORIZONTE_MAXIMO_DIAS)
+        t_retiro = t_ultimo + dias_restantes
+
+    filas = []
+    for i, (neumatico_id, modelo_id, vehiculo_id) in enumerate(neumaticos):
+        medido = puntos[i] > 0
+        filas.append({
+            "neumatico_id": neumatico_id,
+            "modelo_id": modelo_id,
+            "vehiculo_id": vehiculo_id,
+            "puntos": int(puntos[i]),
+            "profundidad_minima_mm": float(minimo[i]),
+            "desgaste_mm_por_1000km": round(float(-pendiente[i] * 1000), 4) if valido[i] else None,
+            "profundidad_estimada_mm": round(float(profundidad_estimada[i]), 2) if valido[i] else None,
+            "odometro_ultimo": int(x_ultimo[i]) if medido else None,
+            "odometro_retiro_estimado": int(round(x_retiro[i])) if valido[i] else None,
+            "km_restantes": int(round(km_restantes[i])) if valido[i] else None,
+            "km_por_dia": round(float(km_por_dia[i]), 2) if con_ritmo[i] else None,
+            "fecha_retiro_estimada": (_EPOCA + timedelta(days=float(t_retiro[i]))).date() if con_fecha[i] else None,
+            "ultima_medicion_en": _EPOCA + timedelta(days=float(t_ultimo[i])) if medido else None,
+            "calculado_en": calculado_en,
+        })
+    return filas
+
+
+async def _cargar_bloque(session: AsyncSession, neumatico_ids: List[uuid.UUID]) -> Tuple[List[Any], List[Tuple]]:
+    """Neumáticos instalados del bloque y sus mediciones desde la última instalación (3 consultas)."""
+    E = EventoNeumatico
+    neumaticos = (await session.exec(
+        select(
+            Neumatico.id, Neumatico.modelo_id, Neumatico.ubicacion_actual_vehiculo_id, Neumatico.kilometraje_acumulado,
+            Neumatico.profundidad_inicial_mm, ModeloNeumatico.profundidad_original_mm,
+        ).join(ModeloNeumatico, ModeloNeumatico.id == Neumatico.modelo_id).where(
+            Neumatico.id.in_(neumatico_ids), Neumatico.estado_actual == EstadoNeumaticoEnum.INSTALADO
+        )
+    )).all()
+    if not neumaticos:
+        return [], []
+    instalados = [n.id for n in neumaticos]
+
+    ultima = select(
+        E.neumatico_id, E.timestamp_evento, E.odometro_vehiculo_en_evento, E.profundidad_remanente_mm,
+        func.row_number().over(partition_by=E.neumatico_id, order_by=(E.timestamp_evento.desc(), E.id.desc())).label("orden"),
+    ).where(E.neumatico_id.in_(instalados), E.tipo_evento == TipoEventoNeumaticoEnum.INSTALACION).subquery()
+    instalaciones = {
+        fila.neumatico_id: fila
+        for fila in (await session.exec(select(
+            ultima.c.neumatico_id, ultima.c.timestamp_evento, ultima.c.odometro_vehiculo_en_evento,
+            ultima.c.profundidad_remanente_mm,
+        ).where(ultima.c.orden == 1))).all()
+    }
+    inspecciones = (await session.exec(
+        select(E.neumatico_id, E.timestamp_evento, E.odometro_vehiculo_en_evento, E.profundidad_remanente_mm)
+        .join(ultima, and_(ultima.c.neumatico_id == E.neumatico_id, ultima.c.orden == 1))
+        .where(
+            E.neumatico_id.in_(instalados),
+            E.tipo_evento == TipoEventoNeumaticoEnum.INSPECCION,
+            E.timestamp_evento >= ultima.c.timestamp_evento,
+            E.odometro_vehiculo_en_evento >= ultima.c.odometro_vehiculo_en_evento,
+            E.profundidad_remanente_mm.is_not(None),
+        )
+    )).all()
+
+    mediciones = [(m[0], m[1], float(m[2]), float(m[3])) for m in inspecciones]
+    for n in neumaticos:
+        instalacion = instalaciones.get(n.id)
+        if instalacion is None or instalacion.odometro_vehiculo_en_evento is None:
+            continue
+        profundidad = instalacion.profundidad_remanente_mm
+        if profundidad is None and not n.kilometraje_acumulado:
+            profundidad = n.profundidad_inicial_mm or n.profundidad_original_mm
+        if profundidad is not None:
+            mediciones.append((n.id, instalacion.timestamp_evento, float(instalacion.odometro_vehiculo_en_evento), float(profundidad)))
+    return [(n.id, n.modelo_id, n.ubicacion_actual_vehiculo_id) for n in neumaticos], mediciones
+
+
+async def _neumaticos_tocados(session: AsyncSession, desde: Optional[datetime]) -> List[uuid.UUID]:
+    """Neumáticos a recalcular: los instalados (desde=None) o los modificados / con eventos nuevos desde `desde`."""
+    if desde is None:
+        return list((await session.exec(
+            select(Neumatico.id).where(Neumatico.estado_actual == EstadoNeumaticoEnum.INSTALADO)
+        )).all())
+    modificados = select(Neumatico.id).where(Neumatico.actualizado_en >= desde)
+    con_eventos = select(EventoNeumatico.neumatico_id).where(EventoNeumatico.creado_en >= desde)
+    return list((await session.exec(modificados.union(con_eventos))).scalars().all())
+
+
+async def refrescar_pronosticos(session: AsyncSession, *, completo: bool = False) -> Dict[str, Any]:
+    """
+    Recalcula los pronósticos de los neumáticos modificados desde la última
+    marca (o de todos con `completo` o sin marca). Los que ya no están
+    instalados pierden su pronóstico.
+
+    Returns:
+        Informe con `refrescado` (False si otro proceso ya estaba refrescando),
+        si fue completo, los neumáticos revisados, los pronósticos con fecha y la duración.
+    """
+    inicio = time.perf_counter()
+    # El lock de transacción se libera con el COMMIT que cierra el refresco
+    if session.bind.dialect.name == "postgresql" and not (await session.exec(_LOCK_REFRESCO)).scalar():
+        await session.rollback()
+        logger.info("Refresco de pronósticos de desgaste omitido: otro proceso lo está ejecutando.")
+        return {"refrescado": False, "motivo": "refresco_en_curso", "duracion_segundos": 0.0}
+
+    corte = datetime.now(timezone.utc)
+    marca = await session.get(MarcaRefresco, MARCA)
+    completo = completo or marca is None
+    desde = None
+    if not completo:
+        anterior = marca.marca if marca.marca.tzinfo else marca.marca.replace(tzinfo=timezone.utc)
+        desde = anterior - timedelta(seconds=settings.PRONOSTICO_DESGASTE_MARGEN_SEGUNDOS)
+
+    neumatico_ids = await _neumaticos_tocados(session, desde)
+    if completo:
+        await session.exec(delete(PronosticoDesgaste))
+    umbrales = await cargar_umbrales_profundidad(session)
+    con_fecha = 0
+    tamano = settings.PRONOSTICO_DESGASTE_BLOQUE
+    for inicio_bloque in range(0, len(neumatico_ids), tamano):
+        bloque = neumatico_ids[inicio_bloque:inicio_bloque + tamano]
+        if not completo:
+            await session.exec(delete(PronosticoDesgaste).where(PronosticoDesgaste.neumatico_id.in_(bloque)))
+        neumaticos, mediciones = await _cargar_bloque(session, bloque)
+        if not neumaticos:
+            continue
+        filas = calcular_pronosticos(neumaticos, mediciones, umbrales, corte)
+        await session.exec(insert(PronosticoDesgaste), params=filas)
+        con_fecha += sum(1 for f in filas if f["fecha_retiro_estimada"] is not None)
+
+    if marca is None:
+        marca = MarcaRefresco(nombre=MARCA, marca=corte)
+    marca.marca = corte
+    marca.actualizado_en = datetime.now(timezone.utc)
+    session.add(marca)
+    await session.commit()
+
+    duracion = round(time.perf_counter() - inicio, 4)
+    logger.info(f"Pronósticos de desgaste refrescados ({'completo' if completo else 'incremental'}): "
+                f"{len(neumatico_ids)} neumáticos revisados, {con_fecha} con fecha de retiro en {duracion}s")
+    return {
+        "refrescado": True, "completo": completo, "neumaticos": len(neumatico_ids),
+        "con_fecha_retiro": con_fecha, "duracion_segundos": duracion,
+    }
+
+
+async def leer_marca(session: AsyncSession) -> Optional[datetime]:
+    """Instante del último refresco (None si nunca se ejecutó)."""
+    return (await session.exec(select(MarcaRefresco.marca).where(MarcaRefresco.nombre == MARCA))).first()
+
+
+async def leer_retiros_proximos(
+    session: AsyncSession,
+    *,
+    hasta: date,
+    vehiculo_id: Optional[uuid.UUID] = None,
+    modelo_id: Optional[uuid.UUID] = None,
+    limit: int = 500,
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve tires whose estimated removal date is on or before `hasta`
+    (overdue ones included), soonest first.
+
+    Args:
+        session: Database session
+        hasta: Last removal date included
+        vehiculo_id / modelo_id: Optional filters
+        limit: Maximum number of rows
+
+    Returns:
+        Forecast rows with serial number, vehicle and model labels
+    """
+    P = PronosticoDesgaste
+    consulta = (
+        select(
+            P.neumatico_id, Neumatico.numero_serie, P.vehiculo_id, Vehiculo.numero_economico,
+            P.modelo_id, ModeloNeumatico.nombre_modelo, P.puntos, P.profundidad_minima_mm,
+            P.desgaste_mm_por_1000km, P.profundidad_estimada_mm, P.odometro_ultimo, P.odometro_retiro_estimado,
+            P.km_restantes, P.km_por_dia, P.fecha_retiro_estimada, P.ultima_medicion_en,
+        )
+        .join(Neumatico, Neumatico.id == P.neumatico_id)
+        .join(ModeloNeumatico, ModeloNeumatico.id == P.modelo_id)
+        .outerjoin(Vehiculo, Vehiculo.id == P.vehiculo_id)
+        .where(P.fecha_retiro_estimada <= hasta)
+    )
+    if vehiculo_id is not None:
+        consulta = consulta.where(P.vehiculo_id == vehiculo_id)
+    if modelo_id is not None:
+        consulta = consulta.where(P.modelo_id == modelo_id)
+    consulta = consulta.order_by(P.fecha_retiro_estimada, P.neumatico_id).limit(limit)
+    return [dict(fila) for fila in (await session.exec(consulta)).mappings()]
+
+
+async def refresco_pronosticos_programado() -> Dict[str, Any]:
+    """Punto de entrada para el scheduler: abre su propia sesión."""
+    async with TareasSessionFactory() as session:
+        return await refrescar_pronosticos(session)
+
+
+async def _main(completo: bool) -> None:
+    try:
+        async with TareasSessionFactory() as session:
+            informe = await refrescar_pronosticos(session, completo=completo)
+        print(json.dumps(informe, indent=2, ensure_ascii=False))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(_main(completo="--completo" in sys.argv[1:]))
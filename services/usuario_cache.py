@@ -0,0 +1,143 @@
+# services/usuario_cache.py
+"""
+Caché de proceso (TTL + LRU) de los usuarios autenticados.
+
+get_current_user se ejecuta en cada petición autenticada; sin caché, cada una
+paga un SELECT sobre 'usuarios' solo para obtener id, activo y es_superusuario.
+Aquí se guarda una instantánea inmutable por `sub` del token (el username), sin
+el hash de la contraseña, durante USUARIO_CACHE_TTL_SEGUNDOS como máximo: ese
+TTL es la obsolescencia máxima tolerada, también entre procesos distintos.
+
+La invalidación es explícita desde crud_usuario (update/remove, tras el commit)
+y automática mediante eventos de mapper de SQLAlchemy, que cubren los cambios
+hechos directamente con la sesión. Cada invalidación sube una versión global
+que impide guardar una carga iniciada antes de ella (sin afectar a las
+entradas ya guardadas de otros usuarios).
+"""
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models.usuario import Usuario
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class UsuarioCacheado:
+    """Instantánea de solo lectura de un Usuario (sin hashed_password)."""
+    id: uuid.UUID
+    username: str
+    email: str
+    nombre_completo: Optional[str]
+    es_superusuario: bool
+    activo: bool
+    fecha_baja: Optional[datetime]
+    creado_en: Optional[datetime]
+    actualizado_en: Optional[datetime]
+    creado_por: Optional[uuid.UUID]
+    actualizado_por: Optional[uuid.UUID]
+
+    @classmethod
+    def desde_modelo(cls, usuario: Usuario) -> "UsuarioCacheado":
+        return cls(
+            id=usuario.id, username=usuario.username, email=usuario.email,
+            nombre_completo=usuario.nombre_completo, es_superusuario=bool(usuario.es_superusuario),
+            activo=bool(usuario.activo), fecha_baja=usuario.fecha_baja, creado_en=usuario.creado_en,
+            actualizado_en=usuario.actualizado_en, creado_por=usuario.creado_por,
+            actualizado_por=usuario.actualizado_por,
+        )
+
+    def a_modelo(self) -> Usuario:
+        """Usuario transitorio (no ligado a ninguna sesión) para los endpoints."""
+        return Usuario(**asdict(self))
+
+
+class UsuarioCache:
+    def __init__(self, ttl_segundos: float, max_entradas: int):
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self.version = 0
+        self._entradas: "OrderedDict[str, Tuple[float, UsuarioCacheado]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def habilitada(self) -> bool:
+        return self.ttl_segundos > 0 and self.max_entradas > 0
+
+    def _leer(self, username: str) -> Optional[UsuarioCacheado]:
+        entrada = self._entradas.get(username)
+        if entrada is not None:
+            expira_en, valor = entrada
+            if expira_en > time.monotonic():
+                self._entradas.move_to_end(username)
+                self.hits += 1
+                return valor
+            self._entradas.pop(username, None)
+        self.misses += 1
+        return None
+
+    def _guardar(self, username: str, valor: UsuarioCacheado, version: int) -> None:
+        # Si hubo una invalidación mientras se cargaba, no se guarda el valor leído
+        if version != self.version:
+            return
+        self._entradas[username] = (time.monotonic() + self.ttl_segundos, valor)
+        self._entradas.move_to_end(username)
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+
+    async def get_usuario(self, session: AsyncSession, username: str) -> Optional[Usuario]:
+        """Devuelve el usuario desde la caché o, si no está, lo lee con la sesión dada."""
+        if self.habilitada:
+            valor = self._leer(username)
+            if valor is not None:
+                return valor.a_modelo()
+        version = self.version
+        usuario = (await session.exec(select(Usuario).where(Usuario.username == username))).first()
+        if usuario is None or not self.habilitada:
+            return usuario
+        self._guardar(username, UsuarioCacheado.desde_modelo(usuario), version)
+        return usuario
+
+    def invalidar_usuario(self, username: Optional[str] = None) -> None:
+        """Descarta un usuario o, sin username, toda la caché."""
+        # También se sube la versión: así una lectura en curso del mismo usuario no se guarda
+        self.version += 1
+        if username is None:
+            self._entradas.clear()
+        else:
+            self._entradas.pop(username, None)
+        logger.debug(f"Caché de usuarios invalidada ({username or 'todos'}, versión {self.version}).")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "version": self.version, "ttl_segundos": self.ttl_segundos, "max_entradas": self.max_entradas,
+            "entradas": len(self._entradas), "hits": self.hits, "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+        }
+
+
+usuario_cache = UsuarioCache(
+    ttl_segundos=settings.USUARIO_CACHE_TTL_SEGUNDOS, max_entradas=settings.USUARIO_CACHE_MAX_ENTRADAS
+)
+
+
+# --- Invalidación automática ante cambios ORM sobre usuarios ---
+@event.listens_for(Usuario, "after_update")
+@event.listens_for(Usuario, "after_delete")
+def _invalidar_usuario_por_orm(mapper, connection, target: Usuario) -> None:
+    usuario_cache.invalidar_usuario(target.username)
+    # Si cambió el username, la entrada vieja se guardó con el anterior
+    for anterior in inspect(target).attrs.username.history.deleted or ():
+        usuario_cache.invalidar_usuario(anterior)
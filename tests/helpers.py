@@ -302,4 +302,9 @@ async def set_profundidad_minima_param(
      print(f"DEBUG [helpers]: Parámetro profundidad mínima establecido en {umbral} para modelo {modelo_id} (Almacén: {almacen_id})")
      return param
 
+async def procesar_outbox_alertas(session: AsyncSession) -> Dict[str, int]:
+    """Drena el outbox de alertas con la sesión de pruebas (las alertas ya no se crean en la petición)."""
+    from services.alert_outbox_worker import AlertOutboxWorker
+    return await AlertOutboxWorker().drenar(session)
+
 # ===== FIN DE tests/helpers.py =====
\ No newline at end of file
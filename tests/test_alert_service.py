@@ -701,3 +701,57 @@ async def test_check_desgaste_irregular_comentarios(db_session: AsyncSession):
     
     # Verificar que se detectó el motivo en los comentarios
     assert any("desgaste central" in str(motivo).lower() for motivo in motivos)
+
+
+@pytest.mark.asyncio
+async def test_alerta_repetida_incrementa_ocurrencias(db_session: AsyncSession):
+    """Una alerta abierta que se repite suma ocurrencias; tras resolverla se crea una nueva."""
+    usuario = Usuario(
+        id=uuid.uuid4(), username="test_dedup_user", email="test_dedup@example.com",
+        hashed_password="hash", nombre_completo="Test Dedup User", activo=True
+    )
+    modelo = ModeloNeumatico(
+        id=uuid.uuid4(), nombre_modelo="ModeloTestDedup", medida="295/80R22.5",
+        fabricante_id=uuid.uuid4(), profundidad_original_mm=18.0,
+        presion_recomendada_psi=100.0, permite_reencauche=True, reencauches_maximos=2
+    )
+    db_session.add_all([usuario, modelo])
+    await db_session.commit()
+    neumatico = Neumatico(
+        id=uuid.uuid4(), numero_serie="TEST-DEDUP-001", modelo_id=modelo.id,
+        fecha_compra=datetime.now(timezone.utc).date(), profundidad_inicial_mm=18.0,
+        reencauches_realizados=0, es_reencauchado=False, estado_actual="EN_STOCK"
+    )
+    db_session.add(neumatico)
+    await db_session.commit()
+
+    alert_service = AlertService(db_session)
+    for presion in (80.0, 75.0, 70.0):
+        evento = EventoNeumatico(
+            id=uuid.uuid4(), neumatico_id=neumatico.id, tipo_evento=TipoEventoNeumaticoEnum.INSPECCION,
+            fecha_evento=datetime.now(timezone.utc), presion_psi=presion, usuario_id=usuario.id
+        )
+        db_session.add(evento)
+        await db_session.commit()
+        await alert_service._check_presion_anormal(neumatico, evento)
+
+    query = select(Alerta).where(
+        Alerta.tipo_alerta == TipoAlertaEnum.PRESION_BAJA.value,
+        Alerta.neumatico_id == neumatico.id
+    )
+    alertas = (await db_session.exec(query)).all()
+    assert len(alertas) == 1
+    alerta = alertas[0]
+    assert alerta.ocurrencias == 3
+    assert alerta.ultima_ocurrencia_en is not None
+    # La alerta conserva los datos de la última repetición
+    assert float(alerta.datos_contexto.get("presion_actual")) == 70.0
+
+    # Resuelta la alerta, una nueva repetición abre otra
+    alerta.resuelta = True
+    db_session.add(alerta)
+    await db_session.commit()
+    await alert_service._check_presion_anormal(neumatico, evento)
+    alertas = (await db_session.exec(query)).all()
+    assert len(alertas) == 2
+    assert sorted(a.ocurrencias for a in alertas) == [1, 3]
@@ -48,6 +48,46 @@ async def test_listar_alertas(client: AsyncClient, db_session: AsyncSession):
     alerta_ids = [alerta["id"] for alerta in data]
     assert str(alerta_test.id) in alerta_ids
 
+@pytest.mark.asyncio
+async def test_listar_alertas_paginacion_cursor(client: AsyncClient, db_session: AsyncSession):
+    """GET /alertas/ recorre todas las alertas por cursor, sin repetir ni saltar filas."""
+    user_id, headers = await create_user_and_get_token(client, db_session, "alertas_cursor", rol="ADMIN")
+
+    # Mismo creado_en para varias alertas: el id desempata
+    ahora = datetime.now(timezone.utc)
+    creadas = set()
+    for i in range(5):
+        alerta = Alerta(
+            tipo_alerta=TipoAlertaEnum.PROFUNDIDAD_BAJA.value, descripcion=f"Alerta cursor {i}",
+            nivel_severidad="WARN", resuelta=False, creado_en=ahora if i < 3 else ahora.replace(microsecond=0)
+        )
+        db_session.add(alerta)
+        creadas.add(alerta.id)
+    await db_session.commit()
+
+    vistas, cursor, paginas = [], None, 0
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get(f"{ALERTAS_PREFIX}/", params=params, headers=headers)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        vistas.extend(uuid.UUID(a["id"]) for a in response.json())
+        paginas += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(vistas) == len(set(vistas))
+    assert creadas <= set(vistas)
+    assert paginas == (len(vistas) + 1) // 2
+
+    # OFFSET sigue disponible
+    response = await client.get(f"{ALERTAS_PREFIX}/", params={"skip": 2, "limit": 2}, headers=headers)
+    assert [uuid.UUID(a["id"]) for a in response.json()] == vistas[2:4]
+
+    response = await client.get(f"{ALERTAS_PREFIX}/", params={"cursor": "no-es-un-cursor"}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
 @pytest.mark.asyncio
 async def test_obtener_alerta_por_id(client: AsyncClient, db_session: AsyncSession):
     """Prueba el endpoint GET /alertas/{id} para obtener una alerta específica."""
@@ -194,3 +234,140 @@ async def test_obtener_resumen_alertas(client: AsyncClient, db_session: AsyncSes
     
     # Verificar que hay alertas recientes
     assert len(data["alertas_recientes"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_resumen_alertas_contadores_y_etag(client: AsyncClient, db_session: AsyncSession):
+    """Los contadores del resumen siguen altas y resoluciones; el ETag permite 304 y la reconciliación corrige desvíos."""
+    from models.alerta_contador import AlertaContadorDelta
+    from services.alertas_contadores_service import plegar_deltas, reconciliar_contadores
+
+    user_id, headers = await create_user_and_get_token(client, db_session, "dashboard_contadores", rol="ADMIN")
+    url = f"{ALERTAS_PREFIX}/dashboard/resumen"
+
+    inicial = await client.get(url, headers=headers)
+    assert inicial.status_code == status.HTTP_200_OK
+    base = inicial.json()["conteo_por_estado"]
+
+    alerta = Alerta(
+        tipo_alerta="STOCK_MINIMO", descripcion="Contador", nivel_severidad="WARN",
+        resuelta=False, creado_en=datetime.now(timezone.utc)
+    )
+    db_session.add(alerta)
+    await db_session.commit()
+    await db_session.refresh(alerta)
+
+    response = await client.get(url, headers=headers)
+    etag = response.headers["etag"]
+    assert etag != inicial.headers["etag"]
+    assert response.json()["conteo_por_estado"]["False"] == base.get("False", 0) + 1
+    assert str(alerta.id) in [a["id"] for a in response.json()["alertas_recientes"]]
+
+    # Sin cambios: 304 sin cuerpo
+    no_modificada = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert no_modificada.status_code == status.HTTP_304_NOT_MODIFIED
+    assert no_modificada.headers["etag"] == etag
+
+    # Notas en una alerta abierta no cambian ningún conteo: el ETag se mantiene
+    parche = await client.patch(f"{ALERTAS_PREFIX}/{alerta.id}", json={"notas_resolucion": "Revisando"}, headers=headers)
+    assert parche.status_code == status.HTTP_200_OK
+    no_modificada = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert no_modificada.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # Resolver la alerta mueve el contador y cambia el ETag
+    parche = await client.patch(f"{ALERTAS_PREFIX}/{alerta.id}", json={"resuelta": True}, headers=headers)
+    assert parche.status_code == status.HTTP_200_OK
+    response = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+    etag = response.headers["etag"]
+    data = response.json()
+    assert data["conteo_por_estado"].get("False", 0) == base.get("False", 0)
+    assert data["conteo_por_estado"]["True"] == base.get("True", 0) + 1
+
+    # Plegar los deltas no cambia conteos ni ETag
+    assert await plegar_deltas(db_session) > 0
+    await db_session.commit()
+    assert (await db_session.exec(select(AlertaContadorDelta))).all() == []
+    no_modificada = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert no_modificada.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # Un delta desviado (p. ej. carga con triggers desactivados) se corrige al reconciliar
+    db_session.add(AlertaContadorDelta(tipo_alerta="STOCK_MINIMO", resuelta=True, delta=5))
+    await db_session.commit()
+    informe = await reconciliar_contadores(db_session)
+    assert {"tipo_alerta": "STOCK_MINIMO", "resuelta": True} in [
+        {"tipo_alerta": c["tipo_alerta"], "resuelta": c["resuelta"]} for c in informe["correcciones"]
+    ]
+    assert (await reconciliar_contadores(db_session))["correcciones"] == []
+    response = await client.get(url, headers=headers)
+    assert response.json()["conteo_por_estado"]["True"] == base.get("True", 0) + 1
+
+
+@pytest.mark.asyncio
+async def test_resumen_alertas_etag_cambia_con_repeticion_visible(client: AsyncClient, db_session: AsyncSession):
+    """Una repetición que cambia la descripción de una alerta reciente invalida el ETag aunque no mueva conteos."""
+    from crud.crud_alerta import alerta as crud_alerta
+
+    _, headers = await create_user_and_get_token(client, db_session, "dashboard_repeticion", rol="ADMIN")
+    url = f"{ALERTAS_PREFIX}/dashboard/resumen"
+    clave = f"test-repeticion-{uuid.uuid4().hex}"
+
+    def _alerta(descripcion: str, nivel: str) -> Alerta:
+        return Alerta(tipo_alerta="STOCK_MINIMO", descripcion=descripcion, nivel_severidad=nivel, clave_dedup=clave)
+
+    await crud_alerta.upsert_abierta(db_session, db_obj=_alerta("Stock 3 de 5", "WARN"))
+    await db_session.commit()
+    response = await client.get(url, headers=headers)
+    etag = response.headers["etag"]
+
+    # Repetición con los mismos valores: solo ocurrencias y marcas de tiempo, el ETag se mantiene
+    _, nueva = await crud_alerta.upsert_abierta(db_session, db_obj=_alerta("Stock 3 de 5", "WARN"))
+    await db_session.commit()
+    assert nueva is False
+    no_modificada = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert no_modificada.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # Repetición con otra descripción y severidad: mismos conteos, cuerpo distinto
+    await crud_alerta.upsert_abierta(db_session, db_obj=_alerta("Stock 1 de 5", "CRITICAL"))
+    await db_session.commit()
+    response = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+    reciente = next(a for a in response.json()["alertas_recientes"] if a["descripcion"].startswith("Stock 1"))
+    assert reciente["nivel_severidad"] == "CRITICAL"
+
+
+@pytest.mark.asyncio
+async def test_contadores_update_masivo_supera_smallint(db_session: AsyncSession):
+    """Un UPDATE masivo de más de 32767 alertas de un grupo no rompe los deltas y mueve los contadores."""
+    from sqlalchemy import insert, update
+    from models.alerta_contador import AlertaContadorDelta
+    from services.alertas_contadores_service import leer_contadores, plegar_deltas
+
+    tipo = "BENCH_MASIVO"
+    cantidad = 33000
+    ahora = datetime.now(timezone.utc)
+    await db_session.execute(insert(Alerta.__table__), [
+        {"id": uuid.uuid4(), "tipo_alerta": tipo, "descripcion": "Masiva", "nivel_severidad": "INFO",
+         "resuelta": False, "ocurrencias": 1, "creado_en": ahora, "actualizado_en": ahora}
+        for _ in range(cantidad)
+    ])
+    await db_session.commit()
+
+    # Una sola sentencia resuelve todo el grupo (en PostgreSQL, un delta de -33000 y otro de +33000)
+    await db_session.exec(update(Alerta).where(Alerta.tipo_alerta == tipo).values(resuelta=True))
+    await db_session.commit()
+    # El delta agregado de una sentencia así debe caber en la columna
+    db_session.add(AlertaContadorDelta(tipo_alerta=tipo, resuelta=False, delta=-cantidad))
+    db_session.add(AlertaContadorDelta(tipo_alerta=tipo, resuelta=False, delta=cantidad))
+    await db_session.commit()
+
+    totales = {(c.tipo_alerta, c.resuelta): c.total for c in await leer_contadores(db_session)}
+    assert totales[(tipo, True)] == cantidad
+    assert totales[(tipo, False)] == 0
+
+    await plegar_deltas(db_session)
+    await db_session.commit()
+    totales = {(c.tipo_alerta, c.resuelta): c.total for c in await leer_contadores(db_session)}
+    assert totales[(tipo, True)] == cantidad and totales[(tipo, False)] == 0
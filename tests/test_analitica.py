@@ -0,0 +1,173 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models.evento_neumatico import EventoNeumatico
+from models.neumatico import Neumatico
+from models.vehiculo import Vehiculo
+from schemas.common import EstadoNeumaticoEnum, TipoEventoNeumaticoEnum
+from services.pronostico_desgaste_service import calcular_pronosticos
+from tests.helpers import create_user_and_get_token, get_or_create_almacen_test, setup_instalacion_prerequisites
+
+ANALITICA_PREFIX = f"{settings.API_V1_STR}/analitica"
+EVENTOS_URL = f"{settings.API_V1_STR}/neumaticos/eventos"
+
+
+@pytest.mark.asyncio
+async def test_cpk_agregados_e_incremental(client: AsyncClient, db_session: AsyncSession):
+    """Compra + eventos con costo y km de un ciclo instalación-desmontaje; el refresco incremental suma lo nuevo."""
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+    _, headers_admin = await create_user_and_get_token(client, db_session, "cpk_admin", es_superusuario=True)
+    almacen = await get_or_create_almacen_test(db_session)
+    neumatico = await db_session.get(Neumatico, neumatico_id)
+    modelo_id = neumatico.modelo_id
+    tipo_vehiculo_id = str((await db_session.get(Vehiculo, vehiculo_id)).tipo_vehiculo_id)
+
+    for payload in (
+        {"tipo_evento": TipoEventoNeumaticoEnum.INSTALACION.value, "vehiculo_id": str(vehiculo_id),
+         "posicion_id": str(posicion_id), "odometro_vehiculo_en_evento": 5000},
+        {"tipo_evento": TipoEventoNeumaticoEnum.DESMONTAJE.value, "destino_desmontaje": EstadoNeumaticoEnum.EN_STOCK.value,
+         "destino_almacen_id": str(almacen.id), "odometro_vehiculo_en_evento": 15000},
+    ):
+        response = await client.post(
+            EVENTOS_URL, json={"neumatico_id": str(neumatico_id), "usuario_id": str(user_id), **payload}, headers=headers
+        )
+        assert response.status_code == status.HTTP_201_CREATED, response.text
+    db_session.add(EventoNeumatico(
+        neumatico_id=neumatico_id, usuario_id=user_id, tipo_evento=TipoEventoNeumaticoEnum.INSPECCION,
+        costo_evento=Decimal("100.00"), moneda_costo="PEN",
+    ))
+    await db_session.commit()
+
+    # Sin marca previa: reconstrucción completa
+    informe = (await client.post(f"{ANALITICA_PREFIX}/cpk/refrescar", headers=headers_admin)).json()
+    assert informe["refrescado"] is True and informe["completo"] is True
+
+    response = await client.get(
+        f"{ANALITICA_PREFIX}/cpk", params={"agrupar_por": "modelo", "modelo_id": str(modelo_id)}, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["calculado_hasta"] is not None
+    assert len(data["grupos"]) == 1
+    grupo = data["grupos"][0]
+    assert grupo["id"] == str(modelo_id)
+    assert grupo["costo_pen"] == pytest.approx(600.0)
+    assert grupo["km"] == 10000
+    assert grupo["cpk_pen"] == pytest.approx(0.06)
+    assert grupo["cpk_usd"] == 0
+
+    por_tipo = (await client.get(
+        f"{ANALITICA_PREFIX}/cpk", params={"agrupar_por": "tipo_vehiculo", "modelo_id": str(modelo_id)}, headers=headers
+    )).json()["grupos"]
+    assert [g["id"] for g in por_tipo] == [tipo_vehiculo_id]
+
+    # Un evento nuevo: el refresco incremental solo recalcula ese neumático
+    db_session.add(EventoNeumatico(
+        neumatico_id=neumatico_id, usuario_id=user_id, tipo_evento=TipoEventoNeumaticoEnum.INSPECCION,
+        costo_evento=Decimal("50.00"), moneda_costo="PEN",
+    ))
+    await db_session.commit()
+    informe = (await client.post(f"{ANALITICA_PREFIX}/cpk/refrescar", headers=headers_admin)).json()
+    assert informe["completo"] is False
+    assert informe["neumaticos"] == 1
+
+    serie = (await client.get(
+        f"{ANALITICA_PREFIX}/cpk/serie", params={"granularidad": "mes", "modelo_id": str(modelo_id)}, headers=headers
+    )).json()
+    assert [p["periodo"] for p in serie["periodos"]] == [date.today().replace(day=1).isoformat()]
+    assert serie["periodos"][0]["costo_pen"] == pytest.approx(650.0)
+    assert serie["periodos"][0]["km"] == 10000
+
+    # Filtro de fechas fuera del periodo y rango inválido
+    vacio = (await client.get(
+        f"{ANALITICA_PREFIX}/cpk", params={"hasta": "2000-01-01", "modelo_id": str(modelo_id)}, headers=headers
+    )).json()
+    assert vacio["grupos"] == []
+    response = await client.get(f"{ANALITICA_PREFIX}/cpk", params={"desde": "2024-02-01", "hasta": "2024-01-01"}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_calcular_pronosticos_vectorizado():
+    """Un ajuste por neumático en una sola pasada; con un solo punto no hay pronóstico."""
+    a, b, modelo = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    inicio = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    mediciones = [
+        # a: 0.5 mm cada 1000 km, 100 km/día
+        (a, inicio + timedelta(days=20), 12000.0, 17.0),
+        (a, inicio, 10000.0, 18.0),
+        (a, inicio + timedelta(days=40), 14000.0, 16.0),
+        (b, inicio, 5000.0, 12.0),
+    ]
+    filas = calcular_pronosticos([(a, modelo, None), (b, modelo, None)], mediciones, {(modelo, None): 3.0}, inicio)
+    fila_a, fila_b = filas
+    assert fila_a["puntos"] == 3
+    assert fila_a["desgaste_mm_por_1000km"] == pytest.approx(0.5)
+    assert fila_a["odometro_retiro_estimado"] == 40000
+    assert fila_a["km_restantes"] == 26000
+    assert fila_a["km_por_dia"] == pytest.approx(100.0)
+    assert fila_a["fecha_retiro_estimada"] == (inicio + timedelta(days=40 + 260)).date()
+    assert fila_b["puntos"] == 1 and fila_b["fecha_retiro_estimada"] is None and fila_b["desgaste_mm_por_1000km"] is None
+
+
+@pytest.mark.asyncio
+async def test_retiros_proximos_e_incremental(client: AsyncClient, db_session: AsyncSession):
+    """Inspecciones desde la instalación -> fecha de retiro; una inspección nueva solo recalcula ese neumático."""
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+    _, headers_admin = await create_user_and_get_token(client, db_session, "desgaste_admin", es_superusuario=True)
+    response = await client.post(EVENTOS_URL, json={
+        "neumatico_id": str(neumatico_id), "usuario_id": str(user_id), "tipo_evento": TipoEventoNeumaticoEnum.INSTALACION.value,
+        "vehiculo_id": str(vehiculo_id), "posicion_id": str(posicion_id), "odometro_vehiculo_en_evento": 10000,
+    }, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+
+    # Instalación hace 40 días (profundidad de partida: la original del modelo, 18 mm); 300 km/día y 0.3 mm/1000 km
+    ahora = datetime.now(timezone.utc)
+    instalacion = (await db_session.exec(select(EventoNeumatico).where(
+        EventoNeumatico.neumatico_id == neumatico_id, EventoNeumatico.tipo_evento == TipoEventoNeumaticoEnum.INSTALACION
+    ))).one()
+    instalacion.timestamp_evento = ahora - timedelta(days=40)
+    db_session.add(instalacion)
+
+    def inspeccion(dias_atras: int, odometro: int, profundidad: str) -> EventoNeumatico:
+        return EventoNeumatico(
+            neumatico_id=neumatico_id, usuario_id=user_id, tipo_evento=TipoEventoNeumaticoEnum.INSPECCION,
+            timestamp_evento=ahora - timedelta(days=dias_atras), odometro_vehiculo_en_evento=odometro,
+            profundidad_remanente_mm=Decimal(profundidad),
+        )
+
+    db_session.add_all([inspeccion(30, 13000, "17.10"), inspeccion(20, 16000, "16.20"), inspeccion(10, 19000, "15.30")])
+    await db_session.commit()
+
+    informe = (await client.post(f"{ANALITICA_PREFIX}/desgaste/refrescar", headers=headers_admin)).json()
+    assert informe["completo"] is True and informe["con_fecha_retiro"] >= 1
+
+    # (18 - 1.6) mm / 0.3 mm por 1000 km -> retiro a ~64667 km: ~45667 km restantes, ~152 días desde la última inspección
+    url = f"{ANALITICA_PREFIX}/desgaste/proximos"
+    assert (await client.get(url, params={"dias": 30, "vehiculo_id": str(vehiculo_id)}, headers=headers)).json()["items"] == []
+    data = (await client.get(url, params={"dias": 200, "vehiculo_id": str(vehiculo_id)}, headers=headers)).json()
+    assert data["calculado_hasta"] is not None
+    [item] = data["items"]
+    assert item["neumatico_id"] == str(neumatico_id)
+    assert item["puntos"] == 4
+    assert item["desgaste_mm_por_1000km"] == pytest.approx(0.3)
+    assert item["km_por_dia"] == pytest.approx(300.0)
+    assert item["km_restantes"] == pytest.approx(45667, abs=2)
+    fecha = date.fromisoformat(item["fecha_retiro_estimada"])
+    assert abs((fecha - (ahora.date() + timedelta(days=142))).days) <= 1
+
+    # Desgaste acelerado: solo se recalcula el neumático con la inspección nueva
+    db_session.add(inspeccion(5, 20500, "8.00"))
+    await db_session.commit()
+    informe = (await client.post(f"{ANALITICA_PREFIX}/desgaste/refrescar", headers=headers_admin)).json()
+    assert informe["completo"] is False and informe["neumaticos"] == 1
+    data = (await client.get(url, params={"dias": 60, "vehiculo_id": str(vehiculo_id)}, headers=headers)).json()
+    assert [i["neumatico_id"] for i in data["items"]] == [str(neumatico_id)]
+    assert date.fromisoformat(data["items"][0]["fecha_retiro_estimada"]) < fecha
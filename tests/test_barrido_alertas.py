@@ -0,0 +1,173 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from core.scheduler import Scheduler
+from models.alerta import Alerta
+from models.modelo import ModeloNeumatico
+from models.neumatico import Neumatico
+from models.parametro_inventario import ParametroInventario
+from models.usuario import Usuario
+from schemas.common import EstadoNeumaticoEnum, TipoAlertaEnum, TipoParametroEnum
+from services.alert_service import AlertService
+from services.barrido_alertas_service import BarridoAlertasService
+from tests.helpers import get_or_create_almacen_test
+
+
+async def _crear_flota(db_session: AsyncSession):
+    """Crea un neumático por regla, uno sin alertas y uno desechado (que el barrido ignora)."""
+    usuario = Usuario(
+        id=uuid.uuid4(), username="test_barrido", email="test_barrido@example.com",
+        hashed_password="hash", nombre_completo="Test Barrido", activo=True
+    )
+    modelo = ModeloNeumatico(
+        id=uuid.uuid4(), nombre_modelo="ModeloBarrido", medida="295/80R22.5", fabricante_id=uuid.uuid4(),
+        profundidad_original_mm=18.0, presion_recomendada_psi=100.0, permite_reencauche=True, reencauches_maximos=2
+    )
+    db_session.add_all([usuario, modelo])
+    await db_session.commit()
+    db_session.add(ParametroInventario(
+        modelo_id=modelo.id, tipo_parametro=TipoParametroEnum.PROFUNDIDAD_MINIMA, valor_numerico=5.0, activo=True
+    ))
+
+    hoy = datetime.now(timezone.utc).date()
+    def _neumatico(serie: str, **kwargs) -> Neumatico:
+        datos = dict(
+            id=uuid.uuid4(), numero_serie=serie, modelo_id=modelo.id, fecha_compra=hoy - timedelta(days=365),
+            kilometraje_acumulado=1000, reencauches_realizados=0, estado_actual=EstadoNeumaticoEnum.EN_STOCK,
+        )
+        datos.update(kwargs)
+        return Neumatico(**datos)
+
+    flota = {
+        "viejo": _neumatico("BARR-VIEJO", fecha_fabricacion=hoy - timedelta(days=365 * 8)),
+        "km": _neumatico("BARR-KM", kilometraje_acumulado=85000),
+        "reencauches": _neumatico("BARR-REENC", reencauches_realizados=2),
+        "gastado": _neumatico("BARR-GASTADO", profundidad_actual_mm=3.5),
+        "ok": _neumatico("BARR-OK", profundidad_actual_mm=12.0),
+        "desechado": _neumatico("BARR-DESECHADO", kilometraje_acumulado=90000, estado_actual=EstadoNeumaticoEnum.DESECHADO),
+    }
+    db_session.add_all(flota.values())
+    await db_session.commit()
+    return flota
+
+
+@pytest.mark.asyncio
+async def test_barrido_alertas_flota(db_session: AsyncSession):
+    flota = await _crear_flota(db_session)
+
+    # Bloques de 2 para recorrer la flota en varias páginas
+    informe = await BarridoAlertasService(db_session, tamano_bloque=2).ejecutar()
+    assert informe["neumaticos"] == 5
+    assert informe["bloques"] == 3
+    assert informe["alertas"] == 4
+    assert set(informe["tiempos_segundos"]) == {"carga", "evaluacion", "insercion", "total"}
+
+    alertas = (await db_session.exec(select(Alerta))).all()
+    por_neumatico = {a.neumatico_id: a for a in alertas}
+    assert len(por_neumatico) == 4
+    assert por_neumatico[flota["viejo"].id].tipo_alerta == TipoAlertaEnum.FIN_VIDA_UTIL_ESTIMADO
+    assert por_neumatico[flota["viejo"].id].datos_contexto["tipo"] == "EDAD"
+    assert por_neumatico[flota["km"].id].datos_contexto["tipo"] == "KILOMETRAJE"
+    assert por_neumatico[flota["reencauches"].id].tipo_alerta == TipoAlertaEnum.LIMITE_REENCAUCHES
+    assert por_neumatico[flota["gastado"].id].tipo_alerta == TipoAlertaEnum.PROFUNDIDAD_BAJA
+    assert por_neumatico[flota["gastado"].id].datos_contexto["profundidad_actual"] == 3.5
+    assert flota["ok"].id not in por_neumatico and flota["desechado"].id not in por_neumatico
+
+    # Un segundo barrido no duplica: solo re-confirma las alertas abiertas
+    await BarridoAlertasService(db_session, tamano_bloque=2).ejecutar()
+    alertas = (await db_session.exec(select(Alerta).execution_options(populate_existing=True))).all()
+    assert len(alertas) == 4
+    assert all(a.ocurrencias == 1 for a in alertas)
+
+
+@pytest.mark.asyncio
+async def test_barrido_umbral_profundidad_por_almacen(db_session: AsyncSession):
+    """El umbral del almacén del neumático tiene prioridad; sin él se usa el general del modelo."""
+    flota = await _crear_flota(db_session)
+    exigente = await get_or_create_almacen_test(db_session, "Almacen Barrido Exigente")
+    normal = await get_or_create_almacen_test(db_session, "Almacen Barrido Normal")
+    modelo_id = flota["ok"].modelo_id
+    db_session.add(ParametroInventario(
+        modelo_id=modelo_id, almacen_id=exigente.id, tipo_parametro=TipoParametroEnum.PROFUNDIDAD_MINIMA,
+        valor_numerico=10.0, activo=True
+    ))
+    en_exigente = Neumatico(
+        id=uuid.uuid4(), numero_serie="BARR-ALM-EXIG", modelo_id=modelo_id, fecha_compra=date.today(),
+        estado_actual=EstadoNeumaticoEnum.EN_STOCK, ubicacion_almacen_id=exigente.id, profundidad_actual_mm=8.0,
+    )
+    en_normal = Neumatico(
+        id=uuid.uuid4(), numero_serie="BARR-ALM-NORM", modelo_id=modelo_id, fecha_compra=date.today(),
+        estado_actual=EstadoNeumaticoEnum.EN_STOCK, ubicacion_almacen_id=normal.id, profundidad_actual_mm=8.0,
+    )
+    db_session.add_all([en_exigente, en_normal])
+    await db_session.commit()
+
+    await BarridoAlertasService(db_session, tamano_bloque=3).ejecutar()
+    alertas = (await db_session.exec(
+        select(Alerta).where(Alerta.tipo_alerta == TipoAlertaEnum.PROFUNDIDAD_BAJA.value)
+    )).all()
+    por_neumatico = {a.neumatico_id: a for a in alertas}
+    assert por_neumatico[en_exigente.id].datos_contexto["profundidad_minima"] == 10.0
+    assert en_normal.id not in por_neumatico
+    assert por_neumatico[flota["gastado"].id].datos_contexto["profundidad_minima"] == 5.0
+
+
+@pytest.mark.asyncio
+async def test_umbral_profundidad_sin_parametro_igual_en_evento_y_barrido(db_session: AsyncSession):
+    """Sin parámetro PROFUNDIDAD_MINIMA, la evaluación por evento y el barrido usan el mismo umbral (el global)."""
+    modelo = ModeloNeumatico(
+        id=uuid.uuid4(), nombre_modelo="ModeloSinParametro", medida="295/80R22.5", fabricante_id=uuid.uuid4(),
+        profundidad_original_mm=18.0, permite_reencauche=False,
+    )
+    db_session.add(modelo)
+    await db_session.commit()
+    umbral = settings.UMBRAL_PROFUNDIDAD_MINIMA_MM
+    bajo, sobre = (
+        Neumatico(
+            id=uuid.uuid4(), numero_serie=serie, modelo_id=modelo.id, fecha_compra=date.today(),
+            estado_actual=EstadoNeumaticoEnum.EN_STOCK, profundidad_actual_mm=profundidad,
+        )
+        for serie, profundidad in (("BARR-SINPAR-BAJO", umbral - 0.5), ("BARR-SINPAR-SOBRE", umbral + 0.5))
+    )
+    db_session.add_all([bajo, sobre])
+    await db_session.commit()
+
+    async def _con_alerta() -> set:
+        alertas = (await db_session.exec(
+            select(Alerta.neumatico_id).where(Alerta.tipo_alerta == TipoAlertaEnum.PROFUNDIDAD_BAJA.value)
+        )).all()
+        return set(alertas) & {bajo.id, sobre.id}
+
+    servicio = AlertService(db_session)
+    await servicio.check_profundidad(bajo.id)
+    await servicio.check_profundidad(sobre.id)
+    por_evento = await _con_alerta()
+    assert por_evento == {bajo.id}
+
+    for alerta in (await db_session.exec(select(Alerta).where(Alerta.neumatico_id.in_([bajo.id, sobre.id])))).all():
+        await db_session.delete(alerta)
+    await db_session.commit()
+    await BarridoAlertasService(db_session).ejecutar()
+    assert await _con_alerta() == por_evento
+
+
+@pytest.mark.asyncio
+async def test_scheduler_ejecutar_ahora():
+    llamadas = []
+
+    async def tarea():
+        llamadas.append(1)
+        return len(llamadas)
+
+    scheduler = Scheduler()
+    scheduler.registrar("prueba", tarea, intervalo_segundos=0)
+    assert await scheduler.ejecutar_ahora("prueba") == 1
+    estado = scheduler.estado()["prueba"]
+    assert estado["ejecuciones"] == 1 and estado["ultimo_error"] is None
+    with pytest.raises(KeyError):
+        await scheduler.ejecutar_ahora("inexistente")
@@ -0,0 +1,124 @@
+# tests/test_catalogo_cache.py
+import uuid
+import pytest
+from decimal import Decimal
+from fastapi import status
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.fabricante import FabricanteNeumatico
+from models.modelo import ModeloNeumatico
+from crud.crud_modelo import modelo as crud_modelo
+from core.config import settings
+from services.catalogo_cache import CatalogoCache, catalogo_cache
+from tests.helpers import create_user_and_get_token
+
+
+async def _crear_modelo(db_session: AsyncSession) -> ModeloNeumatico:
+    fab = FabricanteNeumatico(nombre=f"Fab Cache {uuid.uuid4().hex[:6]}", codigo_abreviado=f"FC{uuid.uuid4().hex[:6]}", activo=True)
+    db_session.add(fab); await db_session.commit(); await db_session.refresh(fab)
+    modelo = ModeloNeumatico(
+        fabricante_id=fab.id, nombre_modelo=f"Mod Cache {uuid.uuid4().hex[:4]}", medida="295/80R22.5",
+        profundidad_original_mm=Decimal("18.0"), presion_recomendada_psi=110.0,
+        permite_reencauche=True, reencauches_maximos=2, activo=True
+    )
+    db_session.add(modelo); await db_session.commit(); await db_session.refresh(modelo)
+    return modelo
+
+
+@pytest.mark.asyncio
+async def test_catalogo_cache_hits_y_misses(db_session: AsyncSession):
+    """La primera lectura es un miss y las siguientes se sirven desde la caché."""
+    modelo = await _crear_modelo(db_session)
+    cache = CatalogoCache(ttl_segundos=60)
+
+    primero = await cache.get_modelo(db_session, modelo.id)
+    segundo = await cache.get_modelo(db_session, modelo.id)
+    assert primero is segundo
+    assert primero.presion_recomendada_psi == 110.0
+    stats = cache.stats()["modelos"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    assert await cache.get_modelo(db_session, uuid.uuid4()) is None
+    fabricante = await cache.get_fabricante(db_session, modelo.fabricante_id)
+    assert fabricante.activo is True
+
+
+@pytest.mark.asyncio
+async def test_catalogo_cache_ttl_expira(db_session: AsyncSession):
+    modelo = await _crear_modelo(db_session)
+    cache = CatalogoCache(ttl_segundos=0)
+    await cache.get_modelo(db_session, modelo.id)
+    await cache.get_modelo(db_session, modelo.id)
+    assert cache.stats()["modelos"]["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_catalogo_cache_invalidacion_por_cambios(db_session: AsyncSession):
+    """Los cambios por CRUD o directamente por la sesión invalidan la entrada cacheada."""
+    modelo = await _crear_modelo(db_session)
+    assert (await catalogo_cache.get_modelo(db_session, modelo.id)).reencauches_maximos == 2
+
+    modelo.reencauches_maximos = 3
+    db_session.add(modelo); await db_session.commit()
+    assert (await catalogo_cache.get_modelo(db_session, modelo.id)).reencauches_maximos == 3
+
+    version = catalogo_cache.version
+    await crud_modelo.update(db_session, db_obj=modelo, obj_in={"permite_reencauche": False})
+    assert catalogo_cache.version > version
+    assert (await catalogo_cache.get_modelo(db_session, modelo.id)).permite_reencauche is False
+
+
+@pytest.mark.asyncio
+async def test_catalogo_cache_invalidacion_por_clave_y_al_confirmar(db_session: AsyncSession):
+    """Invalidar un modelo no vacía el resto; los cambios ORM invalidan al COMMIT y un rollback no invalida."""
+    modelo = await _crear_modelo(db_session)
+    otro = await _crear_modelo(db_session)
+    assert await catalogo_cache.get_modelo(db_session, modelo.id) is not None
+    assert await catalogo_cache.get_modelo(db_session, otro.id) is not None
+
+    catalogo_cache.invalidar_modelo(modelo.id)
+    hits = catalogo_cache.stats()["modelos"]["hits"]
+    await catalogo_cache.get_modelo(db_session, otro.id)
+    assert catalogo_cache.stats()["modelos"]["hits"] == hits + 1
+    await catalogo_cache.get_modelo(db_session, modelo.id)
+
+    # Una carga que empieza antes del COMMIT no puede guardar la fila anterior
+    version = catalogo_cache.version
+    modelo.reencauches_maximos = 4
+    db_session.add(modelo)
+    await db_session.flush()
+    assert catalogo_cache.version == version
+    await db_session.commit()
+    assert catalogo_cache.version > version
+    catalogo_cache._guardar(catalogo_cache._modelos, modelo.id, object(), version)
+    assert (await catalogo_cache.get_modelo(db_session, modelo.id)).reencauches_maximos == 4
+
+    # Rollback: nada que invalidar
+    version = catalogo_cache.version
+    otro.reencauches_maximos = 9
+    db_session.add(otro)
+    await db_session.flush()
+    await db_session.rollback()
+    assert catalogo_cache.version == version
+
+
+@pytest.mark.asyncio
+async def test_endpoint_admin_catalogo_cache(client: AsyncClient, db_session: AsyncSession):
+    """GET /admin/catalogo-cache expone los aciertos y fallos de la caché global (solo superusuarios)."""
+    url = f"{settings.API_V1_STR}/admin/catalogo-cache"
+    _, headers = await create_user_and_get_token(client, db_session, "cache_normal")
+    assert (await client.get(url, headers=headers)).status_code == status.HTTP_403_FORBIDDEN
+
+    _, headers = await create_user_and_get_token(client, db_session, "cache_admin", rol="ADMIN", es_superusuario=True)
+    modelo = await _crear_modelo(db_session)
+    antes = (await client.get(url, headers=headers)).json()["modelos"]
+    await catalogo_cache.get_modelo(db_session, modelo.id)
+    await catalogo_cache.get_modelo(db_session, modelo.id)
+
+    response = await client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["modelos"]["misses"] == antes["misses"] + 1
+    assert data["modelos"]["hits"] == antes["hits"] + 1
+    assert {"version", "ttl_segundos", "fabricantes"} <= data.keys()
@@ -0,0 +1,69 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models.fabricante import FabricanteNeumatico
+from models.modelo import ModeloNeumatico
+from models.neumatico import Neumatico
+from schemas.common import EstadoNeumaticoEnum
+from tests.helpers import create_user_and_get_token
+
+INVENTARIO_PREFIX = f"{settings.API_V1_STR}/inventario"
+
+
+@pytest.mark.asyncio
+async def test_resumen_inventario_en_vivo_en_sqlite(client: AsyncClient, db_session: AsyncSession):
+    """Sin vista materializada (SQLite) el resumen se agrega en vivo con la misma forma."""
+    _, headers = await create_user_and_get_token(client, db_session, "inventario")
+    fabricante = FabricanteNeumatico(nombre=f"Fab Inventario {uuid.uuid4().hex[:6]}", activo=True)
+    db_session.add(fabricante)
+    await db_session.commit()
+    modelo = ModeloNeumatico(
+        nombre_modelo="ModeloInventario", medida="295/80R22.5", fabricante_id=fabricante.id,
+        profundidad_original_mm=18.0, presion_recomendada_psi=100.0,
+    )
+    db_session.add(modelo)
+    await db_session.commit()
+
+    def _neumatico(estado: EstadoNeumaticoEnum, costo: str, moneda: str = "PEN", km: int = 0) -> Neumatico:
+        return Neumatico(
+            numero_serie=f"INV-{uuid.uuid4().hex[:8]}", modelo_id=modelo.id, fecha_compra=date(2024, 1, 1),
+            costo_compra=Decimal(costo), moneda_compra=moneda, estado_actual=estado, kilometraje_acumulado=km,
+        )
+
+    db_session.add_all([
+        _neumatico(EstadoNeumaticoEnum.EN_STOCK, "500.00"),
+        _neumatico(EstadoNeumaticoEnum.EN_STOCK, "300.00", moneda="USD"),
+        _neumatico(EstadoNeumaticoEnum.INSTALADO, "450.00", km=1000),
+        _neumatico(EstadoNeumaticoEnum.INSTALADO, "450.00", km=3000),
+        _neumatico(EstadoNeumaticoEnum.DESECHADO, "999.00"),
+    ])
+    await db_session.commit()
+
+    response = await client.get(f"{INVENTARIO_PREFIX}/resumen", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    resumen = response.json()
+    assert resumen["materializado"] is False
+    assert resumen["calculado_en"] is not None and resumen["antiguedad_segundos"] >= 0
+    grupos = {item["estado_actual"]: item for item in resumen["items"] if item["modelo_id"] == str(modelo.id)}
+    assert set(grupos) == {"EN_STOCK", "INSTALADO"}
+    assert grupos["EN_STOCK"]["cantidad"] == 2
+    assert grupos["EN_STOCK"]["valor_total_pen"] == 500.0 and grupos["EN_STOCK"]["valor_total_usd"] == 300.0
+    assert grupos["EN_STOCK"]["km_promedio_por_vida"] is None
+    assert grupos["INSTALADO"]["km_promedio_por_vida"] == 2000.0
+    assert grupos["INSTALADO"]["fabricante"] == fabricante.nombre
+    assert isinstance(grupos["INSTALADO"]["antiguedad_promedio_dias"], int)
+
+    # El refresco bajo demanda es solo para administradores y en SQLite no hace nada
+    response = await client.post(f"{INVENTARIO_PREFIX}/resumen/refrescar", headers=headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    _, headers_admin = await create_user_and_get_token(client, db_session, "inventario_admin", rol="ADMIN", es_superusuario=True)
+    response = await client.post(f"{INVENTARIO_PREFIX}/resumen/refrescar", headers=headers_admin)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == {"refrescada": False, "motivo": "sin_vista_materializada", "duracion_segundos": 0.0}
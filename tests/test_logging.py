@@ -0,0 +1,56 @@
+import json
+import logging
+
+import pytest
+from httpx import AsyncClient
+
+from core.request_id import CABECERA_REQUEST_ID, RequestIdMiddleware, request_id_actual
+from main import app
+from utils.logging import FiltroLimite, JsonFormatter, RequestIdFilter
+
+
+@pytest.mark.asyncio
+async def test_request_id_en_respuesta(client: AsyncClient):
+    response = await client.get("/", headers={CABECERA_REQUEST_ID: "abc-123"})
+    assert response.headers[CABECERA_REQUEST_ID] == "abc-123"
+
+    # Sin cabecera se genera una nueva por petición
+    primera = (await client.get("/")).headers[CABECERA_REQUEST_ID]
+    segunda = (await client.get("/")).headers[CABECERA_REQUEST_ID]
+    assert primera and segunda and primera != segunda
+
+
+def test_request_id_es_el_middleware_mas_externo():
+    # Starlette antepone cada add_middleware: el primero de la lista envuelve a todos los demás
+    assert app.user_middleware[0].cls is RequestIdMiddleware
+
+
+def test_registro_json_con_request_id_y_muestreo():
+    registros = []
+
+    class _Captura(logging.Handler):
+        def emit(self, record):
+            registros.append(JsonFormatter().format(record))
+
+    logger = logging.getLogger("tests.logging.filas")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = _Captura()
+    handler.addFilter(RequestIdFilter())
+    logger.addHandler(handler)
+    logger.addFilter(FiltroLimite(cada=3))
+    token = request_id_actual.set("req-1")
+    try:
+        for i in range(7):
+            logger.debug("fila %d", i, extra={"vehiculo": i})
+    finally:
+        request_id_actual.reset(token)
+        logger.removeHandler(handler)
+        logger.filters.clear()
+
+    datos = [json.loads(r) for r in registros]
+    # 1 de cada 3 por línea de código; el siguiente que pasa indica cuántos se omitieron
+    assert [d["mensaje"] for d in datos] == ["fila 0", "fila 3", "fila 6"]
+    assert [d.get("suprimidos") for d in datos] == [None, 2, 2]
+    assert all(d["request_id"] == "req-1" and d["nivel"] == "DEBUG" for d in datos)
+    assert datos[1]["vehiculo"] == 3
@@ -0,0 +1,48 @@
+import re
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from tests.helpers import create_user_and_get_token
+
+VEHICULOS_PREFIX = f"{settings.API_V1_STR}/vehiculos"
+
+
+def _server_timing(valor: str) -> dict:
+    return {m.group(1): float(m.group(2)) for m in re.finditer(r"(\w+);dur=([\d.]+)", valor)}
+
+
+@pytest.mark.asyncio
+async def test_server_timing_reparte_db_handler_y_serializacion(client: AsyncClient, db_session: AsyncSession):
+    _, headers = await create_user_and_get_token(client, db_session, "metricas", es_superusuario=True)
+    response = await client.get(f"{VEHICULOS_PREFIX}/", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    tiempos = _server_timing(response.headers["server-timing"])
+    assert set(tiempos) == {"db", "handler", "serializacion", "total"}
+    # La petición consulta el usuario y los vehículos: hay tiempo de SQL medido
+    assert tiempos["db"] > 0
+    assert tiempos["db"] + tiempos["handler"] + tiempos["serializacion"] == pytest.approx(tiempos["total"], abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_endpoint_metrics_por_plantilla_de_ruta(client: AsyncClient):
+    await client.get("/")
+    await client.get(f"{VEHICULOS_PREFIX}/00000000-0000-0000-0000-000000000000")  # 401: sin token
+    await client.get("/no-existe")
+
+    response = await client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    texto = response.text
+    assert 'gesneu_http_requests_total{method="GET",route="/",status="200"}' in texto
+    # La URL concreta se agrupa en su plantilla; lo que no casa con ninguna ruta, en <sin_ruta>
+    assert f'route="{VEHICULOS_PREFIX}/{{vehiculo_id}}",status="401"' in texto
+    assert 'route="<sin_ruta>",status="404"' in texto
+    assert "gesneu_http_request_duration_seconds_bucket" in texto
+    assert "gesneu_http_requests_in_progress" in texto
+    # /metrics no se mide a sí mismo
+    assert 'route="/metrics"' not in texto
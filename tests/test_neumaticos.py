@@ -2,6 +2,7 @@
 import pytest
 import pytest_asyncio # Considerar si realmente se necesita para fixtures específicas de pytest-asyncio
 import uuid
+import json
 from datetime import date, datetime, timezone
 from typing import Dict, Any, Tuple, Optional
 from decimal import Decimal
@@ -27,6 +28,7 @@ from models.posicion_neumatico import PosicionNeumatico
 from models.motivo_desecho import MotivoDesecho
 from models.parametro_inventario import ParametroInventario
 from models.alerta import Alerta
+from models.alerta_outbox import AlertaOutbox
 
 # --- Schemas y Enums ---
 from schemas.common import ( # <--- Importar Enums desde schemas.common
@@ -46,7 +48,7 @@ from core.security import get_password_hash, create_access_token
 from core.config import settings
 
 # Helpers
-from tests.helpers import create_user_and_get_token, get_or_create_almacen_test
+from tests.helpers import create_user_and_get_token, get_or_create_almacen_test, procesar_outbox_alertas
 
 API_PREFIX = settings.API_V1_STR
 AUTH_PREFIX = f"{API_PREFIX}/auth"
@@ -453,6 +455,100 @@ async def test_leer_historial_neumatico_success(client: AsyncClient, db_session:
     assert evento2_id in ids_en_historial
     assert historial[0]["id"] == evento2_id 
 
+    # Paginado por cursor: una página por evento, más recientes primero
+    pagina1 = await client.get(url_historial, params={"limit": 1}, headers=headers)
+    assert pagina1.status_code == status.HTTP_200_OK
+    assert [e["id"] for e in pagina1.json()] == [evento2_id]
+    cursor = pagina1.headers["X-Next-Cursor"]
+    pagina2 = await client.get(url_historial, params={"limit": 1, "cursor": cursor}, headers=headers)
+    assert [e["id"] for e in pagina2.json()] == [evento1_id]
+    assert "X-Next-Cursor" not in pagina2.headers
+
+
+@pytest.mark.asyncio
+async def test_historial_filtros_etiquetas_y_lote(client: AsyncClient, db_session: AsyncSession):
+    """Historial con etiquetas resueltas, filtros de tipo y fecha, y la variante en lote."""
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+    url_eventos = f"{NEUMATICOS_PREFIX}/eventos"
+    url_historial = f"{NEUMATICOS_PREFIX}/{neumatico_id}/historial"
+    for payload in (
+        {"tipo_evento": "INSTALACION", "vehiculo_id": str(vehiculo_id), "posicion_id": str(posicion_id), "odometro_vehiculo_en_evento": 1000},
+        {"tipo_evento": "INSPECCION", "odometro_vehiculo_en_evento": 5000, "profundidad_remanente_mm": 15.0},
+        {"tipo_evento": "INSPECCION", "odometro_vehiculo_en_evento": 9000, "profundidad_remanente_mm": 13.0},
+    ):
+        response = await client.post(url_eventos, json={"neumatico_id": str(neumatico_id), "usuario_id": str(user_id), **payload}, headers=headers)
+        assert response.status_code == status.HTTP_201_CREATED, response.text
+
+    historial = (await client.get(url_historial, headers=headers)).json()
+    instalacion = next(e for e in historial if e["tipo_evento"] == "INSTALACION")
+    vehiculo = await db_session.get(Vehiculo, vehiculo_id)
+    posicion = await db_session.get(PosicionNeumatico, posicion_id)
+    usuario = await db_session.get(Usuario, user_id)
+    assert instalacion["numero_economico"] == vehiculo.numero_economico
+    assert instalacion["codigo_posicion"] == posicion.codigo_posicion
+    assert instalacion["usuario_registra"] == usuario.username
+
+    response = await client.get(url_historial, params={"tipo_evento": "INSPECCION"}, headers=headers)
+    assert [e["profundidad_remanente_mm"] for e in response.json()] == [13.0, 15.0]
+    mas_reciente = datetime.fromisoformat(historial[0]["timestamp_evento"])
+    response = await client.get(url_historial, params={"hasta": mas_reciente.isoformat()}, headers=headers)
+    assert [e["id"] for e in response.json()] == [e["id"] for e in historial[1:]]
+    response = await client.get(url_historial, params={"desde": mas_reciente.isoformat(), "hasta": mas_reciente.isoformat()}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = await client.get(f"{NEUMATICOS_PREFIX}/{uuid.uuid4()}/historial", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    sin_eventos = uuid.uuid4()
+    response = await client.post(f"{NEUMATICOS_PREFIX}/historial/lote", headers=headers, json={
+        "neumatico_ids": [str(neumatico_id), str(sin_eventos)], "limit_por_neumatico": 2,
+    })
+    assert response.status_code == status.HTTP_200_OK, response.text
+    lote = response.json()
+    assert lote[str(sin_eventos)] == []
+    assert [e["id"] for e in lote[str(neumatico_id)]] == [e["id"] for e in historial[:2]]
+    response = await client.post(f"{NEUMATICOS_PREFIX}/historial/lote", headers=headers, json={
+        "neumatico_ids": [str(uuid.uuid4()) for _ in range(501)],
+    })
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_inspeccion_actualiza_condicion_actual(client: AsyncClient, db_session: AsyncSession):
+    """INSPECCION mantiene las columnas desnormalizadas que lee GET /instalados."""
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+
+    url_eventos = f"{NEUMATICOS_PREFIX}/eventos"
+    resp = await client.post(url_eventos, json={
+        "neumatico_id": str(neumatico_id), "tipo_evento": TipoEventoNeumaticoEnum.INSTALACION.value,
+        "vehiculo_id": str(vehiculo_id), "posicion_id": str(posicion_id),
+        "odometro_vehiculo_en_evento": 1000, "usuario_id": str(user_id)
+    }, headers=headers)
+    assert resp.status_code == status.HTTP_201_CREATED
+    resp = await client.post(url_eventos, json={
+        "neumatico_id": str(neumatico_id), "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION.value,
+        "odometro_vehiculo_en_evento": 2000, "profundidad_remanente_mm": 12.5, "presion_psi": 98.0,
+        "usuario_id": str(user_id)
+    }, headers=headers)
+    assert resp.status_code == status.HTTP_201_CREATED, resp.text
+    # Una inspección sin presión conserva la última presión medida
+    resp = await client.post(url_eventos, json={
+        "neumatico_id": str(neumatico_id), "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION.value,
+        "odometro_vehiculo_en_evento": 3000, "profundidad_remanente_mm": 11.0, "usuario_id": str(user_id)
+    }, headers=headers)
+    assert resp.status_code == status.HTTP_201_CREATED, resp.text
+
+    neumatico = await db_session.get(Neumatico, neumatico_id, populate_existing=True)
+    assert float(neumatico.profundidad_actual_mm) == 11.0
+    assert float(neumatico.presion_actual_psi) == 98.0
+    assert neumatico.fecha_ultima_inspeccion is not None
+
+    response = await client.get(f"{NEUMATICOS_PREFIX}/instalados", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    item = next(i for i in response.json() if i["id"] == str(neumatico_id))
+    assert item["profundidad_actual_mm"] == 11.0
+    assert item["presion_actual_psi"] == 98.0
+    assert item["fecha_ultima_inspeccion"] is not None
+
 
 @pytest.mark.asyncio
 @pytest.mark.asyncio
@@ -850,6 +946,7 @@ async def test_evento_inspeccion_genera_alerta_profundidad_baja(client: AsyncCli
     response = await client.post(url_eventos, json=evento_inspeccion_payload, headers=headers)
     assert response.status_code == status.HTTP_201_CREATED, f"Insp Baja failed: {response.text}"
     await db_session.commit()
+    await procesar_outbox_alertas(db_session)
 
     stmt_alerta = select(Alerta).where(
         Alerta.tipo_alerta == TipoAlertaEnum.PROFUNDIDAD_BAJA, 
@@ -860,6 +957,41 @@ async def test_evento_inspeccion_genera_alerta_profundidad_baja(client: AsyncCli
     assert len(alertas) >= 1, "No se generó alerta PROFUNDIDAD_BAJA activa"
 
 
+@pytest.mark.asyncio
+async def test_evento_alertas_via_outbox_idempotente(client: AsyncClient, db_session: AsyncSession):
+    """El evento solo encola en el outbox; el worker crea las alertas una única vez."""
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+    neumatico = await db_session.get(Neumatico, neumatico_id); assert neumatico is not None
+    await set_profundidad_minima_param(db_session, neumatico.modelo_id, 5.0, user_id=user_id)
+
+    url_eventos = f"{NEUMATICOS_PREFIX}/eventos"
+    response = await client.post(url_eventos, json={
+        "neumatico_id": str(neumatico_id), "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION.value,
+        "profundidad_remanente_mm": 4.0, "usuario_id": str(user_id)
+    }, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    evento_id = uuid.UUID(response.json()["id"])
+    await db_session.commit()
+
+    stmt_alertas = select(func.count(Alerta.id)).where(
+        Alerta.tipo_alerta == TipoAlertaEnum.PROFUNDIDAD_BAJA, Alerta.neumatico_id == neumatico_id
+    )
+    assert (await db_session.exec(stmt_alertas)).one() == 0, "La alerta no debe crearse en la petición"
+    fila = (await db_session.exec(select(AlertaOutbox).where(AlertaOutbox.evento_id == evento_id))).one()
+    assert fila.procesado_en is None
+
+    totales = await procesar_outbox_alertas(db_session)
+    assert totales["procesadas"] >= 1 and totales["fallidas"] == 0
+    await db_session.refresh(fila)
+    assert fila.procesado_en is not None
+    assert (await db_session.exec(stmt_alertas)).one() == 1
+
+    # Un segundo drenaje no reprocesa filas ya confirmadas
+    totales = await procesar_outbox_alertas(db_session)
+    assert totales["tomadas"] == 0
+    assert (await db_session.exec(stmt_alertas)).one() == 1
+
+
 @pytest.mark.asyncio
 @pytest.mark.asyncio
 async def test_evento_inspeccion_no_genera_alerta_profundidad_ok(client: AsyncClient, db_session: AsyncSession):
@@ -895,6 +1027,7 @@ async def test_evento_inspeccion_no_genera_alerta_profundidad_ok(client: AsyncCl
     response = await client.post(url_eventos, json=evento_inspeccion_payload, headers=headers)
     assert response.status_code == status.HTTP_201_CREATED, f"Insp OK failed: {response.text}"
     await db_session.commit()
+    await procesar_outbox_alertas(db_session)
 
     stmt_count_after = select(func.count(Alerta.id)).where( # type: ignore
         Alerta.tipo_alerta == TipoAlertaEnum.PROFUNDIDAD_BAJA, 
@@ -939,6 +1072,7 @@ async def test_evento_inspeccion_no_genera_alerta_sin_profundidad(client: AsyncC
     response = await client.post(url_eventos, json=evento_inspeccion_payload, headers=headers)
     assert response.status_code == status.HTTP_201_CREATED, f"Insp sin prof failed: {response.text}"
     await db_session.commit()
+    await procesar_outbox_alertas(db_session)
 
     stmt_count_after = select(func.count(Alerta.id)).where( # type: ignore
         Alerta.tipo_alerta == TipoAlertaEnum.PROFUNDIDAD_BAJA, 
@@ -1007,6 +1141,7 @@ async def test_evento_reencauche_salida_genera_alerta_limite_reencauches(client:
     response = await client.post(url_eventos, json=evento_reencauche_salida_payload, headers=headers)
     assert response.status_code == status.HTTP_201_CREATED, f"Evento reencauche salida fallido: {response.text}"
     await db_session.commit()
+    await procesar_outbox_alertas(db_session)
     
     # Verificar que se creó una alerta por límite de reencauches
     stmt_count_after = select(func.count(Alerta.id)).where(
@@ -1036,3 +1171,176 @@ async def test_evento_reencauche_salida_genera_alerta_limite_reencauches(client:
     
     assert reencauches_realizados == 1
     assert reencauches_maximos == 1
+
+
+@pytest.mark.asyncio
+async def test_crear_eventos_batch_resultados_por_item(client: AsyncClient, db_session: AsyncSession):
+    """Un lote con eventos válidos e inválidos procesa los válidos e informa el error de cada fallido."""
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+
+    payload = {"eventos": [
+        {"neumatico_id": str(neumatico_id), "tipo_evento": TipoEventoNeumaticoEnum.INSTALACION.value,
+         "vehiculo_id": str(vehiculo_id), "posicion_id": str(posicion_id), "odometro_vehiculo_en_evento": 1000},
+        {"neumatico_id": str(neumatico_id), "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION.value,
+         "profundidad_remanente_mm": 12.0, "odometro_vehiculo_en_evento": 1500},
+        # Sin datos de inspección -> 422 solo para este evento
+        {"neumatico_id": str(neumatico_id), "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION.value},
+        # Neumático inexistente -> 404
+        {"neumatico_id": str(uuid.uuid4()), "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION.value,
+         "presion_psi": 100.0},
+        {"neumatico_id": str(neumatico_id), "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION.value,
+         "profundidad_remanente_mm": 11.5, "odometro_vehiculo_en_evento": 2000},
+    ]}
+    response = await client.post(f"{NEUMATICOS_PREFIX}/eventos/batch", json=payload, headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    data = response.json()
+    assert data["total"] == 5 and data["exitosos"] == 3 and data["fallidos"] == 2
+    codigos = [item["codigo_estado"] for item in data["resultados"]]
+    assert codigos == [201, 201, 422, 404, 201]
+    assert [item["indice"] for item in data["resultados"]] == list(range(5))
+
+    eventos = (await db_session.exec(select(EventoNeumatico).where(EventoNeumatico.neumatico_id == neumatico_id))).all()
+    assert len(eventos) == 3
+    neumatico = await db_session.get(Neumatico, neumatico_id)
+    assert neumatico.estado_actual == EstadoNeumaticoEnum.INSTALADO
+
+
+@pytest.mark.asyncio
+async def test_crear_eventos_batch_por_bloques(client: AsyncClient, db_session: AsyncSession):
+    """Con tamano_bloque los eventos se confirman por bloques y se mantiene el orden de resultados."""
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+    eventos = [{"neumatico_id": str(neumatico_id), "tipo_evento": TipoEventoNeumaticoEnum.INSTALACION.value,
+                "vehiculo_id": str(vehiculo_id), "posicion_id": str(posicion_id), "odometro_vehiculo_en_evento": 1000}]
+    eventos += [{"neumatico_id": str(neumatico_id), "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION.value,
+                 "presion_psi": 100.0 + i} for i in range(4)]
+
+    response = await client.post(
+        f"{NEUMATICOS_PREFIX}/eventos/batch", json={"eventos": eventos, "tamano_bloque": 2}, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK, response.text
+    data = response.json()
+    assert data["exitosos"] == 5 and data["fallidos"] == 0
+
+    # Un segundo intento de instalación choca con el estado ya confirmado
+    response = await client.post(f"{NEUMATICOS_PREFIX}/eventos/batch", json={"eventos": eventos[:1]}, headers=headers)
+    assert response.json()["resultados"][0]["codigo_estado"] == status.HTTP_409_CONFLICT
+
+
+@pytest.mark.asyncio
+async def test_crear_eventos_batch_con_varios_fallidos(client: AsyncClient, db_session: AsyncSession):
+    """Los eventos fallidos, seguidos o no, parten el bloque en tramos: se insertan todos los válidos con su outbox."""
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+    validos = [{"neumatico_id": str(neumatico_id), "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION.value,
+                "profundidad_remanente_mm": 15.0 - i} for i in range(3)]
+    # Sin datos de inspección -> 422 para cada uno
+    invalidos = [{"neumatico_id": str(neumatico_id), "tipo_evento": TipoEventoNeumaticoEnum.INSPECCION.value}
+                 for _ in range(4)]
+    eventos = [validos[0], *invalidos[:2], validos[1], *invalidos[2:], validos[2]]
+
+    response = await client.post(f"{NEUMATICOS_PREFIX}/eventos/batch", json={"eventos": eventos}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    data = response.json()
+    assert data["exitosos"] == 3 and data["fallidos"] == len(invalidos)
+    assert [item["exito"] for item in data["resultados"]] == [e in validos for e in eventos]
+
+    ids = [item["evento_id"] for item in data["resultados"] if item["exito"]]
+    db_eventos = (await db_session.exec(select(EventoNeumatico).where(EventoNeumatico.neumatico_id == neumatico_id))).all()
+    assert sorted(str(e.id) for e in db_eventos) == sorted(ids)
+    # Cada evento insertado en bloque deja su entrada en el outbox
+    outbox = (await db_session.exec(select(AlertaOutbox.evento_id).where(AlertaOutbox.neumatico_id == neumatico_id))).all()
+    assert sorted(str(e) for e in outbox) == sorted(ids)
+    neumatico = await db_session.get(Neumatico, neumatico_id)
+    await db_session.refresh(neumatico)
+    assert float(neumatico.profundidad_actual_mm) == 13.0
+
+
+@pytest.mark.asyncio
+async def test_importar_inspecciones_csv_streaming(client: AsyncClient, db_session: AsyncSession):
+    """La importación CSV aplica las filas válidas por número de serie e informa progreso por bloque."""
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+    neumatico = await db_session.get(Neumatico, neumatico_id)
+
+    csv_body = (
+        "numero_serie,profundidad_remanente_mm,presion_psi,notas\r\n"
+        f"{neumatico.numero_serie},12.5,,lectura 1\r\n"
+        "SERIE-INEXISTENTE,10,100,\r\n"
+        f"{neumatico.numero_serie},,,sin datos\r\n"
+        f"{neumatico.numero_serie},12.1,98,lectura 2\r\n"
+    )
+    response = await client.post(
+        f"{NEUMATICOS_PREFIX}/inspecciones/importar?tamano_bloque=2",
+        content=csv_body.encode(), headers={**headers, "Content-Type": "text/csv"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    registros = [json.loads(linea) for linea in response.text.splitlines()]
+    assert [r["bloque"] for r in registros[:-1]] == [1, 2]
+    assert registros[0]["errores"][0]["numero_serie"] == "SERIE-INEXISTENTE"
+    resumen = registros[-1]
+    assert resumen["completado"] is True
+    assert (resumen["filas"], resumen["exitosas"], resumen["fallidas"]) == (4, 2, 2)
+
+    stmt = select(EventoNeumatico).where(
+        EventoNeumatico.neumatico_id == neumatico_id,
+        EventoNeumatico.tipo_evento == TipoEventoNeumaticoEnum.INSPECCION
+    )
+    assert len((await db_session.exec(stmt)).all()) == 2
+
+
+@pytest.mark.asyncio
+async def test_importar_inspecciones_ndjson(client: AsyncClient, db_session: AsyncSession):
+    """Las líneas NDJSON mal formadas se reportan sin interrumpir la importación."""
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+    neumatico = await db_session.get(Neumatico, neumatico_id)
+    lineas = [
+        json.dumps({"numero_serie": neumatico.numero_serie, "presion_psi": 101.5}),
+        "{no es json",
+        json.dumps({"numero_serie": neumatico.numero_serie, "profundidad_remanente_mm": 11.0}),
+    ]
+    response = await client.post(
+        f"{NEUMATICOS_PREFIX}/inspecciones/importar", content="\n".join(lineas).encode(),
+        headers={**headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    resumen = json.loads(response.text.splitlines()[-1])
+    assert (resumen["exitosas"], resumen["fallidas"]) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_instalados_filtros_cursor_y_ndjson(client: AsyncClient, db_session: AsyncSession):
+    """GET /instalados: filtros en SQL, paginación por cursor y modo NDJSON en streaming."""
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+    base = await db_session.get(Neumatico, neumatico_id)
+    vehiculo = await db_session.get(Vehiculo, vehiculo_id)
+    modelo = await db_session.get(ModeloNeumatico, base.modelo_id)
+    otro_vehiculo = Vehiculo(numero_economico=f"ECO-INST-{uuid.uuid4().hex[:6]}", tipo_vehiculo_id=vehiculo.tipo_vehiculo_id)
+    db_session.add(otro_vehiculo)
+    await db_session.commit()
+    for i, (veh, profundidad) in enumerate(((vehiculo_id, 4.0), (vehiculo_id, 12.0), (otro_vehiculo.id, 8.0))):
+        db_session.add(Neumatico(
+            numero_serie=f"SERIE-INST-{i}-{uuid.uuid4().hex[:6]}", modelo_id=base.modelo_id, fecha_compra=date.today(),
+            costo_compra=Decimal("500.00"), estado_actual=EstadoNeumaticoEnum.INSTALADO,
+            ubicacion_actual_vehiculo_id=veh, profundidad_actual_mm=profundidad,
+        ))
+    await db_session.commit()
+    url = f"{NEUMATICOS_PREFIX}/instalados"
+
+    response = await client.get(url, params={"vehiculo_id": str(vehiculo_id), "profundidad_max": 10}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert [n["profundidad_actual_mm"] for n in response.json()] == [4.0]
+    response = await client.get(url, params={"fabricante_id": str(modelo.fabricante_id), "profundidad_min": 5}, headers=headers)
+    assert sorted(n["profundidad_actual_mm"] for n in response.json()) == [8.0, 12.0]
+
+    vistos = []
+    response = await client.get(url, params={"limit": 2}, headers=headers)
+    vistos += [n["id"] for n in response.json()]
+    response = await client.get(url, params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]}, headers=headers)
+    vistos += [n["id"] for n in response.json()]
+    assert len(vistos) == len(set(vistos)) == 3 and "X-Next-Cursor" not in response.headers
+
+    response = await client.get(url, params={"formato": "ndjson", "tipo_vehiculo_id": str(vehiculo.tipo_vehiculo_id)}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lineas = [json.loads(linea) for linea in response.text.splitlines()]
+    assert {linea["id"] for linea in lineas} == set(vistos)
+    response = await client.get(url, params={"formato": "ndjson", "limit": 2}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,128 @@
+import asyncio
+import socket
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from services.notification_dispatcher import AlertaNotificable, DespachadorNotificaciones, PoolSMTP
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class _Buzon:
+    """Handler de aiosmtpd que guarda los mensajes y puede rechazar los primeros con 451."""
+
+    def __init__(self, rechazos_temporales: int = 0):
+        self.mensajes = []
+        self.rechazos_temporales = rechazos_temporales
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.rechazos_temporales > 0:
+            self.rechazos_temporales -= 1
+            return "451 Pruebe más tarde"
+        self.mensajes.append((envelope.rcpt_tos, envelope.content.decode("utf8", errors="replace")))
+        return "250 OK"
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def servidor_smtp():
+    servidores = []
+
+    def _arrancar(handler):
+        controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=_puerto_libre())
+        controller.start()
+        servidores.append(controller)
+        return controller
+
+    yield _arrancar
+    for controller in servidores:
+        controller.stop()
+
+
+def _alerta(tipo: str = "PROFUNDIDAD_BAJA") -> AlertaNotificable:
+    return AlertaNotificable(
+        id=uuid.uuid4(), tipo_alerta=tipo, nivel_severidad="WARN",
+        descripcion=f"Descripción {tipo}", creado_en=datetime.now(timezone.utc),
+    )
+
+
+@pytest.mark.asyncio
+async def test_resumen_por_destinatario_con_conexion_reutilizada(servidor_smtp):
+    buzon = _Buzon()
+    controller = servidor_smtp(buzon)
+    despachador = DespachadorNotificaciones(
+        pool=PoolSMTP(controller.hostname, controller.port, tamano=1, timeout_segundos=5),
+        remitente="gesneu@example.com", max_cola=100,
+    )
+    try:
+        for tipo in ("PROFUNDIDAD_BAJA", "EDAD_MAXIMA", "KM_MAXIMO"):
+            despachador.encolar(["jefe@example.com", "taller@example.com"], _alerta(tipo))
+
+        resultado = await despachador.vaciar()
+        assert resultado == {"resumenes": 2, "enviados": 2}
+        # Un correo por destinatario con las tres alertas
+        assert sorted(rcpt for rcpt, _ in buzon.mensajes) == [["jefe@example.com"], ["taller@example.com"]]
+        for _, contenido in buzon.mensajes:
+            assert "3 alertas nuevas" in contenido
+            assert "EDAD_MAXIMA" in contenido and "KM_MAXIMO" in contenido
+
+        despachador.encolar(["jefe@example.com"], _alerta())
+        await despachador.vaciar()
+        metricas = despachador.metricas()
+        # Los tres correos viajan por la misma conexión persistente
+        assert metricas["conexiones_abiertas"] == 1
+        assert metricas["resumenes_enviados"] == 3 and metricas["alertas_enviadas"] == 7
+    finally:
+        despachador.pool.cerrar()
+
+
+@pytest.mark.asyncio
+async def test_reintento_con_backoff_y_cola_acotada(servidor_smtp):
+    buzon = _Buzon(rechazos_temporales=2)
+    controller = servidor_smtp(buzon)
+    despachador = DespachadorNotificaciones(
+        pool=PoolSMTP(controller.hostname, controller.port, tamano=1, timeout_segundos=5),
+        remitente="gesneu@example.com", max_cola=2, max_reintentos=3, reintento_base_segundos=0.01,
+    )
+    try:
+        assert despachador.encolar(["a@example.com", "b@example.com", "c@example.com"], _alerta()) == 2
+        assert despachador.metricas()["descartadas"] == 1
+
+        await despachador.vaciar()
+        metricas = despachador.metricas()
+        assert metricas["reintentos"] == 2
+        assert metricas["resumenes_enviados"] == 2 and metricas["fallidos"] == 0
+        assert len(buzon.mensajes) == 2
+    finally:
+        despachador.pool.cerrar()
+
+
+@pytest.mark.asyncio
+async def test_bucle_envia_tras_la_ventana_y_al_detener(servidor_smtp):
+    buzon = _Buzon()
+    controller = servidor_smtp(buzon)
+    despachador = DespachadorNotificaciones(
+        pool=PoolSMTP(controller.hostname, controller.port, tamano=2, timeout_segundos=5),
+        remitente="gesneu@example.com", ventana_segundos=0.05,
+    )
+    despachador.iniciar()
+    despachador.encolar(["jefe@example.com"], _alerta())
+    despachador.encolar(["jefe@example.com"], _alerta("EDAD_MAXIMA"))
+    for _ in range(100):
+        if buzon.mensajes:
+            break
+        await asyncio.sleep(0.02)
+    assert len(buzon.mensajes) == 1
+
+    # Lo encolado justo antes de parar también se envía
+    despachador.encolar(["jefe@example.com"], _alerta("KM_MAXIMO"))
+    await despachador.detener()
+    assert len(buzon.mensajes) == 2
+    assert despachador.metricas()["activo"] is False
@@ -74,12 +74,15 @@ async def test_send_alert_notification():
         mock_smtp_instance.quit.assert_called_once()
 
 @pytest.mark.asyncio
-async def test_enqueue_alert_notification():
-    """Prueba que el método enqueue_alert_notification agrega la tarea correctamente."""
-    # Configuración de prueba
-    bg_tasks_mock = MagicMock()
-    service = NotificationService(bg_tasks=bg_tasks_mock)
-    
+async def test_enqueue_alert_notification(monkeypatch):
+    """Prueba que enqueue_alert_notification encola la alerta en el despachador, una vez por destinatario."""
+    from services import notification_service
+    from services.notification_dispatcher import DespachadorNotificaciones
+
+    despachador = DespachadorNotificaciones(max_cola=10)
+    monkeypatch.setattr(notification_service, "despachador", despachador)
+    service = NotificationService(alert_recipients="admin@example.com, supervisor@example.com")
+
     # Datos de prueba
     alerta = AlertaRead(
         id='123e4567-e89b-12d3-a456-426614174000',
@@ -90,11 +93,10 @@ async def test_enqueue_alert_notification():
         creado_en='2023-01-01T00:00:00',
         actualizado_en='2023-01-01T00:00:00'
     )
-    
-    # Ejecutar el método a probar
-    service.enqueue_alert_notification(alerta)
-    
-    # Verificar que se agregó la tarea correctamente
-    assert bg_tasks_mock.add_task.called
-    assert bg_tasks_mock.add_task.call_args[0][0] == service.send_alert_notification
-    assert bg_tasks_mock.add_task.call_args[0][1] == alerta
+
+    # Ejecutar el método a probar: no hace E/S, solo encola
+    assert service.enqueue_alert_notification(alerta) == 2
+
+    metricas = despachador.metricas()
+    assert metricas["en_cola"] == 2
+    assert metricas["encoladas"] == 2
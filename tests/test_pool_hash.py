@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from core.pool_hash import PoolHash, PoolHashSaturadoError, pool_hash
+from tests.helpers import create_test_user
+
+AUTH_PREFIX = f"{settings.API_V1_STR}/auth"
+
+
+@pytest.mark.asyncio
+async def test_pool_hash_acotado_y_metricas():
+    pool = PoolHash(workers=1, max_pendientes=2)
+    liberar = threading.Event()
+    try:
+        # Dos operaciones llenan el pool (una en curso y otra en cola); la tercera se rechaza
+        tareas = [asyncio.create_task(pool.ejecutar(liberar.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        metricas = pool.metricas()
+        assert metricas["pendientes"] == 2
+        assert metricas["en_ejecucion"] == 1 and metricas["en_cola"] == 1
+        with pytest.raises(PoolHashSaturadoError):
+            await pool.ejecutar(liberar.wait, 5)
+
+        liberar.set()
+        assert await asyncio.gather(*tareas) == [True, True]
+        metricas = pool.metricas()
+        assert metricas["pendientes"] == 0
+        assert metricas["completadas"] == 2 and metricas["rechazadas"] == 1
+        assert metricas["max_pendientes_observado"] == 2
+    finally:
+        liberar.set()
+        pool.cerrar()
+
+
+@pytest.mark.asyncio
+async def test_login_con_pool_saturado_devuelve_503(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch
+):
+    await create_test_user(db_session, "hash_user", "hash_user@example.com", "secreto123")
+    form = {"username": "hash_user", "password": "secreto123"}
+
+    response = await client.post(f"{AUTH_PREFIX}/token", data=form)
+    assert response.status_code == status.HTTP_200_OK
+
+    monkeypatch.setattr(pool_hash, "max_pendientes", 0)
+    response = await client.post(f"{AUTH_PREFIX}/token", data=form)
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_crear_usuario_con_pool_saturado_devuelve_503(client: AsyncClient, monkeypatch):
+    """El alta de usuario hashea en el pool: saturado, 503 con Retry-After en vez de 500."""
+    monkeypatch.setattr(pool_hash, "max_pendientes", 0)
+    response = await client.post(f"{settings.API_V1_STR}/usuarios/", json={
+        "username": "hash_alta", "email": "hash_alta@example.com", "password": "secreto123",
+    })
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,60 @@
+import os
+import tempfile
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from core.pool_metrics import PoolMedido, instrumentar_engine
+from tests.helpers import create_user_and_get_token
+
+ADMIN_PREFIX = f"{settings.API_V1_STR}/admin"
+
+
+@pytest.mark.asyncio
+async def test_metricas_pool_checkouts_y_timeouts():
+    ruta = os.path.join(tempfile.mkdtemp(), "pool.db")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{ruta}", poolclass=PoolMedido, pool_size=1, max_overflow=0,
+        pool_timeout=0.2, pool_logging_name="test_pool",
+    )
+    metricas = instrumentar_engine(engine, "test_pool")
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            estado = metricas.instantanea()
+            assert estado["en_uso"] == 1 and estado["ociosas"] == 0
+
+            # Con la única conexión ocupada, la segunda petición agota el timeout
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect() as otra:
+                    await otra.execute(text("SELECT 1"))
+
+        estado = metricas.instantanea()
+        assert estado["checkouts"] == 1 and estado["checkins"] == 1
+        assert estado["en_uso"] == 0 and estado["ociosas"] == 1
+        assert estado["conexiones_abiertas"] == 1
+        assert estado["timeouts"] == 1
+        assert estado["espera_max_segundos"] >= 0.2
+
+        metricas.reiniciar()
+        assert metricas.instantanea()["timeouts"] == 0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_endpoint_pool_solo_superusuario(client: AsyncClient, db_session: AsyncSession):
+    _, headers = await create_user_and_get_token(client, db_session, "pool_op")
+    response = await client.get(f"{ADMIN_PREFIX}/pool", headers=headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    _, headers = await create_user_and_get_token(client, db_session, "pool_admin", rol="ADMIN", es_superusuario=True)
+    response = await client.get(f"{ADMIN_PREFIX}/pool", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert "principal" in response.json()
+    assert "espera_p95_segundos" in response.json()["principal"]
@@ -0,0 +1,84 @@
+import uuid
+
+import pytest
+from fastapi import Depends, FastAPI, status
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from core.consultas_sql import (
+    CABECERA_CONSULTAS, CABECERA_TIEMPO_DB, ConsultasSQLMiddleware, contar_consultas, presupuesto_consultas,
+)
+from models.usuario import Usuario
+from schemas.common import TipoEventoNeumaticoEnum
+from tests.helpers import setup_instalacion_prerequisites
+
+API = settings.API_V1_STR
+
+
+@pytest.mark.asyncio
+async def test_endpoints_calientes_dentro_de_presupuesto(client: AsyncClient, db_session: AsyncSession):
+    # El modo estricto (conftest) convierte en 500 cualquier exceso: basta con que respondan bien
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+
+    response = await client.post(f"{API}/neumaticos/eventos", headers=headers, json={
+        "neumatico_id": str(neumatico_id),
+        "tipo_evento": TipoEventoNeumaticoEnum.INSTALACION.value,
+        "vehiculo_id": str(vehiculo_id),
+        "posicion_id": str(posicion_id),
+        "odometro_vehiculo_en_evento": 1000,
+        "usuario_id": str(user_id),
+    })
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    assert int(response.headers[CABECERA_CONSULTAS]) > 0
+    assert float(response.headers[CABECERA_TIEMPO_DB]) >= 0
+
+    for url in (
+        f"{API}/neumaticos/{neumatico_id}/historial",
+        f"{API}/neumaticos/instalados",
+        f"{API}/vehiculos/",
+        f"{API}/vehiculos/{vehiculo_id}",
+        f"{API}/alertas/",
+        f"{API}/alertas/dashboard/resumen",
+    ):
+        response = await client.get(url, headers=headers)
+        assert response.status_code == status.HTTP_200_OK, (url, response.text)
+        assert CABECERA_CONSULTAS in response.headers
+
+
+@pytest.mark.asyncio
+async def test_exceso_de_presupuesto_devuelve_informe_en_modo_estricto():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    app = FastAPI()
+    app.add_middleware(ConsultasSQLMiddleware)
+
+    @app.get("/n-mas-uno", dependencies=[Depends(presupuesto_consultas(2))])
+    async def n_mas_uno():
+        async with engine.connect() as conn:
+            for _ in range(4):
+                await conn.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as cliente:
+            response = await cliente.get("/n-mas-uno")
+    finally:
+        await engine.dispose()
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    informe = response.json()
+    assert informe["presupuesto"] == 2
+    assert informe["consultas"] >= 4
+    assert {"veces": 4, "sentencia": "SELECT 1"} in informe["repetidas"]
+
+
+@pytest.mark.asyncio
+async def test_contar_consultas_detecta_sentencias_repetidas(db_session: AsyncSession):
+    with contar_consultas() as registro:
+        for _ in range(3):
+            await db_session.get(Usuario, uuid.uuid4())
+    assert registro.consultas == 3
+    assert registro.repetidas(3)[0]["veces"] == 3
+    assert registro.presupuesto_efectivo() is None
@@ -148,3 +148,24 @@ async def test_actualizar_proveedor_duplicado_nombre(client: AsyncClient, db_ses
     assert response_update.status_code == status.HTTP_200_OK
 
 # ===== FIN DE tests/test_proveedores.py =====
+
+
+@pytest.mark.asyncio
+async def test_listar_proveedores_filtra_busca_y_ordena_en_sql(client: AsyncClient, db_session: AsyncSession):
+    """Los inactivos no acortan la página: activo, búsqueda y orden se aplican antes de LIMIT."""
+    user_id, headers = await create_user_and_get_token(client, db_session, "list_prov", rol="ADMIN", es_superusuario=True)
+    sufijo = uuid.uuid4().hex[:6]
+    for nombre, activo in (("Zeta", True), ("Alfa", True), ("Beta", False), ("Gamma", False)):
+        db_session.add(Proveedor(nombre=f"{nombre} Filtro {sufijo}", activo=activo, tipo=TipoProveedorEnum.DISTRIBUIDOR))
+    await db_session.commit()
+    url_base = f"{PROVEEDORES_PREFIX}/"
+
+    response = await client.get(url_base, params={"activo": False, "limit": 2, "busqueda": f"filtro {sufijo}"}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert [p["nombre"] for p in response.json()] == [f"Beta Filtro {sufijo}", f"Gamma Filtro {sufijo}"]
+
+    response = await client.get(url_base, params={"busqueda": sufijo, "orden": "-nombre"}, headers=headers)
+    assert [p["nombre"].split()[0] for p in response.json()] == ["Zeta", "Gamma", "Beta", "Alfa"]
+
+    response = await client.get(url_base, params={"orden": "rfc"}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
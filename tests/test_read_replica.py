@@ -0,0 +1,89 @@
+import os
+import tempfile
+import uuid
+
+import pytest
+import pytest_asyncio
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import database
+from core.config import settings
+from core.escrituras_recientes import registro_escrituras
+from models.tipo_vehiculo import TipoVehiculo
+from models.vehiculo import Vehiculo
+from tests.helpers import create_user_and_get_token
+
+VEHICULOS_PREFIX = f"{settings.API_V1_STR}/vehiculos"
+
+
+@pytest_asyncio.fixture
+async def replica(monkeypatch):
+    """Segunda base SQLite que hace de réplica de lectura (vacía: sin replicación)."""
+    ruta = os.path.join(tempfile.mkdtemp(), "replica.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{ruta}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(database, "LecturaSessionFactory", factory)
+    registro_escrituras.limpiar()
+    yield factory
+    registro_escrituras.limpiar()
+    await engine.dispose()
+
+
+async def _crear_vehiculo(client: AsyncClient, db_session: AsyncSession, headers) -> str:
+    tipo = TipoVehiculo(nombre=f"Tipo réplica {uuid.uuid4().hex[:6]}", ejes_standard=2)
+    db_session.add(tipo)
+    await db_session.commit()
+    response = await client.post(f"{VEHICULOS_PREFIX}/", json={
+        "numero_economico": f"ECO-RPL-{uuid.uuid4().hex[:6]}", "tipo_vehiculo_id": str(tipo.id), "fecha_alta": "2024-01-01"
+    }, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_lecturas_van_a_la_replica_salvo_tras_escribir(client: AsyncClient, db_session: AsyncSession, replica):
+    _, headers = await create_user_and_get_token(client, db_session, "replica")
+    vehiculo_id = await _crear_vehiculo(client, db_session, headers)
+
+    # Read-your-writes: quien acaba de escribir lee de la primaria
+    response = await client.get(f"{VEHICULOS_PREFIX}/{vehiculo_id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    # Pasada la ventana, la lectura va a la réplica (que aún no tiene el vehículo)
+    registro_escrituras.limpiar()
+    response = await client.get(f"{VEHICULOS_PREFIX}/{vehiculo_id}", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async with replica() as sesion_replica:
+        sesion_replica.add(Vehiculo(numero_economico="ECO-SOLO-REPLICA", tipo_vehiculo_id=uuid.uuid4()))
+        await sesion_replica.commit()
+    response = await client.get(f"{VEHICULOS_PREFIX}/", headers=headers)
+    assert [v["numero_economico"] for v in response.json()] == ["ECO-SOLO-REPLICA"]
+
+    # El cliente puede forzar la primaria
+    response = await client.get(f"{VEHICULOS_PREFIX}/{vehiculo_id}", headers={**headers, "X-Leer-Primaria": "1"})
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_replica_caida_usa_la_primaria(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/no/existe/replica.db")
+    monkeypatch.setattr(database, "LecturaSessionFactory", sessionmaker(engine, class_=AsyncSession))
+    _, headers = await create_user_and_get_token(client, db_session, "replica_caida")
+    vehiculo_id = await _crear_vehiculo(client, db_session, headers)
+    registro_escrituras.limpiar()
+
+    response = await client.get(f"{VEHICULOS_PREFIX}/{vehiculo_id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    monkeypatch.setattr(settings, "DB_READ_FALLBACK_PRIMARIA", False)
+    with pytest.raises(Exception):
+        await client.get(f"{VEHICULOS_PREFIX}/{vehiculo_id}", headers=headers)
+    await engine.dispose()
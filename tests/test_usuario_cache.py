@@ -0,0 +1,56 @@
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models.usuario import Usuario
+from services.usuario_cache import UsuarioCache, usuario_cache
+from tests.helpers import create_test_user, create_user_and_get_token
+
+USUARIOS_PREFIX = f"{settings.API_V1_STR}/usuarios"
+
+
+@pytest.mark.asyncio
+async def test_usuario_cache_hits_y_ttl(db_session: AsyncSession):
+    usuario = await create_test_user(db_session, "cache_ttl", "cache_ttl@example.com", "testpassword")
+    cache = UsuarioCache(ttl_segundos=60, max_entradas=1)
+
+    primero = await cache.get_usuario(db_session, "cache_ttl")
+    segundo = await cache.get_usuario(db_session, "cache_ttl")
+    assert primero.id == segundo.id == usuario.id
+    # La copia servida desde la caché es un Usuario transitorio, sin el hash de la contraseña
+    assert isinstance(segundo, Usuario) and segundo is not primero and not segundo.hashed_password
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # LRU: con una sola entrada, otro usuario expulsa al primero
+    await create_test_user(db_session, "cache_ttl2", "cache_ttl2@example.com", "testpassword")
+    await cache.get_usuario(db_session, "cache_ttl2")
+    await cache.get_usuario(db_session, "cache_ttl")
+    assert cache.misses == 3
+
+    sin_cache = UsuarioCache(ttl_segundos=0, max_entradas=100)
+    await sin_cache.get_usuario(db_session, "cache_ttl")
+    assert sin_cache.stats()["entradas"] == 0
+
+
+@pytest.mark.asyncio
+async def test_usuario_cache_invalidado_al_actualizar_y_desactivar(client: AsyncClient, db_session: AsyncSession):
+    user_id, headers = await create_user_and_get_token(client, db_session, "cache_upd")
+    _, headers_admin = await create_user_and_get_token(client, db_session, "cache_adm", rol="ADMIN", es_superusuario=True)
+
+    response = await client.get(f"{USUARIOS_PREFIX}/me/", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    hits = usuario_cache.hits
+    response = await client.get(f"{USUARIOS_PREFIX}/me/", headers=headers)
+    assert usuario_cache.hits == hits + 1
+
+    response = await client.put(f"{USUARIOS_PREFIX}/{user_id}", json={"nombre_completo": "Nombre Nuevo"}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    response = await client.get(f"{USUARIOS_PREFIX}/me/", headers=headers)
+    assert response.json()["nombre_completo"] == "Nombre Nuevo"
+
+    response = await client.delete(f"{USUARIOS_PREFIX}/{user_id}", headers=headers_admin)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    response = await client.get(f"{USUARIOS_PREFIX}/me/", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -14,7 +14,7 @@ from models.usuario import Usuario
 from models.tipo_vehiculo import TipoVehiculo
 from models.vehiculo import Vehiculo
 from core.security import create_access_token, get_password_hash, verify_password # verify_password sí se usa aquí
-from tests.helpers import create_user_and_get_token, create_test_user # Importar create_test_user
+from tests.helpers import create_user_and_get_token, create_test_user, setup_instalacion_prerequisites
 
 # --- Importar settings y definir prefijos ---
 from core.config import settings
@@ -222,4 +222,97 @@ async def test_listar_vehiculos_con_filtro_activo(client: AsyncClient, db_sessio
     ids_inactivos = {v["id"] for v in response_get_inactivos.json()}
     assert vehiculo_activo_id not in ids_inactivos; assert vehiculo_inactivo_id in ids_inactivos
 
-# ===== FIN DE tests/test_vehiculos.py =====
\ No newline at end of file
+
+@pytest.mark.asyncio
+async def test_listado_y_detalle_proyectados_cumplen_vehiculo_read(client: AsyncClient, db_session: AsyncSession):
+    """El listado y el detalle (columnas proyectadas + orjson) devuelven exactamente los campos de VehiculoRead."""
+    from schemas.vehiculo import VehiculoRead
+    from utils.cursor import CABECERA_SIGUIENTE_CURSOR
+    user_id, headers = await create_user_and_get_token(client, db_session, "list_proy", rol="OPERADOR")
+    tipo_vehiculo = await get_or_create_tipo_vehiculo(db_session, nombre="Tipo Vehiculo Proyeccion")
+    url_base = f"{VEHICULOS_PREFIX}/"
+    for i in range(3):
+        datos = {"numero_economico": f"ECO-PROY-{i}-{uuid.uuid4().hex[:6]}", "tipo_vehiculo_id": str(tipo_vehiculo.id), "fecha_alta": "2023-01-01"}
+        assert (await client.post(url_base, json=datos, headers=headers)).status_code == status.HTTP_201_CREATED
+
+    primera = await client.get(url_base, params={"limit": 2}, headers=headers)
+    assert primera.status_code == status.HTTP_200_OK
+    assert primera.headers["content-type"] == "application/json"
+    assert len(primera.json()) == 2
+    segunda = await client.get(url_base, params={"limit": 2, "cursor": primera.headers[CABECERA_SIGUIENTE_CURSOR]}, headers=headers)
+    assert len(segunda.json()) == 1 and CABECERA_SIGUIENTE_CURSOR not in segunda.headers
+
+    item = primera.json()[0]
+    assert set(item) == set(VehiculoRead.model_fields)
+    VehiculoRead.model_validate(item)
+    detalle = await client.get(f"{VEHICULOS_PREFIX}/{item['id']}", headers=headers)
+    assert detalle.status_code == status.HTTP_200_OK
+    assert detalle.json() == item
+
+@pytest.mark.asyncio
+async def test_listar_vehiculos_filtros_busqueda_y_orden(client: AsyncClient, db_session: AsyncSession):
+    """tipo_vehiculo_id, marca, busqueda y orden se compilan a SQL (crud_vehiculo.listado)."""
+    user_id, headers = await create_user_and_get_token(client, db_session, "list_filtros", rol="OPERADOR")
+    tipo_a = await get_or_create_tipo_vehiculo(db_session, nombre="Tipo Filtros A")
+    tipo_b = TipoVehiculo(nombre="Tipo Filtros B", ejes_standard=2)
+    db_session.add(tipo_b); await db_session.commit(); await db_session.refresh(tipo_b)
+    url_base = f"{VEHICULOS_PREFIX}/"
+    sufijo = uuid.uuid4().hex[:6].upper()
+    for eco, tipo, marca in (("ECO-3", tipo_a, "Volvo"), ("ECO-1", tipo_a, "Kenworth"), ("ECO-2", tipo_b, "Volvo")):
+        datos = {"numero_economico": f"{eco}-{sufijo}", "tipo_vehiculo_id": str(tipo.id), "marca": marca}
+        assert (await client.post(url_base, json=datos, headers=headers)).status_code == status.HTTP_201_CREATED
+
+    response = await client.get(url_base, params={"tipo_vehiculo_id": str(tipo_a.id), "marca": "Volvo"}, headers=headers)
+    assert [v["numero_economico"] for v in response.json()] == [f"ECO-3-{sufijo}"]
+
+    response = await client.get(url_base, params={"busqueda": sufijo.lower(), "orden": "numero_economico"}, headers=headers)
+    assert [v["numero_economico"] for v in response.json()] == [f"ECO-{i}-{sufijo}" for i in (1, 2, 3)]
+
+    response = await client.get(url_base, params={"orden": "vin,notas"}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = await client.get(url_base, params={"orden": "marca", "cursor": "x"}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.asyncio
+async def test_layout_vehiculo_con_etag(client: AsyncClient, db_session: AsyncSession):
+    """GET /vehiculos/{id}/layout: ejes, posiciones y neumático montado; 304 con If-None-Match vigente."""
+    headers, neumatico_id, vehiculo_id, posicion_id, user_id = await setup_instalacion_prerequisites(client, db_session)
+    url = f"{VEHICULOS_PREFIX}/{vehiculo_id}/layout"
+
+    response = await client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    layout = response.json()
+    assert layout["vehiculo_id"] == str(vehiculo_id)
+    [eje] = layout["ejes"]
+    assert eje["numero_eje"] == 1 and eje["tipo_eje"] == "DIRECCION"
+    assert [(p["id"], p["neumatico"]) for p in eje["posiciones"]] == [(str(posicion_id), None)]
+    etag_vacio = response.headers["ETag"]
+
+    response = await client.post(f"{API_PREFIX}/neumaticos/eventos", headers=headers, json={
+        "neumatico_id": str(neumatico_id), "tipo_evento": "INSTALACION", "vehiculo_id": str(vehiculo_id),
+        "posicion_id": str(posicion_id), "odometro_vehiculo_en_evento": 1000, "usuario_id": str(user_id),
+    })
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    response = await client.get(url, headers={**headers, "If-None-Match": etag_vacio})
+    assert response.status_code == status.HTTP_200_OK
+    etag_montado = response.headers["ETag"]
+    assert etag_montado != etag_vacio
+    assert response.json()["ejes"][0]["posiciones"][0]["neumatico"]["id"] == str(neumatico_id)
+
+    response = await client.get(url, headers={**headers, "If-None-Match": f'W/{etag_montado}, "otro"'})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b"" and response.headers["ETag"] == etag_montado
+
+    response = await client.post(f"{API_PREFIX}/neumaticos/eventos", headers=headers, json={
+        "neumatico_id": str(neumatico_id), "tipo_evento": "INSPECCION", "odometro_vehiculo_en_evento": 5000,
+        "profundidad_remanente_mm": 11.5, "usuario_id": str(user_id),
+    })
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    response = await client.get(url, headers={**headers, "If-None-Match": etag_montado})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["ejes"][0]["posiciones"][0]["neumatico"]["profundidad_actual_mm"] == 11.5
+
+    response = await client.get(f"{VEHICULOS_PREFIX}/{uuid.uuid4()}/layout", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+# ===== FIN DE tests/test_vehiculos.py =====
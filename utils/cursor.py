@@ -0,0 +1,70 @@
+# utils/cursor.py
+"""
+Paginación por cursor (keyset) sobre el par (columna de orden, id).
+
+El cursor es opaco para el cliente: base64url de un JSON con el valor de la
+columna de orden y el id de la última fila de la página. La página siguiente se
+obtiene con una comparación de tuplas `(orden, id) < (valor, id)` que el índice
+compuesto resuelve sin recorrer las filas anteriores, de modo que la página N
+cuesta lo mismo que la primera (a diferencia de OFFSET).
+
+Los listados devuelven el cursor de la página siguiente en la cabecera
+`X-Next-Cursor` (ausente en la última página) para no cambiar el cuerpo de
+las respuestas existentes.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import tuple_
+
+CABECERA_SIGUIENTE_CURSOR = "X-Next-Cursor"
+
+T = TypeVar("T")
+
+
+class CursorInvalidoError(ValueError):
+    """El cursor recibido no es válido (manipulado o de otro listado)."""
+
+
+def codificar_cursor(valor: datetime, id_: uuid.UUID) -> str:
+    datos = json.dumps({"v": valor.isoformat(), "id": str(id_)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return datetime.fromisoformat(datos["v"]), uuid.UUID(datos["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorInvalidoError(f"Cursor inválido: {cursor}") from e
+
+
+def aplicar_cursor(stmt, columna_orden, columna_id, cursor: Optional[str], limit: int, descendente: bool = True):
+    """
+    Ordena `stmt` por (columna_orden, columna_id), aplica el cursor si lo hay
+    y pide una fila de más para saber si existe página siguiente.
+    """
+    if descendente:
+        stmt = stmt.order_by(columna_orden.desc(), columna_id.desc())
+    else:
+        stmt = stmt.order_by(columna_orden.asc(), columna_id.asc())
+    if cursor:
+        valor, id_ = decodificar_cursor(cursor)
+        clave = tuple_(columna_orden, columna_id)
+        stmt = stmt.where(clave < tuple_(valor, id_) if descendente else clave > tuple_(valor, id_))
+    return stmt.limit(limit + 1)
+
+
+def paginar(
+    filas: Sequence[T], limit: int, clave: Callable[[T], Tuple[datetime, uuid.UUID]]
+) -> Tuple[List[T], Optional[str]]:
+    """Recorta la fila de más de `aplicar_cursor` y calcula el cursor siguiente."""
+    filas = list(filas)
+    if len(filas) <= limit:
+        return filas, None
+    filas = filas[:limit]
+    return filas, codificar_cursor(*clave(filas[-1]))
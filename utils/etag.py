@@ -0,0 +1,37 @@
+# utils/etag.py
+"""
+GET condicional con ETag.
+
+El ETag se calcula a partir de la versión de los datos (marcas de tiempo,
+ids), nunca del cuerpo serializado: así una petición con `If-None-Match`
+vigente se responde con 304 sin construir ni serializar la respuesta.
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Response, status
+
+CABECERA_ETAG = "ETag"
+CABECERA_IF_NONE_MATCH = "If-None-Match"
+
+
+def calcular_etag(*partes: Any) -> str:
+    """ETag fuerte (entre comillas) a partir de las partes que identifican la versión."""
+    resumen = hashlib.blake2b("|".join(map(str, partes)).encode(), digest_size=12).hexdigest()
+    return f'"{resumen}"'
+
+
+def etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """True si `If-None-Match` incluye `etag` (comparación débil, RFC 9110 §13.1.2) o es `*`."""
+    if not if_none_match:
+        return False
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato == "*" or candidato.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def respuesta_no_modificada(etag: str) -> Response:
+    """304 sin cuerpo con el ETag vigente."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={CABECERA_ETAG: etag})
@@ -1,59 +1,220 @@
 # gesneu_api2/utils/logging.py
+"""
+Configuración central del logging de la aplicación.
+
+setup_logging() se llama una sola vez al arrancar (main.py y los procesos
+independientes) y configura el logger raíz:
+
+- Un QueueHandler encola cada registro ya formateado y un QueueListener, en su
+  propio hilo, hace la E/S (consola y fichero): el event loop nunca espera a
+  disco ni a stdout.
+- Los registros salen en JSON (LOG_FORMATO="json") o en texto, con la id de la
+  petición en curso (core/request_id.py).
+- LOG_NIVELES permite niveles por módulo, p.ej.
+  "sqlalchemy.engine=INFO,routers.vehiculos=DEBUG".
+
+Para los mensajes por fila de los listados, logger_limitado() devuelve un
+logger con límite de registros por segundo y/o muestreo (1 de cada N) por
+línea de código, de modo que un listado grande no inunde los logs.
+"""
+import atexit
+import json
 import logging
-import sys # Para StreamHandler a stdout
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
 from core.config import settings # Para obtener el nivel de log desde la configuración
+from core.request_id import request_id_actual
 
 # Nombre para el logger de la aplicación
 APP_LOGGER_NAME = settings.PROJECT_NAME # O un nombre específico como "gesneu_api_logger"
 
-def setup_logging(log_level_str: str = settings.LOG_LEVEL):
+FORMATO_TEXTO = "%(asctime)s - %(name)s - %(levelname)s - %(module)s:%(lineno)d - [%(request_id)s] %(message)s"
+
+# Atributos estándar de LogRecord; el resto son `extra` y se incluyen en el JSON
+_ATRIBUTOS_REGISTRO = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Añade `request_id` al registro; se evalúa en el contexto de quien registra."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_actual.get() or "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "modulo": record.module,
+            "linea": record.lineno,
+        }
+        for clave, valor in record.__dict__.items():
+            if clave not in _ATRIBUTOS_REGISTRO and not clave.startswith("_"):
+                datos[clave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            datos["excepcion"] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class _QueueHandlerPreformateado(logging.handlers.QueueHandler):
     """
-    Configura el logging básico para la aplicación.
-    Utiliza el nivel de log especificado en la configuración.
+    QueueHandler que resuelve el mensaje y la traza en el hilo que registra
+    (los argumentos pueden no ser seguros de compartir entre hilos), pero deja
+    el formato final (JSON o texto) al listener.
     """
-    # Convertir el string del nivel de log a un valor numérico de logging
-    numeric_log_level = getattr(logging, log_level_str.upper(), logging.INFO)
 
-    # Crear el directorio de logs si no existe
-    log_dir = Path("logs")
-    log_dir.mkdir(parents=True, exist_ok=True)
-    log_file_path = log_dir / "app.log"
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        mensaje = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = mensaje
+        record.args = None
+        record.exc_info = None
+        return record
 
-    # Configuración básica
-    # Se remueven los handlers por defecto para evitar duplicados si se llama múltiples veces
-    # o si otros módulos también configuran basicConfig.
-    # Es mejor configurar handlers directamente en el logger específico.
-    # logging.basicConfig(level=numeric_log_level, format=log_format) # Evitar basicConfig si se configuran loggers específicos
 
-    # Obtener el logger específico de la aplicación
-    logger_instance = logging.getLogger(APP_LOGGER_NAME)
-    logger_instance.setLevel(numeric_log_level) # Establecer el nivel para este logger
+def _parsear_niveles(niveles: str) -> Dict[str, int]:
+    resultado: Dict[str, int] = {}
+    for par in filter(None, (p.strip() for p in niveles.split(","))):
+        nombre, _, nivel = par.partition("=")
+        valor = logging.getLevelName(nivel.strip().upper())
+        if nombre.strip() and isinstance(valor, int):
+            resultado[nombre.strip()] = valor
+    return resultado
 
-    # Evitar añadir handlers múltiples veces si esta función se llama más de una vez
-    if not logger_instance.handlers:
-        # Formato del log
-        log_format = "%(asctime)s - %(name)s - %(levelname)s - %(module)s:%(lineno)d - %(message)s"
-        formatter = logging.Formatter(log_format)
 
-        # Handler para escribir a un archivo
-        file_handler = logging.FileHandler(log_file_path)
+def setup_logging(
+    log_level_str: str = settings.LOG_LEVEL,
+    formato: str = settings.LOG_FORMATO,
+    niveles: str = settings.LOG_NIVELES,
+    archivo: Optional[str] = settings.LOG_ARCHIVO,
+) -> logging.Logger:
+    """
+    Configura el logger raíz con la cola asíncrona (idempotente: una segunda
+    llamada sustituye la configuración anterior).
+    """
+    global _listener, _queue_handler
+    detener_logging()
+
+    formatter = JsonFormatter() if formato.lower() == "json" else logging.Formatter(FORMATO_TEXTO)
+    handlers: List[logging.Handler] = []
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    handlers.append(stream_handler)
+    if archivo:
+        # Crear el directorio de logs si no existe
+        Path(archivo).parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.FileHandler(archivo, encoding="utf-8")
         file_handler.setFormatter(formatter)
-        logger_instance.addHandler(file_handler)
-
-        # Handler para escribir a la consola (stdout)
-        stream_handler = logging.StreamHandler(sys.stdout)
-        stream_handler.setFormatter(formatter)
-        logger_instance.addHandler(stream_handler)
-    
-    return logger_instance
-
-# Crear y configurar la instancia del logger que será importada por otros módulos
-# Esta función setup_logging() se llamará una vez cuando este módulo se importe por primera vez.
-logger = setup_logging()
-
-# Opcionalmente, podrías querer configurar el logger raíz también,
-# pero para aplicaciones es mejor usar loggers nombrados.
-# Por ejemplo, para silenciar otros loggers (como uvicorn access) o cambiar su nivel:
-# logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
-# logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO) # Para ver queries SQL
+        handlers.append(file_handler)
+
+    cola: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _queue_handler = _QueueHandlerPreformateado(cola)
+    _queue_handler.addFilter(RequestIdFilter())
+    _listener = logging.handlers.QueueListener(cola, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    raiz = logging.getLogger()
+    raiz.setLevel(getattr(logging, log_level_str.upper(), logging.INFO))
+    raiz.addHandler(_queue_handler)
+    for nombre, nivel in _parsear_niveles(niveles).items():
+        logging.getLogger(nombre).setLevel(nivel)
+    return logging.getLogger(APP_LOGGER_NAME)
+
+
+def detener_logging() -> None:
+    """Vacía la cola y detiene el hilo del listener (al apagar la aplicación)."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(detener_logging)
+
+
+# --- Logs por fila: límite por segundo y muestreo ---
+class FiltroLimite(logging.Filter):
+    """
+    Deja pasar como mucho `por_segundo` registros por segundo (con ráfaga de
+    igual tamaño) y/o 1 de cada `cada`, por cada línea de código que registra.
+    El registro que pasa tras una supresión lleva `suprimidos` con el número
+    de registros descartados desde el anterior.
+    """
+
+    def __init__(self, por_segundo: Optional[float] = None, cada: Optional[int] = None):
+        super().__init__()
+        self.por_segundo = por_segundo
+        self.cada = cada
+        self._lock = threading.Lock()
+        # (pathname, lineno) -> [tokens, último instante, contador de muestreo, suprimidos]
+        self._estado: Dict[Tuple[str, int], List[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        clave = (record.pathname, record.lineno)
+        ahora = time.monotonic()
+        with self._lock:
+            estado = self._estado.get(clave)
+            if estado is None:
+                estado = self._estado[clave] = [float(self.por_segundo or 0), ahora, 0, 0]
+            pasa = True
+            if self.cada and self.cada > 1:
+                estado[2] += 1
+                pasa = estado[2] % self.cada == 1
+            if pasa and self.por_segundo:
+                estado[0] = min(self.por_segundo, estado[0] + (ahora - estado[1]) * self.por_segundo)
+                estado[1] = ahora
+                if estado[0] >= 1:
+                    estado[0] -= 1
+                else:
+                    pasa = False
+            if not pasa:
+                estado[3] += 1
+                return False
+            if estado[3]:
+                record.suprimidos = int(estado[3])
+                estado[3] = 0
+            return True
+
+
+def logger_limitado(
+    nombre: str, por_segundo: Optional[float] = settings.LOG_FILAS_POR_SEGUNDO, cada: Optional[int] = None
+) -> logging.Logger:
+    """
+    Logger hijo `<nombre>.filas` con FiltroLimite, para mensajes por fila.
+    Su nivel se hereda del módulo y se puede ajustar aparte con LOG_NIVELES.
+    """
+    logger_filas = logging.getLogger(f"{nombre}.filas")
+    if not any(isinstance(f, FiltroLimite) for f in logger_filas.filters):
+        logger_filas.addFilter(FiltroLimite(por_segundo=por_segundo, cada=cada))
+    return logger_filas
+
+
+# Logger de la aplicación usado por algunos routers (se configura con setup_logging)
+logger = logging.getLogger(APP_LOGGER_NAME)
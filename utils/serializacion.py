@@ -0,0 +1,60 @@
+# utils/serializacion.py
+"""
+Serialización rápida de listados y lecturas.
+
+En lugar de cargar entidades ORM y copiarlas campo a campo en diccionarios
+(que FastAPI vuelve a recorrer con jsonable_encoder), los endpoints calientes:
+
+1. Proyectan en el SELECT solo las columnas del schema de respuesta, con el
+   nombre del campo como etiqueta (`columnas_de_schema`): sin identity map ni
+   objetos ORM por fila.
+2. Devuelven las filas tal cual en una RespuestaORJSON, que las serializa en C
+   (UUID, datetime y date incluidos) sin pasar por jsonable_encoder.
+
+El `response_model` de la ruta se mantiene para la documentación OpenAPI;
+FastAPI no revalida las respuestas que ya son un objeto Response.
+"""
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _por_defecto(valor: Any) -> Any:
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"Tipo no serializable a JSON: {type(valor).__name__}")
+
+
+class RespuestaORJSON(JSONResponse):
+    """JSONResponse serializada con orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_por_defecto, option=orjson.OPT_NON_STR_KEYS)
+
+
+def columnas_de_schema(modelo: Type[Any], schema: Type[BaseModel], **expresiones: Any) -> List[Any]:
+    """
+    Columnas de `modelo` para los campos de `schema`, etiquetadas con el nombre
+    del campo. `expresiones` sustituye las de campos calculados o que no son
+    columna del modelo (p.ej. `rol=case(...)`).
+    """
+    columnas = []
+    for nombre in schema.model_fields:
+        if nombre in expresiones:
+            columnas.append(expresiones[nombre].label(nombre))
+        else:
+            columnas.append(getattr(modelo, nombre).label(nombre))
+    return columnas
+
+
+def lineas_ndjson(filas: Iterable[Dict[str, Any]]) -> bytes:
+    """Filas en JSON Lines (una por línea), para respuestas `application/x-ndjson` en streaming."""
+    return b"".join(orjson.dumps(fila, default=_por_defecto) + b"\n" for fila in filas)
+
+
+def filas_como_dicts(result) -> List[Dict[str, Any]]:
+    """Filas de un SELECT proyectado como diccionarios campo -> valor."""
+    return [dict(fila) for fila in result.mappings()]